@@ -0,0 +1,56 @@
+"""Benchmark del modo script de la CLI frente a un proceso por comando.
+
+Ejecuta un script de N comandos con 'run' (un solo proceso y un solo
+estado) y una muestra de los mismos comandos lanzando un proceso por
+cada uno, como haría un script de shell.
+
+Uso:
+    python benchmarks/bench_cli.py [num_luces] [num_comandos]
+"""
+
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+from mcp_home_simulator.cli import CLI, CommandSession
+
+
+def main() -> int:
+    num_lights = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    commands = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    names = [f"luz_{i:04d}" for i in range(num_lights)]
+    script = [f"lights {'on' if i % 2 == 0 else 'off'} {names[i % num_lights]}"
+              for i in range(commands)]
+    with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as f:
+        yaml.safe_dump({'lights': names}, f)
+    try:
+        start = time.perf_counter()
+        session = CommandSession(CLI(f.name))
+        session.run_script(script, out=io.StringIO())
+        in_process = time.perf_counter() - start
+
+        sample = script[:min(commands, 20)]
+        start = time.perf_counter()
+        for line in sample:
+            subprocess.run([sys.executable, '-m', 'mcp_home_simulator', '--config', f.name]
+                           + line.split(), check=True, stdout=subprocess.DEVNULL)
+        per_process = (time.perf_counter() - start) / len(sample)
+    finally:
+        os.unlink(f.name)
+
+    print(f"Luces: {num_lights}, comandos: {commands}")
+    print(f"run (un proceso):       {in_process:8.3f} s  ({in_process / commands * 1e6:8.1f} µs/comando)")
+    print(f"Un proceso por comando: {per_process * commands:8.3f} s  "
+          f"({per_process * 1e6:8.1f} µs/comando, estimado con {len(sample)})")
+    print(session.summary())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
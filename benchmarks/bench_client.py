@@ -0,0 +1,83 @@
+"""Benchmark del cliente en proceso frente al protocolo por stdio.
+
+Mide el coste por llamada de set_light_state + list_lights_on con
+HomeClient, con el servidor en el mismo proceso codificando JSON y con
+un servidor en un subproceso por tuberías.
+
+Uso:
+    python benchmarks/bench_client.py [num_luces] [num_llamadas]
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import yaml
+
+from mcp_home_simulator import HomeClient
+from mcp_home_simulator.mcp_stdio import MCPStdioServer
+
+
+def main() -> int:
+    num_lights = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    names = [f"luz_{i:04d}" for i in range(num_lights)]
+    with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as f:
+        yaml.safe_dump({'lights': names, 'server': {'reload_interval': 0}}, f)
+    try:
+        client = HomeClient(f.name)
+        start = time.perf_counter()
+        for i in range(calls):
+            client.call('set_light_state', name=names[i % num_lights], on=i % 2 == 0)
+            client.call('list_lights_on')
+        direct = time.perf_counter() - start
+
+        server = MCPStdioServer(f.name)
+        sink = io.StringIO()
+        with redirect_stdout(sink):
+            start = time.perf_counter()
+            for i in range(calls):
+                server.process_message(json.dumps({
+                    'type': 'call', 'id': 2 * i + 1, 'tool': 'set_light_state',
+                    'args': {'name': names[i % num_lights], 'on': i % 2 == 0}}))
+                server.process_message(json.dumps({
+                    'type': 'call', 'id': 2 * i + 2, 'tool': 'list_lights_on', 'args': {}}))
+            for line in sink.getvalue().splitlines():
+                json.loads(line)
+            in_process = time.perf_counter() - start
+
+        piped_calls = min(calls, 2000)
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'mcp_home_simulator', '--mcp=stdio', f'--config={f.name}'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        process.stdout.readline()
+        start = time.perf_counter()
+        for i in range(piped_calls):
+            for msg_id, tool, args in (
+                    (2 * i + 1, 'set_light_state', {'name': names[i % num_lights], 'on': True}),
+                    (2 * i + 2, 'list_lights_on', {})):
+                process.stdin.write(json.dumps(
+                    {'type': 'call', 'id': msg_id, 'tool': tool, 'args': args}) + '\n')
+                process.stdin.flush()
+                json.loads(process.stdout.readline())
+        piped = time.perf_counter() - start
+        process.stdin.close()
+        process.wait()
+    finally:
+        os.unlink(f.name)
+
+    print(f"Luces: {num_lights}, pares de llamadas: {calls} ({piped_calls} por tubería)")
+    print(f"HomeClient:            {direct / calls / 2 * 1e6:8.2f} µs/llamada")
+    print(f"Servidor en proceso:   {in_process / calls / 2 * 1e6:8.2f} µs/llamada")
+    print(f"Subproceso por stdio:  {piped / piped_calls / 2 * 1e6:8.2f} µs/llamada")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Benchmark de la carga de configuraciones con muchas luces.
+
+Genera archivos de 100k y 1M luces en YAML, JSON y JSON por líneas y mide
+el tiempo de Config() y el pico de memoria de Python (tracemalloc) en una
+segunda carga. YAML solo se mide hasta --yaml-max luces porque su lectura
+es mucho más lenta.
+
+Uso:
+    python benchmarks/bench_config.py [num_luces ...] [--yaml-max=N]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.loaders import dump_config
+
+
+def measure(path: str):
+    """Carga el archivo dos veces: una para el tiempo y otra para la memoria."""
+    start = time.perf_counter()
+    config = Config(path)
+    elapsed = time.perf_counter() - start
+    count = len(config.lights)
+    del config
+
+    tracemalloc.start()
+    Config(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main() -> int:
+    sizes = [int(arg) for arg in sys.argv[1:] if not arg.startswith('--')] \
+        or [100_000, 1_000_000]
+    yaml_max = 100_000
+    for arg in sys.argv[1:]:
+        if arg.startswith('--yaml-max='):
+            yaml_max = int(arg.split('=', 1)[1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            data = {'lights': [f"luz_{i:07d}" if i % 10 else
+                               {'name': f"luz_{i:07d}", 'watts': 60}
+                               for i in range(size)]}
+            for fmt, ext in (('yaml', 'yaml'), ('json', 'json'), ('ndjson', 'ndjson')):
+                if fmt == 'yaml' and size > yaml_max:
+                    continue
+                path = os.path.join(tmp, f"casa_{size}.{ext}")
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(dump_config(data, fmt))
+                file_mb = os.path.getsize(path) / 2**20
+                count, elapsed, peak = measure(path)
+                print(f"{fmt:>6} {count:>9} luces ({file_mb:6.1f} MB): "
+                      f"{elapsed:6.2f} s, {count / elapsed / 1000:7.1f} k luces/s, "
+                      f"pico {peak / 2**20:7.1f} MB")
+                os.unlink(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
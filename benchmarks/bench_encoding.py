@@ -0,0 +1,54 @@
+"""Benchmark de codificación JSON frente a MessagePack.
+
+Compara tamaño y rendimiento (codificar + decodificar) de respuestas
+get_all_states en casas de distinto tamaño. Si la extensión msgpack no
+está instalada se mide la implementación en Python puro.
+
+Uso:
+    python benchmarks/bench_encoding.py [iteraciones]
+"""
+
+import json
+import sys
+import time
+
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.encoding import MSGPACK_NATIVE, packb, unpackb
+from mcp_home_simulator.state import HomeState
+
+
+def measure(encode, decode, message, iterations):
+    """Devuelve (bytes por mensaje, mensajes por segundo)."""
+    encoded = encode(message)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        decode(encode(message))
+    elapsed = time.perf_counter() - start
+    return len(encoded), iterations / elapsed
+
+
+def main() -> int:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"MessagePack: {'extensión msgpack' if MSGPACK_NATIVE else 'Python puro'}")
+
+    for num_lights in (10, 1000, 10000):
+        names = [f"luz_{i:06d}" for i in range(num_lights)]
+        state = HomeState(Config.from_data({'lights': names}))
+        state.set_lights_state(names[::3], True)
+        message = {'type': 'result', 'id': 1, 'ok': True,
+                   'result': state.get_all_states()}
+
+        count = max(1, iterations * 1000 // num_lights)
+        json_size, json_rate = measure(
+            lambda m: json.dumps(m, ensure_ascii=False).encode('utf-8'),
+            json.loads, message, count)
+        pack_size, pack_rate = measure(packb, unpackb, message, count)
+
+        print(f"{num_lights:>6} luces | JSON {json_size:>8} B {json_rate:>9.0f} msg/s"
+              f" | MessagePack {pack_size:>8} B {pack_rate:>9.0f} msg/s"
+              f" | tamaño {pack_size / json_size:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
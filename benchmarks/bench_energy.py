@@ -0,0 +1,66 @@
+"""Benchmark de la simulación energética en configuraciones grandes.
+
+Simula un día con cambios de luces cada minuto y mide el coste de la
+integración y de los informes.
+
+Uso:
+    python benchmarks/bench_energy.py [num_luces] [num_plantas]
+"""
+
+import random
+import sys
+import time
+
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.state import HomeState
+
+
+def build_config(num_lights: int, floors: int) -> Config:
+    """Genera un edificio con plantas y zonas de 250 luces."""
+    lights = [{'name': f"luz_{i:06d}", 'watts': 5 + i % 60}
+              for i in range(num_lights)]
+    per_floor = num_lights // floors
+    groups = {}
+    for floor in range(floors):
+        members = [f"luz_{i:06d}"
+                   for i in range(floor * per_floor, (floor + 1) * per_floor)]
+        groups[f"planta{floor}"] = {
+            f"zona{zone}": members[zone * 250:(zone + 1) * 250]
+            for zone in range(len(members) // 250)
+        }
+    return Config.from_data({'lights': lights, 'groups': groups})
+
+
+def main() -> int:
+    num_lights = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    floors = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    config = build_config(num_lights, floors)
+    state = HomeState(config)
+    names = config.lights
+    rng = random.Random(7)
+    print(f"Luces: {num_lights}, grupos: {len(config.group_index)}")
+
+    start = time.perf_counter()
+    for minute in range(1440):
+        batch = rng.sample(names, 200)
+        state.set_lights_state(batch, minute % 2 == 0)
+        state.clock.advance(60)
+    elapsed = time.perf_counter() - start
+    print(f"Día simulado (1440 pasos, 200 cambios/paso): {elapsed * 1000:.0f} ms "
+          f"({elapsed / 1440 * 1e6:.0f} µs/paso)")
+
+    start = time.perf_counter()
+    report = state.energy.report()
+    print(f"Informe completo: {(time.perf_counter() - start) * 1000:.2f} ms, "
+          f"total {report['total_wh'] / 1000:.1f} kWh")
+
+    start = time.perf_counter()
+    report = state.energy.report(3600, 7200 * 6, step=900)
+    print(f"Informe con {len(report['intervals'])} intervalos: "
+          f"{(time.perf_counter() - start) * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
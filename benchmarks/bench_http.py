@@ -0,0 +1,103 @@
+"""Benchmark de la pasarela HTTP con un generador de carga local.
+
+Abre varias conexiones persistentes que encadenan peticiones (pipelining)
+contra la pasarela en el mismo bucle de eventos y mide las peticiones por
+segundo de: lecturas repetidas (caché de cuerpos), lecturas condicionales
+(304), escrituras por POST y el snapshot completo comprimido con gzip.
+
+Uso:
+    python benchmarks/bench_http.py [num_luces] [num_peticiones] [conexiones] [profundidad]
+"""
+
+import asyncio
+import json
+import sys
+import time
+
+from mcp_home_simulator import HomeClient
+from mcp_home_simulator.gateway import HTTPGateway
+
+
+def build(method: str, target: str, body=None, headers=()) -> bytes:
+    """Construye los bytes de una petición."""
+    lines = [f"{method} {target} HTTP/1.1", "Host: bench"]
+    lines += [f"{name}: {value}" for name, value in headers]
+    payload = b''
+    if body is not None:
+        payload = json.dumps(body).encode('utf-8')
+        lines.append(f"Content-Length: {len(payload)}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """Lee una respuesta y devuelve su estado."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line[:15].lower() == b'content-length:':
+            length = int(line[15:])
+    if length and not head.startswith(b'HTTP/1.1 304'):
+        await reader.readexactly(length)
+    return int(head[9:12])
+
+
+async def load(port: int, requests: list, connections: int, depth: int) -> float:
+    """Envía las peticiones repartidas entre las conexiones y devuelve los segundos."""
+    async def worker(chunk):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for i in range(0, len(chunk), depth):
+            batch = chunk[i:i + depth]
+            writer.write(b''.join(batch))
+            for _ in batch:
+                if await read_response(reader) >= 400:
+                    raise RuntimeError("Respuesta de error")
+        writer.close()
+
+    chunks = [requests[i::connections] for i in range(connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(chunk) for chunk in chunks))
+    return time.perf_counter() - start
+
+
+async def run(num_lights: int, total: int, connections: int, depth: int) -> None:
+    names = [f"luz_{i:06d}" for i in range(num_lights)]
+    client = HomeClient.from_data({'lights': names})
+    gateway = await HTTPGateway(client, port=0).start()
+
+    etag_request = build('GET', '/tools/list_lights_on')
+    reader, writer = await asyncio.open_connection('127.0.0.1', gateway.port)
+    writer.write(etag_request)
+    head = await reader.readuntil(b'\r\n\r\n')
+    etag = next(line.split(b': ', 1)[1].decode() for line in head.split(b'\r\n')
+                if line.lower().startswith(b'etag:'))
+    writer.close()
+
+    scenarios = [
+        ('GET list_lights_on', [etag_request] * total),
+        ('GET condicional (304)', [build('GET', '/tools/list_lights_on',
+                                         headers=[('If-None-Match', etag)])] * total),
+        ('POST set_light_state', [build('POST', '/tools/set_light_state',
+                                        {'name': names[i % num_lights], 'on': i % 2 == 0})
+                                  for i in range(total)]),
+        ('GET get_all_states gzip', [build('GET', '/tools/get_all_states',
+                                           headers=[('Accept-Encoding', 'gzip')])] * (total // 10)),
+    ]
+    print(f"Luces: {num_lights}, conexiones: {connections}, profundidad: {depth}")
+    for label, requests in scenarios:
+        elapsed = await load(gateway.port, requests, connections, depth)
+        print(f"{label:26s} {len(requests) / elapsed:10.0f} peticiones/s")
+    print(f"Métricas: {gateway.stats()}")
+    await gateway.close()
+
+
+def main() -> int:
+    num_lights = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    connections = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    depth = int(sys.argv[4]) if len(sys.argv) > 4 else 16
+    asyncio.run(run(num_lights, total, connections, depth))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
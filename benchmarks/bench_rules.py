@@ -0,0 +1,88 @@
+"""Benchmark del motor de reglas incremental.
+
+Genera N reglas sobre M luces y aplica un flujo de mutaciones aleatorias,
+comparando el coste con y sin motor de reglas.
+
+Uso:
+    python benchmarks/bench_rules.py [num_reglas] [num_luces] [mutaciones]
+"""
+
+import random
+import sys
+import time
+
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.state import HomeState
+
+
+def build_config(num_rules: int, num_lights: int, with_rules: bool) -> Config:
+    """
+    Genera una configuración con reglas que dependen de una o dos luces.
+
+    Las condiciones leen la primera mitad de las luces y las acciones
+    escriben en la segunda, de modo que se mide la evaluación incremental
+    sin cascadas (que se prueban en tests/test_rules.py).
+    """
+    rng = random.Random(1234)
+    lights = [f"luz_{i:05d}" for i in range(num_lights)]
+    inputs, outputs = lights[:num_lights // 2], lights[num_lights // 2:]
+    rules = []
+    if with_rules:
+        for i in range(num_rules):
+            a, b = rng.sample(inputs, 2)
+            target = rng.choice(outputs)
+            when = {'lights': {a: True}}
+            if i % 3 == 0:
+                when['lights'][b] = False
+            if i % 10 == 0:
+                when['presence'] = False
+            rules.append({
+                'name': f"regla_{i}",
+                'when': when,
+                'then': {'lights': {target: bool(i % 2)}},
+            })
+    return Config.from_data({'lights': lights, 'rules': rules})
+
+
+def run(state: HomeState, lights, mutations: int) -> float:
+    """Aplica mutaciones aleatorias y devuelve el tiempo total en segundos."""
+    rng = random.Random(42)
+    start = time.perf_counter()
+    for i in range(mutations):
+        if i % 50 == 0:
+            state.set_presence(['Carlos'] if i % 100 else [])
+        else:
+            state.set_light_state(rng.choice(lights), rng.random() < 0.5)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    num_rules = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    num_lights = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    mutations = int(sys.argv[3]) if len(sys.argv) > 3 else 100000
+
+    baseline_config = build_config(num_rules, num_lights, with_rules=False)
+    baseline = run(HomeState(baseline_config), baseline_config.lights, mutations)
+
+    start = time.perf_counter()
+    config = build_config(num_rules, num_lights, with_rules=True)
+    state = HomeState(config)
+    setup = time.perf_counter() - start
+    elapsed = run(state, config.lights, mutations)
+
+    stats = state.rules.stats
+    print(f"Reglas: {num_rules}, luces: {num_lights}, mutaciones: {mutations}")
+    print(f"Compilación + indexado: {setup * 1000:.1f} ms")
+    print(f"Sin reglas: {mutations / baseline:,.0f} mutaciones/s")
+    print(f"Con reglas: {mutations / elapsed:,.0f} mutaciones/s "
+          f"({elapsed / mutations * 1e6:.1f} µs/mutación)")
+    print(f"Evaluaciones por mutación: {stats['evaluations'] / max(stats['mutations'], 1):.2f} "
+          f"(escaneo completo: {num_rules})")
+    print(f"Disparos: {stats['fires']}, ciclos suprimidos: {stats['cycles_suppressed']}, "
+          f"tormentas suprimidas: {stats['storms_suppressed']}, "
+          f"cascadas truncadas: {stats['cascades_truncated']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Benchmark de activación de escenas sobre configuraciones grandes.
+
+Uso:
+    python benchmarks/bench_scenes.py [num_luces]
+"""
+
+import sys
+import time
+
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.state import HomeState
+
+
+def build_config(num_lights: int) -> Config:
+    """Genera una configuración con dos escenas que cubren todas las luces."""
+    lights = [f"luz_{i:06d}" for i in range(num_lights)]
+    return Config.from_data({
+        'lights': lights,
+        'scenes': {
+            'todo': {'lights': {'*': True}, 'alarm': False},
+            'noche': {'lights': {'*': False, 'luz_0000*': True}, 'alarm': True},
+        },
+    })
+
+
+def main() -> int:
+    num_lights = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = 50
+
+    start = time.perf_counter()
+    config = build_config(num_lights)
+    compile_ms = (time.perf_counter() - start) * 1000
+    state = HomeState(config)
+
+    timings = []
+    for _ in range(repeat):
+        for name in ('todo', 'noche'):
+            start = time.perf_counter()
+            state.activate_scene(name)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print(f"Luces: {num_lights}")
+    print(f"Compilación de config + escenas: {compile_ms:.2f} ms")
+    print(f"Activación (cambio completo): mediana {timings[len(timings) // 2]:.3f} ms, "
+          f"p95 {timings[int(len(timings) * 0.95)]:.3f} ms, máx {timings[-1]:.3f} ms")
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        state.activate_scene('noche')
+    noop_ms = (time.perf_counter() - start) * 1000 / repeat
+    print(f"Activación sin cambios: {noop_ms:.3f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
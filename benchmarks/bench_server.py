@@ -0,0 +1,57 @@
+"""Benchmark del servidor MCP con un agente que consulta el estado en bucle.
+
+Mide el coste por llamada de get_all_states con y sin mutaciones entre
+consultas (con el estado estable, la respuesta sale de la caché).
+
+Uso:
+    python benchmarks/bench_server.py [num_luces] [num_llamadas]
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import yaml
+
+from mcp_home_simulator.mcp_stdio import MCPStdioServer
+
+
+def main() -> int:
+    num_lights = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    names = [f"luz_{i:06d}" for i in range(num_lights)]
+    with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as f:
+        yaml.safe_dump({'lights': names}, f)
+    try:
+        server = MCPStdioServer(f.name)
+    finally:
+        os.unlink(f.name)
+
+    message = {'type': 'call', 'id': 1, 'tool': 'get_all_states', 'args': {}}
+    sink = io.StringIO()
+
+    with redirect_stdout(sink):
+        start = time.perf_counter()
+        for i in range(calls):
+            server.handle_call(dict(message, id=i + 1))
+        stable = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(calls):
+            server.state.set_light_state(names[i % len(names)], i % 2 == 0)
+            server.handle_call(dict(message, id=i + 1))
+        changing = time.perf_counter() - start
+
+    print(f"Luces: {len(names)}, llamadas: {calls}")
+    print(f"Estado estable: {stable / calls * 1e6:.1f} µs/llamada")
+    print(f"Mutación entre llamadas: {changing / calls * 1e6:.1f} µs/llamada")
+    print(f"Caché: {server.responses.stats()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Benchmark del servidor stdio con procesos lectores en memoria compartida.
+
+Mide el camino servido completo (process_message → cola → respuesta
+escrita) de un flujo de list_lights_on con una escritura cada
+`cada_escritura` llamadas, sin procesos lectores (0) y con 1 a N. Cada
+lectura reenviada paga dos saltos entre procesos (petición y respuesta),
+y las lecturas que llegan con escrituras pendientes se encolan detrás de
+ellas; la columna 'reenviadas' indica cuántas se sirvieron desde los
+procesos. Solo escala con varios núcleos disponibles.
+
+Uso:
+    python benchmarks/bench_shared.py [num_luces] [max_procesos] [llamadas] [cada_escritura]
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import yaml
+
+from mcp_home_simulator.mcp_stdio import MCPStdioServer
+
+
+def run(config_path, names, workers, calls, write_every):
+    """Sirve `calls` mensajes y devuelve (llamadas/s, lecturas reenviadas)."""
+    server = MCPStdioServer(config_path, workers=workers)
+    read = json.dumps({'type': 'call', 'id': 0, 'tool': 'list_lights_on', 'args': {}})
+    messages = [
+        json.dumps({'type': 'call', 'id': i, 'tool': 'set_light_state',
+                    'args': {'name': names[i % len(names)], 'on': i % 2 == 0}})
+        if write_every and i % write_every == 0 else read.replace('"id": 0', f'"id": {i}')
+        for i in range(1, calls + 1)
+    ]
+    sink = io.StringIO()
+    with redirect_stdout(sink):
+        server.start_pipeline()
+        start = time.perf_counter()
+        for message in messages:
+            server.process_message(message)
+        forwarded = server.readers.forwarded if server.readers is not None else 0
+        # stop_pipeline espera a que se escriban todas las respuestas
+        server.stop_pipeline()
+        elapsed = time.perf_counter() - start
+    assert sink.getvalue().count('\n') == calls
+    return calls / elapsed, forwarded
+
+
+def main() -> int:
+    num_lights = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    calls = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+    write_every = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+
+    names = [f"luz_{i:06d}" for i in range(num_lights)]
+    with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as f:
+        yaml.safe_dump({'lights': names}, f)
+    try:
+        print(f"Luces: {num_lights}, llamadas: {calls}, una escritura cada "
+              f"{write_every}, núcleos: {os.cpu_count()}")
+        base = None
+        for workers in range(0, max_workers + 1):
+            throughput, forwarded = run(f.name, names, workers, calls, write_every)
+            base = base or throughput
+            print(f"{workers:2d} procesos: {throughput:10.0f} llamadas/s "
+                  f"(x{throughput / base:.2f}), {forwarded} lecturas reenviadas")
+    finally:
+        os.unlink(f.name)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Benchmark del registro de cambios con historiales largos.
+
+Registra millones de cambios y mide el coste de get_state_at() en
+instantes al principio, en medio y al final del historial, para comprobar
+que no depende de la longitud total.
+
+Uso:
+    python benchmarks/bench_timeseries.py [num_luces] [num_pasos]
+"""
+
+import random
+import sys
+import time
+
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.state import HomeState
+
+
+def main() -> int:
+    num_lights = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    names = [f"luz_{i:06d}" for i in range(num_lights)]
+    state = HomeState(Config.from_data({
+        'lights': names, 'energy': {'enabled': False}}))
+    rng = random.Random(7)
+
+    start = time.perf_counter()
+    for step in range(steps):
+        state.set_lights_state(rng.sample(names, 50), step % 2 == 0)
+        state.clock.advance(1)
+    elapsed = time.perf_counter() - start
+
+    log = state.changes
+    stats = log.stats()
+    print(f"Cambios: {stats['rows']}, chunks: {stats['chunks']}, "
+          f"checkpoints: {stats['checkpoints']}")
+    print(f"Registro: {elapsed * 1000:.0f} ms "
+          f"({elapsed / stats['rows'] * 1e9:.0f} ns/cambio)")
+    print(f"Comprimido: {stats['compressed_bytes'] / 1024:.0f} KiB "
+          f"(crudo {stats['raw_bytes'] / 1024:.0f} KiB)")
+
+    for label, when in (('inicio', steps * 0.01), ('mitad', steps * 0.5),
+                        ('final', steps * 0.99)):
+        start = time.perf_counter()
+        for _ in range(20):
+            log.get_state_at(when)
+        per_query = (time.perf_counter() - start) / 20
+        print(f"get_state_at ({label}): {per_query * 1000:.2f} ms")
+
+    start = time.perf_counter()
+    result = log.get_changes(steps * 0.5, steps * 0.5 + 10,
+                             entity_filter='light:luz_0000*')
+    print(f"get_changes (10 s, filtrado): "
+          f"{(time.perf_counter() - start) * 1000:.2f} ms, "
+          f"{len(result['changes'])} cambios")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
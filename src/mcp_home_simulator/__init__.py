@@ -1,3 +1,7 @@
 """MCP Home Simulator - Simulador de domótica con soporte MCP y CLI."""
 
 __version__ = "0.1.0"
+
+from .client import AsyncHomeClient, HomeClient, ToolError  # noqa: E402
+
+__all__ = ['AsyncHomeClient', 'HomeClient', 'ToolError', '__version__']
@@ -4,7 +4,7 @@ import sys
 import argparse
 from typing import Optional, List
 from .cli import run_cli
-from .mcp_stdio import start_mcp_server
+from .mcp_stdio import FRAMINGS, PROTOCOLS, start_mcp_server
 
 
 def main(argv: Optional[List[str]] = None) -> int:
@@ -26,15 +26,50 @@ def main(argv: Optional[List[str]] = None) -> int:
     if '--mcp' in argv or '--mcp=stdio' in argv:
         # Modo MCP stdio
         config_path = 'config.yaml'
+        protocol = 'simple'
+        framing = 'line'
+        workers = '0'
+        record = None
 
-        # Extraer config si está especificado
+        # Extraer config, protocolo, framing, procesos lectores y grabación si están especificados
         for i, arg in enumerate(argv):
             if arg.startswith('--config='):
                 config_path = arg.split('=', 1)[1]
             elif arg == '--config' and i + 1 < len(argv):
                 config_path = argv[i + 1]
+            elif arg.startswith('--protocol='):
+                protocol = arg.split('=', 1)[1]
+            elif arg == '--protocol' and i + 1 < len(argv):
+                protocol = argv[i + 1]
+            elif arg.startswith('--framing='):
+                framing = arg.split('=', 1)[1]
+            elif arg == '--framing' and i + 1 < len(argv):
+                framing = argv[i + 1]
+            elif arg.startswith('--workers='):
+                workers = arg.split('=', 1)[1]
+            elif arg == '--workers' and i + 1 < len(argv):
+                workers = argv[i + 1]
+            elif arg.startswith('--record='):
+                record = arg.split('=', 1)[1]
+            elif arg == '--record' and i + 1 < len(argv):
+                record = argv[i + 1]
 
-        start_mcp_server(config_path)
+        if protocol not in PROTOCOLS:
+            print(f"❌ Error: Protocolo desconocido '{protocol}' "
+                  f"(opciones: {', '.join(PROTOCOLS)})", file=sys.stderr)
+            return 2
+
+        if framing not in FRAMINGS:
+            print(f"❌ Error: Framing desconocido '{framing}' "
+                  f"(opciones: {', '.join(FRAMINGS)})", file=sys.stderr)
+            return 2
+
+        if not workers.isdigit():
+            print(f"❌ Error: Número de procesos lectores inválido '{workers}'",
+                  file=sys.stderr)
+            return 2
+
+        start_mcp_server(config_path, protocol, framing, int(workers), record)
         return 0
     else:
         # Modo CLI
@@ -0,0 +1,210 @@
+"""Cachés del servidor MCP."""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Callable, Hashable, Tuple, Union
+
+
+# Capacidad por defecto de la caché de idempotencia (respuestas)
+DEFAULT_IDEMPOTENCY_CAPACITY = 1024
+
+# Tiempo de vida por defecto de una respuesta cacheada (segundos reales)
+DEFAULT_IDEMPOTENCY_TTL = 300.0
+
+# Número máximo de respuestas de solo lectura retenidas por versión del estado
+DEFAULT_RESPONSE_CACHE_CAPACITY = 1024
+
+
+class IdempotencyCache:
+    """
+    Caché LRU acotada con TTL de respuestas ya enviadas.
+
+    Permite que un cliente que reintenta una llamada (por ejemplo tras un
+    timeout) reciba la respuesta original sin que la tool se ejecute de
+    nuevo. Las entradas se ordenan por uso reciente: al superar la
+    capacidad se descarta la menos usada, y las que superan el TTL se
+    descartan al consultarlas.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_IDEMPOTENCY_CAPACITY,
+                 ttl: float = DEFAULT_IDEMPOTENCY_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Inicializa la caché.
+
+        Args:
+            capacity: Número máximo de respuestas retenidas.
+            ttl: Segundos que una respuesta sigue siendo válida.
+            clock: Función de tiempo (inyectable para tests).
+        """
+        if capacity <= 0 or ttl <= 0:
+            raise ValueError("'capacity' y 'ttl' deben ser mayores que 0")
+        self.capacity = capacity
+        self.ttl = ttl
+        self._clock = clock
+        # {clave: (instante de caducidad, respuesta)}
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        """Obtiene el número de respuestas retenidas."""
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Busca la respuesta asociada a una clave.
+
+        Args:
+            key: Clave de idempotencia.
+
+        Returns:
+            Respuesta cacheada, None si no existe o ha caducado.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+            self.expirations += 1
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, response: Any) -> None:
+        """
+        Guarda la respuesta asociada a una clave.
+
+        Args:
+            key: Clave de idempotencia.
+            response: Respuesta a devolver en los reintentos.
+        """
+        entries = self._entries
+        entries[key] = (self._clock() + self.ttl, response)
+        entries.move_to_end(key)
+        while len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas de la caché.
+
+        Returns:
+            Diccionario con size, capacity, hits, misses, hit_rate,
+            evictions y expirations.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+class ResponseCache:
+    """
+    Respuestas serializadas de tools de solo lectura, por versión del estado.
+
+    Cualquier mutación incrementa HomeState.version; al detectarlo en la
+    siguiente consulta se descarta la caché completa. Mientras el estado no
+    cambie, una consulta repetida cuesta una búsqueda en un diccionario. Las
+    entradas se acotan con una LRU, de modo que variar los argumentos de
+    las consultas no hace crecer la memoria entre mutaciones.
+    """
+
+    def __init__(self, state: Any, capacity: int = DEFAULT_RESPONSE_CACHE_CAPACITY):
+        """
+        Inicializa la caché.
+
+        Args:
+            state: Instancia de HomeState.
+            capacity: Número máximo de respuestas retenidas.
+        """
+        if capacity <= 0:
+            raise ValueError("'capacity' debe ser mayor que 0")
+        self.state = state
+        self.capacity = capacity
+        self._version = state.version
+        self._entries: 'OrderedDict[Hashable, Union[str, bytes]]' = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        """Obtiene el número de respuestas retenidas."""
+        return len(self._entries)
+
+    def _check_version(self) -> None:
+        """Descarta la caché si el estado cambió desde la última consulta."""
+        version = self.state.version
+        if version != self._version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._version = version
+
+    def get(self, key: Hashable) -> Optional[Union[str, bytes]]:
+        """
+        Busca la respuesta serializada de una llamada.
+
+        Args:
+            key: Clave de la llamada (tool, argumentos y codificación).
+
+        Returns:
+            Resultado serializado, None si no está en caché.
+        """
+        self._check_version()
+        payload = self._entries.get(key)
+        if payload is None:
+            self.misses += 1
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return payload
+
+    def put(self, key: Hashable, payload: Union[str, bytes]) -> None:
+        """
+        Guarda la respuesta serializada de una llamada.
+
+        Args:
+            key: Clave de la llamada (tool, argumentos y codificación).
+            payload: Resultado serializado (JSON o MessagePack).
+        """
+        self._check_version()
+        entries = self._entries
+        entries[key] = payload
+        entries.move_to_end(key)
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas de la caché.
+
+        Returns:
+            Diccionario con size, capacity, version, hits, misses, hit_rate,
+            invalidations y evictions.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'capacity': self.capacity,
+            'version': self._version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'evictions': self.evictions,
+        }
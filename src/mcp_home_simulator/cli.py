@@ -1,12 +1,37 @@
 """Interfaz CLI para el simulador de domótica."""
 
 import argparse
+import asyncio
+import io
+import shlex
 import sys
-from typing import List, Optional
+import time
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO
 from .config import Config
+from .gateway import DEFAULT_HTTP_HOST, DEFAULT_HTTP_PORT, serve_http
+from .replay import format_report, replay_session
 from .state import HomeState
 
 
+# Comandos que operan sobre el estado: {comando: método de CLI} o, si tiene
+# subcomandos, {comando: {subcomando: método de CLI}}
+COMMANDS: Dict[str, Any] = {
+    'status': 'cmd_status',
+    'lights': {'list': 'cmd_lights_list', 'on': 'cmd_lights_on', 'off': 'cmd_lights_off'},
+    'alarm': {'on': 'cmd_alarm_on', 'off': 'cmd_alarm_off'},
+    'presence': {'show': 'cmd_presence_show', 'set': 'cmd_presence_set',
+                 'clear': 'cmd_presence_clear'},
+    'scene': {'list': 'cmd_scene_list', 'activate': 'cmd_scene_activate'},
+}
+
+# Órdenes propias de la consola interactiva
+SHELL_COMMANDS = ('help', 'timings', 'exit', 'quit')
+
+# Caracteres de salida acumulados antes de escribirlos en stdout (modo run)
+OUTPUT_BUFFER_SIZE = 64 * 1024
+
+
 class CLI:
     """Interfaz de línea de comandos para el simulador."""
 
@@ -20,6 +45,30 @@ class CLI:
         self.config = Config(config_path)
         self.state = HomeState(self.config)
 
+    def dispatch(self, args: argparse.Namespace) -> int:
+        """
+        Ejecuta el método cmd_* correspondiente a un comando parseado.
+
+        Args:
+            args: Argumentos parseados (command y <command>_command).
+
+        Returns:
+            Código de salida del comando (1 si el comando no existe o le
+            falta el subcomando).
+        """
+        handler = COMMANDS.get(args.command)
+        if handler is None:
+            print(f"❌ Error: Comando desconocido '{args.command}'")
+            return 1
+        if isinstance(handler, dict):
+            subcommand = getattr(args, f'{args.command}_command', None)
+            if not subcommand:
+                print(f"❌ Error: Especifica un subcomando para '{args.command}' "
+                      f"({', '.join(handler)})")
+                return 1
+            handler = handler[subcommand]
+        return getattr(self, handler)(args)
+
     def cmd_status(self, args: argparse.Namespace) -> int:
         """
         Muestra el estado general del sistema.
@@ -206,6 +255,50 @@ class CLI:
         print("✅ Lista de presencia limpiada. No hay nadie en casa.")
         return 0
 
+    def cmd_scene_list(self, args: argparse.Namespace) -> int:
+        """
+        Lista las escenas configuradas.
+
+        Args:
+            args: Argumentos parseados.
+
+        Returns:
+            Código de salida.
+        """
+        scenes = self.config.scenes
+
+        print("🎬 ESCENAS:")
+        if not scenes:
+            print("  (ninguna escena configurada)")
+        for scene in scenes.values():
+            print(f"  • {scene.name}: {len(scene.lights_on)} luces encendidas, "
+                  f"{len(scene.lights_off)} apagadas")
+
+        return 0
+
+    def cmd_scene_activate(self, args: argparse.Namespace) -> int:
+        """
+        Activa una escena.
+
+        Args:
+            args: Argumentos parseados (debe contener 'name').
+
+        Returns:
+            Código de salida.
+        """
+        name = args.name
+        changes = self.state.activate_scene(name)
+
+        if changes is None:
+            print(f"❌ Error: La escena '{name}' no existe.")
+            print(
+                f"   Escenas disponibles: {', '.join(self.state.list_scenes())}")
+            return 1
+
+        changed = len(changes['lights_on']) + len(changes['lights_off'])
+        print(f"✅ Escena '{name}' activada ({changed} luces cambiadas).")
+        return 0
+
 
 def create_parser() -> argparse.ArgumentParser:
     """
@@ -271,65 +364,384 @@ def create_parser() -> argparse.ArgumentParser:
     presence_subparsers.add_parser(
         'clear', help='Limpia la lista de personas presentes')
 
+    # Comando: scene
+    scene_parser = subparsers.add_parser('scene', help='Gestiona las escenas')
+    scene_subparsers = scene_parser.add_subparsers(dest='scene_command')
+
+    scene_subparsers.add_parser('list', help='Lista las escenas configuradas')
+
+    scene_activate_parser = scene_subparsers.add_parser(
+        'activate', help='Activa una escena')
+    scene_activate_parser.add_argument('name', help='Nombre de la escena')
+
+    # Comando: replay
+    replay_parser = subparsers.add_parser(
+        'replay', help='Reproduce una sesión grabada con --record')
+    replay_parser.add_argument('file', help='Archivo de grabación')
+    replay_parser.add_argument(
+        '--paced', action='store_true',
+        help='Respeta el ritmo original (por defecto, lo más rápido posible)')
+    replay_parser.add_argument(
+        '--config', dest='replay_config', default=None,
+        help='Configuración a usar (default: la de la sesión grabada)')
+
+    # Comando: http
+    http_parser = subparsers.add_parser(
+        'http', help='Expone las tools como API HTTP/REST')
+    http_parser.add_argument(
+        '--host', default=DEFAULT_HTTP_HOST,
+        help=f'Dirección en la que escuchar (default: {DEFAULT_HTTP_HOST})')
+    http_parser.add_argument(
+        '--port', type=int, default=DEFAULT_HTTP_PORT,
+        help=f'Puerto (default: {DEFAULT_HTTP_PORT})')
+
+    # Comandos: run y shell
+    run_parser = subparsers.add_parser(
+        'run', help='Ejecuta un script de comandos (uno por línea) en un solo proceso')
+    run_parser.add_argument(
+        'script', nargs='?', default='-',
+        help="Archivo de comandos ('-' o sin indicar = entrada estándar)")
+    run_parser.add_argument(
+        '-e', '--stop-on-error', action='store_true',
+        help='Detiene el script en el primer comando que falle')
+
+    subparsers.add_parser(
+        'shell', help='Abre una consola interactiva con autocompletado')
+
     return parser
 
 
-def run_cli(args: Optional[List[str]] = None) -> int:
+class CommandSession:
     """
-    Ejecuta la interfaz CLI.
+    Ejecuta comandos de la CLI, uno tras otro, sobre el mismo estado.
+
+    Cada línea se parsea con el parser de la CLI y se despacha a los
+    métodos cmd_* de una única instancia de CLI, de modo que la
+    configuración se carga una vez y el estado se conserva entre
+    comandos. Se mide el tiempo de cada comando para el resumen final.
+    """
+
+    def __init__(self, cli: CLI):
+        """
+        Inicializa la sesión.
+
+        Args:
+            cli: CLI (con su estado) sobre la que ejecutar los comandos.
+        """
+        self.cli = cli
+        self.parser = create_parser()
+        # Sin valor por defecto para detectar un --config en una línea
+        self.parser.set_defaults(config=None)
+        # {comando: [veces, segundos totales, segundos del más lento]}
+        self.timings: Dict[str, List[float]] = {}
+        self.executed = 0
+        self.failures = 0
+
+    def execute(self, line: str) -> Optional[int]:
+        """
+        Ejecuta una línea de comandos.
+
+        Args:
+            line: Línea con la sintaxis de la CLI sin el programa
+                ('lights on salon'); '#' inicia un comentario.
+
+        Returns:
+            Código de salida, None si la línea está vacía.
+        """
+        try:
+            tokens = shlex.split(line, comments=True)
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            self.failures += 1
+            return 1
+        if not tokens:
+            return None
+
+        try:
+            args = self.parser.parse_args(tokens)
+        except SystemExit as e:
+            # argparse ya mostró la ayuda o el error
+            code = e.code if isinstance(e.code, int) else 1
+            if code:
+                self.failures += 1
+            return code
+        if args.command not in COMMANDS:
+            print(f"❌ Error: El comando '{args.command}' no está disponible en una sesión")
+            self.failures += 1
+            return 1
+        if args.config is not None:
+            print("❌ Error: --config no está disponible en una sesión "
+                  "(la configuración se carga al iniciarla)")
+            self.failures += 1
+            return 1
+
+        start = time.perf_counter()
+        code = self.cli.dispatch(args)
+        elapsed = time.perf_counter() - start
+
+        subcommand = getattr(args, f'{args.command}_command', None)
+        key = f"{args.command} {subcommand}" if subcommand else args.command
+        timing = self.timings.setdefault(key, [0, 0.0, 0.0])
+        timing[0] += 1
+        timing[1] += elapsed
+        timing[2] = max(timing[2], elapsed)
+        self.executed += 1
+        if code:
+            self.failures += 1
+        return code
+
+    def run_script(self, lines: Iterable[str], stop_on_error: bool = False,
+                   out: Optional[TextIO] = None) -> int:
+        """
+        Ejecuta un script de comandos con la salida en búfer.
+
+        La salida de los comandos se acumula y se escribe en bloques de
+        OUTPUT_BUFFER_SIZE caracteres en lugar de en cada print.
+
+        Args:
+            lines: Líneas del script.
+            stop_on_error: True para detenerse en el primer comando que falle.
+            out: Destino de la salida (None = sys.stdout).
+
+        Returns:
+            0 si todos los comandos terminaron bien, 1 si alguno falló.
+        """
+        out = out if out is not None else sys.stdout
+        buffer = io.StringIO()
+        status = 0
+        with redirect_stdout(buffer):
+            for number, line in enumerate(lines, 1):
+                code = self.execute(line)
+                if code:
+                    status = 1
+                    if stop_on_error:
+                        print(f"❌ Script detenido en la línea {number}: {line.strip()}")
+                        break
+                if buffer.tell() >= OUTPUT_BUFFER_SIZE:
+                    out.write(buffer.getvalue())
+                    buffer.seek(0)
+                    buffer.truncate()
+        out.write(buffer.getvalue())
+        out.flush()
+        return status
+
+    def completions(self, line: str) -> List[str]:
+        """
+        Obtiene las opciones para completar la última palabra de una línea.
+
+        Args:
+            line: Texto escrito hasta el cursor.
+
+        Returns:
+            Palabras que empiezan por la última palabra, ordenadas.
+        """
+        words = line.split()
+        if line and not line[-1].isspace() and words:
+            current = words.pop()
+        else:
+            current = ''
+
+        if not words:
+            options: Iterable[str] = list(COMMANDS) + list(SHELL_COMMANDS)
+        else:
+            handler = COMMANDS.get(words[0])
+            options = ()
+            if isinstance(handler, dict):
+                if len(words) == 1:
+                    options = handler
+                elif len(words) == 2 and words[0] == 'lights' and words[1] in ('on', 'off'):
+                    options = self.cli.state.lights
+                elif len(words) == 2 and words[:2] == ['scene', 'activate']:
+                    options = self.cli.state.list_scenes()
+        return sorted(option for option in options if option.startswith(current))
+
+    @staticmethod
+    def help_text() -> str:
+        """
+        Formatea la ayuda de la consola.
+
+        Returns:
+            Texto con los comandos disponibles en una sesión y las órdenes
+            propias de la consola.
+        """
+        lines = ["Comandos disponibles:"]
+        for command, handler in COMMANDS.items():
+            if isinstance(handler, dict):
+                lines.append(f"  {command} {{{','.join(handler)}}}")
+            else:
+                lines.append(f"  {command}")
+        lines.append(f"Órdenes de la consola: {', '.join(SHELL_COMMANDS)}")
+        lines.append("Usa '<comando> -h' para ver sus argumentos.")
+        return '\n'.join(lines)
+
+    def summary(self) -> str:
+        """
+        Formatea el resumen de tiempos de la sesión.
+
+        Returns:
+            Texto con el total y una línea por comando (veces, media y máximo).
+        """
+        total = sum(timing[1] for timing in self.timings.values())
+        lines = [f"⏱️  {self.executed} comandos en {total * 1000:.1f} ms "
+                 f"({self.failures} con error)"]
+        for key, (count, elapsed, slowest) in sorted(
+                self.timings.items(), key=lambda item: -item[1][1]):
+            lines.append(f"  {key:20s} {int(count):6d} × {elapsed / count * 1e6:9.1f} µs "
+                         f"(máx {slowest * 1e6:.1f} µs)")
+        return '\n'.join(lines)
+
+    def run_shell(self, read_line: Callable[[str], str] = input) -> int:
+        """
+        Ejecuta la consola interactiva hasta 'exit', 'quit' o fin de entrada.
+
+        Con el módulo readline disponible, el tabulador completa comandos,
+        subcomandos y nombres de luces y escenas.
+
+        Args:
+            read_line: Función que lee una línea mostrando un prompt.
+
+        Returns:
+            Código de salida.
+        """
+        try:
+            import readline
+        except ImportError:  # Windows sin readline
+            readline = None
+        if readline is not None and read_line is input:
+            def complete(text: str, index: int) -> Optional[str]:
+                options = self.completions(readline.get_line_buffer()[:readline.get_endidx()])
+                return options[index] if index < len(options) else None
+            readline.set_completer(complete)
+            readline.set_completer_delims(' \t')
+            readline.parse_and_bind('tab: complete')
+
+        print("🏠 Consola del simulador: 'help' muestra los comandos, 'exit' sale.")
+        while True:
+            try:
+                line = read_line('mcp-home> ')
+            except EOFError:
+                print()
+                break
+            except KeyboardInterrupt:
+                print()
+                continue
+            command = line.strip()
+            if command in ('exit', 'quit'):
+                break
+            if command == 'help':
+                print(self.help_text())
+            elif command == 'timings':
+                print(self.summary())
+            else:
+                self.execute(line)
+        print(self.summary())
+        return 0
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    """
+    Ejecuta un script de comandos sobre un único estado.
 
     Args:
-        args: Argumentos de línea de comandos (None = usar sys.argv).
+        args: Argumentos parseados (config, script, stop_on_error).
+
+    Returns:
+        Código de salida (0 = todos los comandos terminaron bien).
+    """
+    session = CommandSession(CLI(args.config))
+    if args.script == '-':
+        code = session.run_script(sys.stdin, args.stop_on_error)
+    else:
+        try:
+            with open(args.script, encoding='utf-8') as f:
+                code = session.run_script(f, args.stop_on_error)
+        except OSError as e:
+            print(f"❌ Error: {e}")
+            return 1
+    print(session.summary(), file=sys.stderr)
+    return code
+
+
+def cmd_shell(args: argparse.Namespace) -> int:
+    """
+    Abre la consola interactiva.
+
+    Args:
+        args: Argumentos parseados (config).
 
     Returns:
         Código de salida.
     """
-    parser = create_parser()
-    parsed_args = parser.parse_args(args)
+    return CommandSession(CLI(args.config)).run_shell()
 
-    if not parsed_args.command:
-        parser.print_help()
+
+def cmd_http(args: argparse.Namespace) -> int:
+    """
+    Inicia la pasarela HTTP hasta que se interrumpa con Ctrl+C.
+
+    Args:
+        args: Argumentos parseados (config, host, port).
+
+    Returns:
+        Código de salida.
+    """
+    try:
+        asyncio.run(serve_http(args.config, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
         return 1
+    return 0
 
-    cli = CLI(parsed_args.config)
 
-    # Despachar comandos
-    if parsed_args.command == 'status':
-        return cli.cmd_status(parsed_args)
+def cmd_replay(args: argparse.Namespace) -> int:
+    """
+    Reproduce una sesión grabada y muestra el informe.
 
-    elif parsed_args.command == 'lights':
-        if not parsed_args.lights_command:
-            print("❌ Error: Especifica un subcomando para 'lights' (list, on, off)")
-            return 1
+    Args:
+        args: Argumentos parseados (file, paced, replay_config).
 
-        if parsed_args.lights_command == 'list':
-            return cli.cmd_lights_list(parsed_args)
-        elif parsed_args.lights_command == 'on':
-            return cli.cmd_lights_on(parsed_args)
-        elif parsed_args.lights_command == 'off':
-            return cli.cmd_lights_off(parsed_args)
+    Returns:
+        Código de salida (0 = respuestas idénticas a la grabación).
+    """
+    try:
+        report = replay_session(args.file, args.replay_config, args.paced)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    print(format_report(report))
+    return 0 if report['matched'] else 1
 
-    elif parsed_args.command == 'alarm':
-        if not parsed_args.alarm_command:
-            print("❌ Error: Especifica un subcomando para 'alarm' (on, off)")
-            return 1
 
-        if parsed_args.alarm_command == 'on':
-            return cli.cmd_alarm_on(parsed_args)
-        elif parsed_args.alarm_command == 'off':
-            return cli.cmd_alarm_off(parsed_args)
+# Comandos que no operan sobre un único estado: {comando: función}
+STANDALONE_COMMANDS: Dict[str, Callable[[argparse.Namespace], int]] = {
+    'replay': cmd_replay,
+    'http': cmd_http,
+    'run': cmd_run,
+    'shell': cmd_shell,
+}
 
-    elif parsed_args.command == 'presence':
-        if not parsed_args.presence_command:
-            print("❌ Error: Especifica un subcomando para 'presence' (show, set, clear)")
-            return 1
 
-        if parsed_args.presence_command == 'show':
-            return cli.cmd_presence_show(parsed_args)
-        elif parsed_args.presence_command == 'set':
-            return cli.cmd_presence_set(parsed_args)
-        elif parsed_args.presence_command == 'clear':
-            return cli.cmd_presence_clear(parsed_args)
+def run_cli(args: Optional[List[str]] = None) -> int:
+    """
+    Ejecuta la interfaz CLI.
+
+    Args:
+        args: Argumentos de línea de comandos (None = usar sys.argv).
+
+    Returns:
+        Código de salida.
+    """
+    parser = create_parser()
+    parsed_args = parser.parse_args(args)
+
+    if not parsed_args.command:
+        parser.print_help()
+        return 1
+
+    standalone = STANDALONE_COMMANDS.get(parsed_args.command)
+    if standalone is not None:
+        return standalone(parsed_args)
 
-    print(f"❌ Error: Comando desconocido '{parsed_args.command}'")
-    return 1
+    return CLI(parsed_args.config).dispatch(parsed_args)
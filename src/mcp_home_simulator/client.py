@@ -0,0 +1,302 @@
+"""Cliente en proceso del simulador, sin serialización ni tuberías."""
+
+import asyncio
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .config import Config
+from .state import HomeState
+from .tools import MCPTools
+
+
+# Una llamada de un lote: (tool, args) o {'tool', 'args'?, 'id'?}
+BatchCall = Union[Tuple[str, Dict[str, Any]], Dict[str, Any]]
+
+
+class ToolError(Exception):
+    """Error devuelto por una tool; 'response' es el mensaje 'error' del protocolo."""
+
+    def __init__(self, response: Dict[str, Any]):
+        """
+        Inicializa el error.
+
+        Args:
+            response: Mensaje {type: 'error', id, ok: False, error, code?}.
+        """
+        super().__init__(response['error'])
+        self.response = response
+        self.error = response['error']
+        self.code = response.get('code')
+
+
+class HomeClient:
+    """
+    Acceso directo a las tools del simulador desde el mismo intérprete.
+
+    Ejecuta las tools de MCPTools sobre un HomeState propio (o compartido)
+    con la misma semántica y los mismos mensajes de resultado y error que
+    el servidor por stdio, pero sin codificar JSON ni pasar por tuberías.
+    Los resultados no se copian: pertenecen al llamador y no deben
+    compartirse entre hilos. Las llamadas se serializan con un cerrojo,
+    como en el hilo de ejecución del servidor, y cada lote se ejecuta sin
+    que se intercalen llamadas de otros hilos.
+    """
+
+    def __init__(self, config_path: str = "config.yaml",
+                 state: Optional[HomeState] = None):
+        """
+        Inicializa el cliente.
+
+        Args:
+            config_path: Ruta al archivo de configuración (si no se da 'state').
+            state: Estado existente a controlar (p. ej. el de otro componente).
+        """
+        self.state = state if state is not None else HomeState(Config(config_path))
+        self.tools = MCPTools(self.state)
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> 'HomeClient':
+        """
+        Crea un cliente a partir de una configuración en memoria.
+
+        Args:
+            data: Diccionario con la configuración.
+
+        Returns:
+            Cliente sobre un estado nuevo.
+
+        Raises:
+            ValueError: Si la configuración no es válida.
+        """
+        return cls(state=HomeState(Config.from_data(data)))
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        """Obtiene las definiciones de las tools (como en el mensaje 'ready')."""
+        return list(self.tools.get_tool_definitions().values())
+
+    def request(self, tool: str, args: Optional[Dict[str, Any]] = None,
+                msg_id: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        Ejecuta una tool y devuelve el mensaje de respuesta del protocolo.
+
+        Args:
+            tool: Nombre de la tool.
+            args: Argumentos de la tool (None = sin argumentos).
+            msg_id: ID del mensaje (None = uno correlativo).
+
+        Returns:
+            {type: 'result', id, ok: True, result} o
+            {type: 'error', id, ok: False, error}.
+        """
+        with self._lock:
+            return self._execute(tool, args, msg_id)
+
+    def request_versioned(self, tool: str, args: Optional[Dict[str, Any]] = None
+                          ) -> Tuple[int, Dict[str, Any]]:
+        """
+        Ejecuta una tool y devuelve también la versión del estado resultante.
+
+        Ninguna otra llamada se intercala entre la ejecución y la lectura de
+        la versión, así que el resultado de una tool cacheable corresponde
+        exactamente a esa versión.
+
+        Args:
+            tool: Nombre de la tool.
+            args: Argumentos de la tool.
+
+        Returns:
+            Tupla (versión del estado, mensaje de respuesta como request()).
+        """
+        with self._lock:
+            response = self._execute(tool, args, None)
+            return self.state.version, response
+
+    def _execute(self, tool: str, args: Optional[Dict[str, Any]],
+                 msg_id: Optional[Any]) -> Dict[str, Any]:
+        """Ejecuta una tool con el cerrojo ya adquirido."""
+        if msg_id is None:
+            msg_id = next(self._ids)
+        if not tool:
+            return {'type': 'error', 'id': msg_id, 'ok': False,
+                    'error': "Mensaje inválido: falta 'id' o 'tool'"}
+        result = self.tools.execute_tool(tool, {} if args is None else args)
+        if isinstance(result, dict) and result.get('ok') is False:
+            return {'type': 'error', 'id': msg_id, 'ok': False,
+                    'error': result.get('error', 'Error desconocido')}
+        return {'type': 'result', 'id': msg_id, 'ok': True, 'result': result}
+
+    def call(self, tool: str, args: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        """
+        Ejecuta una tool y devuelve su resultado.
+
+        Los argumentos se pueden pasar como diccionario o con nombre:
+        call('set_light_state', name='salon', on=True).
+
+        Args:
+            tool: Nombre de la tool.
+            args: Argumentos de la tool.
+            **kwargs: Argumentos adicionales de la tool.
+
+        Returns:
+            Resultado de la tool.
+
+        Raises:
+            ToolError: Si la tool devuelve un error.
+        """
+        if kwargs:
+            args = dict(args or {}, **kwargs)
+        response = self.request(tool, args)
+        if not response['ok']:
+            raise ToolError(response)
+        return response['result']
+
+    def batch(self, calls: Iterable[BatchCall]) -> List[Dict[str, Any]]:
+        """
+        Ejecuta varias tools seguidas sin intercalar llamadas de otros hilos.
+
+        Un error no detiene el lote: cada llamada tiene su mensaje de
+        respuesta, en el mismo orden.
+
+        Args:
+            calls: Llamadas (tool, args) o {'tool', 'args'?, 'id'?}.
+
+        Returns:
+            Mensajes de respuesta, como request().
+        """
+        responses = []
+        with self._lock:
+            for call in calls:
+                if isinstance(call, dict):
+                    responses.append(self._execute(call.get('tool'), call.get('args'),
+                                                   call.get('id')))
+                else:
+                    tool, args = call
+                    responses.append(self._execute(tool, args, None))
+        return responses
+
+    def call_many(self, calls: Iterable[BatchCall]) -> List[Any]:
+        """
+        Ejecuta un lote y devuelve los resultados.
+
+        Args:
+            calls: Llamadas, como en batch().
+
+        Returns:
+            Resultados de las tools, en orden.
+
+        Raises:
+            ToolError: Con la primera respuesta de error (el lote se
+                ejecuta completo igualmente).
+        """
+        responses = self.batch(calls)
+        for response in responses:
+            if not response['ok']:
+                raise ToolError(response)
+        return [response['result'] for response in responses]
+
+
+class AsyncHomeClient:
+    """
+    Variante asyncio de HomeClient.
+
+    Con el reloj simulado, las tools se ejecutan en el propio bucle de
+    eventos, porque tardan microsegundos. Con el reloj en tiempo real, las
+    tools de reloj esperan entre eventos sin soltar el cerrojo de
+    HomeClient, así que todas las llamadas pasan a un único hilo aparte (en
+    orden de llegada) y el bucle nunca espera por el cerrojo.
+    """
+
+    def __init__(self, config_path: str = "config.yaml",
+                 state: Optional[HomeState] = None,
+                 client: Optional[HomeClient] = None):
+        """
+        Inicializa el cliente.
+
+        Args:
+            config_path: Ruta al archivo de configuración.
+            state: Estado existente a controlar.
+            client: Cliente síncrono a compartir (prevalece sobre los anteriores).
+        """
+        self.client = client if client is not None else HomeClient(config_path, state)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> 'AsyncHomeClient':
+        """Crea un cliente a partir de una configuración en memoria."""
+        return cls(client=HomeClient.from_data(data))
+
+    @property
+    def state(self) -> HomeState:
+        """Obtiene el estado controlado."""
+        return self.client.state
+
+    async def _run(self, function: Any, *args: Any) -> Any:
+        """
+        Ejecuta una función de HomeClient en el bucle o, en tiempo real, en el hilo del cliente.
+
+        Args:
+            function: Método de HomeClient.
+            *args: Argumentos del método.
+
+        Returns:
+            Resultado del método.
+        """
+        if not self.client.state.clock.realtime:
+            return function(*args)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1,
+                                                thread_name_prefix='home-client')
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, function, *args)
+
+    def close(self) -> None:
+        """Para el hilo de las llamadas en tiempo real, si se creó."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def request(self, tool: str, args: Optional[Dict[str, Any]] = None,
+                      msg_id: Optional[Any] = None) -> Dict[str, Any]:
+        """Ejecuta una tool y devuelve el mensaje de respuesta (ver HomeClient.request)."""
+        return await self._run(self.client.request, tool, args, msg_id)
+
+    async def request_versioned(self, tool: str, args: Optional[Dict[str, Any]] = None
+                                ) -> Tuple[int, Dict[str, Any]]:
+        """Ejecuta una tool y devuelve también la versión (ver HomeClient.request_versioned)."""
+        return await self._run(self.client.request_versioned, tool, args)
+
+    async def call(self, tool: str, args: Optional[Dict[str, Any]] = None,
+                   **kwargs: Any) -> Any:
+        """
+        Ejecuta una tool y devuelve su resultado (ver HomeClient.call).
+
+        Raises:
+            ToolError: Si la tool devuelve un error.
+        """
+        if kwargs:
+            args = dict(args or {}, **kwargs)
+        response = await self.request(tool, args)
+        if not response['ok']:
+            raise ToolError(response)
+        return response['result']
+
+    async def batch(self, calls: Iterable[BatchCall]) -> List[Dict[str, Any]]:
+        """Ejecuta un lote sin intercalar otras llamadas (ver HomeClient.batch)."""
+        return await self._run(self.client.batch, list(calls))
+
+    async def call_many(self, calls: Iterable[BatchCall]) -> List[Any]:
+        """
+        Ejecuta un lote y devuelve los resultados (ver HomeClient.call_many).
+
+        Raises:
+            ToolError: Con la primera respuesta de error.
+        """
+        responses = await self.batch(calls)
+        for response in responses:
+            if not response['ok']:
+                raise ToolError(response)
+        return [response['result'] for response in responses]
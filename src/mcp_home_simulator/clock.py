@@ -0,0 +1,208 @@
+"""Reloj simulado con planificador de eventos discretos."""
+
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Any, Callable
+
+
+class SimClock:
+    """
+    Reloj virtual con una cola de eventos (heap) ordenada por tiempo.
+
+    En modo virtual (por defecto) el tiempo solo avanza con advance() o
+    run_until(), que ejecutan los eventos vencidos sin esperas reales: un
+    día simulado se recorre en milisegundos. En modo tiempo real, run_until()
+    espera entre eventos para que el tiempo simulado avance a `speed` veces
+    la velocidad del reloj de pared, y sync() alinea el reloj con el tiempo
+    real transcurrido.
+    """
+
+    def __init__(self, start: float = 0.0, realtime: bool = False,
+                 speed: float = 1.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Inicializa el reloj.
+
+        Args:
+            start: Tiempo simulado inicial (segundos).
+            realtime: True para el modo de ritmo en tiempo real.
+            speed: Factor de velocidad del modo tiempo real.
+            sleep: Función de espera (inyectable para tests).
+        """
+        if speed <= 0:
+            raise ValueError("'speed' debe ser mayor que 0")
+        self._now = float(start)
+        self.realtime = realtime
+        self.speed = speed
+        self._sleep = sleep
+        self._wall = time.monotonic()
+
+        # Ejecuciones de run_until() en curso (un evento puede llamar a sync())
+        self._running = 0
+
+        # Entradas del heap: [tiempo, secuencia, callback, args, activa]
+        self._queue: List[List[Any]] = []
+        self._timers: Dict[int, List[Any]] = {}
+        self._seq = itertools.count(1)
+
+    @property
+    def now(self) -> float:
+        """Obtiene el tiempo simulado actual."""
+        return self._now
+
+    @property
+    def pending(self) -> int:
+        """Obtiene el número de eventos planificados pendientes."""
+        return len(self._timers)
+
+    def next_event_time(self) -> Optional[float]:
+        """
+        Obtiene el instante del próximo evento pendiente.
+
+        Returns:
+            Tiempo simulado del próximo evento, None si no hay ninguno.
+        """
+        queue = self._queue
+        while queue and not queue[0][4]:
+            heapq.heappop(queue)
+        return queue[0][0] if queue else None
+
+    def schedule(self, delay: float, callback: Callable[..., Any],
+                 *args: Any) -> int:
+        """
+        Planifica un evento tras un retardo simulado.
+
+        Args:
+            delay: Retardo en segundos simulados (>= 0).
+            callback: Función a invocar.
+            *args: Argumentos para la función.
+
+        Returns:
+            Identificador del evento (para cancel()).
+        """
+        if delay < 0:
+            raise ValueError("El retardo no puede ser negativo")
+        return self.schedule_at(self._now + delay, callback, *args)
+
+    def schedule_at(self, when: float, callback: Callable[..., Any],
+                    *args: Any) -> int:
+        """
+        Planifica un evento en un instante simulado absoluto.
+
+        Args:
+            when: Instante simulado (si ya pasó, se ejecuta en el próximo avance).
+            callback: Función a invocar.
+            *args: Argumentos para la función.
+
+        Returns:
+            Identificador del evento (para cancel()).
+        """
+        timer_id = next(self._seq)
+        entry = [max(float(when), self._now), timer_id, callback, args, True]
+        heapq.heappush(self._queue, entry)
+        self._timers[timer_id] = entry
+        return timer_id
+
+    def cancel(self, timer_id: int) -> bool:
+        """
+        Cancela un evento planificado.
+
+        Args:
+            timer_id: Identificador devuelto por schedule().
+
+        Returns:
+            True si se canceló, False si no existía o ya se ejecutó.
+        """
+        entry = self._timers.pop(timer_id, None)
+        if entry is None:
+            return False
+        # Borrado perezoso: la entrada se descarta al llegar a la cima del heap
+        entry[4] = False
+        return True
+
+    def advance(self, seconds: float) -> int:
+        """
+        Avanza el reloj ejecutando los eventos vencidos.
+
+        Args:
+            seconds: Segundos simulados a avanzar (>= 0).
+
+        Returns:
+            Número de eventos ejecutados.
+        """
+        if seconds < 0:
+            raise ValueError("No se puede retroceder el reloj")
+        return self.run_until(self._now + seconds)
+
+    def run_until(self, until: float) -> int:
+        """
+        Ejecuta los eventos hasta el instante indicado y deja el reloj en él.
+
+        Los eventos planificados durante la ejecución también se procesan si
+        vencen antes de `until`. Si un evento adelanta el reloj más allá de
+        `until` (p. ej. con un advance() anidado), el reloj no retrocede.
+
+        Args:
+            until: Instante simulado objetivo.
+
+        Returns:
+            Número de eventos ejecutados.
+        """
+        if until < self._now:
+            raise ValueError("No se puede retroceder el reloj")
+
+        queue = self._queue
+        executed = 0
+        self._running += 1
+        try:
+            while queue and queue[0][0] <= until:
+                entry = heapq.heappop(queue)
+                if not entry[4]:
+                    continue
+                self._pace(entry[0])
+                self._now = max(self._now, entry[0])
+                del self._timers[entry[1]]
+                entry[4] = False
+                entry[2](*entry[3])
+                executed += 1
+
+            self._pace(until)
+            self._now = max(self._now, until)
+        finally:
+            self._running -= 1
+        return executed
+
+    def sync(self) -> int:
+        """
+        En modo tiempo real, avanza el reloj hasta el tiempo real transcurrido.
+
+        En modo virtual no hace nada, y tampoco desde un evento ejecutado
+        por run_until() (que ya marca el ritmo del reloj).
+
+        Returns:
+            Número de eventos ejecutados.
+        """
+        if not self.realtime or self._running:
+            return 0
+        wall = time.monotonic()
+        target = self._now + (wall - self._wall) * self.speed
+        realtime, self.realtime = self.realtime, False
+        try:
+            executed = self.run_until(target)
+        finally:
+            self.realtime = realtime
+        self._wall = wall
+        return executed
+
+    def _pace(self, when: float) -> None:
+        """
+        En modo tiempo real, espera hasta que corresponda el instante indicado.
+
+        Args:
+            when: Instante simulado que se va a alcanzar.
+        """
+        if not self.realtime or when <= self._now:
+            return
+        self._sleep((when - self._now) / self.speed)
+        self._wall = time.monotonic()
@@ -3,7 +3,19 @@
 import os
 import yaml
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+from .cache import DEFAULT_IDEMPOTENCY_CAPACITY, DEFAULT_IDEMPOTENCY_TTL
+from .dispatch import (
+    DEFAULT_INBOX_CAPACITY, DEFAULT_OUTBOX_CAPACITY, DEFAULT_PRIORITY_WEIGHTS,
+    PRIORITY_CLASSES)
+from .faults import FaultSettings, compile_faults
+from .history import DEFAULT_PRESENCE_CAPACITY
+from .includes import FragmentCache, compose_config
+from .loaders import LightCollector, config_format, dump_config
+from .reload import DEFAULT_RELOAD_INTERVAL
+from .rules import Rule, compile_rules
+from .scenes import Scene, compile_scenes
+from .timeseries import DEFAULT_CHECKPOINT_EVERY, DEFAULT_CHUNK_SIZE
 
 
 DEFAULT_CONFIG = """lights:
@@ -20,23 +32,124 @@ presence_default:
   known_people: []
 """
 
+# Separador de niveles en las rutas de grupo (ej: 'edificio/planta1/cocina')
+GROUP_SEPARATOR = '/'
+
+# Potencia por defecto de una luz sin 'watts' (vatios)
+DEFAULT_LIGHT_WATTS = 10.0
+
+
+def build_group_index(groups: Optional[Dict[str, Any]],
+                      lights: List[str]) -> Dict[str, Tuple[str, ...]]:
+    """
+    Precalcula el índice de pertenencia de la jerarquía de grupos.
+
+    Cada nodo de la jerarquía es un diccionario (subgrupos) o una lista
+    (luces). Un grupo contiene las luces de todos sus descendientes.
+
+    Args:
+        groups: Jerarquía de grupos tal como aparece en la configuración.
+        lights: Luces configuradas.
+
+    Returns:
+        Diccionario {ruta del grupo: tupla de luces}.
+
+    Raises:
+        ValueError: Si la jerarquía no es válida o referencia luces inexistentes.
+    """
+    index: Dict[str, Tuple[str, ...]] = {}
+    if not groups:
+        return index
+    if not isinstance(groups, dict):
+        raise ValueError("'groups' debe ser un diccionario")
+
+    known = set(lights)
+
+    def visit(path: str, node: Any) -> Tuple[str, ...]:
+        if isinstance(node, list):
+            for light in node:
+                if light not in known:
+                    raise ValueError(
+                        f"El grupo '{path}' referencia la luz inexistente '{light}'")
+            members = tuple(dict.fromkeys(node))
+        elif isinstance(node, dict):
+            collected: Dict[str, None] = {}
+            for name, child in node.items():
+                name = str(name)
+                if not name or GROUP_SEPARATOR in name:
+                    raise ValueError(f"Nombre de grupo inválido: '{name}'")
+                collected.update(dict.fromkeys(
+                    visit(f"{path}{GROUP_SEPARATOR}{name}", child)))
+            members = tuple(collected)
+        else:
+            raise ValueError(
+                f"El grupo '{path}' debe ser una lista de luces o un diccionario")
+        index[path] = members
+        return members
+
+    for name, node in groups.items():
+        name = str(name)
+        if not name or GROUP_SEPARATOR in name:
+            raise ValueError(f"Nombre de grupo inválido: '{name}'")
+        visit(name, node)
+
+    return index
+
 
 class Config:
-    """Maneja la configuración del simulador desde config.yaml."""
+    """
+    Maneja la configuración del simulador desde config.yaml.
+
+    El formato se elige por la extensión: YAML (.yaml, .yml), JSON (.json)
+    o una luz JSON por línea (.ndjson, .jsonl). En JSON y JSON por líneas
+    la lista de luces se valida mientras se lee.
+
+    La clave 'include' compone la configuración a partir de otros archivos
+    (ver includes.compose_config); los fragmentos parseados se comparten
+    entre instancias en fragment_cache.
+    """
+
+    # Fragmentos parseados por hash de contenido, compartidos entre recargas
+    fragment_cache = FragmentCache()
 
     def __init__(self, config_path: str = "config.yaml"):
         """
         Inicializa la configuración.
 
         Args:
-            config_path: Ruta al archivo de configuración YAML.
+            config_path: Ruta al archivo de configuración.
         """
         self.config_path = Path(config_path)
+        self._files = [self.config_path]
         self.data = self._load_config()
 
+    @classmethod
+    def from_data(cls, data: Dict[str, Any],
+                  config_path: str = "config.yaml") -> 'Config':
+        """
+        Crea una configuración a partir de un diccionario ya cargado.
+
+        Args:
+            data: Diccionario con la configuración.
+            config_path: Ruta asociada (solo informativa).
+
+        Returns:
+            Configuración validada con sus índices precalculados.
+
+        Raises:
+            ValueError: Si la configuración no es válida.
+        """
+        config = cls.__new__(cls)
+        config.config_path = Path(config_path)
+        config._files = [config.config_path]
+        config._validate_config(data)
+        config._build_indexes(data)
+        config.data = data
+        return config
+
     def _load_config(self) -> Dict[str, Any]:
         """
-        Carga la configuración desde el archivo YAML.
+        Carga la configuración desde el archivo.
 
         Si el archivo no existe, crea uno con valores predeterminados.
 
@@ -49,11 +162,12 @@ class Config:
             self._create_default_config()
 
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+            config, normalized, self._files = compose_config(
+                self.config_path, self.fragment_cache)
 
             # Validar configuración
-            self._validate_config(config)
+            self._validate_config(config, lights_normalized=normalized)
+            self._build_indexes(config)
             return config
         except Exception as e:
             raise ValueError(f"Error al cargar configuración: {e}")
@@ -61,15 +175,21 @@ class Config:
     def _create_default_config(self) -> None:
         """Crea un archivo de configuración predeterminado."""
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
+        fmt = config_format(self.config_path)
         with open(self.config_path, 'w', encoding='utf-8') as f:
-            f.write(DEFAULT_CONFIG)
+            if fmt == 'yaml':
+                f.write(DEFAULT_CONFIG)
+            else:
+                f.write(dump_config(yaml.safe_load(DEFAULT_CONFIG), fmt))
 
-    def _validate_config(self, config: Dict[str, Any]) -> None:
+    def _validate_config(self, config: Dict[str, Any],
+                         lights_normalized: bool = False) -> None:
         """
         Valida la estructura de la configuración.
 
         Args:
             config: Diccionario de configuración a validar.
+            lights_normalized: True si el cargador ya validó y normalizó 'lights'.
 
         Raises:
             ValueError: Si la configuración no es válida.
@@ -83,17 +203,209 @@ class Config:
         if not config['lights']:
             raise ValueError("Debe haber al menos una luz configurada")
 
+        if not lights_normalized:
+            self._normalize_lights(config)
+
         if 'alarm_default' not in config:
             config['alarm_default'] = False
 
         if 'presence_default' not in config:
             config['presence_default'] = {'present': False, 'known_people': []}
 
+        if 'clock' in config and not isinstance(config['clock'], dict):
+            raise ValueError("'clock' debe ser un diccionario")
+
+        if 'server' in config and not isinstance(config['server'], dict):
+            raise ValueError("'server' debe ser un diccionario")
+        self._validate_priorities(config.get('server') or {})
+
+    def _validate_priorities(self, server: Dict[str, Any]) -> None:
+        """
+        Valida las clases de prioridad y los pesos del servidor.
+
+        Args:
+            server: Sección 'server' de la configuración.
+
+        Raises:
+            ValueError: Si alguna tool usa una clase desconocida o algún
+                peso no es un entero positivo.
+        """
+        priorities = server.get('priorities') or {}
+        if not isinstance(priorities, dict):
+            raise ValueError("'server.priorities' debe ser un diccionario tool -> clase")
+        for tool, name in priorities.items():
+            if name not in PRIORITY_CLASSES:
+                raise ValueError(f"Clase de prioridad desconocida para '{tool}': "
+                                 f"'{name}' (opciones: {', '.join(PRIORITY_CLASSES)})")
+
+        weights = server.get('priority_weights') or {}
+        if not isinstance(weights, dict):
+            raise ValueError("'server.priority_weights' debe ser un diccionario clase -> peso")
+        for name, weight in weights.items():
+            if name not in PRIORITY_CLASSES:
+                raise ValueError(f"Clase de prioridad desconocida: '{name}'")
+            if isinstance(weight, bool) or not isinstance(weight, int) or weight <= 0:
+                raise ValueError(f"El peso de la clase '{name}' debe ser un entero positivo")
+
+    def _normalize_lights(self, config: Dict[str, Any]) -> None:
+        """
+        Normaliza la lista de luces a nombres y extrae su potencia.
+
+        Cada luz puede ser un nombre o un diccionario {name, watts}. Tras la
+        normalización, 'lights' contiene solo nombres y 'light_watts' la
+        potencia de las luces que la declaran.
+
+        Args:
+            config: Diccionario de configuración a normalizar.
+
+        Raises:
+            ValueError: Si alguna entrada no es válida o hay nombres repetidos.
+        """
+        collector = LightCollector()
+        for index, entry in enumerate(config['lights']):
+            collector.add(entry, f"lights[{index}]")
+        collector.apply(config)
+
+    def _build_indexes(self, config: Dict[str, Any]) -> None:
+        """
+        Precalcula los índices derivados de la configuración.
+
+        Args:
+            config: Diccionario de configuración ya validado.
+
+        Raises:
+            ValueError: Si la jerarquía de grupos no es válida.
+        """
+        group_index = build_group_index(
+            config.get('groups'), config.get('lights', []))
+
+        light_groups: Dict[str, List[str]] = {}
+        for path, members in group_index.items():
+            for light in members:
+                light_groups.setdefault(light, []).append(path)
+
+        scenes = compile_scenes(
+            config.get('scenes'), config.get('lights', []), group_index)
+
+        self._group_index = group_index
+        self._light_groups = {
+            light: tuple(paths) for light, paths in light_groups.items()}
+        self._scenes = scenes
+        self._rules = compile_rules(
+            config.get('rules'), config.get('lights', []), group_index, scenes)
+        self._faults = compile_faults(config.get('faults'), config.get('lights', []))
+
+    @property
+    def files(self) -> List[Path]:
+        """Obtiene las rutas de los archivos leídos (el principal y sus fragmentos)."""
+        return getattr(self, '_files', None) or [self.config_path]
+
+    @property
+    def group_index(self) -> Dict[str, Tuple[str, ...]]:
+        """Obtiene el índice {ruta de grupo: luces del grupo}."""
+        if getattr(self, '_group_index', None) is None:
+            self._build_indexes(self.data)
+        return self._group_index
+
+    @property
+    def light_groups(self) -> Dict[str, Tuple[str, ...]]:
+        """Obtiene el índice inverso {luz: rutas de los grupos que la contienen}."""
+        if getattr(self, '_light_groups', None) is None:
+            self._build_indexes(self.data)
+        return self._light_groups
+
+    @property
+    def scenes(self) -> Dict[str, Scene]:
+        """Obtiene las escenas compiladas {nombre: Scene}."""
+        if getattr(self, '_scenes', None) is None:
+            self._build_indexes(self.data)
+        return self._scenes
+
+    @property
+    def rules(self) -> List[Rule]:
+        """Obtiene las reglas de automatización compiladas."""
+        if getattr(self, '_rules', None) is None:
+            self._build_indexes(self.data)
+        return self._rules
+
+    @property
+    def faults(self) -> Optional[FaultSettings]:
+        """Obtiene los perfiles de latencia y fallos simulados (None = sin inyección)."""
+        if not hasattr(self, '_faults'):
+            self._build_indexes(self.data)
+        return self._faults
+
+    @property
+    def clock(self) -> Dict[str, Any]:
+        """Obtiene la configuración del reloj simulado (start, realtime, speed)."""
+        clock = self.data.get('clock') or {}
+        return {
+            'start': float(clock.get('start', 0.0)),
+            'realtime': bool(clock.get('realtime', False)),
+            'speed': float(clock.get('speed', 1.0)),
+        }
+
+    @property
+    def history(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración de historiales.
+
+        Incluye la capacidad del historial de presencia y los parámetros del
+        registro de cambios (changes, chunk_size, checkpoint_every).
+        """
+        history = self.data.get('history') or {}
+        return {
+            'presence_capacity': int(history.get(
+                'presence_capacity', DEFAULT_PRESENCE_CAPACITY)),
+            'changes': bool(history.get('changes', True)),
+            'chunk_size': int(history.get('chunk_size', DEFAULT_CHUNK_SIZE)),
+            'checkpoint_every': int(history.get(
+                'checkpoint_every', DEFAULT_CHECKPOINT_EVERY)),
+        }
+
+    @property
+    def server(self) -> Dict[str, Any]:
+        """
+        Obtiene la configuración del servidor MCP.
+
+        Incluye la caché de idempotencia (idempotency_capacity,
+        idempotency_ttl y dedupe_by_id, que usa el 'id' del mensaje como
+        clave cuando no se envía 'idempotency_key'), la capacidad de las
+        colas de entrada y salida (inbox_capacity, por clase de prioridad, y
+        outbox_capacity) y la planificación: 'priorities' asigna una clase a
+        cada tool (sobre la clasificación por defecto) y 'priority_weights'
+        el peso de cada clase. 'reload_interval' es el intervalo en segundos
+        entre comprobaciones del archivo para la recarga en caliente (0 la
+        desactiva).
+        """
+        server = self.data.get('server') or {}
+        return {
+            'idempotency_capacity': int(server.get(
+                'idempotency_capacity', DEFAULT_IDEMPOTENCY_CAPACITY)),
+            'idempotency_ttl': float(server.get(
+                'idempotency_ttl', DEFAULT_IDEMPOTENCY_TTL)),
+            'dedupe_by_id': bool(server.get('dedupe_by_id', False)),
+            'inbox_capacity': int(server.get('inbox_capacity', DEFAULT_INBOX_CAPACITY)),
+            'outbox_capacity': int(server.get('outbox_capacity', DEFAULT_OUTBOX_CAPACITY)),
+            'priorities': dict(server.get('priorities') or {}),
+            'priority_weights': dict(DEFAULT_PRIORITY_WEIGHTS,
+                                     **(server.get('priority_weights') or {})),
+            'reload_interval': float(server.get('reload_interval', DEFAULT_RELOAD_INTERVAL)),
+        }
+
     @property
     def lights(self) -> List[str]:
         """Obtiene la lista de luces configuradas."""
         return self.data.get('lights', [])
 
+    @property
+    def light_watts(self) -> Dict[str, float]:
+        """Obtiene la potencia (W) de cada luz, con el valor por defecto aplicado."""
+        energy = self.data.get('energy') or {}
+        default = float(energy.get('default_watts', DEFAULT_LIGHT_WATTS))
+        declared = self.data.get('light_watts') or {}
+        return {light: float(declared.get(light, default)) for light in self.lights}
+
     @property
     def alarm_default(self) -> bool:
         """Obtiene el estado predeterminado de la alarma."""
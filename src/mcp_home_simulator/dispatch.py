@@ -0,0 +1,243 @@
+"""Colas acotadas y planificación por prioridad de las llamadas del servidor MCP."""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Any, Hashable, Mapping
+
+
+# Capacidad por defecto de la cola de llamadas pendientes (por clase de prioridad)
+DEFAULT_INBOX_CAPACITY = 1024
+
+# Clases de prioridad, de mayor a menor
+PRIORITY_CLASSES = ('alarm', 'write', 'read')
+
+# Peso de cada clase en el reparto de turnos entre colas con trabajo
+DEFAULT_PRIORITY_WEIGHTS = {'alarm': 4, 'write': 2, 'read': 1}
+
+# Capacidad por defecto de la cola de mensajes pendientes de escribir
+DEFAULT_OUTBOX_CAPACITY = 1024
+
+
+class PendingCall:
+    """Trabajo admitido a la espera de un hilo de ejecución."""
+
+    __slots__ = ('kind', 'message', 'msg_id', 'priority', 'received', 'deadline', 'done')
+
+    def __init__(self, kind: str, message: Any, msg_id: Optional[Hashable] = None,
+                 deadline_ms: Optional[float] = None,
+                 done: Optional[threading.Event] = None,
+                 priority: str = PRIORITY_CLASSES[0]):
+        """
+        Inicializa la llamada pendiente.
+
+        Args:
+            kind: Tipo de trabajo ('call', 'hello' o 'jsonrpc').
+            message: Mensaje decodificado.
+            msg_id: ID del mensaje (para cancelarlo).
+            deadline_ms: Plazo máximo desde la recepción, en milisegundos.
+            done: Evento a activar cuando el trabajo termine.
+            priority: Clase de prioridad (ver PRIORITY_CLASSES).
+        """
+        self.kind = kind
+        self.message = message
+        self.msg_id = msg_id
+        self.priority = priority
+        self.received = time.monotonic()
+        self.deadline = (self.received + deadline_ms / 1000.0
+                         if deadline_ms is not None else None)
+        self.done = done
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        """
+        Indica si el plazo de la llamada ha vencido.
+
+        Args:
+            now: Instante monotónico actual (None = ahora).
+
+        Returns:
+            True si la llamada tenía plazo y ya venció.
+        """
+        if self.deadline is None:
+            return False
+        return (time.monotonic() if now is None else now) >= self.deadline
+
+
+class CallQueue:
+    """
+    Cola acotada y segura entre hilos de llamadas pendientes, por prioridad.
+
+    Cada clase de prioridad tiene su propia cola FIFO con la misma
+    capacidad, de modo que una ráfaga de lecturas no llena el hueco de las
+    escrituras. El hilo lector admite llamadas con push(), que falla en lugar
+    de bloquear cuando la cola de su clase está llena (el servidor responde
+    'busy'), y las puede retirar por id con cancel(). El hilo de ejecución
+    las consume con pop(), que bloquea hasta que haya trabajo o la cola se
+    cierre.
+
+    El turno entre clases con trabajo se reparte con round robin ponderado
+    suave: cada clase acumula su peso en cada extracción y se sirve la de
+    mayor crédito, que paga la suma de pesos activos. Con los pesos por
+    defecto (4, 2, 1) y todas las colas llenas, de cada 7 llamadas 4 son de
+    alarma, 2 escrituras y 1 lectura: las lecturas nunca se quedan sin
+    turno. A igualdad de crédito gana la clase de mayor prioridad.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_INBOX_CAPACITY,
+                 weights: Optional[Mapping[str, int]] = None):
+        """
+        Inicializa la cola.
+
+        Args:
+            capacity: Número máximo de llamadas pendientes por clase.
+            weights: Peso de cada clase (None = DEFAULT_PRIORITY_WEIGHTS).
+
+        Raises:
+            ValueError: Si la capacidad o algún peso no son positivos.
+        """
+        if capacity <= 0:
+            raise ValueError("La capacidad de la cola debe ser mayor que 0")
+        weights = dict(DEFAULT_PRIORITY_WEIGHTS if weights is None else weights)
+        for name, weight in weights.items():
+            if isinstance(weight, bool) or not isinstance(weight, int) or weight <= 0:
+                raise ValueError(f"Peso inválido para la clase '{name}': {weight}")
+        self.capacity = capacity
+        self.weights = weights
+        self._queues: Dict[str, Deque[PendingCall]] = {name: deque() for name in weights}
+        self._credit = dict.fromkeys(weights, 0)
+        self._by_id: Dict[Hashable, PendingCall] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._size = 0
+        # Llamadas admitidas que aún no han terminado (pendientes o en ejecución)
+        self.unfinished = 0
+
+        # Métricas por clase: llamadas servidas y tiempo en cola (segundos)
+        self._served = dict.fromkeys(weights, 0)
+        self._wait_total = dict.fromkeys(weights, 0.0)
+        self._wait_max = dict.fromkeys(weights, 0.0)
+
+    def __len__(self) -> int:
+        """Obtiene el número total de llamadas pendientes."""
+        return self._size
+
+    def push(self, call: PendingCall, force: bool = False) -> bool:
+        """
+        Añade una llamada a la cola de su clase si hay espacio.
+
+        Args:
+            call: Llamada a encolar.
+            force: True para encolar aunque la cola esté llena (mensajes de control).
+
+        Returns:
+            False si la cola de la clase está llena o la cola está cerrada.
+
+        Raises:
+            ValueError: Si la clase de prioridad no existe.
+        """
+        items = self._queues.get(call.priority)
+        if items is None:
+            raise ValueError(f"Clase de prioridad desconocida: '{call.priority}'")
+        with self._condition:
+            if self._closed or (not force and len(items) >= self.capacity):
+                return False
+            items.append(call)
+            self._size += 1
+            self.unfinished += 1
+            if call.msg_id is not None:
+                self._by_id[call.msg_id] = call
+            self._condition.notify()
+            return True
+
+    def pop(self) -> Optional[PendingCall]:
+        """
+        Extrae la siguiente llamada según la prioridad, esperando si no hay ninguna.
+
+        Returns:
+            Llamada pendiente, None si la cola se cerró y está vacía.
+        """
+        with self._condition:
+            while not self._size:
+                if self._closed:
+                    return None
+                self._condition.wait()
+
+            credit = self._credit
+            best = None
+            total = 0
+            for name, items in self._queues.items():
+                if items:
+                    weight = self.weights[name]
+                    credit[name] += weight
+                    total += weight
+                    if best is None or credit[name] > credit[best]:
+                        best = name
+            credit[best] -= total
+
+            call = self._queues[best].popleft()
+            self._size -= 1
+            if call.msg_id is not None and self._by_id.get(call.msg_id) is call:
+                del self._by_id[call.msg_id]
+
+            wait = time.monotonic() - call.received
+            self._served[best] += 1
+            self._wait_total[best] += wait
+            if wait > self._wait_max[best]:
+                self._wait_max[best] = wait
+            return call
+
+    def cancel(self, msg_id: Hashable) -> Optional[PendingCall]:
+        """
+        Retira una llamada pendiente por su id.
+
+        Args:
+            msg_id: ID del mensaje de la llamada.
+
+        Returns:
+            Llamada retirada, None si no estaba pendiente.
+        """
+        with self._condition:
+            call = self._by_id.pop(msg_id, None)
+            if call is not None:
+                self._queues[call.priority].remove(call)
+                self._size -= 1
+                self.unfinished -= 1
+            return call
+
+    def task_done(self) -> None:
+        """Indica que una llamada extraída con pop() ha terminado de ejecutarse."""
+        with self._condition:
+            self.unfinished -= 1
+
+    def close(self) -> None:
+        """Cierra la cola: no admite más llamadas y despierta al consumidor."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def reopen(self) -> None:
+        """Vuelve a admitir llamadas tras close(), conservando las métricas."""
+        with self._condition:
+            self._closed = False
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Obtiene las métricas de cada clase de prioridad.
+
+        Returns:
+            Diccionario clase -> {weight, pending, served, wait_ms_mean,
+            wait_ms_max}, con el tiempo en cola de las llamadas servidas.
+        """
+        with self._condition:
+            return {
+                name: {
+                    'weight': self.weights[name],
+                    'pending': len(items),
+                    'served': self._served[name],
+                    'wait_ms_mean': round(1000.0 * self._wait_total[name]
+                                          / self._served[name], 3)
+                    if self._served[name] else 0.0,
+                    'wait_ms_max': round(1000.0 * self._wait_max[name], 3),
+                }
+                for name, items in self._queues.items()
+            }
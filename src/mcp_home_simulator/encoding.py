@@ -0,0 +1,263 @@
+"""Codificación MessagePack de los mensajes MCP, con implementación pura de respaldo."""
+
+import struct
+from typing import Any, Callable, Dict, List, Tuple
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depende del entorno
+    msgpack = None
+
+
+# Codificaciones que se pueden negociar tras el mensaje 'ready'
+ENCODINGS = ('json', 'msgpack')
+
+# Indica si se usa la extensión msgpack (si no, la implementación en Python)
+MSGPACK_NATIVE = msgpack is not None
+
+_pack_double = struct.Struct('>d').pack
+_pack_u8 = struct.Struct('>B').pack
+_pack_u16 = struct.Struct('>H').pack
+_pack_u32 = struct.Struct('>I').pack
+_pack_u64 = struct.Struct('>Q').pack
+_pack_i8 = struct.Struct('>b').pack
+_pack_i16 = struct.Struct('>h').pack
+_pack_i32 = struct.Struct('>i').pack
+_pack_i64 = struct.Struct('>q').pack
+
+
+def _pack_int(value: int, out: bytearray) -> None:
+    """Codifica un entero con el formato más compacto."""
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -0x20 <= value < 0:
+        out.append(value & 0xff)
+    elif value >= 0:
+        if value <= 0xff:
+            out += b'\xcc' + _pack_u8(value)
+        elif value <= 0xffff:
+            out += b'\xcd' + _pack_u16(value)
+        elif value <= 0xffffffff:
+            out += b'\xce' + _pack_u32(value)
+        elif value <= 0xffffffffffffffff:
+            out += b'\xcf' + _pack_u64(value)
+        else:
+            raise OverflowError("Entero demasiado grande para MessagePack")
+    elif value >= -0x80:
+        out += b'\xd0' + _pack_i8(value)
+    elif value >= -0x8000:
+        out += b'\xd1' + _pack_i16(value)
+    elif value >= -0x80000000:
+        out += b'\xd2' + _pack_i32(value)
+    elif value >= -0x8000000000000000:
+        out += b'\xd3' + _pack_i64(value)
+    else:
+        raise OverflowError("Entero demasiado pequeño para MessagePack")
+
+
+def _pack_header(size: int, fix: int, fix_limit: int, marker16: int,
+                 out: bytearray, marker8: int = 0) -> None:
+    """Codifica la cabecera de longitud de un str, bin, array o map."""
+    if size < fix_limit:
+        out.append(fix | size)
+    elif marker8 and size <= 0xff:
+        out += _pack_u8(marker8) + _pack_u8(size)
+    elif size <= 0xffff:
+        out += _pack_u8(marker16) + _pack_u16(size)
+    elif size <= 0xffffffff:
+        out += _pack_u8(marker16 + 1) + _pack_u32(size)
+    else:
+        raise OverflowError("Objeto demasiado grande para MessagePack")
+
+
+def _pack(value: Any, out: bytearray) -> None:
+    """Codifica un valor en MessagePack añadiéndolo a `out`."""
+    if value is None:
+        out.append(0xc0)
+    elif value is True:
+        out.append(0xc3)
+    elif value is False:
+        out.append(0xc2)
+    elif isinstance(value, int):
+        _pack_int(value, out)
+    elif isinstance(value, float):
+        out += b'\xcb' + _pack_double(value)
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        _pack_header(len(data), 0xa0, 32, 0xda, out, marker8=0xd9)
+        out += data
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        if len(data) <= 0xff:
+            out += b'\xc4' + _pack_u8(len(data))
+        elif len(data) <= 0xffff:
+            out += b'\xc5' + _pack_u16(len(data))
+        else:
+            out += b'\xc6' + _pack_u32(len(data))
+        out += data
+    elif isinstance(value, (list, tuple)):
+        _pack_header(len(value), 0x90, 16, 0xdc, out)
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        _pack_header(len(value), 0x80, 16, 0xde, out)
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"Tipo no serializable en MessagePack: {type(value).__name__}")
+
+
+class _Unpacker:
+    """Decodificador MessagePack en Python sobre un buffer completo."""
+
+    # Formatos de tamaño fijo: marcador -> (struct, bytes)
+    _FIXED: Dict[int, Tuple[Callable[..., Tuple[Any, ...]], int]] = {
+        0xca: (struct.Struct('>f').unpack_from, 4),
+        0xcb: (struct.Struct('>d').unpack_from, 8),
+        0xcc: (struct.Struct('>B').unpack_from, 1),
+        0xcd: (struct.Struct('>H').unpack_from, 2),
+        0xce: (struct.Struct('>I').unpack_from, 4),
+        0xcf: (struct.Struct('>Q').unpack_from, 8),
+        0xd0: (struct.Struct('>b').unpack_from, 1),
+        0xd1: (struct.Struct('>h').unpack_from, 2),
+        0xd2: (struct.Struct('>i').unpack_from, 4),
+        0xd3: (struct.Struct('>q').unpack_from, 8),
+    }
+    _u8 = struct.Struct('>B').unpack_from
+    _u16 = struct.Struct('>H').unpack_from
+    _u32 = struct.Struct('>I').unpack_from
+
+    def __init__(self, data: Any):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def _take(self, size: int) -> memoryview:
+        """Consume `size` bytes del buffer."""
+        end = self.pos + size
+        if end > len(self.data):
+            raise ValueError("Mensaje MessagePack truncado")
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def _length(self, width: int) -> int:
+        """Lee una longitud de 1, 2 o 4 bytes."""
+        unpack = {1: self._u8, 2: self._u16, 4: self._u32}[width]
+        self._take(width)
+        return unpack(self.data, self.pos - width)[0]
+
+    def _str(self, size: int) -> str:
+        return str(self._take(size), 'utf-8')
+
+    def _array(self, size: int) -> List[Any]:
+        return [self.unpack() for _ in range(size)]
+
+    def _map(self, size: int) -> Dict[Any, Any]:
+        result = {}
+        for _ in range(size):
+            key = self.unpack()
+            result[key] = self.unpack()
+        return result
+
+    def unpack(self) -> Any:
+        """Decodifica el siguiente valor."""
+        marker = self._take(1)[0]
+        if marker < 0x80:
+            return marker
+        if marker >= 0xe0:
+            return marker - 0x100
+        if marker <= 0x8f:
+            return self._map(marker & 0x0f)
+        if marker <= 0x9f:
+            return self._array(marker & 0x0f)
+        if marker <= 0xbf:
+            return self._str(marker & 0x1f)
+        if marker == 0xc0:
+            return None
+        if marker == 0xc2:
+            return False
+        if marker == 0xc3:
+            return True
+
+        fixed = self._FIXED.get(marker)
+        if fixed is not None:
+            unpack, size = fixed
+            self._take(size)
+            return unpack(self.data, self.pos - size)[0]
+
+        if 0xc4 <= marker <= 0xc6:
+            return bytes(self._take(self._length(1 << (marker - 0xc4))))
+        if 0xd9 <= marker <= 0xdb:
+            return self._str(self._length(1 << (marker - 0xd9)))
+        if marker in (0xdc, 0xdd):
+            return self._array(self._length(2 if marker == 0xdc else 4))
+        if marker in (0xde, 0xdf):
+            return self._map(self._length(2 if marker == 0xde else 4))
+        raise ValueError(f"Formato MessagePack no soportado: 0x{marker:02x}")
+
+
+def packb(value: Any) -> bytes:
+    """
+    Codifica un valor en MessagePack.
+
+    Args:
+        value: Valor compuesto de None, bool, int, float, str, bytes,
+            listas/tuplas y diccionarios.
+
+    Returns:
+        Bytes codificados.
+
+    Raises:
+        TypeError: Si el valor contiene tipos no serializables.
+    """
+    if msgpack is not None:
+        return msgpack.packb(value, use_bin_type=True)
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+def unpackb(data: Any) -> Any:
+    """
+    Decodifica un mensaje MessagePack completo.
+
+    Args:
+        data: Bytes (o memoryview) con un único valor codificado.
+
+    Returns:
+        Valor decodificado.
+
+    Raises:
+        ValueError: Si el mensaje no es válido.
+    """
+    if msgpack is not None:
+        try:
+            return msgpack.unpackb(data, raw=False)
+        except Exception as e:
+            raise ValueError(f"Mensaje MessagePack inválido: {e}")
+    unpacker = _Unpacker(data)
+    try:
+        value = unpacker.unpack()
+    except (IndexError, UnicodeDecodeError, TypeError) as e:
+        raise ValueError(f"Mensaje MessagePack inválido: {e}")
+    if unpacker.pos != len(unpacker.data):
+        raise ValueError("Datos sobrantes tras el mensaje MessagePack")
+    return value
+
+
+def pack_map_header(size: int) -> bytes:
+    """
+    Codifica la cabecera de un map de `size` entradas.
+
+    Permite componer mensajes concatenando claves y valores ya codificados.
+
+    Args:
+        size: Número de pares clave-valor.
+
+    Returns:
+        Bytes de la cabecera.
+    """
+    out = bytearray()
+    _pack_header(size, 0x80, 16, 0xde, out)
+    return bytes(out)
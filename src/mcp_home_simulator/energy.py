@@ -0,0 +1,298 @@
+"""Simulación vectorizada del consumo energético de las luces."""
+
+from typing import Dict, List, Optional, Any
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende del entorno
+    np = None
+
+from .rules import LIGHT_KEY_PREFIX
+
+
+# Indica si la simulación energética está disponible (requiere numpy)
+ENERGY_AVAILABLE = np is not None
+
+# Capacidad inicial de la tabla de segmentos (se duplica al llenarse)
+INITIAL_SEGMENTS = 64
+
+# Actualizaciones incrementales entre recálculos completos de la potencia
+REFRESH_EVERY = 4096
+
+# Número máximo de intervalos de un informe con 'step'
+MAX_REPORT_INTERVALS = 10000
+
+
+class EnergyMeter:
+    """
+    Acumulador de consumo de las luces basado en arrays de NumPy.
+
+    El consumo se modela como una sucesión de segmentos de potencia
+    constante: cada vez que el estado de las luces cambia en un instante
+    simulado nuevo se cierra el segmento actual. Para cada segmento se
+    guarda su inicio, la potencia total y por grupo, y la energía acumulada
+    hasta ese inicio. La potencia se actualiza con operaciones sobre arrays
+    a partir de los índices de las luces que cambian (sumando o restando su
+    potencia en el total y en sus grupos), sin bucles por luz, y se
+    recalcula desde cero periódicamente para acotar el error de redondeo.
+    Las consultas sobre rangos arbitrarios se resuelven con searchsorted
+    sobre los inicios de segmento.
+    """
+
+    def __init__(self, state: Any):
+        """
+        Inicializa el medidor y lo registra como observador del estado.
+
+        Args:
+            state: Instancia de HomeState.
+
+        Raises:
+            ImportError: Si numpy no está instalado.
+        """
+        if np is None:
+            raise ImportError(
+                "La simulación energética requiere numpy "
+                "(pip install mcp-home-simulator[energy])")
+
+        self.state = state
+        self._build_indexes()
+
+        # Segmentos: columna 0 = total, columnas 1.. = grupos
+        width = len(self.groups) + 1
+        self._starts = np.zeros(INITIAL_SEGMENTS, dtype=np.float64)
+        self._power = np.zeros((INITIAL_SEGMENTS, width), dtype=np.float64)
+        self._energy = np.zeros((INITIAL_SEGMENTS, width), dtype=np.float64)
+        self._count = 1
+        self._starts[0] = state.clock.now
+        self._dirty = True
+
+        state.add_listener(self._on_change)
+
+    def _build_indexes(self) -> None:
+        """Construye los arrays de potencias, estados y grupos a partir del estado."""
+        state = self.state
+        config = state.config
+        names = list(state.lights)
+        self._position = {name: i for i, name in enumerate(names)}
+
+        light_watts = config.light_watts
+        self.watts = np.array([light_watts.get(name, 0.0) for name in names],
+                              dtype=np.float64)
+        self.on = np.fromiter(state.lights.values(), dtype=bool,
+                              count=len(names))
+
+        # Pertenencia luz-grupo como pares (luz, grupo) para bincount
+        self.groups: List[str] = list(config.group_index)
+        pair_lights: List[int] = []
+        pair_groups: List[int] = []
+        for column, path in enumerate(self.groups):
+            for light in config.group_index[path]:
+                pair_lights.append(self._position[light])
+                pair_groups.append(column)
+        self._pair_lights = np.array(pair_lights, dtype=np.intp)
+        self._pair_groups = np.array(pair_groups, dtype=np.intp)
+
+        # Índice inverso luz -> columnas de grupo en formato CSR
+        order = np.argsort(self._pair_lights, kind='stable')
+        self._light_cols = self._pair_groups[order] + 1
+        self._light_ptr = np.zeros(len(names) + 1, dtype=np.intp)
+        np.cumsum(np.bincount(self._pair_lights, minlength=len(names)),
+                  out=self._light_ptr[1:])
+        self._updates = 0
+
+    def reconfigure(self) -> None:
+        """
+        Adapta el medidor a la configuración actual del estado conservando el histórico.
+
+        Se invoca tras una recarga que cambia las luces, los grupos o las
+        potencias. El segmento actual se cierra en el instante actual y el
+        siguiente usa las nuevas potencias. Las columnas de los grupos que
+        siguen existiendo conservan su consumo acumulado; las de los grupos
+        nuevos empiezan en 0 y las de los eliminados se descartan.
+        """
+        self._open_segment(self.state.clock.now)
+        old_groups = {path: column + 1 for column, path in enumerate(self.groups)}
+        self._build_indexes()
+
+        source = np.array([0] + [old_groups.get(path, -1) for path in self.groups],
+                          dtype=np.intp)
+        missing = source < 0
+        self._power = self._power[:, source]
+        self._energy = self._energy[:, source]
+        self._power[:, missing] = 0.0
+        self._energy[:, missing] = 0.0
+        self._dirty = True
+
+    @property
+    def start(self) -> float:
+        """Obtiene el instante simulado en que empezó la medición."""
+        return float(self._starts[0])
+
+    def _compute_power(self) -> Any:
+        """
+        Calcula la potencia instantánea total y por grupo.
+
+        Returns:
+            Array con la potencia total en la posición 0 y la de cada grupo
+            a continuación.
+        """
+        drawn = self.watts * self.on
+        power = np.empty(len(self.groups) + 1, dtype=np.float64)
+        power[0] = drawn.sum()
+        if self.groups:
+            power[1:] = np.bincount(
+                self._pair_groups, weights=drawn[self._pair_lights],
+                minlength=len(self.groups))
+        return power
+
+    def _current_segment(self) -> int:
+        """
+        Obtiene el índice del segmento abierto con su potencia actualizada.
+
+        Returns:
+            Índice del último segmento.
+        """
+        last = self._count - 1
+        if self._dirty:
+            self._power[last] = self._compute_power()
+            self._dirty = False
+        return last
+
+    def _open_segment(self, when: float) -> None:
+        """
+        Cierra el segmento actual y abre uno nuevo en el instante indicado.
+
+        Args:
+            when: Instante simulado de inicio del nuevo segmento.
+        """
+        last = self._current_segment()
+        if when <= self._starts[last]:
+            return
+
+        if self._count == len(self._starts):
+            capacity = len(self._starts) * 2
+            self._starts = np.resize(self._starts, capacity)
+            self._power = np.resize(self._power, (capacity, self._power.shape[1]))
+            self._energy = np.resize(self._energy, (capacity, self._energy.shape[1]))
+
+        new = self._count
+        self._starts[new] = when
+        self._energy[new] = self._energy[last] + \
+            self._power[last] * (when - self._starts[last])
+        self._power[new] = self._power[last]
+        self._count += 1
+
+    def _on_change(self, changes: Dict[str, Any]) -> None:
+        """
+        Observador de HomeState: actualiza el estado encendido/apagado.
+
+        Args:
+            changes: Diccionario {clave: nuevo valor}.
+        """
+        position = self._position
+        updates = [(position[key[len(LIGHT_KEY_PREFIX):]], value)
+                   for key, value in changes.items()
+                   if key.startswith(LIGHT_KEY_PREFIX)]
+        if not updates:
+            return
+
+        # La potencia previa es válida hasta ahora: cerrar el segmento
+        self._open_segment(self.state.clock.now)
+
+        indexes, values = zip(*updates)
+        indexes = np.fromiter(indexes, dtype=np.intp, count=len(indexes))
+        values = np.fromiter(values, dtype=bool, count=len(values))
+        self.on[indexes] = values
+
+        self._updates += 1
+        if self._updates % REFRESH_EVERY == 0:
+            self._dirty = True
+            return
+
+        # Solo llegan transiciones reales: sumar o restar la potencia
+        watts = self.watts[indexes]
+        delta = np.where(values, watts, -watts)
+        row = self._power[self._count - 1]
+        row[0] += delta.sum()
+
+        starts = self._light_ptr[indexes]
+        lengths = self._light_ptr[indexes + 1] - starts
+        total = int(lengths.sum())
+        if total:
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) \
+                + np.arange(total)
+            np.add.at(row, self._light_cols[offsets], np.repeat(delta, lengths))
+
+    def cumulative(self, times: Any) -> Any:
+        """
+        Obtiene la energía acumulada (W·s) en los instantes indicados.
+
+        Los instantes anteriores al inicio o posteriores al tiempo actual se
+        recortan a esos límites.
+
+        Args:
+            times: Array de instantes simulados.
+
+        Returns:
+            Matriz (instantes × (1 + grupos)) con la energía acumulada.
+        """
+        last = self._current_segment()
+        now = self.state.clock.now
+        times = np.clip(np.asarray(times, dtype=np.float64), self.start, now)
+        starts = self._starts[:self._count]
+        segment = np.searchsorted(starts, times, side='right') - 1
+        elapsed = (times - starts[segment])[:, None]
+        return self._energy[segment] + self._power[segment] * elapsed
+
+    def report(self, start: Optional[float] = None, end: Optional[float] = None,
+               step: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Genera un informe de consumo para un rango de tiempo simulado.
+
+        Args:
+            start: Inicio del rango (None = inicio de la medición).
+            end: Fin del rango (None = tiempo actual).
+            step: Si se indica, desglosa el rango en intervalos de este tamaño.
+
+        Returns:
+            Diccionario con el consumo total y por grupo en Wh, la potencia
+            actual y, opcionalmente, el desglose por intervalos.
+
+        Raises:
+            ValueError: Si el rango o el intervalo no son válidos.
+        """
+        now = self.state.clock.now
+        start = self.start if start is None else float(start)
+        end = now if end is None else float(end)
+        if end < start:
+            raise ValueError("El fin del rango debe ser posterior al inicio")
+
+        edges = [start, end]
+        if step is not None:
+            if step <= 0:
+                raise ValueError("'step' debe ser mayor que 0")
+            if (end - start) / step > MAX_REPORT_INTERVALS:
+                raise ValueError(
+                    f"'step' demasiado pequeño: el rango tendría más de "
+                    f"{MAX_REPORT_INTERVALS} intervalos")
+            edges = np.append(np.arange(start, end, float(step)), end)
+
+        energy_wh = np.diff(self.cumulative(edges), axis=0) / 3600.0
+        total = energy_wh.sum(axis=0)
+        power = self._power[self._current_segment()]
+
+        report: Dict[str, Any] = {
+            'from': start,
+            'to': end,
+            'total_wh': float(total[0]),
+            'groups': {path: float(total[column + 1])
+                       for column, path in enumerate(self.groups)},
+            'power_w': float(power[0]),
+        }
+        if step is not None:
+            report['intervals'] = [
+                {'from': float(edges[i]), 'to': float(edges[i + 1]),
+                 'total_wh': float(energy_wh[i, 0])}
+                for i in range(len(energy_wh))
+            ]
+        return report
@@ -0,0 +1,379 @@
+"""Inyección de latencia y fallos simulados en las tools y los dispositivos."""
+
+import heapq
+import itertools
+import math
+import random
+import threading
+import time
+from fnmatch import fnmatchcase
+from typing import AbstractSet, Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+# Distribuciones de latencia admitidas
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'lognormal')
+
+# Perfil de una tool que se aplica a las tools sin perfil propio
+DEFAULT_TOOL_PROFILE = '*'
+
+# Dispositivo de la alarma (el resto de dispositivos son luces)
+ALARM_DEVICE = 'alarm'
+
+
+class Latency:
+    """Distribución de la latencia simulada de una tool o dispositivo."""
+
+    __slots__ = ('dist', 'params')
+
+    def __init__(self, dist: str, params: Tuple[float, ...]):
+        """
+        Inicializa la distribución.
+
+        Args:
+            dist: 'fixed' (ms), 'uniform' (min_ms, max_ms) o 'lognormal'
+                (mediana en ms, sigma).
+            params: Parámetros de la distribución.
+        """
+        self.dist = dist
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: Any, where: str) -> 'Latency':
+        """
+        Crea la distribución desde la configuración.
+
+        Un número es una latencia fija en milisegundos; un diccionario
+        indica 'dist' y sus parámetros: {dist: fixed, ms},
+        {dist: uniform, min_ms, max_ms} o {dist: lognormal, median_ms, sigma}.
+
+        Args:
+            spec: Valor de 'latency' en la configuración.
+            where: Perfil al que pertenece (para los mensajes de error).
+
+        Returns:
+            Distribución validada.
+
+        Raises:
+            ValueError: Si la especificación no es válida.
+        """
+        def number(value: Any, name: str) -> float:
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"'{name}' de la latencia de '{where}' debe ser un número >= 0")
+            return float(value)
+
+        if not isinstance(spec, dict):
+            return cls('fixed', (number(spec, 'latency'),))
+        dist = spec.get('dist', 'fixed')
+        if dist == 'fixed':
+            return cls(dist, (number(spec.get('ms'), 'ms'),))
+        if dist == 'uniform':
+            low, high = number(spec.get('min_ms'), 'min_ms'), number(spec.get('max_ms'), 'max_ms')
+            if low > high:
+                raise ValueError(f"'min_ms' no puede ser mayor que 'max_ms' en '{where}'")
+            return cls(dist, (low, high))
+        if dist == 'lognormal':
+            median = number(spec.get('median_ms'), 'median_ms')
+            if median <= 0:
+                raise ValueError(f"'median_ms' de la latencia de '{where}' debe ser mayor que 0")
+            return cls(dist, (math.log(median), number(spec.get('sigma', 0.5), 'sigma')))
+        raise ValueError(f"Distribución de latencia desconocida en '{where}': '{dist}' "
+                         f"(opciones: {', '.join(LATENCY_DISTRIBUTIONS)})")
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        Obtiene una latencia aleatoria.
+
+        Args:
+            rng: Generador de números aleatorios.
+
+        Returns:
+            Latencia en segundos.
+        """
+        if self.dist == 'uniform':
+            ms = rng.uniform(*self.params)
+        elif self.dist == 'lognormal':
+            ms = rng.lognormvariate(*self.params)
+        else:
+            ms = self.params[0]
+        return ms / 1000.0
+
+
+class FaultProfile:
+    """Latencia y probabilidad de fallo de una tool o un dispositivo."""
+
+    __slots__ = ('latency', 'failure_rate')
+
+    def __init__(self, latency: Optional[Latency] = None, failure_rate: float = 0.0):
+        """
+        Inicializa el perfil.
+
+        Args:
+            latency: Distribución de latencia (None = sin latencia).
+            failure_rate: Probabilidad de fallo de cada llamada (0 a 1).
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    @classmethod
+    def parse(cls, spec: Any, where: str) -> 'FaultProfile':
+        """
+        Crea el perfil desde la configuración {latency?, failure_rate?}.
+
+        Raises:
+            ValueError: Si el perfil no es válido.
+        """
+        if not isinstance(spec, dict):
+            raise ValueError(f"El perfil de fallos de '{where}' debe ser un diccionario")
+        latency = Latency.parse(spec['latency'], where) if 'latency' in spec else None
+        rate = spec.get('failure_rate', 0.0)
+        if isinstance(rate, bool) or not isinstance(rate, (int, float)) or not 0 <= rate <= 1:
+            raise ValueError(f"'failure_rate' de '{where}' debe estar entre 0 y 1")
+        return cls(latency, float(rate))
+
+
+class FaultSettings:
+    """Perfiles de fallos compilados desde la sección 'faults' de la configuración."""
+
+    def __init__(self, seed: Optional[int], tools: Dict[str, FaultProfile],
+                 devices: Dict[str, FaultProfile]):
+        """
+        Inicializa los perfiles.
+
+        Args:
+            seed: Semilla del generador (None = no reproducible).
+            tools: Perfil de cada tool ('*' para el resto).
+            devices: Perfil de cada luz o de 'alarm'.
+        """
+        self.seed = seed
+        self.tools = tools
+        self.devices = devices
+
+
+def compile_faults(section: Any, lights: List[str]) -> Optional[FaultSettings]:
+    """
+    Valida y compila la sección 'faults' de la configuración.
+
+    Args:
+        section: Sección {seed?, tools?, devices?} o None.
+        lights: Luces configuradas (los dispositivos válidos, más 'alarm').
+
+    Returns:
+        Perfiles compilados, None si no hay sección.
+
+    Raises:
+        ValueError: Si la sección no es válida o referencia dispositivos inexistentes.
+    """
+    if section is None:
+        return None
+    if not isinstance(section, dict):
+        raise ValueError("'faults' debe ser un diccionario")
+    seed = section.get('seed')
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+        raise ValueError("'faults.seed' debe ser un entero")
+
+    tools = section.get('tools') or {}
+    devices = section.get('devices') or {}
+    if not isinstance(tools, dict) or not isinstance(devices, dict):
+        raise ValueError("'faults.tools' y 'faults.devices' deben ser diccionarios")
+    known = set(lights)
+    for device in devices:
+        if device != ALARM_DEVICE and device not in known:
+            raise ValueError(f"'faults.devices' referencia la luz inexistente '{device}'")
+
+    return FaultSettings(
+        seed,
+        {str(tool): FaultProfile.parse(spec, str(tool)) for tool, spec in tools.items()},
+        {device: FaultProfile.parse(spec, device) for device, spec in devices.items()},
+    )
+
+
+class FaultInjector:
+    """
+    Decide la latencia y el fallo simulados de cada llamada.
+
+    Una llamada suma el perfil de su tool (o el de '*') y el de cada
+    dispositivo que toca: luces indicadas en 'name', 'names', 'group' o
+    'pattern', y la alarma en sus tools. Los dispositivos responden en
+    paralelo, así que la latencia es la mayor de todas; la llamada falla si
+    falla cualquiera de ellos. Con la misma semilla y las mismas llamadas en
+    el mismo orden, las decisiones son idénticas.
+    """
+
+    def __init__(self, settings: FaultSettings,
+                 group_index: Optional[Dict[str, Tuple[str, ...]]] = None,
+                 alarm_tools: AbstractSet[str] = frozenset()):
+        """
+        Inicializa el inyector.
+
+        Args:
+            settings: Perfiles compilados.
+            group_index: Índice {ruta de grupo: luces} para las tools de grupo.
+            alarm_tools: Tools que actúan sobre el dispositivo 'alarm'.
+        """
+        self.settings = settings
+        self.group_index = group_index or {}
+        self.alarm_tools = alarm_tools
+        self._rng = random.Random(settings.seed)
+        self.delayed = 0
+        self.failed = 0
+
+    def _devices(self, tool_name: str, args: Dict[str, Any]) -> List[str]:
+        """Obtiene los dispositivos con perfil propio que toca una llamada."""
+        devices = self.settings.devices
+        if not devices:
+            return []
+        if tool_name in self.alarm_tools:
+            return [ALARM_DEVICE] if ALARM_DEVICE in devices else []
+
+        name, names = args.get('name'), args.get('names')
+        group, pattern = args.get('group'), args.get('pattern')
+        members = set(self.group_index.get(group, ())) if isinstance(group, str) else ()
+        selected = set(names) if isinstance(names, list) and \
+            all(isinstance(n, str) for n in names) else ()
+        touched = []
+        for device in devices:
+            if device == ALARM_DEVICE:
+                continue
+            if device == name or device in selected or device in members or \
+                    (isinstance(pattern, str) and fnmatchcase(device, pattern)):
+                touched.append(device)
+        return touched
+
+    def plan(self, tool_name: str, args: Any) -> Tuple[float, Optional[str]]:
+        """
+        Decide la latencia y el fallo de una llamada.
+
+        Args:
+            tool_name: Nombre de la tool.
+            args: Argumentos de la llamada.
+
+        Returns:
+            Tupla (latencia en segundos, mensaje de error o None).
+        """
+        settings = self.settings
+        profiles: List[Tuple[str, FaultProfile]] = []
+        profile = settings.tools.get(tool_name) or settings.tools.get(DEFAULT_TOOL_PROFILE)
+        if profile is not None:
+            profiles.append((f"la tool '{tool_name}'", profile))
+        if isinstance(args, dict):
+            profiles.extend((f"el dispositivo '{device}'", settings.devices[device])
+                            for device in self._devices(tool_name, args))
+
+        rng = self._rng
+        delay = 0.0
+        error = None
+        for source, profile in profiles:
+            if profile.latency is not None:
+                delay = max(delay, profile.latency.sample(rng))
+            if profile.failure_rate and rng.random() < profile.failure_rate \
+                    and error is None:
+                error = f"Fallo simulado en {source}"
+        if delay:
+            self.delayed += 1
+        if error is not None:
+            self.failed += 1
+        return delay, error
+
+
+class DelayQueue:
+    """
+    Hilo que ejecuta callbacks cuando vence su latencia simulada.
+
+    Las llamadas lentas esperan aquí sin ocupar el hilo de ejecución, que
+    sigue atendiendo al resto; al vencer, su callback las encola (o
+    responde el fallo). Todas comparten un único hilo con un heap ordenado
+    por instante de vencimiento.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Inicializa la cola.
+
+        Args:
+            capacity: Número máximo de llamadas esperando a la vez.
+        """
+        self.capacity = capacity
+        # Entradas del heap: [vencimiento, secuencia, callback, id]
+        self._heap: List[List[Any]] = []
+        self._by_id: Dict[Hashable, List[Any]] = {}
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        """Obtiene el número de llamadas esperando."""
+        return len(self._heap)
+
+    def start(self) -> None:
+        """Arranca el hilo."""
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='mcp-delays', daemon=True)
+        self._thread.start()
+
+    def schedule(self, delay: float, callback: Callable[[], None],
+                 msg_id: Optional[Hashable] = None) -> bool:
+        """
+        Planifica un callback tras una espera.
+
+        Args:
+            delay: Segundos de espera.
+            callback: Función a invocar en el hilo de la cola.
+            msg_id: ID de la llamada (para cancelarla).
+
+        Returns:
+            False si la cola está llena o cerrada.
+        """
+        with self._condition:
+            if self._closed or len(self._heap) >= self.capacity:
+                return False
+            entry = [time.monotonic() + delay, next(self._seq), callback, msg_id]
+            heapq.heappush(self._heap, entry)
+            if msg_id is not None:
+                self._by_id[msg_id] = entry
+            self._condition.notify()
+            return True
+
+    def cancel(self, msg_id: Hashable) -> bool:
+        """
+        Descarta la llamada con el id indicado.
+
+        Returns:
+            True si estaba esperando.
+        """
+        with self._condition:
+            entry = self._by_id.pop(msg_id, None)
+            if entry is None:
+                return False
+            entry[2] = None
+            return True
+
+    def _run(self) -> None:
+        """Ejecuta los callbacks vencidos hasta que se llame a stop()."""
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed and not self._heap:
+                        return
+                    if self._heap:
+                        wait = self._heap[0][0] - time.monotonic()
+                        if wait <= 0 or self._closed:
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+                entry = heapq.heappop(self._heap)
+                callback = entry[2]
+                if entry[3] is not None and self._by_id.get(entry[3]) is entry:
+                    del self._by_id[entry[3]]
+            if callback is not None:
+                callback()
+
+    def stop(self) -> None:
+        """Ejecuta al momento las llamadas que siguen esperando y para el hilo."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
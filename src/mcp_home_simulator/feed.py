@@ -0,0 +1,218 @@
+"""Difusión de los cambios de estado a clientes suscritos (flujos en vivo)."""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .rules import LIGHT_KEY_PREFIX, LIGHT_SET_KEY
+
+
+# Número máximo de claves pendientes por suscriptor; al superarlo se descartan
+# y el suscriptor recibe un snapshot completo en lugar de los cambios
+DEFAULT_MAX_PENDING = 4096
+
+
+class FeedSubscriber:
+    """
+    Cambios pendientes de enviar a un cliente.
+
+    Los cambios se fusionan por clave (luz, alarma o presencia): si una
+    luz cambia varias veces antes de que el cliente los lea, solo queda el
+    último valor. Así la memoria por cliente está acotada por el número de
+    claves, por lento que sea el cliente.
+    """
+
+    def __init__(self, feed: 'ChangeFeed', wake: Callable[[], None]):
+        """
+        Inicializa el suscriptor.
+
+        Args:
+            feed: Difusor al que pertenece.
+            wake: Función a invocar cuando pasa a haber cambios pendientes
+                (desde el hilo que modificó el estado).
+        """
+        self.feed = feed
+        self.wake = wake
+        # {clave del observador de HomeState: último valor}
+        self.pending: Dict[str, Any] = {}
+        # Versión del estado tras el último cambio recibido
+        self.version = 0
+        # True si se descartaron cambios por superar max_pending
+        self.overflow = False
+        self.coalesced = 0
+
+    def take(self, after: int = -1) -> Optional[Tuple[str, int, Dict[str, Any]]]:
+        """
+        Extrae los cambios pendientes.
+
+        Args:
+            after: Versión ya enviada al cliente (los cambios hasta ella se
+                descartan, p. ej. porque ya van en el snapshot inicial).
+
+        Returns:
+            ('delta', versión, cambios), ('resync', versión, {}) si hay que
+            enviar un snapshot completo, o None si no hay nada nuevo.
+        """
+        with self.feed._lock:
+            pending, overflow, version = self.pending, self.overflow, self.version
+            self.pending = {}
+            self.overflow = False
+        if version <= after:
+            return None
+        if overflow:
+            return 'resync', version, {}
+        if not pending:
+            return None
+        return 'delta', version, pending
+
+    def close(self) -> None:
+        """Cancela la suscripción."""
+        self.feed.unsubscribe(self)
+
+
+class ChangeFeed:
+    """
+    Reparte los cambios de un HomeState entre suscriptores.
+
+    Solo se registra como observador del estado mientras hay suscriptores,
+    de modo que sin clientes conectados las mutaciones no pagan nada. El
+    observador se ejecuta en el hilo que modifica el estado: se limita a
+    fusionar los cambios y a despertar a los suscriptores que estaban
+    vacíos.
+    """
+
+    def __init__(self, state: Any, max_pending: int = DEFAULT_MAX_PENDING):
+        """
+        Inicializa el difusor.
+
+        Args:
+            state: Instancia de HomeState.
+            max_pending: Claves pendientes por suscriptor antes de pasar a
+                reenviar un snapshot completo.
+
+        Raises:
+            ValueError: Si max_pending no es positivo.
+        """
+        if max_pending <= 0:
+            raise ValueError("'max_pending' debe ser mayor que 0")
+        self.state = state
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers: List[FeedSubscriber] = []
+        self.overflows = 0
+
+    def __len__(self) -> int:
+        """Obtiene el número de suscriptores."""
+        return len(self._subscribers)
+
+    def subscribe(self, wake: Callable[[], None]) -> FeedSubscriber:
+        """
+        Añade un suscriptor.
+
+        Args:
+            wake: Función a invocar cuando el suscriptor tenga cambios.
+
+        Returns:
+            Suscriptor (ciérralo con close()).
+        """
+        subscriber = FeedSubscriber(self, wake)
+        with self._lock:
+            first = not self._subscribers
+            self._subscribers = self._subscribers + [subscriber]
+        if first:
+            self.state.add_listener(self._on_change)
+        return subscriber
+
+    def unsubscribe(self, subscriber: FeedSubscriber) -> None:
+        """
+        Elimina un suscriptor.
+
+        Args:
+            subscriber: Suscriptor a eliminar.
+        """
+        with self._lock:
+            if subscriber not in self._subscribers:
+                return
+            self._subscribers = [s for s in self._subscribers if s is not subscriber]
+            last = not self._subscribers
+        if last:
+            self.state.remove_listener(self._on_change)
+
+    def _on_change(self, changes: Dict[str, Any]) -> None:
+        """Observador de HomeState: fusiona los cambios en cada suscriptor."""
+        if LIGHT_SET_KEY in changes:
+            self._resync_all()
+            return
+        if 'presence' in changes:
+            changes = dict(changes, presence=self.state.get_presence())
+        version = self.state.version
+        wake = []
+        with self._lock:
+            for subscriber in self._subscribers:
+                pending = subscriber.pending
+                if not pending and not subscriber.overflow:
+                    wake.append(subscriber.wake)
+                subscriber.version = version
+                if subscriber.overflow:
+                    continue
+                before = len(pending)
+                pending.update(changes)
+                subscriber.coalesced += before + len(changes) - len(pending)
+                if len(pending) > self.max_pending:
+                    subscriber.pending = {}
+                    subscriber.overflow = True
+                    self.overflows += 1
+        for function in wake:
+            function()
+
+    def _resync_all(self) -> None:
+        """Obliga a todos los suscriptores a recibir un snapshot completo."""
+        version = self.state.version
+        wake = []
+        with self._lock:
+            for subscriber in self._subscribers:
+                if not subscriber.pending and not subscriber.overflow:
+                    wake.append(subscriber.wake)
+                subscriber.version = version
+                subscriber.pending = {}
+                subscriber.overflow = True
+        for function in wake:
+            function()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas del difusor.
+
+        Returns:
+            Diccionario con subscribers, coalesced (cambios fusionados con
+            uno posterior) y overflows (snapshots forzados).
+        """
+        subscribers = self._subscribers
+        return {
+            'subscribers': len(subscribers),
+            'coalesced': sum(s.coalesced for s in subscribers),
+            'overflows': self.overflows,
+        }
+
+
+def delta_payload(version: int, changes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convierte los cambios fusionados en un delta con la forma del snapshot.
+
+    Args:
+        version: Versión del estado tras los cambios.
+        changes: {clave del observador: valor} (presencia ya completa).
+
+    Returns:
+        {version, lights?: {nombre: encendida}, alarm?, presence?}.
+    """
+    payload: Dict[str, Any] = {'version': version}
+    lights = {}
+    prefix = len(LIGHT_KEY_PREFIX)
+    for key, value in changes.items():
+        if key.startswith(LIGHT_KEY_PREFIX):
+            lights[key[prefix:]] = value
+        else:
+            payload[key] = value
+    if lights:
+        payload['lights'] = lights
+    return payload
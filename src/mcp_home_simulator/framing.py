@@ -0,0 +1,198 @@
+"""Framing binario de mensajes sobre stdin/stdout (Content-Length o prefijo de longitud)."""
+
+import struct
+from typing import BinaryIO, Optional
+
+
+# Nombre de la cabecera con la longitud del mensaje (en minúsculas)
+CONTENT_LENGTH = b'content-length'
+
+# Longitud máxima de una línea de cabecera
+MAX_HEADER_LINE = 1024
+
+# Tamaño máximo de un mensaje (bytes)
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+# Tamaño inicial del buffer de lectura reutilizable
+INITIAL_BUFFER_SIZE = 64 * 1024
+
+# Prefijo de longitud de los mensajes binarios (uint32 big-endian)
+LENGTH_PREFIX = struct.Struct('>I')
+
+
+class FramingError(ValueError):
+    """Error de formato en el flujo de mensajes; el flujo queda desincronizado."""
+
+
+class _BufferedReader:
+    """
+    Base de los lectores: lee cuerpos de longitud conocida en un buffer reutilizable.
+
+    El cuerpo de cada mensaje se lee con readinto() en un buffer que se
+    reutiliza entre mensajes (solo crece si llega uno mayor), y se devuelve
+    como memoryview sin copias intermedias. La vista solo es válida hasta
+    la siguiente llamada a read().
+    """
+
+    def __init__(self, stream: BinaryIO, max_size: int = MAX_FRAME_SIZE):
+        """
+        Inicializa el lector.
+
+        Args:
+            stream: Flujo binario de entrada (ej: sys.stdin.buffer).
+            max_size: Tamaño máximo aceptado para un mensaje.
+        """
+        self._stream = stream
+        self.max_size = max_size
+        self._buffer = bytearray(INITIAL_BUFFER_SIZE)
+
+    def _read_length(self) -> Optional[int]:
+        """Lee la longitud del siguiente mensaje (None al final del flujo)."""
+        raise NotImplementedError
+
+    def read(self) -> Optional[memoryview]:
+        """
+        Lee el siguiente mensaje.
+
+        Returns:
+            Vista sobre el cuerpo del mensaje, None al final del flujo.
+
+        Raises:
+            FramingError: Si el mensaje no es válido o está truncado.
+        """
+        length = self._read_length()
+        if length is None:
+            return None
+        if length > self.max_size:
+            raise FramingError(f"Mensaje demasiado grande: {length} bytes")
+
+        if length > len(self._buffer):
+            # Buffer nuevo: una vista devuelta antes no impide el cambio
+            self._buffer = bytearray(max(length, 2 * len(self._buffer)))
+        view = memoryview(self._buffer)[:length]
+
+        received = 0
+        while received < length:
+            count = self._stream.readinto(view[received:])
+            if not count:
+                raise FramingError("Fin de la entrada dentro de un mensaje")
+            received += count
+        return view
+
+
+class FrameReader(_BufferedReader):
+    """Lee mensajes 'Content-Length: N\\r\\n\\r\\n<N bytes>' de un flujo binario."""
+
+    def _read_length(self) -> Optional[int]:
+        """
+        Lee las cabeceras de un mensaje.
+
+        Returns:
+            Longitud del cuerpo, None si el flujo terminó entre mensajes.
+
+        Raises:
+            FramingError: Si las cabeceras no son válidas.
+        """
+        length = None
+        headers = False
+        while True:
+            line = self._stream.readline(MAX_HEADER_LINE)
+            if not line:
+                if headers:
+                    raise FramingError("Fin de la entrada dentro de las cabeceras")
+                return None
+            if line in (b'\r\n', b'\n'):
+                if not headers:
+                    # Líneas vacías entre mensajes
+                    continue
+                if length is None:
+                    raise FramingError("Falta la cabecera Content-Length")
+                return length
+            if not line.endswith(b'\n'):
+                raise FramingError("Línea de cabecera demasiado larga")
+
+            name, separator, value = line.partition(b':')
+            if not separator:
+                raise FramingError(f"Cabecera inválida: {line!r}")
+            headers = True
+            if name.strip().lower() == CONTENT_LENGTH:
+                try:
+                    length = int(value.strip())
+                except ValueError:
+                    raise FramingError(f"Content-Length inválido: {value.strip()!r}")
+                if length < 0:
+                    raise FramingError(f"Content-Length fuera de rango: {length}")
+
+
+class LengthPrefixedReader(_BufferedReader):
+    """Lee mensajes binarios precedidos por su longitud (uint32 big-endian)."""
+
+    def _read_length(self) -> Optional[int]:
+        """
+        Lee el prefijo de longitud de un mensaje.
+
+        Returns:
+            Longitud del cuerpo, None si el flujo terminó entre mensajes.
+
+        Raises:
+            FramingError: Si el prefijo está truncado.
+        """
+        prefix = self._stream.read(LENGTH_PREFIX.size)
+        if not prefix:
+            return None
+        while len(prefix) < LENGTH_PREFIX.size:
+            more = self._stream.read(LENGTH_PREFIX.size - len(prefix))
+            if not more:
+                raise FramingError("Fin de la entrada dentro del prefijo de longitud")
+            prefix += more
+        return LENGTH_PREFIX.unpack(prefix)[0]
+
+
+class FrameWriter:
+    """Escribe mensajes con cabecera Content-Length en un flujo binario."""
+
+    def __init__(self, stream: BinaryIO):
+        """
+        Inicializa el escritor.
+
+        Args:
+            stream: Flujo binario de salida (ej: sys.stdout.buffer).
+        """
+        self._stream = stream
+
+    def write(self, payload: bytes) -> None:
+        """
+        Escribe un mensaje y vacía el flujo.
+
+        Args:
+            payload: Cuerpo del mensaje.
+        """
+        stream = self._stream
+        stream.write(b'Content-Length: %d\r\n\r\n' % len(payload))
+        stream.write(payload)
+        stream.flush()
+
+
+class LengthPrefixedWriter:
+    """Escribe mensajes binarios precedidos por su longitud (uint32 big-endian)."""
+
+    def __init__(self, stream: BinaryIO):
+        """
+        Inicializa el escritor.
+
+        Args:
+            stream: Flujo binario de salida (ej: sys.stdout.buffer).
+        """
+        self._stream = stream
+
+    def write(self, payload: bytes) -> None:
+        """
+        Escribe un mensaje y vacía el flujo.
+
+        Args:
+            payload: Cuerpo del mensaje.
+        """
+        stream = self._stream
+        stream.write(LENGTH_PREFIX.pack(len(payload)))
+        stream.write(payload)
+        stream.flush()
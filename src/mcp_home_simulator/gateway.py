@@ -0,0 +1,677 @@
+"""Pasarela HTTP/1.1 (asyncio) que expone las tools y los cambios del simulador."""
+
+import asyncio
+import gzip
+import json
+import os
+import time
+from email.utils import formatdate
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote
+
+from .client import AsyncHomeClient, HomeClient
+from .feed import DEFAULT_MAX_PENDING, ChangeFeed, delta_payload
+from .tools import READ_ONLY_TOOLS
+
+
+# Dirección y puerto por defecto de la pasarela
+DEFAULT_HTTP_HOST = '127.0.0.1'
+DEFAULT_HTTP_PORT = 8080
+
+# Tamaño máximo de la línea de petición más las cabeceras, y del cuerpo (bytes)
+MAX_HEADER_SIZE = 64 * 1024
+MAX_BODY_SIZE = 1 << 20
+
+# Segundos que una conexión persistente puede estar inactiva antes de cerrarse
+KEEPALIVE_TIMEOUT = 15.0
+
+# Tamaño mínimo de un cuerpo para comprimirlo con gzip, y nivel de compresión
+# (el más rápido: los snapshots grandes se comprimen igualmente bien)
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 1
+
+# Número máximo de cuerpos cacheados por versión del estado
+MAX_CACHED_BODIES = 256
+
+# Prefijo de las rutas de las tools: GET /tools, GET|POST /tools/<tool>
+TOOLS_PATH = '/tools'
+
+# Ruta del flujo de cambios (Server-Sent Events)
+EVENTS_PATH = '/events'
+
+# Segundos sin cambios tras los que el flujo envía un comentario (detecta
+# clientes desconectados y mantiene abiertos los proxies)
+HEARTBEAT_INTERVAL = 15.0
+
+# Frases de estado de las respuestas que genera la pasarela
+STATUS_REASONS = {
+    100: 'Continue',
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    431: 'Request Header Fields Too Large',
+    501: 'Not Implemented',
+    505: 'HTTP Version Not Supported',
+}
+
+# Cabeceras de cada respuesta: (estado, cabeceras adicionales, cuerpo)
+Response = Tuple[int, List[Tuple[str, str]], bytes]
+
+
+class HTTPError(Exception):
+    """Petición HTTP que no se puede atender; se responde con 'status'."""
+
+    def __init__(self, status: int, message: str, headers: Tuple[Tuple[str, str], ...] = ()):
+        """
+        Inicializa el error.
+
+        Args:
+            status: Código de estado HTTP.
+            message: Descripción del error (va en el cuerpo JSON).
+            headers: Cabeceras adicionales de la respuesta (p. ej. Allow).
+        """
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = list(headers)
+
+
+class Request:
+    """Petición HTTP ya leída de la conexión."""
+
+    def __init__(self, method: str, target: str, version: str,
+                 headers: Dict[str, str], body: bytes = b''):
+        """
+        Inicializa la petición.
+
+        Args:
+            method: Método (GET, HEAD, POST...).
+            target: Ruta con la consulta ('/tools/x?a=1').
+            version: Versión del protocolo ('HTTP/1.1').
+            headers: Cabeceras, con los nombres en minúsculas.
+            body: Cuerpo de la petición.
+        """
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        self.body = body
+        path, _, self.query = target.partition('?')
+        self.path = unquote(path)
+
+    @property
+    def keep_alive(self) -> bool:
+        """Indica si la conexión sigue abierta tras responder."""
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return 'keep-alive' in connection
+        return 'close' not in connection
+
+
+def parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+    """
+    Analiza la línea de petición y las cabeceras.
+
+    Args:
+        head: Bytes hasta la línea vacía (incluida).
+
+    Returns:
+        Tupla (método, destino, versión, cabeceras en minúsculas).
+
+    Raises:
+        HTTPError: Si la petición está mal formada o la versión no es 1.x.
+    """
+    try:
+        lines = head.decode('latin-1').split('\r\n')
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise HTTPError(400, "Línea de petición inválida")
+    if not version.startswith('HTTP/1.'):
+        raise HTTPError(505, f"Versión no soportada: {version}")
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(':')
+        if not sep or not name or name != name.strip():
+            raise HTTPError(400, f"Cabecera inválida: {line!r}")
+        name = name.lower()
+        value = value.strip()
+        headers[name] = f"{headers[name]}, {value}" if name in headers else value
+    return method, target, version, headers
+
+
+def parse_query(query: str, properties: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Convierte la consulta de una URL en argumentos de una tool.
+
+    Los argumentos declarados de tipo 'string' en el input_schema se toman
+    tal cual (?group=2024 → {'group': '2024'}). El resto de valores se
+    interpretan como JSON si es válido (números, booleanos, listas) y, si
+    no, como texto: ?group=planta&limit=5 → {'group': 'planta', 'limit': 5}.
+
+    Args:
+        query: Consulta sin el '?'.
+        properties: Propiedades del input_schema de la tool (None = ninguna).
+
+    Returns:
+        Diccionario de argumentos.
+    """
+    properties = properties or {}
+    args: Dict[str, Any] = {}
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        if (properties.get(key) or {}).get('type') == 'string':
+            args[key] = value
+            continue
+        try:
+            args[key] = json.loads(value)
+        except ValueError:
+            args[key] = value
+    return args
+
+
+def accepts_gzip(header: str) -> bool:
+    """
+    Indica si una cabecera Accept-Encoding admite gzip.
+
+    Args:
+        header: Valor de la cabecera ('' si no se envió).
+
+    Returns:
+        True si 'gzip' (o '*') aparece con un peso distinto de 0.
+    """
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        if coding.strip().lower() not in ('gzip', '*'):
+            continue
+        name, _, weight = params.partition('=')
+        if name.strip().lower() != 'q':
+            return True
+        try:
+            return float(weight) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """
+    Compara una cabecera If-None-Match con un ETag (comparación débil).
+
+    Args:
+        header: Valor de If-None-Match.
+        etag: ETag actual del recurso.
+
+    Returns:
+        True si alguna etiqueta coincide o la cabecera es '*'.
+    """
+    if header.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for tag in header.split(','):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith('W/') else tag) == opaque:
+            return True
+    return False
+
+
+def _json_body(value: Any) -> bytes:
+    """Serializa un valor como cuerpo JSON."""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _sse_event(event: str, version: int, data: Any) -> bytes:
+    """Serializa un evento Server-Sent Events (el JSON compacto no lleva saltos de línea)."""
+    return b'event: %s\nid: %d\ndata: %s\n\n' % (event.encode('ascii'), version, _json_body(data))
+
+
+class HTTPGateway:
+    """
+    Servidor HTTP/1.1 sobre asyncio que expone las tools de MCPTools.
+
+    Rutas:
+        GET /tools                 → {tools: [definiciones]}
+        GET|HEAD /tools/<tool>?... → tools de solo lectura, argumentos en la consulta
+        POST /tools/<tool>         → cualquier tool, argumentos en un cuerpo JSON
+
+    Las respuestas son el resultado de la tool (200) o su error (400; 404
+    si la tool no existe). Las conexiones son persistentes y admiten
+    peticiones encadenadas (pipelining), que se responden en orden. Las
+    tools cacheables llevan un ETag débil derivado de la versión del
+    estado: un If-None-Match coincidente se responde con 304 sin ejecutar
+    la tool, y los cuerpos se guardan (también comprimidos) hasta la
+    siguiente mutación.
+
+    GET /events abre un flujo Server-Sent Events con un snapshot inicial
+    y después deltas con solo lo que cambió (ver stream_events).
+    """
+
+    def __init__(self, client: HomeClient, host: str = DEFAULT_HTTP_HOST,
+                 port: int = DEFAULT_HTTP_PORT, max_pending: int = DEFAULT_MAX_PENDING):
+        """
+        Inicializa la pasarela.
+
+        Args:
+            client: Cliente en proceso sobre el estado a exponer.
+            host: Dirección en la que escuchar.
+            port: Puerto (0 = uno libre).
+            max_pending: Cambios pendientes por cliente del flujo antes de
+                reenviarle un snapshot completo.
+        """
+        self.client = AsyncHomeClient(client=client)
+        self.tools = client.tools
+        definitions = self.tools.get_tool_definitions()
+        self.tool_names = frozenset(definitions)
+        # Propiedades del input_schema de cada tool (tipos de la consulta)
+        self._properties = {name: definition['input_schema'].get('properties', {})
+                            for name, definition in definitions.items()}
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.feed = ChangeFeed(client.state, max_pending)
+
+        # Identificador de esta instancia en los ETag: las versiones de otro
+        # proceso (o de otro estado) no deben coincidir
+        self._etag_prefix = os.urandom(4).hex()
+
+        # Respuestas de las tools cacheables para la versión _bodies_version:
+        # {(tool, consulta, gzip): (cabeceras sin el ETag, cuerpo)}
+        self._bodies: Dict[Tuple[str, str, bool], Tuple[List[Tuple[str, str]], bytes]] = {}
+        self._bodies_version = -1
+
+        # Cabecera Date, regenerada como mucho una vez por segundo
+        self._date_second = 0
+        self._date = ''
+
+        self.connections = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.body_hits = 0
+        self.gzipped = 0
+        self.frames = 0
+
+    # ==================== CICLO DE VIDA ====================
+
+    async def start(self) -> 'HTTPGateway':
+        """
+        Empieza a aceptar conexiones.
+
+        Returns:
+            La propia pasarela (con 'port' resuelto si era 0).
+        """
+        self._server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port, limit=MAX_HEADER_SIZE)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self) -> None:
+        """Atiende conexiones hasta que se cancele la tarea."""
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Deja de aceptar conexiones y espera a que se cierre el socket."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self.client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas de la pasarela.
+
+        Returns:
+            Diccionario con connections, requests, not_modified, body_hits,
+            gzipped y events (flujos: subscribers, frames, coalesced,
+            overflows).
+        """
+        return {
+            'connections': self.connections,
+            'requests': self.requests,
+            'not_modified': self.not_modified,
+            'body_hits': self.body_hits,
+            'gzipped': self.gzipped,
+            'events': dict(self.feed.stats(), frames=self.frames),
+        }
+
+    # ==================== CONEXIONES ====================
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        """
+        Atiende las peticiones de una conexión, en orden, hasta que se cierre.
+
+        Args:
+            reader: Flujo de entrada de la conexión.
+            writer: Flujo de salida de la conexión.
+        """
+        self.connections += 1
+        loop = asyncio.get_running_loop()
+        idle = None
+        try:
+            while True:
+                # Una conexión inactiva se cierra; el cierre interrumpe la lectura
+                idle = loop.call_later(KEEPALIVE_TIMEOUT, writer.close)
+                try:
+                    request = await self.read_request(reader, writer)
+                except HTTPError as e:
+                    self._send(writer, (e.status, e.headers, _json_body(
+                        {'ok': False, 'error': e.message})), 'GET', False)
+                    break
+                finally:
+                    idle.cancel()
+                if request is None:
+                    break
+                self.requests += 1
+                if request.path == EVENTS_PATH and request.method == 'GET':
+                    await self.stream_events(request, reader, writer)
+                    break
+                try:
+                    response = await self.dispatch(request)
+                except HTTPError as e:
+                    response = (e.status, e.headers, _json_body({'ok': False, 'error': e.message}))
+                keep_alive = request.keep_alive
+                self._send(writer, response, request.method, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader: asyncio.StreamReader,
+                           writer: asyncio.StreamWriter) -> Optional[Request]:
+        """
+        Lee una petición completa de la conexión.
+
+        Args:
+            reader: Flujo de entrada.
+            writer: Flujo de salida (para el '100 Continue').
+
+        Returns:
+            Petición, None si la conexión se cerró entre peticiones.
+
+        Raises:
+            HTTPError: Si la petición no es válida o es demasiado grande.
+        """
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HTTPError(400, "Petición incompleta")
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "Cabeceras demasiado grandes")
+        method, target, version, headers = parse_head(head)
+
+        if 'transfer-encoding' in headers:
+            raise HTTPError(501, "Transfer-Encoding no soportado en peticiones")
+        length = headers.get('content-length')
+        if length is None:
+            if method == 'POST':
+                raise HTTPError(411, "Falta Content-Length")
+            return Request(method, target, version, headers)
+        if not length.isdigit():
+            raise HTTPError(400, f"Content-Length inválido: {length}")
+        size = int(length)
+        if size > MAX_BODY_SIZE:
+            raise HTTPError(413, f"Cuerpo demasiado grande (máximo {MAX_BODY_SIZE} bytes)")
+        if headers.get('expect', '').lower() == '100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+        body = await reader.readexactly(size) if size else b''
+        return Request(method, target, version, headers, body)
+
+    def _send(self, writer: asyncio.StreamWriter, response: Response,
+              method: str, keep_alive: bool) -> None:
+        """
+        Escribe una respuesta en la conexión.
+
+        Args:
+            writer: Flujo de salida.
+            response: (estado, cabeceras adicionales, cuerpo).
+            method: Método de la petición (HEAD no lleva cuerpo).
+            keep_alive: False para anunciar el cierre de la conexión.
+        """
+        status, headers, body = response
+        lines = []
+        if status != 304:
+            lines.append('Content-Type: application/json; charset=utf-8')
+            lines.append(f"Content-Length: {len(body)}")
+        lines.extend(f"{name}: {value}" for name, value in headers)
+        if not keep_alive:
+            lines.append('Connection: close')
+        head = self._head(status, lines)
+        if method == 'HEAD' or status == 304:
+            writer.write(head)
+        else:
+            writer.write(head + body)
+
+    def _head(self, status: int, lines: List[str]) -> bytes:
+        """Construye la línea de estado y las cabeceras (con Date) de una respuesta."""
+        second = int(time.time())
+        if second != self._date_second:
+            self._date_second = second
+            self._date = formatdate(second, usegmt=True)
+        lines = [f"HTTP/1.1 {status} {STATUS_REASONS.get(status, '')}",
+                 f"Date: {self._date}"] + lines
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    # ==================== FLUJO DE CAMBIOS ====================
+
+    async def _snapshot(self) -> Tuple[int, bytes]:
+        """Obtiene el snapshot completo del estado como evento SSE."""
+        version, response = await self.client.request_versioned('get_all_states')
+        return version, _sse_event('snapshot', version, dict(response['result'], version=version))
+
+    async def stream_events(self, request: Request, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+        """
+        Envía los cambios del estado como Server-Sent Events hasta que el cliente se desconecte.
+
+        El primer evento ('snapshot') es el estado completo con su versión.
+        Después, cada evento 'delta' lleva solo las luces, la alarma o la
+        presencia que cambiaron, fusionadas por clave mientras el cliente
+        no las lee. Un cliente lento no hace crecer la memoria: su
+        escritura espera (drain) y, mientras, sus cambios se fusionan; si
+        acumula más de max_pending claves se descartan y recibe un nuevo
+        snapshot. La consulta admite interval_ms: tiempo mínimo entre
+        eventos, para agrupar ráfagas de cambios en un solo delta.
+
+        Args:
+            request: Petición GET /events.
+            reader: Flujo de entrada (solo para detectar la desconexión).
+            writer: Flujo de salida.
+        """
+        interval = parse_query(request.query).get('interval_ms', 0)
+        interval = interval / 1000.0 if isinstance(interval, (int, float)) and interval > 0 else 0
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        subscriber = self.feed.subscribe(lambda: loop.call_soon_threadsafe(ready.set))
+        closed = asyncio.ensure_future(reader.read())
+        waiter = None
+        try:
+            sent, snapshot = await self._snapshot()
+            writer.write(self._head(200, [
+                'Content-Type: text/event-stream; charset=utf-8',
+                'Cache-Control: no-cache',
+                'Connection: close']) + snapshot)
+            self.frames += 1
+            await writer.drain()
+            while not closed.done():
+                if waiter is None:
+                    waiter = asyncio.ensure_future(ready.wait())
+                done, _ = await asyncio.wait({waiter, closed}, timeout=HEARTBEAT_INTERVAL,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if closed.done():
+                    break
+                if not done:
+                    writer.write(b': ping\n\n')
+                    await writer.drain()
+                    continue
+                waiter = None
+                ready.clear()
+                item = subscriber.take(sent)
+                if item is None:
+                    continue
+                kind, version, changes = item
+                if kind == 'resync':
+                    sent, frame = await self._snapshot()
+                else:
+                    sent, frame = version, _sse_event('delta', version, delta_payload(version, changes))
+                writer.write(frame)
+                self.frames += 1
+                await writer.drain()
+                if interval:
+                    await asyncio.sleep(interval)
+        finally:
+            subscriber.close()
+            closed.cancel()
+            if waiter is not None:
+                waiter.cancel()
+
+    # ==================== RUTAS ====================
+
+    async def dispatch(self, request: Request) -> Response:
+        """
+        Atiende una petición según su ruta y su método.
+
+        Args:
+            request: Petición leída.
+
+        Returns:
+            (estado, cabeceras adicionales, cuerpo).
+
+        Raises:
+            HTTPError: Si la ruta o el método no existen o el cuerpo no es válido.
+        """
+        path = request.path
+        if path == TOOLS_PATH or path == TOOLS_PATH + '/':
+            if request.method not in ('GET', 'HEAD'):
+                raise HTTPError(405, "Método no permitido", (('Allow', 'GET, HEAD'),))
+            return 200, [], _json_body({'tools': list(self.tools.get_tool_definitions().values())})
+
+        if path == EVENTS_PATH:
+            raise HTTPError(405, "Método no permitido", (('Allow', 'GET'),))
+        if not path.startswith(TOOLS_PATH + '/'):
+            raise HTTPError(404, f"Ruta no encontrada: {path}")
+        tool = path[len(TOOLS_PATH) + 1:]
+        if tool not in self.tool_names:
+            raise HTTPError(404, f"Tool '{tool}' no encontrada")
+
+        if request.method == 'POST':
+            args = self._body_args(request)
+            return self._tool_response(await self.client.request(tool, args), request)
+        if request.method not in ('GET', 'HEAD'):
+            raise HTTPError(405, "Método no permitido", (('Allow', 'GET, HEAD, POST'),))
+        if tool not in READ_ONLY_TOOLS:
+            raise HTTPError(405, f"La tool '{tool}' modifica el estado: usa POST",
+                            (('Allow', 'POST'),))
+        args = parse_query(request.query, self._properties[tool])
+        if self.tools.is_cacheable(tool):
+            return await self._cached_get(tool, args, request)
+        return self._tool_response(await self.client.request(tool, args), request)
+
+    @staticmethod
+    def _body_args(request: Request) -> Dict[str, Any]:
+        """
+        Obtiene los argumentos de una tool del cuerpo JSON de la petición.
+
+        Raises:
+            HTTPError: Si el cuerpo no es un objeto JSON.
+        """
+        if not request.body.strip():
+            return {}
+        try:
+            args = json.loads(request.body)
+        except ValueError as e:
+            raise HTTPError(400, f"JSON inválido: {e}")
+        if not isinstance(args, dict):
+            raise HTTPError(400, "El cuerpo debe ser un objeto JSON con los argumentos")
+        return args
+
+    def _tool_response(self, response: Dict[str, Any], request: Request) -> Response:
+        """Convierte un mensaje de respuesta de HomeClient en una respuesta HTTP."""
+        if response['ok']:
+            return self._encode(200, response['result'], request)
+        return 400, [], _json_body({'ok': False, 'error': response['error']})
+
+    def _encode(self, status: int, value: Any, request: Request,
+                headers: Optional[List[Tuple[str, str]]] = None) -> Response:
+        """Serializa un resultado y lo comprime si es grande y el cliente lo admite."""
+        headers = headers if headers is not None else []
+        body = _json_body(value)
+        if len(body) >= GZIP_MIN_SIZE:
+            headers.append(('Vary', 'Accept-Encoding'))
+            if accepts_gzip(request.headers.get('accept-encoding', '')):
+                body = gzip.compress(body, GZIP_LEVEL, mtime=0)
+                headers.append(('Content-Encoding', 'gzip'))
+                self.gzipped += 1
+        return status, headers, body
+
+    async def _cached_get(self, tool: str, args: Dict[str, Any], request: Request) -> Response:
+        """
+        Atiende la lectura de una tool cacheable con ETag y caché de cuerpos.
+
+        El resultado de estas tools depende solo de la versión del estado,
+        así que la versión identifica la representación.
+
+        Args:
+            tool: Tool cacheable.
+            args: Argumentos de la consulta.
+            request: Petición (If-None-Match, Accept-Encoding).
+
+        Returns:
+            (estado, cabeceras adicionales, cuerpo).
+        """
+        state = self.client.state
+        version = state.version
+        etag = f'W/"{self._etag_prefix}-{version}"'
+        if etag_matches(request.headers.get('if-none-match', ''), etag):
+            self.not_modified += 1
+            return 304, [('ETag', etag), ('Cache-Control', 'no-cache')], b''
+
+        gzip_ok = accepts_gzip(request.headers.get('accept-encoding', ''))
+        key = (tool, request.query, gzip_ok)
+        cached = self._bodies.get(key) if self._bodies_version == version else None
+        if cached is not None:
+            self.body_hits += 1
+            headers, body = cached
+            return 200, [('ETag', etag), ('Cache-Control', 'no-cache')] + headers, body
+
+        version, response = await self.client.request_versioned(tool, args)
+        if not response['ok']:
+            return self._tool_response(response, request)
+        status, headers, body = self._encode(200, response['result'], request)
+        if version > self._bodies_version:
+            self._bodies.clear()
+            self._bodies_version = version
+        if version == self._bodies_version and len(self._bodies) < MAX_CACHED_BODIES:
+            self._bodies[key] = (headers, body)
+        etag = f'W/"{self._etag_prefix}-{version}"'
+        return status, [('ETag', etag), ('Cache-Control', 'no-cache')] + headers, body
+
+
+async def serve_http(config_path: str = "config.yaml", host: str = DEFAULT_HTTP_HOST,
+                     port: int = DEFAULT_HTTP_PORT) -> None:
+    """
+    Crea la pasarela sobre un estado nuevo y atiende peticiones indefinidamente.
+
+    Args:
+        config_path: Ruta al archivo de configuración.
+        host: Dirección en la que escuchar.
+        port: Puerto.
+    """
+    gateway = await HTTPGateway(HomeClient(config_path), host, port).start()
+    print(f"🌐 Pasarela HTTP escuchando en http://{gateway.host}:{gateway.port}{TOOLS_PATH}",
+          flush=True)
+    try:
+        await gateway.serve_forever()
+    finally:
+        await gateway.close()
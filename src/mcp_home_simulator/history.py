@@ -0,0 +1,185 @@
+"""Historial de presencia en un buffer circular ordenado por tiempo."""
+
+from array import array
+from typing import Dict, List, Optional, Any, Sequence
+
+
+# Tipos de evento de presencia
+PRESENCE_EVENTS = ('set', 'add', 'remove', 'clear')
+
+# Capacidad por defecto del historial de presencia
+DEFAULT_PRESENCE_CAPACITY = 10000
+
+# Tamaño máximo de página en las consultas
+MAX_PAGE_SIZE = 1000
+
+
+class PresenceHistory:
+    """
+    Buffer circular acotado con los eventos de presencia.
+
+    Los eventos se añaden en orden de tiempo simulado (no decreciente), por
+    lo que las consultas por rango localizan sus extremos con búsqueda
+    binaria sobre los timestamps. Al llenarse, cada evento nuevo sustituye
+    al más antiguo. Los timestamps y tipos se guardan en arrays compactos.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_PRESENCE_CAPACITY):
+        """
+        Inicializa el historial.
+
+        Args:
+            capacity: Número máximo de eventos retenidos.
+        """
+        if capacity <= 0:
+            raise ValueError("La capacidad del historial debe ser mayor que 0")
+        self.capacity = capacity
+        self._times = array('d', bytes(8 * capacity))
+        self._events = array('B', bytes(capacity))
+        self._people: List[Optional[Sequence[str]]] = [None] * capacity
+        self._present = array('B', bytes(capacity))
+        self._head = 0
+        self._size = 0
+        # Número total de eventos registrados (seq del próximo evento)
+        self._seq = 0
+
+    def __len__(self) -> int:
+        """Obtiene el número de eventos retenidos."""
+        return self._size
+
+    @property
+    def total_recorded(self) -> int:
+        """Obtiene el número total de eventos registrados (incluye descartados)."""
+        return self._seq
+
+    def append(self, time: float, event: str, people: Sequence[str],
+               present: bool) -> None:
+        """
+        Registra un evento de presencia.
+
+        Args:
+            time: Instante simulado del evento.
+            event: Tipo de evento ('set', 'add', 'remove' o 'clear').
+            people: Personas afectadas por el evento.
+            present: Valor de 'present' tras el evento.
+
+        Raises:
+            ValueError: Si el evento es anterior al último registrado.
+        """
+        if self._size and time < self._time_at(self._size - 1):
+            raise ValueError("Los eventos deben registrarse en orden de tiempo")
+
+        head = self._head
+        self._times[head] = time
+        self._events[head] = PRESENCE_EVENTS.index(event)
+        self._people[head] = tuple(people)
+        self._present[head] = 1 if present else 0
+
+        self._head = (head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        self._seq += 1
+
+    def _physical(self, index: int) -> int:
+        """
+        Convierte un índice lógico (0 = más antiguo) en posición del buffer.
+
+        Args:
+            index: Índice lógico.
+
+        Returns:
+            Posición física en los arrays.
+        """
+        return (self._head - self._size + index) % self.capacity
+
+    def _time_at(self, index: int) -> float:
+        """Obtiene el timestamp del evento con índice lógico dado."""
+        return self._times[self._physical(index)]
+
+    def _bisect(self, time: float, right: bool) -> int:
+        """
+        Busca por bisección la posición lógica de un instante.
+
+        Args:
+            time: Instante a buscar.
+            right: False para el primer evento >= time, True para el primero > time.
+
+        Returns:
+            Índice lógico (entre 0 y el número de eventos).
+        """
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            value = self._time_at(middle)
+            if value < time or (right and value == time):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _entry(self, index: int) -> Dict[str, Any]:
+        """Construye el diccionario de un evento a partir de su índice lógico."""
+        position = self._physical(index)
+        return {
+            'seq': self._seq - self._size + index,
+            'time': self._times[position],
+            'event': PRESENCE_EVENTS[self._events[position]],
+            'people': list(self._people[position]),
+            'present': bool(self._present[position]),
+        }
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None,
+              offset: int = 0, limit: int = 100,
+              newest_first: bool = False) -> Dict[str, Any]:
+        """
+        Consulta los eventos de un rango de tiempo con paginación.
+
+        Args:
+            since: Instante inicial incluido (None = desde el más antiguo).
+            until: Instante final incluido (None = hasta el más reciente).
+            offset: Número de eventos del rango a saltar.
+            limit: Tamaño máximo de la página.
+            newest_first: True para recorrer el rango del más reciente al más antiguo.
+
+        Returns:
+            Diccionario con 'entries', 'total' (eventos del rango) y
+            'next_offset' (None si no hay más páginas).
+
+        Raises:
+            ValueError: Si los parámetros de paginación no son válidos.
+        """
+        if offset < 0 or limit <= 0:
+            raise ValueError("'offset' debe ser >= 0 y 'limit' mayor que 0")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+        first = 0 if since is None else self._bisect(since, right=False)
+        end = self._size if until is None else self._bisect(until, right=True)
+        total = max(end - first, 0)
+
+        if newest_first:
+            indexes = range(end - 1 - offset,
+                            max(end - 1 - offset - limit, first - 1), -1)
+        else:
+            indexes = range(first + offset, min(first + offset + limit, end))
+
+        entries = [self._entry(index) for index in indexes]
+        next_offset = offset + len(entries)
+        return {
+            'entries': entries,
+            'total': total,
+            'next_offset': next_offset if next_offset < total else None,
+        }
+
+    def last(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Obtiene los últimos eventos, del más antiguo al más reciente.
+
+        Args:
+            count: Número de eventos.
+
+        Returns:
+            Lista de eventos.
+        """
+        count = max(0, min(count, self._size))
+        return [self._entry(index)
+                for index in range(self._size - count, self._size)]
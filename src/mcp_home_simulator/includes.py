@@ -0,0 +1,293 @@
+"""Composición de la configuración a partir de fragmentos con 'include:'."""
+
+import glob
+import hashlib
+import marshal
+import os
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .loaders import config_format, load_config_file
+
+
+# Clave de la configuración con los fragmentos a incluir
+INCLUDE_KEY = 'include'
+
+# Directorio (junto al archivo principal) donde se guardan los fragmentos ya parseados
+CACHE_DIR_NAME = '.mcp_cache'
+
+# Número máximo de fragmentos parseados retenidos en memoria
+DEFAULT_FRAGMENT_CACHE_CAPACITY = 256
+
+# Versión del formato de los fragmentos cacheados (cambiarla invalida los archivos)
+_CACHE_VERSION = 1
+
+# Etiqueta de los archivos de la caché persistente: el formato de marshal no
+# es estable entre versiones del intérprete
+_CACHE_TAG = f"py{sys.version_info[0]}{sys.version_info[1]}-m{marshal.version}"
+
+# Bytes leídos en cada bloque al calcular el hash de un archivo
+_HASH_BLOCK = 1 << 20
+
+
+def file_digest(path: Path) -> str:
+    """
+    Calcula el hash SHA-256 del contenido de un archivo por bloques.
+
+    Args:
+        path: Ruta del archivo.
+
+    Returns:
+        Hash en hexadecimal.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FragmentCache:
+    """
+    Caché de fragmentos de configuración parseados, por hash de contenido.
+
+    La clave es el hash SHA-256 del archivo junto con su formato, de modo
+    que un fragmento sin cambios no se vuelve a parsear aunque se haya
+    modificado otro. Los resultados se guardan serializados con marshal:
+    cada consulta devuelve una copia nueva que se puede modificar al
+    fusionar. Además de la memoria (LRU acotada), se pueden guardar en un
+    directorio para reutilizarlos en el siguiente arranque.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_FRAGMENT_CACHE_CAPACITY):
+        """
+        Inicializa la caché.
+
+        Args:
+            capacity: Número máximo de fragmentos retenidos en memoria.
+        """
+        if capacity <= 0:
+            raise ValueError("La capacidad de la caché de fragmentos debe ser mayor que 0")
+        self.capacity = capacity
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Obtiene el número de fragmentos retenidos en memoria."""
+        return len(self._entries)
+
+    def load(self, path: Path, directory: Optional[Path] = None) -> Tuple[Any, bool]:
+        """
+        Carga un fragmento, parseándolo solo si su contenido no está en caché.
+
+        Args:
+            path: Ruta del fragmento.
+            directory: Directorio de la caché persistente (None = solo memoria).
+
+        Returns:
+            Tupla (configuración, True si 'lights' ya está normalizada),
+            como load_config_file.
+
+        Raises:
+            ValueError: Si el contenido no es válido.
+        """
+        key = f"{file_digest(path)}.{config_format(path)}.{_CACHE_TAG}"
+        blob = self._entries.get(key)
+        if blob is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return marshal.loads(blob)
+
+        blob = self._read_disk(directory, key)
+        if blob is not None:
+            try:
+                result = marshal.loads(blob)
+            except (EOFError, ValueError, TypeError):
+                result = None
+            if isinstance(result, tuple) and len(result) == 2:
+                self.disk_hits += 1
+                self._remember(key, blob)
+                return result
+            # Archivo truncado o corrupto: se descarta y se vuelve a parsear
+            self._remove_disk(directory, key)
+
+        self.misses += 1
+        result = load_config_file(path)
+        try:
+            blob = marshal.dumps(result)
+        except ValueError:
+            # Tipos sin representación en marshal (p. ej. fechas de YAML): sin caché
+            return result
+        self._remember(key, blob)
+        self._write_disk(directory, key, blob)
+        return result
+
+    def _remember(self, key: str, blob: bytes) -> None:
+        """Guarda un fragmento serializado en memoria, descartando el menos usado."""
+        self._entries[key] = blob
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _read_disk(directory: Optional[Path], key: str) -> Optional[bytes]:
+        """Lee un fragmento de la caché persistente (None si no está o es de otra versión)."""
+        if directory is None:
+            return None
+        try:
+            data = (directory / key).read_bytes()
+        except OSError:
+            return None
+        if data[:1] != bytes([_CACHE_VERSION]):
+            return None
+        return data[1:]
+
+    @staticmethod
+    def _remove_disk(directory: Path, key: str) -> None:
+        """Elimina un fragmento de la caché persistente; los errores se ignoran."""
+        try:
+            (directory / key).unlink()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _write_disk(directory: Optional[Path], key: str, blob: bytes) -> None:
+        """Escribe un fragmento en la caché persistente; los errores se ignoran."""
+        if directory is None:
+            return
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            temporary = directory / f"{key}.{os.getpid()}.tmp"
+            temporary.write_bytes(bytes([_CACHE_VERSION]) + blob)
+            os.replace(temporary, directory / key)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """Vacía la caché en memoria."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Obtiene las estadísticas de la caché.
+
+        Returns:
+            Diccionario con size, hits (memoria), disk_hits y misses (parseos).
+        """
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+        }
+
+
+def merge_config(base: Dict[str, Any], overlay: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fusiona un fragmento sobre la configuración acumulada.
+
+    Los diccionarios se fusionan recursivamente, las listas se concatenan
+    (luces, reglas, personas conocidas...) y el resto de valores del
+    fragmento sustituyen a los acumulados.
+
+    Args:
+        base: Configuración acumulada (se modifica).
+        overlay: Fragmento a fusionar.
+
+    Returns:
+        La configuración acumulada.
+    """
+    for key, value in overlay.items():
+        current = base.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            merge_config(current, value)
+        elif isinstance(current, list) and isinstance(value, list):
+            current.extend(value)
+        else:
+            base[key] = value
+    return base
+
+
+def _include_paths(value: Any, parent: Path) -> List[Path]:
+    """
+    Resuelve las rutas de una directiva 'include:'.
+
+    Args:
+        value: Ruta o lista de rutas (relativas al archivo que incluye;
+            admiten patrones glob, que se expanden en orden alfabético).
+        parent: Directorio del archivo que incluye.
+
+    Returns:
+        Rutas de los fragmentos, en orden.
+
+    Raises:
+        ValueError: Si la directiva no es válida o un fragmento no existe.
+    """
+    entries = [value] if isinstance(value, str) else value
+    if not isinstance(entries, list) or not all(isinstance(e, str) and e for e in entries):
+        raise ValueError(f"'{INCLUDE_KEY}' debe ser una ruta o una lista de rutas")
+    paths: List[Path] = []
+    for entry in entries:
+        pattern = parent / os.path.expanduser(entry)
+        if glob.has_magic(entry):
+            matches = sorted(Path(match) for match in glob.glob(str(pattern)))
+            if not matches:
+                raise ValueError(f"Ningún fragmento coincide con '{entry}'")
+            paths.extend(matches)
+        elif pattern.is_file():
+            paths.append(pattern)
+        else:
+            raise ValueError(f"Fragmento no encontrado: '{entry}'")
+    return paths
+
+
+def compose_config(path: Path, cache: FragmentCache) -> Tuple[Any, bool, List[Path]]:
+    """
+    Carga un archivo de configuración resolviendo sus 'include:'.
+
+    Los fragmentos se fusionan en el orden indicado (ver merge_config) y
+    después el propio archivo, que prevalece sobre sus fragmentos. Los
+    fragmentos pueden incluir a su vez otros, en cualquier formato. Solo se
+    parsean los fragmentos cuyo contenido cambió; los parseados se guardan
+    en CACHE_DIR_NAME junto al archivo principal.
+
+    Args:
+        path: Ruta del archivo principal.
+        cache: Caché de fragmentos parseados.
+
+    Returns:
+        Tupla (configuración, True si 'lights' ya está normalizada, rutas
+        de todos los archivos leídos).
+
+    Raises:
+        ValueError: Si algún archivo no es válido o hay una inclusión circular.
+    """
+    config, normalized = load_config_file(path)
+    files = [Path(path)]
+    if not isinstance(config, dict) or INCLUDE_KEY not in config:
+        return config, normalized, files
+
+    directory = Path(path).parent / CACHE_DIR_NAME
+
+    def expand(fragment: Dict[str, Any], source: Path, stack: Tuple[Path, ...]) -> Dict[str, Any]:
+        includes = _include_paths(fragment.pop(INCLUDE_KEY), source.parent)
+        merged: Dict[str, Any] = {}
+        for include in includes:
+            resolved = include.resolve()
+            if resolved in stack:
+                raise ValueError(f"Inclusión circular de '{include}'")
+            files.append(include)
+            child, _ = cache.load(include, directory)
+            if not isinstance(child, dict):
+                raise ValueError(f"El fragmento '{include}' debe ser un diccionario")
+            if INCLUDE_KEY in child:
+                child = expand(child, include, stack + (resolved,))
+            merge_config(merged, child)
+        return merge_config(merged, fragment)
+
+    # Las luces de varios fragmentos se vuelven a validar juntas (duplicados entre archivos)
+    return expand(config, Path(path), (Path(path).resolve(),)), False, files
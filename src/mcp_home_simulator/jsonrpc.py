@@ -0,0 +1,269 @@
+"""Modo JSON-RPC 2.0 del servidor MCP (peticiones, notificaciones y lotes)."""
+
+import json
+from typing import Dict, List, Optional, Any, Tuple
+
+
+JSONRPC_VERSION = '2.0'
+
+# Versión del protocolo MCP anunciada en 'initialize'
+MCP_PROTOCOL_VERSION = '2024-11-05'
+
+# Códigos de error JSON-RPC
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+# Error de ejecución de una tool invocada directamente por su nombre
+TOOL_ERROR = -32000
+# Petición rechazada porque la cola de entrada del servidor está llena
+SERVER_BUSY = -32001
+
+
+class JSONRPCDispatcher:
+    """
+    Traduce mensajes JSON-RPC 2.0 a llamadas de MCPTools.
+
+    Acepta los métodos de MCP ('initialize', 'tools/list', 'tools/call',
+    'ping') y, como atajo, el nombre de cualquier tool con sus argumentos en
+    'params'. Un lote (array) se procesa en una sola pasada y su respuesta
+    se serializa como un único array. Las notificaciones (mensajes sin 'id')
+    se ejecutan pero no generan respuesta ni se serializa su resultado.
+
+    Las respuestas se construyen ya serializadas, de modo que las tools de
+    solo lectura reutilizan la caché de respuestas del servidor.
+    """
+
+    def __init__(self, server: Any):
+        """
+        Inicializa el despachador.
+
+        Args:
+            server: Instancia de MCPStdioServer (tools, estado y cachés).
+        """
+        self.server = server
+        self.tools = server.tools
+
+    def handle_line(self, line: str) -> Optional[str]:
+        """
+        Procesa un mensaje JSON-RPC serializado.
+
+        Args:
+            line: Petición, notificación o lote en JSON.
+
+        Returns:
+            Respuesta serializada, None si no hay nada que responder.
+        """
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError as e:
+            return self.error(None, PARSE_ERROR, f"Error al parsear JSON: {e}")
+        return self.handle_payload(payload)
+
+    def handle_payload(self, payload: Any) -> Optional[str]:
+        """
+        Procesa un mensaje JSON-RPC ya decodificado.
+
+        Args:
+            payload: Petición (dict) o lote (list).
+
+        Returns:
+            Respuesta serializada, None si no hay nada que responder.
+        """
+        if not isinstance(payload, list):
+            return self.handle_request(payload)
+        if not payload:
+            return self.error(None, INVALID_REQUEST, "Lote vacío")
+
+        handle = self.handle_request
+        parts = [part for part in map(handle, payload) if part is not None]
+        if not parts:
+            return None
+        return '[' + ', '.join(parts) + ']'
+
+    def handle_request(self, request: Any) -> Optional[str]:
+        """
+        Procesa una petición o notificación individual.
+
+        Args:
+            request: Objeto JSON-RPC.
+
+        Returns:
+            Respuesta serializada, None si es una notificación.
+        """
+        if (not isinstance(request, dict)
+                or request.get('jsonrpc') != JSONRPC_VERSION
+                or not isinstance(request.get('method'), str)):
+            msg_id = request.get('id') if isinstance(request, dict) else None
+            return self.error(msg_id, INVALID_REQUEST, "Petición JSON-RPC inválida")
+
+        notification = 'id' not in request
+        msg_id = request.get('id')
+        method = request['method']
+        params = request.get('params', {})
+        if params is None:
+            params = {}
+        if not isinstance(params, dict):
+            if notification:
+                return None
+            return self.error(msg_id, INVALID_PARAMS,
+                              "'params' debe ser un objeto con nombre")
+
+        try:
+            payload, code, message = self.dispatch(method, params, notification)
+        except Exception as e:
+            payload, code, message = None, INTERNAL_ERROR, f"Error interno: {e}"
+
+        if notification:
+            return None
+        if code is not None:
+            return self.error(msg_id, code, message)
+        return self.result(msg_id, payload)
+
+    def dispatch(self, method: str, params: Dict[str, Any],
+                 notification: bool) -> Tuple[Optional[str], Optional[int], str]:
+        """
+        Ejecuta un método.
+
+        Args:
+            method: Nombre del método.
+            params: Parámetros con nombre.
+            notification: True si no se espera respuesta (no se serializa).
+
+        Returns:
+            Tupla (resultado serializado, código de error, mensaje de error).
+        """
+        if method == 'tools/call':
+            name = params.get('name')
+            if not isinstance(name, str):
+                return None, INVALID_PARAMS, "Falta parámetro requerido: name"
+            arguments = params.get('arguments') or {}
+            payload, error = self.call_tool(name, arguments, notification)
+            if notification:
+                return None, None, ''
+            if error is not None:
+                return self.dumps({
+                    'content': [{'type': 'text', 'text': error}],
+                    'isError': True,
+                }), None, ''
+            # Mismo formato que json.dumps() del diccionario completo
+            return ('{"content": [{"type": "text", "text": %s}], '
+                    '"structuredContent": %s, "isError": false}'
+                    % (self.dumps(payload), payload)), None, ''
+
+        if self.tools.has_tool(method):
+            payload, error = self.call_tool(method, params, notification)
+            if error is not None:
+                return None, TOOL_ERROR, error
+            return payload, None, ''
+
+        if method.startswith('notifications/'):
+            return None, None, ''
+        if notification:
+            return None, None, ''
+
+        if method == 'initialize':
+            return self.dumps(self.initialize()), None, ''
+        if method == 'tools/list':
+            return self.dumps({'tools': self.list_tools()}), None, ''
+        if method == 'ping':
+            return '{}', None, ''
+        if method == 'metrics':
+            return self.dumps(self.server.metrics()), None, ''
+        return None, METHOD_NOT_FOUND, f"Método '{method}' no encontrado"
+
+    def call_tool(self, name: str, args: Dict[str, Any],
+                  notification: bool) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Ejecuta una tool y serializa su resultado.
+
+        Args:
+            name: Nombre de la tool.
+            args: Argumentos para la tool.
+            notification: True para ejecutar sin serializar el resultado.
+
+        Returns:
+            Tupla (resultado serializado, mensaje de error).
+        """
+        if not isinstance(args, dict):
+            return None, "'arguments' debe ser un objeto"
+
+        server = self.server
+        key = None
+        if not notification and self.tools.is_cacheable(name):
+            server.state.clock.sync()
+            key = self.tools.cache_key(name, args)
+            if key is not None:
+                key = (key, 'json')
+                payload = server.responses.get(key)
+                if payload is not None:
+                    return payload, None
+
+        result = self.tools.execute_tool(name, args)
+        if isinstance(result, dict) and result.get('ok') is False:
+            return None, result.get('error', 'Error desconocido')
+        if notification:
+            return None, None
+
+        payload = self.dumps(result)
+        if key is not None:
+            server.responses.put(key, payload)
+        return payload, None
+
+    def initialize(self) -> Dict[str, Any]:
+        """Construye el resultado de 'initialize'."""
+        return {
+            'protocolVersion': MCP_PROTOCOL_VERSION,
+            'serverInfo': {'name': 'mcp-home-simulator',
+                           'version': self.server.VERSION},
+            'capabilities': {'tools': {}},
+        }
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        """Construye la lista de tools con el esquema de MCP (inputSchema)."""
+        return [
+            {
+                'name': definition['name'],
+                'description': definition['description'],
+                'inputSchema': definition['input_schema'],
+            }
+            for definition in self.tools.get_tool_definitions().values()
+        ]
+
+    def result(self, msg_id: Any, payload: str) -> str:
+        """
+        Construye una respuesta de éxito serializada.
+
+        Args:
+            msg_id: ID de la petición.
+            payload: Resultado ya serializado.
+
+        Returns:
+            Respuesta JSON-RPC serializada.
+        """
+        return ('{"jsonrpc": "2.0", "id": %s, "result": %s}'
+                % (self.dumps(msg_id), payload))
+
+    def error(self, msg_id: Any, code: int, message: str) -> str:
+        """
+        Construye una respuesta de error serializada.
+
+        Args:
+            msg_id: ID de la petición (None si no se pudo determinar).
+            code: Código de error JSON-RPC.
+            message: Descripción del error.
+
+        Returns:
+            Respuesta JSON-RPC serializada.
+        """
+        return self.dumps({
+            'jsonrpc': JSONRPC_VERSION,
+            'id': msg_id,
+            'error': {'code': code, 'message': message},
+        })
+
+    @staticmethod
+    def dumps(value: Any) -> str:
+        """Serializa un valor con el mismo formato que el resto del servidor."""
+        return json.dumps(value, ensure_ascii=False)
@@ -0,0 +1,358 @@
+"""Lectura de archivos de configuración en YAML, JSON y JSON por líneas."""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, IO, List, Optional, Set, Tuple
+
+import yaml
+
+
+# Formato de configuración según la extensión del archivo (por defecto, YAML)
+CONFIG_FORMATS = {
+    '.yaml': 'yaml', '.yml': 'yaml',
+    '.json': 'json',
+    '.ndjson': 'ndjson', '.jsonl': 'ndjson',
+}
+
+# Caracteres leídos del archivo en cada recarga del buffer de JSON
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# Espacios en blanco permitidos entre tokens JSON
+_JSON_WHITESPACE = ' \t\n\r'
+
+# Cargador YAML: la extensión en C de libyaml si está disponible
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def config_format(path: Path) -> str:
+    """
+    Obtiene el formato de un archivo de configuración por su extensión.
+
+    Args:
+        path: Ruta del archivo.
+
+    Returns:
+        'yaml', 'json' o 'ndjson'.
+    """
+    return CONFIG_FORMATS.get(Path(path).suffix.lower(), 'yaml')
+
+
+class LightCollector:
+    """
+    Valida y acumula las entradas de 'lights' en una sola pasada.
+
+    Cada entrada es un nombre o un diccionario {name, watts}. Se rechazan
+    los tipos inválidos y los nombres repetidos (que en HomeState se
+    fusionarían en una sola luz sin avisar).
+    """
+
+    def __init__(self):
+        """Inicializa el acumulador vacío."""
+        self.names: List[str] = []
+        self.watts: Dict[str, float] = {}
+        self._seen: Set[str] = set()
+
+    def add(self, entry: Any, where: str) -> None:
+        """
+        Valida una entrada y la añade.
+
+        Args:
+            entry: Entrada de la lista de luces.
+            where: Posición de la entrada para los mensajes de error.
+
+        Raises:
+            ValueError: Si la entrada no es válida o el nombre está repetido.
+        """
+        if isinstance(entry, str):
+            name = entry
+        elif isinstance(entry, dict):
+            name = entry.get('name')
+            if not isinstance(name, str) or not name:
+                raise ValueError(f"Luz sin nombre válido en {where}: {entry}")
+            if 'watts' in entry:
+                value = entry['watts']
+                if isinstance(value, bool) or not isinstance(value, (int, float)) \
+                        or value < 0:
+                    raise ValueError(
+                        f"'watts' de la luz '{name}' debe ser un número >= 0")
+                self.watts[name] = float(value)
+        else:
+            raise ValueError(f"Entrada de luz inválida en {where}: {entry!r} "
+                             f"(se esperaba un nombre o {{name, watts}})")
+        if not name:
+            raise ValueError(f"Nombre de luz vacío en {where}")
+        if name in self._seen:
+            raise ValueError(f"Luz duplicada en {where}: '{name}'")
+        self._seen.add(name)
+        self.names.append(name)
+
+    def apply(self, config: Dict[str, Any]) -> None:
+        """
+        Sustituye 'lights' por los nombres y fusiona las potencias en 'light_watts'.
+
+        Args:
+            config: Diccionario de configuración a completar.
+        """
+        config['lights'] = self.names
+        if self.watts:
+            config['light_watts'] = dict(config.get('light_watts') or {}, **self.watts)
+        self._seen = set()
+
+
+class JsonStream:
+    """
+    Lector incremental de un documento JSON sobre un archivo de texto.
+
+    Mantiene en memoria solo un buffer con el valor que se está
+    decodificando, de modo que los elementos de una lista grande se
+    obtienen uno a uno sin cargar el documento completo.
+    """
+
+    def __init__(self, stream: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Inicializa el lector.
+
+        Args:
+            stream: Archivo de texto abierto.
+            chunk_size: Caracteres a leer en cada recarga del buffer.
+        """
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        """
+        Descarta lo ya consumido y añade hasta 'size' caracteres al buffer.
+
+        Returns:
+            False si el archivo se había terminado.
+        """
+        if self._eof:
+            return False
+        data = self._stream.read(size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Salta los espacios y obtiene el siguiente carácter sin consumirlo.
+
+        Returns:
+            Carácter siguiente, '' al final del documento.
+        """
+        while True:
+            buf = self._buf
+            pos = self._pos
+            end = len(buf)
+            while pos < end and buf[pos] in _JSON_WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < end:
+                return buf[pos]
+            if not self._fill(self._chunk_size):
+                return ''
+
+    def expect(self, chars: str) -> str:
+        """
+        Consume el siguiente carácter, que debe ser uno de los indicados.
+
+        Args:
+            chars: Caracteres admitidos.
+
+        Returns:
+            Carácter consumido.
+
+        Raises:
+            ValueError: Si el carácter no es ninguno de los admitidos.
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            found = repr(char) if char else 'fin del archivo'
+            raise ValueError(f"JSON inválido: se esperaba uno de {chars!r}, "
+                             f"encontrado {found}")
+        self._pos += 1
+        return char
+
+    def value(self) -> Any:
+        """
+        Decodifica el siguiente valor JSON completo.
+
+        Si el valor no cabe en el buffer se leen bloques cada vez mayores
+        hasta que se pueda decodificar o se termine el archivo.
+
+        Returns:
+            Valor decodificado.
+
+        Raises:
+            ValueError: Si el valor no es JSON válido.
+        """
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if not self._fill(size):
+                    raise ValueError(f"JSON inválido: {e.msg}") from None
+                size *= 2
+                continue
+            # Un número al final del buffer puede continuar en el siguiente bloque
+            if end == len(self._buf) and self._fill(size):
+                continue
+            self._pos = end
+            return value
+
+
+def load_yaml(stream: IO[str]) -> Tuple[Any, bool]:
+    """
+    Carga un documento YAML completo.
+
+    Args:
+        stream: Archivo de texto abierto.
+
+    Returns:
+        Tupla (configuración, False): las luces quedan sin normalizar.
+    """
+    return yaml.load(stream, Loader=_YAML_LOADER), False
+
+
+def load_json(stream: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[Any, bool]:
+    """
+    Carga un documento JSON validando 'lights' mientras se lee.
+
+    La lista de luces se decodifica elemento a elemento, sin construir la
+    lista de entradas originales; el resto de claves se decodifican enteras.
+
+    Args:
+        stream: Archivo de texto abierto.
+        chunk_size: Caracteres a leer en cada recarga del buffer.
+
+    Returns:
+        Tupla (configuración, True si 'lights' ya está normalizada).
+
+    Raises:
+        ValueError: Si el documento no es JSON válido o alguna luz no es válida.
+    """
+    reader = JsonStream(stream, chunk_size)
+    if reader.peek() != '{':
+        config = reader.value()
+        if reader.peek():
+            raise ValueError("JSON inválido: datos tras el final del documento")
+        return config, False
+
+    reader.expect('{')
+    config: Dict[str, Any] = {}
+    collector: Optional[LightCollector] = None
+    if reader.peek() == '}':
+        reader.expect('}')
+    else:
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError("JSON inválido: las claves deben ser cadenas")
+            reader.expect(':')
+            if key == 'lights' and reader.peek() == '[':
+                if collector is not None:
+                    raise ValueError("Clave 'lights' duplicada")
+                collector = LightCollector()
+                reader.expect('[')
+                if reader.peek() == ']':
+                    reader.expect(']')
+                else:
+                    index = 0
+                    while True:
+                        collector.add(reader.value(), f"lights[{index}]")
+                        index += 1
+                        if reader.expect(',]') == ']':
+                            break
+                config['lights'] = None
+            else:
+                config[key] = reader.value()
+            if reader.expect(',}') == '}':
+                break
+    if reader.peek():
+        raise ValueError("JSON inválido: datos tras el final del documento")
+    if collector is not None:
+        collector.apply(config)
+        return config, True
+    return config, False
+
+
+def load_ndjson(stream: IO[str]) -> Tuple[Dict[str, Any], bool]:
+    """
+    Carga una lista de luces con una entrada JSON por línea.
+
+    Cada línea no vacía es un nombre ("salon") o un objeto
+    ({"name": "salon", "watts": 60}). El resto de la configuración toma
+    sus valores por defecto.
+
+    Args:
+        stream: Archivo de texto abierto.
+
+    Returns:
+        Tupla (configuración, True): las luces quedan normalizadas.
+
+    Raises:
+        ValueError: Si alguna línea no es JSON válido o la luz no es válida.
+    """
+    collector = LightCollector()
+    loads = json.loads
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            entry = loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido en la línea {number}: {e.msg}") from None
+        collector.add(entry, f"la línea {number}")
+    config: Dict[str, Any] = {}
+    collector.apply(config)
+    return config, True
+
+
+def load_config_file(path: Path) -> Tuple[Any, bool]:
+    """
+    Carga un archivo de configuración según su formato.
+
+    Args:
+        path: Ruta del archivo.
+
+    Returns:
+        Tupla (configuración, True si 'lights' ya está validada y normalizada).
+
+    Raises:
+        ValueError: Si el contenido no es válido.
+    """
+    fmt = config_format(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        if fmt == 'json':
+            return load_json(f)
+        if fmt == 'ndjson':
+            return load_ndjson(f)
+        return load_yaml(f)
+
+
+def dump_config(config: Dict[str, Any], fmt: str) -> str:
+    """
+    Serializa una configuración en el formato indicado.
+
+    Args:
+        config: Diccionario de configuración.
+        fmt: 'yaml', 'json' o 'ndjson' (solo se escriben las luces).
+
+    Returns:
+        Texto del archivo.
+    """
+    if fmt == 'json':
+        return json.dumps(config, ensure_ascii=False, indent=2) + '\n'
+    if fmt == 'ndjson':
+        return ''.join(json.dumps(light, ensure_ascii=False) + '\n'
+                       for light in config['lights'])
+    return yaml.safe_dump(config, allow_unicode=True, sort_keys=False)
@@ -1,37 +1,192 @@
 """Servidor MCP por stdio - Protocolo simplificado JSON line-delimited."""
 
+import os
 import sys
 import json
-from typing import Dict, Any, Optional
-from .tools import MCPTools
+import queue
+import threading
+import time
+from typing import Dict, Any, Optional, BinaryIO, Hashable
+from . import __version__
+from .cache import IdempotencyCache, ResponseCache
+from .dispatch import PRIORITY_CLASSES, CallQueue, PendingCall
+from .encoding import ENCODINGS, pack_map_header, packb, unpackb
+from .faults import DelayQueue, FaultInjector
+from .framing import (
+    FrameReader, FrameWriter, FramingError, LengthPrefixedReader,
+    LengthPrefixedWriter)
+from .jsonrpc import INTERNAL_ERROR, PARSE_ERROR, SERVER_BUSY, JSONRPCDispatcher
+from .recording import (
+    RECORD_IN_PACKED, RECORD_IN_TEXT, RECORD_OUT_PACKED, RECORD_OUT_TEXT, SessionRecorder)
+from .reload import ConfigWatcher
+from .shared import SHARED_READ_TOOLS, ReaderPool, SharedHomeState, SharedStateMirror
+from .tools import ALARM_TOOLS, MCPTools
 from .state import HomeState
 from .config import Config
 
 
+# Formatos de mensaje soportados: el protocolo simplificado y JSON-RPC 2.0
+PROTOCOLS = ('simple', 'jsonrpc')
+
+# Delimitación de mensajes: una línea por mensaje o cabecera Content-Length
+FRAMINGS = ('line', 'content-length')
+
+# Fragmentos fijos de un mensaje 'result' en MessagePack (antes y después del id)
+_PACKED_RESULT_HEAD = pack_map_header(4) + packb('type') + packb('result') + packb('id')
+_PACKED_RESULT_TAIL = packb('ok') + packb(True) + packb('result')
+
+
 class MCPStdioServer:
     """Servidor MCP que comunica por stdin/stdout usando JSON line-delimited."""
 
-    def __init__(self, config_path: str = "config.yaml"):
+    VERSION = __version__
+
+    def __init__(self, config_path: str = "config.yaml", protocol: str = 'simple',
+                 framing: str = 'line', workers: int = 0,
+                 record: Optional[str] = None):
         """
         Inicializa el servidor MCP.
 
         Args:
             config_path: Ruta al archivo de configuración.
+            protocol: Formato de mensajes ('simple' o 'jsonrpc').
+            framing: Delimitación de mensajes ('line' o 'content-length').
+            workers: Procesos lectores con el estado en memoria compartida
+                (0 = todo en este proceso).
+            record: Archivo donde grabar la sesión (None = sin grabación).
+
+        Raises:
+            ValueError: Si el protocolo, el framing o el número de procesos
+                no son válidos.
         """
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Protocolo desconocido: '{protocol}'")
+        if framing not in FRAMINGS:
+            raise ValueError(f"Framing desconocido: '{framing}'")
+        if workers < 0:
+            raise ValueError(f"Número de procesos lectores inválido: {workers}")
+        self.protocol = protocol
+        self.framing = framing
         self.config = Config(config_path)
         self.state = HomeState(self.config)
         self.tools = MCPTools(self.state)
         self.running = False
 
+        # Escritor de mensajes binarios (None = una línea de texto por mensaje)
+        self._writer: Optional[Any] = None
+        self._output_stream: Optional[BinaryIO] = None
+
+        # Codificación negociada con 'hello' y cambio de transporte pendiente
+        self.encoding = 'json'
+        self._switch_transport = False
+
+        # Respuestas ya enviadas, para reintentos con clave de idempotencia
+        server = self.config.server
+        self.idempotency = IdempotencyCache(server['idempotency_capacity'],
+                                            server['idempotency_ttl'])
+        self.dedupe_by_id = server['dedupe_by_id']
+
+        # Respuestas serializadas de tools de solo lectura por versión del estado
+        self.responses = ResponseCache(self.state)
+
+        # Despachador JSON-RPC 2.0 (solo en modo 'jsonrpc')
+        self.jsonrpc: Optional[JSONRPCDispatcher] = None
+        if protocol == 'jsonrpc':
+            self.jsonrpc = JSONRPCDispatcher(self)
+
+        # Colas acotadas de entrada (por prioridad) y salida; solo se usan
+        # mientras el bucle está activo
+        self.priorities = server['priorities']
+        self.calls = CallQueue(server['inbox_capacity'], server['priority_weights'])
+        self.outbox_capacity = server['outbox_capacity']
+        self.pipelined = False
+        self._outbox: Optional[queue.Queue] = None
+
+        # Procesos lectores sobre memoria compartida (solo con el bucle activo)
+        self.workers = workers
+        self.readers: Optional[ReaderPool] = None
+        self._mirror: Optional[SharedStateMirror] = None
+        self._readers_lock = threading.Lock()
+
+        # Recarga en caliente de la configuración (vigilante activo con el bucle)
+        self.reload_interval = server['reload_interval']
+        self._watcher: Optional[ConfigWatcher] = None
+        self.reload_stats: Dict[str, Any] = {
+            'count': 0, 'errors': 0, 'last_error': None,
+            'load_ms': 0.0, 'apply_ms': 0.0, 'added': 0, 'removed': 0,
+        }
+        # Latencia y fallos simulados: las llamadas lentas esperan en su propio hilo
+        self.faults = self.build_faults(self.config)
+        self.delays = DelayQueue(server['inbox_capacity'])
+
+        self._threads: list = []
+        self.queue_stats = {'busy': 0, 'expired': 0, 'cancelled': 0}
+
+        # Grabación de los mensajes recibidos y enviados (ver recording.py)
+        self.recorder: Optional[SessionRecorder] = None
+        if record is not None:
+            self.recorder = SessionRecorder(record, {
+                'version': self.VERSION, 'protocol': protocol, 'framing': framing,
+                'config': str(config_path)})
+
     def send_message(self, message: Dict[str, Any]) -> None:
         """
-        Envía un mensaje JSON por stdout.
+        Envía un mensaje por stdout con la codificación negociada.
 
         Args:
             message: Diccionario con el mensaje a enviar.
         """
-        json_str = json.dumps(message, ensure_ascii=False)
-        print(json_str, flush=True)
+        if self.encoding == 'msgpack':
+            self.emit(packb(message))
+        else:
+            self.write_line(json.dumps(message, ensure_ascii=False))
+
+    def write_line(self, line: str) -> None:
+        """
+        Escribe un mensaje ya serializado por stdout.
+
+        Args:
+            line: Mensaje JSON serializado.
+        """
+        self.emit(line)
+
+    def emit(self, item: Any) -> None:
+        """
+        Entrega un mensaje serializado al escritor.
+
+        Con el bucle activo, el mensaje pasa por la cola de salida acotada y
+        lo escribe el hilo escritor; si la cola está llena, el llamador se
+        bloquea hasta que haya espacio (el servidor deja de leer y el cliente
+        nota la contrapresión en la tubería).
+
+        Args:
+            item: Mensaje (str en texto, bytes binario) o nuevo escritor.
+        """
+        if self._outbox is not None:
+            self._outbox.put(item)
+        else:
+            self._write(item)
+
+    def _write(self, item: Any) -> None:
+        """
+        Escribe un elemento de la cola de salida.
+
+        Args:
+            item: Mensaje (str en texto, bytes binario) o nuevo escritor,
+                que sustituye al actual a partir de este punto del flujo.
+        """
+        if self.recorder is not None and isinstance(item, (str, bytes, bytearray)):
+            self.recorder.record(
+                RECORD_OUT_TEXT if isinstance(item, str) else RECORD_OUT_PACKED, item)
+        if isinstance(item, str):
+            if self._writer is not None:
+                self._writer.write(item.encode('utf-8'))
+            else:
+                print(item, flush=True)
+        elif isinstance(item, (bytes, bytearray)):
+            self._writer.write(item)
+        else:
+            self._writer = item
 
     def send_ready(self) -> None:
         """Envía el mensaje de handshake inicial con las tools disponibles."""
@@ -39,7 +194,8 @@ class MCPStdioServer:
 
         message = {
             'type': 'ready',
-            'version': '0.1.0',
+            'version': self.VERSION,
+            'encodings': list(ENCODINGS),
             'tools': list(tools_definitions.values())
         }
 
@@ -49,6 +205,9 @@ class MCPStdioServer:
         """
         Procesa una llamada a una tool MCP.
 
+        Si la llamada lleva clave de idempotencia y ya se respondió, se
+        reenvía la respuesta original sin volver a ejecutar la tool.
+
         Args:
             message: Mensaje con la llamada a procesar.
         """
@@ -60,38 +219,120 @@ class MCPStdioServer:
             self.send_error(msg_id, "Mensaje inválido: falta 'id' o 'tool'")
             return
 
+        if self.tools.is_cacheable(tool_name):
+            self.handle_cached_call(msg_id, tool_name, args)
+            return
+
+        key = self.idempotency_key(message)
+        if key is not None:
+            cached = self.idempotency.get(key)
+            if cached is not None:
+                self.send_message(dict(cached, id=msg_id))
+                return
+
         # Ejecutar la tool
         result = self.tools.execute_tool(tool_name, args)
 
         # Verificar si hubo error
         if isinstance(result, dict) and result.get('ok') is False:
-            self.send_error(msg_id, result.get('error', 'Error desconocido'))
+            response = self.error_message(msg_id, result.get('error', 'Error desconocido'))
         else:
-            self.send_result(msg_id, result)
+            response = self.result_message(msg_id, result)
 
-    def send_result(self, msg_id: Any, result: Any) -> None:
+        if key is not None:
+            self.idempotency.put(key, response)
+        self.send_message(response)
+
+    def handle_cached_call(self, msg_id: Any, tool_name: str,
+                           args: Dict[str, Any]) -> None:
         """
-        Envía un mensaje de resultado exitoso.
+        Procesa una llamada a una tool de solo lectura usando la caché de respuestas.
+
+        El resultado serializado se reutiliza mientras no cambie la versión
+        del estado; solo se inserta el id de la llamada en el sobre.
+
+        Args:
+            msg_id: ID del mensaje original.
+            tool_name: Nombre de la tool (cacheable).
+            args: Argumentos para la tool.
+        """
+        # En modo tiempo real, los eventos vencidos pueden cambiar el estado
+        self.state.clock.sync()
+        packed = self.encoding == 'msgpack'
+        key = self.tools.cache_key(tool_name, args)
+        if key is not None:
+            key = (key, self.encoding)
+
+        payload = self.responses.get(key) if key is not None else None
+        if payload is None:
+            result = self.tools.execute_tool(tool_name, args)
+            if isinstance(result, dict) and result.get('ok') is False:
+                self.send_error(msg_id, result.get('error', 'Error desconocido'))
+                return
+            payload = packb(result) if packed else json.dumps(result, ensure_ascii=False)
+            if key is not None:
+                self.responses.put(key, payload)
+
+        if packed:
+            # Map {type, id, ok, result} compuesto con el resultado ya codificado
+            self.emit(b''.join((
+                _PACKED_RESULT_HEAD, packb(msg_id), _PACKED_RESULT_TAIL, payload)))
+            return
+
+        # Mismo formato que json.dumps() del mensaje completo
+        self.write_line('{"type": "result", "id": %s, "ok": true, "result": %s}'
+                        % (json.dumps(msg_id, ensure_ascii=False), payload))
+
+    def idempotency_key(self, message: Dict[str, Any]) -> Optional[Hashable]:
+        """
+        Obtiene la clave de idempotencia de una llamada.
+
+        Se usa 'idempotency_key' si está presente; si no, el 'id' del mensaje
+        cuando el servidor está configurado con server.dedupe_by_id.
+
+        Args:
+            message: Mensaje con la llamada.
+
+        Returns:
+            Clave (tool, valor), None si la llamada no es idempotente.
+        """
+        key = message.get('idempotency_key')
+        if key is None and self.dedupe_by_id:
+            key = message.get('id')
+        if not isinstance(key, (str, int)) or isinstance(key, bool):
+            return None
+        return (message.get('tool'), key)
+
+    def result_message(self, msg_id: Any, result: Any) -> Dict[str, Any]:
+        """
+        Construye un mensaje de resultado exitoso.
 
         Args:
             msg_id: ID del mensaje original.
             result: Resultado de la operación.
+
+        Returns:
+            Mensaje de tipo 'result'.
         """
-        message = {
+        return {
             'type': 'result',
             'id': msg_id,
             'ok': True,
             'result': result
         }
-        self.send_message(message)
 
-    def send_error(self, msg_id: Optional[Any], error: str) -> None:
+    def error_message(self, msg_id: Optional[Any], error: str,
+                      code: Optional[str] = None) -> Dict[str, Any]:
         """
-        Envía un mensaje de error.
+        Construye un mensaje de error.
 
         Args:
             msg_id: ID del mensaje original (puede ser None).
             error: Descripción del error.
+            code: Código del error de planificación ('busy' o 'deadline').
+
+        Returns:
+            Mensaje de tipo 'error'.
         """
         message = {
             'type': 'error',
@@ -99,8 +340,126 @@ class MCPStdioServer:
             'ok': False,
             'error': error
         }
+        if code is not None:
+            message['code'] = code
+        return message
+
+    def send_result(self, msg_id: Any, result: Any) -> None:
+        """
+        Envía un mensaje de resultado exitoso.
+
+        Args:
+            msg_id: ID del mensaje original.
+            result: Resultado de la operación.
+        """
+        self.send_message(self.result_message(msg_id, result))
+
+    def send_error(self, msg_id: Optional[Any], error: str,
+                   code: Optional[str] = None) -> None:
+        """
+        Envía un mensaje de error.
+
+        Args:
+            msg_id: ID del mensaje original (puede ser None).
+            error: Descripción del error.
+            code: Código del error de planificación ('busy' o 'deadline').
+        """
+        self.send_message(self.error_message(msg_id, error, code))
+
+    def send_metrics(self, msg_id: Optional[Any]) -> None:
+        """
+        Envía las métricas del servidor.
+
+        Args:
+            msg_id: ID del mensaje original (puede ser None).
+        """
+        message = {'type': 'metrics', 'id': msg_id}
+        message.update(self.metrics())
         self.send_message(message)
 
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas del servidor.
+
+        Returns:
+            Diccionario con las métricas de cada caché.
+        """
+        return {
+            'idempotency': self.idempotency.stats(),
+            'response_cache': self.responses.stats(),
+            'queue': self.queue_metrics(),
+            'reload': dict(self.reload_stats, fragments=Config.fragment_cache.stats()),
+            'faults': {
+                'enabled': self.faults is not None,
+                'delayed': self.faults.delayed if self.faults is not None else 0,
+                'failed': self.faults.failed if self.faults is not None else 0,
+                'waiting': len(self.delays),
+            },
+        }
+
+    def queue_metrics(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas de las colas de entrada y salida.
+
+        Returns:
+            Diccionario con la ocupación, capacidades, llamadas rechazadas,
+            vencidas o canceladas y, por clase de prioridad, las llamadas
+            pendientes y servidas y su tiempo en cola.
+        """
+        outbox = self._outbox
+        metrics = {
+            'pending': len(self.calls),
+            'capacity': self.calls.capacity,
+            'outbox': outbox.qsize() if outbox is not None else 0,
+            'outbox_capacity': self.outbox_capacity,
+        }
+        metrics.update(self.queue_stats)
+        metrics['classes'] = self.calls.stats()
+        if self.readers is not None:
+            metrics['readers'] = self.readers.stats()
+        return metrics
+
+    def priority_of(self, tool_name: Any) -> str:
+        """
+        Obtiene la clase de prioridad de una tool.
+
+        Args:
+            tool_name: Nombre de la tool.
+
+        Returns:
+            Clase de server.priorities o, si no se configuró, la clase por
+            defecto de la tool.
+        """
+        if not isinstance(tool_name, str):
+            return 'write'
+        return self.priorities.get(tool_name) or self.tools.priority_class(tool_name)
+
+    def jsonrpc_priority(self, payload: Any) -> str:
+        """
+        Obtiene la clase de prioridad de un mensaje JSON-RPC.
+
+        Un lote toma la clase más prioritaria de sus peticiones; los métodos
+        que no son tools ('initialize', 'ping'...) se tratan como escrituras.
+
+        Args:
+            payload: Petición (dict) o lote (list).
+
+        Returns:
+            Clase de prioridad.
+        """
+        requests = payload if isinstance(payload, list) else [payload]
+        best = len(PRIORITY_CLASSES) - 1
+        for request in requests:
+            if not isinstance(request, dict):
+                continue
+            name = request.get('method')
+            params = request.get('params')
+            if name == 'tools/call' and isinstance(params, dict):
+                name = params.get('name')
+            priority = self.priority_of(name) if self.tools.has_tool(name) else 'write'
+            best = min(best, PRIORITY_CLASSES.index(priority))
+        return PRIORITY_CLASSES[best]
+
     def process_message(self, line: str) -> None:
         """
         Procesa una línea de entrada JSON.
@@ -108,55 +467,671 @@ class MCPStdioServer:
         Args:
             line: Línea JSON a procesar.
         """
+        if self.recorder is not None:
+            self.recorder.record(RECORD_IN_TEXT, line)
+        if self.jsonrpc is not None:
+            if self.pipelined:
+                self.submit_jsonrpc(line)
+                return
+            response = self.jsonrpc.handle_line(line)
+            if response is not None:
+                self.write_line(response)
+            return
+
         try:
             message = json.loads(line)
         except json.JSONDecodeError as e:
             self.send_error(None, f"Error al parsear JSON: {e}")
             return
 
+        self.handle_message(message)
+
+    def process_packed(self, data: Any) -> None:
+        """
+        Procesa un mensaje codificado en MessagePack.
+
+        Args:
+            data: Bytes (o memoryview) del mensaje.
+        """
+        if self.recorder is not None:
+            self.recorder.record(RECORD_IN_PACKED, data)
+        try:
+            message = unpackb(data)
+        except ValueError as e:
+            self.send_error(None, f"Error al decodificar MessagePack: {e}")
+            return
+
+        self.handle_message(message)
+
+    def handle_message(self, message: Any) -> None:
+        """
+        Procesa un mensaje ya decodificado del protocolo simplificado.
+
+        Args:
+            message: Mensaje decodificado.
+        """
+        if not isinstance(message, dict):
+            self.send_error(None, "Mensaje inválido: se esperaba un objeto")
+            return
+
         msg_type = message.get('type')
 
         if msg_type == 'call':
-            self.handle_call(message)
+            self.submit_call(message)
+        elif msg_type == 'hello':
+            self.submit_hello(message)
+        elif msg_type == 'cancel':
+            self.handle_cancel(message)
+        elif msg_type == 'reload':
+            self.reload_config(message.get('id'))
+        elif msg_type == 'metrics':
+            self.send_metrics(message.get('id'))
         elif msg_type == 'quit':
             self.running = False
         else:
             self.send_error(message.get('id'),
                             f"Tipo de mensaje desconocido: {msg_type}")
 
+    def submit_call(self, message: Dict[str, Any]) -> None:
+        """
+        Admite una llamada en la cola de entrada.
+
+        Si la cola está llena, la llamada se rechaza al momento con un error
+        'busy'; si su 'deadline_ms' ya venció, con un error 'deadline'. Sin
+        el bucle activo, la llamada se ejecuta directamente.
+
+        Args:
+            message: Mensaje con la llamada.
+        """
+        msg_id = message.get('id')
+        deadline_ms = message.get('deadline_ms')
+        if deadline_ms is not None:
+            if isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float)):
+                self.send_error(msg_id, "'deadline_ms' debe ser un número")
+                return
+            if deadline_ms <= 0:
+                self.reject_expired(msg_id)
+                return
+
+        if self.faults is not None and self.inject_fault(message, deadline_ms):
+            return
+
+        if not self.pipelined:
+            self.handle_call(message)
+            return
+
+        # Solo se reenvía si no queda ninguna llamada anterior por terminar:
+        # así la lectura ve las escrituras que el cliente envió antes
+        if (self.readers is not None and message.get('tool') in SHARED_READ_TOOLS
+                and not self.calls.unfinished):
+            with self._readers_lock:
+                if self.readers is not None:
+                    self.forward_read(message, deadline_ms)
+                    return
+
+        key = msg_id if isinstance(msg_id, (str, int)) else None
+        priority = self.priority_of(message.get('tool'))
+        if not self.calls.push(PendingCall('call', message, key, deadline_ms,
+                                           priority=priority)):
+            self.queue_stats['busy'] += 1
+            self.send_error(msg_id, f"Servidor ocupado: {self.calls.capacity} "
+                                    f"llamadas '{priority}' pendientes", code='busy')
+
+    def build_faults(self, config: Config) -> Optional[FaultInjector]:
+        """
+        Crea el inyector de latencia y fallos de una configuración.
+
+        Args:
+            config: Configuración con la sección 'faults'.
+
+        Returns:
+            Inyector, None si la configuración no define fallos.
+        """
+        settings = config.faults
+        if settings is None:
+            return None
+        return FaultInjector(settings, config.group_index, ALARM_TOOLS)
+
+    def inject_fault(self, message: Dict[str, Any], deadline_ms: Optional[float]) -> bool:
+        """
+        Aplica la latencia y el fallo simulados a una llamada.
+
+        La decisión se toma al admitir la llamada, en el orden de llegada,
+        para que sea reproducible con la misma semilla. Una llamada lenta
+        espera en la cola de retardos sin bloquear al resto y, al vencer,
+        entra en la cola de entrada (o responde su fallo con el código
+        'fault'). Sin el bucle activo no hay latencia, solo fallos.
+
+        Args:
+            message: Mensaje con la llamada.
+            deadline_ms: Plazo de la llamada en milisegundos (None = sin plazo).
+
+        Returns:
+            True si la llamada ya se ha respondido o está esperando.
+        """
+        msg_id = message.get('id')
+        tool_name = message.get('tool')
+        if not msg_id or not tool_name:
+            return False
+        delay, error = self.faults.plan(tool_name, message.get('args', {}))
+        if not self.pipelined or not delay:
+            if error is None:
+                return False
+            self.send_error(msg_id, error, code='fault')
+            return True
+
+        key = msg_id if isinstance(msg_id, (str, int)) else None
+        if error is not None:
+            callback = lambda: self.send_error(msg_id, error, code='fault')
+        else:
+            call = PendingCall('call', message, key, deadline_ms,
+                               priority=self.priority_of(tool_name))
+            callback = lambda: self.release_delayed(call)
+        if not self.delays.schedule(delay, callback, key):
+            self.queue_stats['busy'] += 1
+            self.send_error(msg_id, f"Servidor ocupado: {self.delays.capacity} "
+                                    f"llamadas con latencia pendientes", code='busy')
+        return True
+
+    def release_delayed(self, call: PendingCall) -> None:
+        """
+        Encola una llamada cuya latencia simulada ha vencido.
+
+        Conserva su plazo original; el tiempo en cola se mide desde aquí.
+
+        Args:
+            call: Llamada retenida.
+        """
+        call.received = time.monotonic()
+        self.calls.push(call, force=True)
+
+    def forward_read(self, message: Dict[str, Any], deadline_ms: Optional[float]) -> None:
+        """
+        Envía una lectura de luces o alarma a los procesos lectores.
+
+        Solo se invoca con la cola de llamadas vacía y sin ninguna en
+        ejecución, de modo que el segmento ya refleja todas las escrituras
+        admitidas antes.
+
+        Args:
+            message: Mensaje con la llamada.
+            deadline_ms: Plazo de la llamada en milisegundos (None = sin plazo).
+        """
+        msg_id = message.get('id')
+        if not msg_id:
+            self.send_error(msg_id, "Mensaje inválido: falta 'id' o 'tool'")
+            return
+        deadline = time.monotonic() + deadline_ms / 1000.0 if deadline_ms is not None else None
+        if not self.readers.submit(msg_id, message['tool'], self.encoding, deadline):
+            self.queue_stats['busy'] += 1
+            self.send_error(msg_id, f"Servidor ocupado: {self.readers.capacity} "
+                                    f"lecturas pendientes", code='busy')
+
+    def submit_jsonrpc(self, line: str) -> None:
+        """
+        Admite un mensaje JSON-RPC en la cola de entrada.
+
+        Las notificaciones 'notifications/cancelled' retiran la petición
+        pendiente indicada en 'requestId' sin generar respuesta. Con la cola
+        llena, las peticiones se rechazan con el código SERVER_BUSY y las
+        notificaciones se descartan.
+
+        Args:
+            line: Petición, notificación o lote en JSON.
+        """
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError as e:
+            self.write_line(self.jsonrpc.error(None, PARSE_ERROR,
+                                               f"Error al parsear JSON: {e}"))
+            return
+
+        msg_id = payload.get('id') if isinstance(payload, dict) else None
+        if isinstance(payload, dict) and payload.get('method') == 'notifications/cancelled':
+            params = payload.get('params')
+            if isinstance(params, dict) and self.cancel_pending(params.get('requestId')):
+                return
+
+        key = msg_id if isinstance(msg_id, (str, int)) else None
+        priority = self.jsonrpc_priority(payload)
+        if not self.calls.push(PendingCall('jsonrpc', payload, key, priority=priority)):
+            self.queue_stats['busy'] += 1
+            if not isinstance(payload, dict) or 'id' in payload:
+                self.write_line(self.jsonrpc.error(
+                    msg_id, SERVER_BUSY, f"Servidor ocupado: {self.calls.capacity} "
+                                         f"peticiones '{priority}' pendientes"))
+
+    def submit_hello(self, message: Dict[str, Any]) -> None:
+        """
+        Encola la negociación de codificación y espera a que se complete.
+
+        La respuesta y el cambio de escritor se producen en el hilo de
+        ejecución (con la prioridad más alta), en orden con el resto de
+        respuestas; el lector espera para no leer el siguiente mensaje con
+        el framing antiguo.
+
+        Args:
+            message: Mensaje {type: 'hello', encoding}.
+        """
+        if not self.pipelined:
+            self.handle_hello(message)
+            return
+        done = threading.Event()
+        if self.calls.push(PendingCall('hello', message, done=done), force=True):
+            done.wait()
+
+    def handle_cancel(self, message: Dict[str, Any]) -> None:
+        """
+        Cancela una llamada que aún está en la cola de entrada.
+
+        Responde {type: 'cancelled', id, ok}; si la llamada se retiró, no
+        habrá ninguna otra respuesta para ese id. Una llamada que ya se está
+        ejecutando o que terminó no se puede cancelar.
+
+        Args:
+            message: Mensaje {type: 'cancel', id} con el id de la llamada.
+        """
+        msg_id = message.get('id')
+        if self.cancel_pending(msg_id):
+            self.send_message({'type': 'cancelled', 'id': msg_id, 'ok': True})
+        else:
+            self.send_message({'type': 'cancelled', 'id': msg_id, 'ok': False,
+                               'error': f"No hay ninguna llamada pendiente con id {msg_id}"})
+
+    def cancel_pending(self, msg_id: Any) -> bool:
+        """
+        Retira de la cola de entrada la llamada con el id indicado.
+
+        Args:
+            msg_id: ID del mensaje de la llamada.
+
+        Returns:
+            True si la llamada estaba pendiente y se retiró.
+        """
+        if not self.pipelined or not isinstance(msg_id, (str, int)):
+            return False
+        if self.calls.cancel(msg_id) is None and not self.delays.cancel(msg_id):
+            return False
+        self.queue_stats['cancelled'] += 1
+        return True
+
+    def reject_expired(self, msg_id: Any) -> None:
+        """
+        Responde a una llamada cuyo plazo venció antes de ejecutarse.
+
+        Args:
+            msg_id: ID del mensaje de la llamada.
+        """
+        self.queue_stats['expired'] += 1
+        self.send_error(msg_id, "Plazo vencido antes de ejecutar la llamada",
+                        code='deadline')
+
+    def reload_config(self, msg_id: Optional[Any] = None) -> None:
+        """
+        Vuelve a cargar y validar el archivo de configuración.
+
+        La carga y la validación se hacen en el hilo que llama (el
+        vigilante o el lector), fuera del hilo de ejecución; la nueva
+        configuración se aplica después entre dos llamadas (ver
+        apply_reload). Si el archivo no es válido se conserva la
+        configuración actual.
+
+        Args:
+            msg_id: ID del mensaje 'reload' (None si la inicia el vigilante).
+        """
+        path = str(self.config.config_path)
+        start = time.perf_counter()
+        try:
+            if not os.path.exists(path):
+                raise ValueError(f"El archivo {path} no existe")
+            config = Config(path)
+        except ValueError as e:
+            self.reload_stats['errors'] += 1
+            self.reload_stats['last_error'] = str(e)
+            if msg_id is not None:
+                self.send_error(msg_id, f"Error al recargar la configuración: {e}")
+            return
+        self.reload_stats['load_ms'] = round((time.perf_counter() - start) * 1000.0, 3)
+
+        message = {'id': msg_id, 'config': config}
+        if self.pipelined:
+            self.calls.push(PendingCall('reload', message), force=True)
+        else:
+            self.apply_reload(message)
+
+    def apply_reload(self, message: Dict[str, Any]) -> None:
+        """
+        Aplica una configuración recargada sin perder el estado.
+
+        Se ejecuta en el hilo de ejecución, de modo que el cambio es atómico
+        respecto a las llamadas. Además del estado (ver
+        HomeState.apply_config), se actualizan las prioridades por tool y,
+        si cambian las luces, se recrea el segmento de los procesos lectores.
+        La capacidad de las colas y de las cachés, el reloj y los historiales
+        requieren reiniciar el servidor.
+
+        Args:
+            message: {'id': ID del mensaje 'reload' o None, 'config': Config}.
+        """
+        start = time.perf_counter()
+        config = message['config']
+        names = list(self.state.lights)
+        summary = self.state.apply_config(config)
+        self.config = config
+        self.priorities = config.server['priorities']
+        self.faults = self.build_faults(config)
+        if self._watcher is not None and self._watcher.paths != tuple(map(str, config.files)):
+            self._watcher.watch(config.files)
+        if self.readers is not None and list(self.state.lights) != names:
+            with self._readers_lock:
+                self.stop_readers()
+                self.start_readers()
+
+        stats = self.reload_stats
+        stats['count'] += 1
+        stats['apply_ms'] = round((time.perf_counter() - start) * 1000.0, 3)
+        stats['added'] = len(summary['added'])
+        stats['removed'] = len(summary['removed'])
+        if message['id'] is not None:
+            self.send_message({
+                'type': 'reloaded', 'id': message['id'], 'ok': True,
+                'added': summary['added'], 'removed': summary['removed'],
+                'load_ms': stats['load_ms'], 'apply_ms': stats['apply_ms'],
+            })
+
+    def execute(self, call: PendingCall) -> None:
+        """
+        Ejecuta un trabajo extraído de la cola de entrada.
+
+        Args:
+            call: Llamada pendiente.
+        """
+        try:
+            if call.kind == 'hello':
+                self.handle_hello(call.message)
+            elif call.kind == 'jsonrpc':
+                response = self.jsonrpc.handle_payload(call.message)
+                if response is not None:
+                    self.write_line(response)
+            elif call.kind == 'reload':
+                self.apply_reload(call.message)
+            elif call.expired():
+                self.reject_expired(call.message.get('id'))
+            else:
+                self.handle_call(call.message)
+        finally:
+            if call.done is not None:
+                call.done.set()
+
+    def handle_hello(self, message: Dict[str, Any]) -> None:
+        """
+        Negocia la codificación de los mensajes siguientes.
+
+        La respuesta 'hello' se envía aún con la codificación actual; a
+        partir de ella, con 'msgpack', los mensajes en ambos sentidos son
+        MessagePack precedido de su longitud (uint32 big-endian). El cliente
+        debe esperar la respuesta antes de enviar mensajes binarios.
+
+        Args:
+            message: Mensaje {type: 'hello', encoding}.
+        """
+        encoding = message.get('encoding', 'json')
+        if encoding not in ENCODINGS:
+            self.send_error(message.get('id'),
+                            f"Codificación no soportada: '{encoding}' "
+                            f"(opciones: {', '.join(ENCODINGS)})")
+            return
+
+        # Las lecturas reenviadas antes del hello se serializaron con la
+        # codificación actual: deben salir antes del cambio de escritor
+        if self.readers is not None:
+            self.readers.drain()
+        self.send_message({'type': 'hello', 'id': message.get('id'),
+                           'encoding': encoding})
+        if encoding != self.encoding:
+            if encoding == 'json':
+                self.send_error(message.get('id'),
+                                "No se puede volver a JSON tras cambiar de codificación")
+                return
+            self.encoding = encoding
+            # El escritor cambia justo tras la respuesta, en orden con el resto
+            self.emit(LengthPrefixedWriter(self._output_stream or sys.stdout.buffer))
+            self._switch_transport = True
+
+    def start_pipeline(self) -> None:
+        """
+        Crea las colas acotadas y arranca los hilos de ejecución y escritura.
+
+        El hilo que llama actúa como lector: decodifica los mensajes y los
+        admite en la cola de entrada, de modo que un handler lento no impide
+        rechazar con 'busy', cancelar o consultar métricas.
+        """
+        if self.pipelined:
+            return
+        self.pipelined = True
+        self.calls.reopen()
+        self._outbox = queue.Queue(self.outbox_capacity)
+        if self.workers and self.jsonrpc is None and not self.state.clock.realtime:
+            self.start_readers()
+        if self.reload_interval > 0:
+            self._watcher = ConfigWatcher(self.config.files, self.reload_config,
+                                          self.reload_interval)
+            self._watcher.start()
+        self.delays.start()
+        self._threads = [
+            threading.Thread(target=self._work_loop, name='mcp-worker', daemon=True),
+            threading.Thread(target=self._write_loop, name='mcp-writer', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop_pipeline(self) -> None:
+        """Termina las llamadas pendientes, vacía la cola de salida y para los hilos."""
+        if not self.pipelined:
+            return
+        worker, writer = self._threads
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        self.stop_readers()
+        self.delays.stop()
+        self.calls.close()
+        worker.join()
+        self._outbox.put(None)
+        writer.join()
+        self.pipelined = False
+        self._outbox = None
+        self._threads = []
+
+    def start_readers(self) -> None:
+        """
+        Crea el segmento compartido con luces y alarma y arranca los procesos lectores.
+
+        Este proceso sigue siendo el único escritor: cada mutación del
+        estado se replica en el segmento, y las lecturas de
+        SHARED_READ_TOOLS se responden desde los procesos cuando la cola de
+        llamadas no tiene nada pendiente ni en ejecución. Si queda alguna
+        llamada anterior, la lectura se encola detrás de ella para que vea
+        las escrituras que el cliente envió antes.
+        """
+        shared = SharedHomeState(list(self.state.lights))
+        self._mirror = SharedStateMirror(self.state, shared)
+        self.readers = ReaderPool(shared, self.workers, self.emit, self.calls.capacity)
+        self.readers.start()
+
+    def stop_readers(self) -> None:
+        """Para los procesos lectores y elimina el segmento compartido."""
+        if self.readers is None:
+            return
+        self.readers.stop()
+        self._mirror.close()
+        self.readers.shared.close()
+        self.readers = None
+        self._mirror = None
+
+    def _work_loop(self) -> None:
+        """Ejecuta las llamadas de la cola de entrada hasta que se cierre."""
+        while True:
+            call = self.calls.pop()
+            if call is None:
+                break
+            try:
+                self.execute(call)
+            except Exception as e:
+                self.send_internal_error(f"Error interno del servidor: {e}")
+            finally:
+                self.calls.task_done()
+
+    def _write_loop(self) -> None:
+        """Escribe los mensajes de la cola de salida hasta recibir None."""
+        outbox = self._outbox
+        while True:
+            item = outbox.get()
+            if item is None:
+                break
+            try:
+                self._write(item)
+            except (BrokenPipeError, ValueError):
+                # El cliente cerró la salida: descartar el resto
+                pass
+
     def run(self) -> None:
         """
         Ejecuta el bucle principal del servidor MCP.
 
-        Lee líneas de stdin, procesa mensajes y responde por stdout.
+        Lee mensajes de stdin, los procesa y responde por stdout.
         """
-        # Enviar mensaje de handshake
-        self.send_ready()
+        if self.framing == 'content-length':
+            self.serve_framed(sys.stdin.buffer, sys.stdout.buffer)
+            return
 
-        # Bucle principal
-        self.running = True
+        self._output_stream = sys.stdout.buffer
+        self.start_pipeline()
         try:
-            for line in sys.stdin:
-                line = line.strip()
-                if not line:
-                    continue
+            # Enviar mensaje de handshake (en JSON-RPC lo inicia el cliente)
+            if self.jsonrpc is None:
+                self.send_ready()
+
+            # Bucle principal
+            self.running = True
+            try:
+                for line in sys.stdin:
+                    line = line.strip()
+                    if not line:
+                        continue
+
+                    self.process_message(line)
+
+                    if not self.running or self._switch_transport:
+                        break
+            except KeyboardInterrupt:
+                pass
+            except Exception as e:
+                self.stop_pipeline()
+                self.send_internal_error(f"Error interno del servidor: {e}")
+
+            if self.running and self._switch_transport:
+                # Codificación binaria negociada: seguir sobre los flujos binarios
+                self.serve_binary(LengthPrefixedReader(sys.stdin.buffer),
+                                  sys.stdin.buffer, sys.stdout.buffer)
+        finally:
+            self.stop_pipeline()
+
+    def serve_framed(self, input_stream: BinaryIO, output_stream: BinaryIO) -> None:
+        """
+        Ejecuta el bucle principal con mensajes delimitados por Content-Length.
+
+        Los cuerpos se leen en un buffer reutilizable y se decodifican una
+        sola vez; las respuestas se escriben directamente como bytes.
+
+        Args:
+            input_stream: Flujo binario de entrada (sys.stdin.buffer).
+            output_stream: Flujo binario de salida (sys.stdout.buffer).
+        """
+        self._writer = FrameWriter(output_stream)
+        self._output_stream = output_stream
 
-                self.process_message(line)
+        self.start_pipeline()
+        try:
+            if self.jsonrpc is None:
+                self.send_ready()
+
+            self.running = True
+            self.serve_binary(FrameReader(input_stream), input_stream, output_stream)
+        finally:
+            self.stop_pipeline()
+
+    def serve_binary(self, reader: Any, input_stream: BinaryIO,
+                     output_stream: BinaryIO) -> None:
+        """
+        Procesa mensajes de un lector binario hasta el final de la entrada.
+
+        Tras negociar MessagePack con 'hello', el lector y el escritor pasan
+        a usar mensajes precedidos de su longitud sobre los mismos flujos
+        (el escritor lo cambia handle_hello, en orden con las respuestas).
+
+        Args:
+            reader: Lector de mensajes (FrameReader o LengthPrefixedReader).
+            input_stream: Flujo binario de entrada.
+            output_stream: Flujo binario de salida.
+        """
+        try:
+            while self.running:
+                if self._switch_transport:
+                    self._switch_transport = False
+                    reader = LengthPrefixedReader(input_stream)
 
-                if not self.running:
+                body = reader.read()
+                if body is None:
                     break
+                if self.encoding == 'msgpack':
+                    self.process_packed(body)
+                    continue
+                try:
+                    text = str(body, 'utf-8')
+                except UnicodeDecodeError as e:
+                    self.send_internal_error(f"Mensaje no es UTF-8 válido: {e}")
+                    continue
+                self.process_message(text)
         except KeyboardInterrupt:
             pass
+        except FramingError as e:
+            # El flujo queda desincronizado: terminar lo pendiente y avisar al final
+            self.stop_pipeline()
+            self.send_internal_error(f"Error de framing: {e}")
         except Exception as e:
-            self.send_error(None, f"Error interno del servidor: {e}")
+            self.stop_pipeline()
+            self.send_internal_error(f"Error interno del servidor: {e}")
+
+    def send_internal_error(self, error: str) -> None:
+        """
+        Envía un error no asociado a ninguna llamada en el protocolo activo.
+
+        Args:
+            error: Descripción del error.
+        """
+        if self.jsonrpc is not None:
+            self.write_line(self.jsonrpc.error(None, INTERNAL_ERROR, error))
+        else:
+            self.send_error(None, error)
 
 
-def start_mcp_server(config_path: str = "config.yaml") -> None:
+def start_mcp_server(config_path: str = "config.yaml",
+                     protocol: str = 'simple', framing: str = 'line',
+                     workers: int = 0, record: Optional[str] = None) -> None:
     """
     Inicia el servidor MCP por stdio.
 
     Args:
         config_path: Ruta al archivo de configuración.
+        protocol: Formato de mensajes ('simple' o 'jsonrpc').
+        framing: Delimitación de mensajes ('line' o 'content-length').
+        workers: Procesos lectores con el estado en memoria compartida.
+        record: Archivo donde grabar la sesión (None = sin grabación).
     """
-    server = MCPStdioServer(config_path)
-    server.run()
+    server = MCPStdioServer(config_path, protocol, framing, workers, record)
+    try:
+        server.run()
+    finally:
+        if server.recorder is not None:
+            server.recorder.close()
@@ -0,0 +1,105 @@
+"""Grabación binaria de sesiones del servidor MCP."""
+
+import json
+import struct
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Iterator, Tuple, Union
+
+
+# Cabecera al inicio de cada archivo de grabación
+RECORD_MAGIC = b'MCPREC\x01\n'
+
+# Tipos de registro: metadatos de la sesión, mensajes de entrada y de salida
+# en texto (JSON) o binarios (MessagePack)
+RECORD_META = 0
+RECORD_IN_TEXT = 1
+RECORD_IN_PACKED = 2
+RECORD_OUT_TEXT = 3
+RECORD_OUT_PACKED = 4
+
+# Cabecera de cada registro: microsegundos desde el inicio (uint64), tipo
+# (uint8) y longitud del contenido (uint32)
+_RECORD = struct.Struct('<QBI')
+
+
+class SessionRecorder:
+    """
+    Graba los mensajes de una sesión con su instante relativo.
+
+    El archivo empieza con RECORD_MAGIC y un registro de metadatos (JSON);
+    después, cada mensaje recibido o enviado se añade al final como un
+    registro de 13 bytes de cabecera seguido del mensaje tal como viajó.
+    Los registros se escriben desde el hilo lector y el escritor, así que
+    se serializan con un cerrojo.
+    """
+
+    def __init__(self, path: str, meta: Dict[str, Any]):
+        """
+        Crea el archivo de grabación.
+
+        Args:
+            path: Ruta del archivo (se sobrescribe).
+            meta: Metadatos de la sesión (protocolo, versión...).
+        """
+        self.path = path
+        self._file: BinaryIO = open(path, 'wb')
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.records = 0
+        self._file.write(RECORD_MAGIC)
+        self.record(RECORD_META, json.dumps(meta, ensure_ascii=False))
+
+    def record(self, kind: int, data: Union[str, bytes, bytearray, memoryview]) -> None:
+        """
+        Añade un registro a la grabación.
+
+        Args:
+            kind: Tipo de registro (RECORD_*).
+            data: Mensaje en texto o bytes.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        micros = int((time.perf_counter() - self._start) * 1_000_000)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(_RECORD.pack(micros, kind, len(data)))
+            self._file.write(data)
+            self.records += 1
+
+    def close(self) -> None:
+        """Cierra el archivo de grabación."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_recording(path: str) -> Iterator[Tuple[float, int, bytes]]:
+    """
+    Lee los registros de una grabación.
+
+    Un registro incompleto al final (grabación interrumpida) se ignora.
+
+    Args:
+        path: Ruta del archivo.
+
+    Yields:
+        Tuplas (segundos desde el inicio, tipo, contenido).
+
+    Raises:
+        ValueError: Si el archivo no es una grabación.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(RECORD_MAGIC)) != RECORD_MAGIC:
+            raise ValueError(f"'{path}' no es una grabación de sesión")
+        while True:
+            header = f.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+            micros, kind, length = _RECORD.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield micros / 1_000_000, kind, data
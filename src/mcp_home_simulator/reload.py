@@ -0,0 +1,117 @@
+"""Vigilancia del archivo de configuración para la recarga en caliente."""
+
+import os
+import threading
+from typing import Callable, Optional, Sequence, Tuple, Union
+
+
+# Intervalo por defecto entre comprobaciones del archivo (segundos; 0 = sin vigilancia)
+DEFAULT_RELOAD_INTERVAL = 1.0
+
+# Firma de un archivo: (mtime en ns, tamaño, inodo)
+Signature = Tuple[int, int, int]
+
+
+def file_signature(path: str) -> Optional[Signature]:
+    """
+    Obtiene la firma de un archivo para detectar cambios.
+
+    Args:
+        path: Ruta del archivo.
+
+    Returns:
+        Tupla (mtime_ns, tamaño, inodo), None si el archivo no existe.
+    """
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return (info.st_mtime_ns, info.st_size, info.st_ino)
+
+
+class ConfigWatcher:
+    """
+    Hilo que comprueba periódicamente si los archivos de configuración cambiaron.
+
+    Compara la fecha de modificación, el tamaño y el inodo (los editores
+    que guardan escribiendo un archivo nuevo y renombrándolo cambian el
+    inodo) del archivo principal y de sus fragmentos incluidos. Un archivo
+    que desaparece no provoca recarga: se espera a que vuelva a existir.
+    """
+
+    def __init__(self, paths: Union[str, Sequence[str]], on_change: Callable[[], None],
+                 interval: float = DEFAULT_RELOAD_INTERVAL):
+        """
+        Inicializa el vigilante tomando la firma actual de los archivos.
+
+        Args:
+            paths: Ruta o rutas de los archivos de configuración.
+            on_change: Función a invocar (en el hilo del vigilante) tras un cambio.
+            interval: Segundos entre comprobaciones.
+
+        Raises:
+            ValueError: Si el intervalo no es positivo.
+        """
+        if interval <= 0:
+            raise ValueError("El intervalo de recarga debe ser mayor que 0")
+        self.interval = interval
+        self._on_change = on_change
+        self.watch(paths)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, paths: Union[str, Sequence[str]]) -> None:
+        """
+        Cambia los archivos vigilados (p. ej. si una recarga añade fragmentos).
+
+        Args:
+            paths: Ruta o rutas de los archivos de configuración.
+        """
+        paths = (paths,) if isinstance(paths, str) else tuple(map(str, paths))
+        # Rutas y firma en una sola asignación, por si el hilo está comprobando
+        self._watched = (paths, self._read_signature(paths))
+
+    @property
+    def paths(self) -> Tuple[str, ...]:
+        """Obtiene las rutas vigiladas."""
+        return self._watched[0]
+
+    @staticmethod
+    def _read_signature(paths: Sequence[str]) -> Optional[Tuple[Signature, ...]]:
+        """Obtiene la firma conjunta de los archivos (None si falta alguno)."""
+        signatures = tuple(file_signature(path) for path in paths)
+        return None if None in signatures else signatures
+
+    def check(self) -> bool:
+        """
+        Comprueba los archivos e invoca on_change si alguno cambió.
+
+        Returns:
+            True si se detectó un cambio.
+        """
+        paths, previous = self._watched
+        signature = self._read_signature(paths)
+        if signature is None or signature == previous:
+            return False
+        self._watched = (paths, signature)
+        self._on_change()
+        return True
+
+    def start(self) -> None:
+        """Arranca el hilo de vigilancia."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='mcp-config-watcher',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo de vigilancia y espera a que termine."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        """Bucle de comprobación hasta que se llame a stop()."""
+        while not self._stop.wait(self.interval):
+            self.check()
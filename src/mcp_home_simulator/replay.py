@@ -0,0 +1,211 @@
+"""Reproducción de sesiones grabadas contra el servidor MCP."""
+
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .encoding import unpackb
+from .mcp_stdio import MCPStdioServer
+from .recording import (
+    RECORD_IN_PACKED, RECORD_IN_TEXT, RECORD_META, RECORD_OUT_PACKED, read_recording)
+
+
+# Tipos de respuesta cuyo contenido depende del momento (no se comparan)
+VOLATILE_TYPES = frozenset({'metrics'})
+
+# Número máximo de diferencias que se detallan en el informe
+MAX_MISMATCHES = 10
+
+
+class ReplayServer(MCPStdioServer):
+    """Servidor que guarda las respuestas en memoria en lugar de escribirlas."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        """Inicializa el servidor con la lista de respuestas vacía."""
+        super().__init__(*args, **kwargs)
+        # (instante, mensaje serializado) de cada respuesta, en orden de escritura
+        self.outputs: List[Tuple[float, Any]] = []
+
+    def _write(self, item: Any) -> None:
+        """Guarda un mensaje de la cola de salida (los cambios de escritor se ignoran)."""
+        if isinstance(item, (str, bytes, bytearray)):
+            self.outputs.append((time.perf_counter(), item))
+
+
+def _decode(data: Any, packed: bool) -> Any:
+    """Decodifica un mensaje grabado o generado (None si no es válido)."""
+    try:
+        return unpackb(data) if packed else json.loads(data)
+    except ValueError:
+        return None
+
+
+def _response_key(message: Any) -> Optional[Any]:
+    """Obtiene el id de una respuesta o petición (None si no tiene)."""
+    if isinstance(message, dict):
+        msg_id = message.get('id')
+        if isinstance(msg_id, (str, int)) and not isinstance(msg_id, bool):
+            return msg_id
+    return None
+
+
+def _comparable(message: Any) -> Any:
+    """Quita de una respuesta los campos que dependen del momento."""
+    if isinstance(message, dict):
+        return {key: value for key, value in message.items() if not key.endswith('_ms')}
+    return message
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """Obtiene un percentil de una lista ordenada (0 si está vacía)."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def replay_session(path: str, config_path: Optional[str] = None,
+                   paced: bool = False) -> Dict[str, Any]:
+    """
+    Reproduce una sesión grabada con --record y compara las respuestas.
+
+    Los mensajes de entrada se entregan al servidor en el mismo orden, lo
+    más rápido posible o respetando sus instantes originales. Las
+    respuestas se emparejan por id con las grabadas (las que no tienen id,
+    por orden); no se comparan las de VOLATILE_TYPES ni los campos que
+    terminan en '_ms'.
+
+    Args:
+        path: Archivo de grabación.
+        config_path: Configuración a usar (None = la de la sesión grabada).
+        paced: True para respetar el ritmo original.
+
+    Returns:
+        Informe con messages, responses, elapsed_s, throughput (mensajes/s),
+        latency_ms {p50, p95, p99, max}, matched y mismatches.
+
+    Raises:
+        ValueError: Si el archivo no es una grabación válida.
+    """
+    meta: Dict[str, Any] = {}
+    inbound: List[Tuple[float, int, bytes]] = []
+    expected: List[Any] = []
+    for offset, kind, data in read_recording(path):
+        if kind == RECORD_META:
+            meta = json.loads(data)
+        elif kind in (RECORD_IN_TEXT, RECORD_IN_PACKED):
+            inbound.append((offset, kind, data))
+        else:
+            expected.append(_decode(data, kind == RECORD_OUT_PACKED))
+
+    server = ReplayServer(config_path or meta.get('config', 'config.yaml'),
+                          meta.get('protocol', 'simple'))
+    sent: Dict[Any, float] = {}
+    server.start_pipeline()
+    start = time.perf_counter()
+    try:
+        if server.jsonrpc is None:
+            server.send_ready()
+        server.running = True
+        for offset, kind, data in inbound:
+            if paced:
+                wait = start + offset - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            packed = kind == RECORD_IN_PACKED
+            key = _response_key(_decode(data, packed))
+            if key is not None:
+                sent.setdefault(key, time.perf_counter())
+            if packed:
+                server.process_packed(data)
+            else:
+                server.process_message(data.decode('utf-8'))
+            if not server.running:
+                break
+    finally:
+        server.stop_pipeline()
+    elapsed = time.perf_counter() - start
+
+    latencies = []
+    actual = []
+    for instant, item in server.outputs:
+        message = _decode(item, not isinstance(item, str))
+        actual.append(message)
+        key = _response_key(message)
+        if key is not None and key in sent:
+            latencies.append((instant - sent.pop(key)) * 1000.0)
+    latencies.sort()
+
+    mismatches = _compare(expected, actual)
+    return {
+        'messages': len(inbound),
+        'responses': len(actual),
+        'elapsed_s': round(elapsed, 6),
+        'throughput': round(len(inbound) / elapsed, 1) if elapsed > 0 else 0.0,
+        'latency_ms': {
+            'p50': round(_percentile(latencies, 0.50), 3),
+            'p95': round(_percentile(latencies, 0.95), 3),
+            'p99': round(_percentile(latencies, 0.99), 3),
+            'max': round(latencies[-1], 3) if latencies else 0.0,
+        },
+        'matched': not mismatches and len(expected) == len(actual),
+        'mismatches': mismatches[:MAX_MISMATCHES],
+    }
+
+
+def _compare(expected: List[Any], actual: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Compara las respuestas grabadas con las reproducidas.
+
+    Args:
+        expected: Respuestas grabadas, en orden.
+        actual: Respuestas reproducidas, en orden.
+
+    Returns:
+        Lista de diferencias {id, expected, actual}.
+    """
+    def group(messages: List[Any]) -> Dict[Any, List[Any]]:
+        groups: Dict[Any, List[Any]] = {}
+        for message in messages:
+            if isinstance(message, dict) and message.get('type') in VOLATILE_TYPES:
+                continue
+            groups.setdefault(_response_key(message), []).append(_comparable(message))
+        return groups
+
+    wanted, got = group(expected), group(actual)
+    mismatches = []
+    for key in list(wanted) + [key for key in got if key not in wanted]:
+        left, right = wanted.get(key, []), got.get(key, [])
+        for i in range(max(len(left), len(right))):
+            before = left[i] if i < len(left) else None
+            after = right[i] if i < len(right) else None
+            if before != after:
+                mismatches.append({'id': key, 'expected': before, 'actual': after})
+    return mismatches
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """
+    Formatea el informe de replay_session para la terminal.
+
+    Args:
+        report: Informe devuelto por replay_session.
+
+    Returns:
+        Texto del informe.
+    """
+    latency = report['latency_ms']
+    lines = [
+        f"Mensajes: {report['messages']}, respuestas: {report['responses']}",
+        f"Tiempo: {report['elapsed_s']:.3f} s ({report['throughput']:.1f} mensajes/s)",
+        f"Latencia (ms): p50 {latency['p50']:.3f}, p95 {latency['p95']:.3f}, "
+        f"p99 {latency['p99']:.3f}, máx {latency['max']:.3f}",
+    ]
+    if report['matched']:
+        lines.append("✅ Las respuestas coinciden con la grabación")
+    else:
+        lines.append(f"❌ Respuestas distintas de la grabación "
+                     f"(mostrando {len(report['mismatches'])}):")
+        for mismatch in report['mismatches']:
+            lines.append(f"  id {mismatch['id']}: esperado {mismatch['expected']}, "
+                         f"obtenido {mismatch['actual']}")
+    return '\n'.join(lines)
@@ -0,0 +1,374 @@
+"""Motor de automatizaciones incremental indexado por dependencias de estado."""
+
+from typing import Dict, List, Optional, Any, Callable, Iterable, Set, Tuple
+from .scenes import Scene, compile_scene
+
+
+# Prefijo de las claves de cambio de luces (igual que en HomeState)
+LIGHT_KEY_PREFIX = 'light:'
+
+# Clave sintética que cambia cuando cambia cualquier luz
+ANY_LIGHT_KEY = 'lights'
+
+# Clave de cambio que notifica un nuevo conjunto de luces tras una recarga
+# (valor: tupla con los nombres de las luces configuradas)
+LIGHT_SET_KEY = 'light_set'
+
+# Condición de una regla: recibe el HomeState y devuelve si se cumple
+Condition = Callable[[Any], bool]
+
+
+class Rule:
+    """Regla de automatización: condición, dependencias y acción."""
+
+    def __init__(self, name: str, condition: Condition,
+                 depends: Iterable[str], action: Scene, delay: float = 0.0):
+        """
+        Inicializa una regla.
+
+        Args:
+            name: Nombre de la regla.
+            condition: Función que evalúa la condición sobre el estado.
+            depends: Claves de estado que lee la condición ('alarm',
+                'presence', 'light:<nombre>' o 'lights' para cualquier luz).
+            action: Cambios a aplicar cuando la condición pasa a cumplirse.
+            delay: Segundos simulados que la condición debe mantenerse antes
+                de disparar la acción (0 = inmediato).
+        """
+        self.name = name
+        self.condition = condition
+        self.depends = frozenset(depends)
+        self.action = action
+        self.delay = delay
+
+
+def compile_condition(name: str, spec: Dict[str, Any], known: Set[str],
+                      group_index: Dict[str, Tuple[str, ...]]
+                      ) -> Tuple[Condition, Set[str]]:
+    """
+    Compila la sección 'when' de una regla e infiere sus dependencias.
+
+    Args:
+        name: Nombre de la regla (para los mensajes de error).
+        spec: Condiciones: 'presence', 'alarm', 'any_light_on' (booleanos)
+            y 'lights' ({luz o ruta de grupo: booleano}).
+        known: Conjunto de luces configuradas.
+        group_index: Índice de grupos de la configuración.
+
+    Returns:
+        Tupla (condición, claves de estado de las que depende).
+
+    Raises:
+        ValueError: Si la condición no es válida.
+    """
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError(f"Regla '{name}': 'when' debe ser un diccionario no vacío")
+
+    checks: List[Condition] = []
+    depends: Set[str] = set()
+
+    for key, expected in spec.items():
+        if key == 'lights':
+            if not isinstance(expected, dict):
+                raise ValueError(
+                    f"Regla '{name}': 'when.lights' debe ser un diccionario")
+            for target, on in expected.items():
+                if not isinstance(on, bool):
+                    raise ValueError(
+                        f"Regla '{name}': el valor de '{target}' debe ser booleano")
+                if target in known:
+                    checks.append(
+                        lambda state, light=target, on=on: state.lights[light] == on)
+                    depends.add(LIGHT_KEY_PREFIX + target)
+                elif target in group_index:
+                    goal = len(group_index[target]) if on else 0
+                    checks.append(
+                        lambda state, path=target, goal=goal:
+                            state.group_on[path] == goal)
+                    depends.update(
+                        LIGHT_KEY_PREFIX + light for light in group_index[target])
+                else:
+                    raise ValueError(
+                        f"Regla '{name}': '{target}' no es una luz ni un grupo")
+            continue
+
+        if not isinstance(expected, bool):
+            raise ValueError(f"Regla '{name}': '{key}' debe ser booleano")
+        if key == 'presence':
+            checks.append(
+                lambda state, v=expected: state.presence['present'] == v)
+            depends.add('presence')
+        elif key == 'alarm':
+            checks.append(lambda state, v=expected: state.alarm_armed == v)
+            depends.add('alarm')
+        elif key == 'any_light_on':
+            checks.append(
+                lambda state, v=expected: (state.lights_on_count > 0) == v)
+            depends.add(ANY_LIGHT_KEY)
+        else:
+            raise ValueError(f"Regla '{name}': condición desconocida '{key}'")
+
+    if len(checks) == 1:
+        return checks[0], depends
+    return (lambda state: all(check(state) for check in checks)), depends
+
+
+def compile_rules(rules: Optional[List[Dict[str, Any]]], lights: List[str],
+                  group_index: Dict[str, Tuple[str, ...]],
+                  scenes: Dict[str, Scene]) -> List[Rule]:
+    """
+    Compila la sección 'rules' de la configuración.
+
+    Args:
+        rules: Lista de reglas ({name, when, then, for?, depends?}).
+        lights: Luces configuradas.
+        group_index: Índice de grupos de la configuración.
+        scenes: Escenas compiladas (referenciables con 'then.scene').
+
+    Returns:
+        Lista de reglas compiladas.
+
+    Raises:
+        ValueError: Si alguna regla no es válida.
+    """
+    compiled: List[Rule] = []
+    if not rules:
+        return compiled
+    if not isinstance(rules, list):
+        raise ValueError("'rules' debe ser una lista")
+
+    known = set(lights)
+    names: Set[str] = set()
+    for position, spec in enumerate(rules):
+        if not isinstance(spec, dict):
+            raise ValueError(f"La regla #{position} debe ser un diccionario")
+        name = str(spec.get('name', f"regla_{position}"))
+        if name in names:
+            raise ValueError(f"Regla duplicada: '{name}'")
+        names.add(name)
+
+        condition, depends = compile_condition(
+            name, spec.get('when'), known, group_index)
+        extra = spec.get('depends') or []
+        if isinstance(extra, str):
+            extra = [extra]
+        if not isinstance(extra, list) or not all(isinstance(key, str) for key in extra):
+            raise ValueError(
+                f"Regla '{name}': 'depends' debe ser una clave de estado o una lista de claves")
+        depends.update(extra)
+
+        then = spec.get('then')
+        if not isinstance(then, dict) or not then:
+            raise ValueError(f"Regla '{name}': 'then' debe ser un diccionario no vacío")
+        if 'scene' in then:
+            action = scenes.get(then['scene'])
+            if action is None:
+                raise ValueError(
+                    f"Regla '{name}': escena '{then['scene']}' no encontrada")
+        else:
+            action = compile_scene(name, then, lights, known, group_index)
+
+        delay = spec.get('for', 0)
+        if isinstance(delay, bool) or not isinstance(delay, (int, float)) or delay < 0:
+            raise ValueError(
+                f"Regla '{name}': 'for' debe ser un número de segundos >= 0")
+
+        compiled.append(Rule(name, condition, depends, action, float(delay)))
+
+    return compiled
+
+
+class RuleEngine:
+    """
+    Evalúa reglas de forma incremental a partir de los cambios de HomeState.
+
+    Las reglas se indexan por las claves de estado de las que dependen, de
+    forma que cada mutación solo reevalúa las reglas afectadas. Las reglas
+    se disparan por flanco (cuando su condición pasa de falsa a verdadera);
+    las reglas con 'for' planifican el disparo en el reloj simulado y se
+    cancelan si la condición deja de cumplirse antes. Si una acción provoca
+    nuevos cambios, se procesan en cascada, con protección frente a ciclos
+    (cada regla se dispara como mucho una vez por cascada) y tormentas
+    (límite de rondas y de disparos por cascada).
+    """
+
+    def __init__(self, state: Any, rules: List[Rule], max_rounds: int = 32,
+                 max_fires: int = 1000):
+        """
+        Inicializa el motor.
+
+        HomeState invoca on_change() tras cada mutación, después de notificar
+        a los observadores registrados.
+
+        Args:
+            state: Instancia de HomeState.
+            rules: Reglas compiladas.
+            max_rounds: Máximo de rondas de cascada por mutación externa.
+            max_fires: Máximo de disparos por cascada.
+        """
+        self.state = state
+        self.rules = list(rules)
+        self.max_rounds = max_rounds
+        self.max_fires = max_fires
+
+        self._index: Dict[str, List[int]] = {}
+        for position, rule in enumerate(self.rules):
+            for key in rule.depends:
+                self._index.setdefault(key, []).append(position)
+        self._watch_any_light = ANY_LIGHT_KEY in self._index
+
+        # Estado de la condición en la última evaluación (disparo por flanco)
+        self._active: List[bool] = [
+            bool(rule.condition(state)) for rule in self.rules]
+        self._fires: List[int] = [0] * len(self.rules)
+
+        # Disparos diferidos pendientes: {posición: id de evento del reloj}
+        self._timers: Dict[int, int] = {}
+
+        self._pending: Set[str] = set()
+        self._running = False
+
+        self.stats: Dict[str, int] = {
+            'mutations': 0,
+            'evaluations': 0,
+            'fires': 0,
+            'cycles_suppressed': 0,
+            'storms_suppressed': 0,
+            'cascades_truncated': 0,
+        }
+
+    def affected_rules(self, keys: Iterable[str]) -> List[int]:
+        """
+        Obtiene las reglas que dependen de alguna de las claves.
+
+        Args:
+            keys: Claves de estado que cambiaron.
+
+        Returns:
+            Posiciones de las reglas afectadas, en orden de definición.
+        """
+        index = self._index
+        affected: Set[int] = set()
+        any_light = False
+        for key in keys:
+            positions = index.get(key)
+            if positions:
+                affected.update(positions)
+            if not any_light and key.startswith(LIGHT_KEY_PREFIX):
+                any_light = True
+        if any_light and self._watch_any_light:
+            affected.update(index[ANY_LIGHT_KEY])
+        return sorted(affected)
+
+    def on_change(self, changes: Dict[str, Any]) -> None:
+        """
+        Reevalúa las reglas afectadas por los cambios de una mutación.
+
+        Args:
+            changes: Diccionario {clave: nuevo valor}.
+        """
+        self._pending.update(changes)
+        if self._running:
+            # Cambio provocado por una acción: se procesa en la cascada actual
+            return
+
+        self._running = True
+        self.stats['mutations'] += 1
+        try:
+            self._run_cascade()
+        finally:
+            self._pending.clear()
+            self._running = False
+
+    def _run_cascade(self) -> None:
+        """Procesa los cambios pendientes hasta que el estado se estabiliza."""
+        fired: Set[int] = set()
+        rounds = 0
+        stats = self.stats
+        active = self._active
+        rules = self.rules
+        state = self.state
+
+        while self._pending:
+            if rounds >= self.max_rounds:
+                stats['cascades_truncated'] += 1
+                return
+            rounds += 1
+
+            keys, self._pending = self._pending, set()
+            for position in self.affected_rules(keys):
+                rule = rules[position]
+                stats['evaluations'] += 1
+                now = bool(rule.condition(state))
+                was = active[position]
+                active[position] = now
+                if now == was:
+                    continue
+                if not now:
+                    timer = self._timers.pop(position, None)
+                    if timer is not None:
+                        state.clock.cancel(timer)
+                    continue
+                if rule.delay > 0:
+                    self._timers[position] = state.clock.schedule(
+                        rule.delay, self._fire_delayed, position)
+                    continue
+                if position in fired:
+                    stats['cycles_suppressed'] += 1
+                    continue
+                if len(fired) >= self.max_fires:
+                    stats['storms_suppressed'] += 1
+                    continue
+                fired.add(position)
+                self._fire(position)
+
+    def close(self) -> None:
+        """Cancela los disparos diferidos pendientes (al sustituir el motor)."""
+        for timer in self._timers.values():
+            self.state.clock.cancel(timer)
+        self._timers.clear()
+
+    def _fire_delayed(self, position: int) -> None:
+        """
+        Dispara una regla diferida cuyo plazo ha vencido en el reloj simulado.
+
+        Args:
+            position: Posición de la regla.
+        """
+        self._timers.pop(position, None)
+        if self._active[position]:
+            self._fire(position)
+
+    def _fire(self, position: int) -> None:
+        """
+        Ejecuta la acción de una regla.
+
+        Args:
+            position: Posición de la regla.
+        """
+        self._fires[position] += 1
+        self.stats['fires'] += 1
+        diff = self.rules[position].action.diff(self.state)
+        self.state.apply_changes(
+            turn_on=diff['turn_on'],
+            turn_off=diff['turn_off'],
+            alarm=diff['alarm'],
+            presence=diff['presence'])
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """
+        Describe las reglas y su estado actual.
+
+        Returns:
+            Lista de diccionarios con name, active, fires y depends.
+        """
+        return [
+            {
+                'name': rule.name,
+                'active': self._active[position],
+                'fires': self._fires[position],
+                'depends': len(rule.depends),
+                'pending': position in self._timers,
+            }
+            for position, rule in enumerate(self.rules)
+        ]
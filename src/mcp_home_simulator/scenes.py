@@ -0,0 +1,192 @@
+"""Escenas: estados objetivo precompilados que se aplican de forma atómica."""
+
+import fnmatch
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+
+class Scene:
+    """Escena compilada: luces a encender/apagar, alarma y presencia objetivo."""
+
+    def __init__(self, name: str, lights_on: Tuple[str, ...],
+                 lights_off: Tuple[str, ...], alarm: Optional[bool] = None,
+                 presence: Optional[List[str]] = None):
+        """
+        Inicializa una escena compilada.
+
+        Args:
+            name: Nombre de la escena.
+            lights_on: Luces que la escena deja encendidas.
+            lights_off: Luces que la escena deja apagadas.
+            alarm: Estado objetivo de la alarma (None = no lo toca).
+            presence: Personas presentes objetivo (None = no lo toca).
+        """
+        self.name = name
+        self.lights_on = lights_on
+        self.lights_off = lights_off
+        self.alarm = alarm
+        self.presence = presence
+
+    def diff(self, state: Any) -> Dict[str, Any]:
+        """
+        Calcula el diff mínimo entre la escena y el estado actual.
+
+        Args:
+            state: Instancia de HomeState.
+
+        Returns:
+            Diccionario con 'turn_on', 'turn_off' (luces que cambian),
+            'alarm' y 'presence' (None si no cambian).
+        """
+        lights = state.lights
+        alarm = self.alarm
+        if alarm is not None and state.alarm_armed == alarm:
+            alarm = None
+        presence = self.presence
+        if presence is not None and state.presence['known_people'] == presence:
+            presence = None
+        return {
+            'turn_on': [name for name in self.lights_on if not lights[name]],
+            'turn_off': [name for name in self.lights_off if lights[name]],
+            'alarm': alarm,
+            'presence': presence,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Describe la escena para mostrarla por CLI o MCP.
+
+        Returns:
+            Diccionario con el contenido de la escena.
+        """
+        return {
+            'name': self.name,
+            'lights_on': len(self.lights_on),
+            'lights_off': len(self.lights_off),
+            'alarm': self.alarm,
+            'presence': None if self.presence is None else list(self.presence),
+        }
+
+
+def resolve_light_target(key: str, lights: List[str],
+                         group_index: Dict[str, Tuple[str, ...]]) -> Tuple[str, ...]:
+    """
+    Resuelve una clave de escena a las luces que abarca.
+
+    Se prueba, en orden: ruta de grupo y patrón glob ('*' = todas). Los
+    nombres exactos de luz se resuelven antes de llamar a esta función.
+
+    Args:
+        key: Clave del diccionario 'lights' de la escena.
+        lights: Luces configuradas.
+        group_index: Índice de grupos de la configuración.
+
+    Returns:
+        Tupla de luces seleccionadas.
+
+    Raises:
+        ValueError: Si la clave no selecciona ninguna luz.
+    """
+    if key in group_index:
+        return group_index[key]
+    if key == '*':
+        return tuple(lights)
+    matched = tuple(fnmatch.filter(lights, key))
+    if not matched:
+        raise ValueError(f"'{key}' no corresponde a ninguna luz ni grupo")
+    return matched
+
+
+def compile_scenes(scenes: Optional[Dict[str, Any]], lights: List[str],
+                   group_index: Dict[str, Tuple[str, ...]]) -> Dict[str, Scene]:
+    """
+    Compila las escenas de la configuración.
+
+    Las claves de 'lights' se aplican en orden, de forma que una entrada
+    posterior sobrescribe a las anteriores (ej: '*': false seguido de
+    'dormitorio': true).
+
+    Args:
+        scenes: Sección 'scenes' de la configuración.
+        lights: Luces configuradas.
+        group_index: Índice de grupos de la configuración.
+
+    Returns:
+        Diccionario {nombre: Scene}.
+
+    Raises:
+        ValueError: Si alguna escena no es válida.
+    """
+    compiled: Dict[str, Scene] = {}
+    if not scenes:
+        return compiled
+    if not isinstance(scenes, dict):
+        raise ValueError("'scenes' debe ser un diccionario")
+
+    known = set(lights)
+    for name, spec in scenes.items():
+        name = str(name)
+        compiled[name] = compile_scene(name, spec, lights, known, group_index)
+
+    return compiled
+
+
+def compile_scene(name: str, spec: Dict[str, Any], lights: List[str],
+                  known: Set[str],
+                  group_index: Dict[str, Tuple[str, ...]]) -> Scene:
+    """
+    Compila una única escena.
+
+    Args:
+        name: Nombre de la escena.
+        spec: Definición de la escena (lights, alarm, presence).
+        lights: Luces configuradas.
+        known: Conjunto de luces configuradas (para búsquedas O(1)).
+        group_index: Índice de grupos de la configuración.
+
+    Returns:
+        Escena compilada.
+
+    Raises:
+        ValueError: Si la escena no es válida.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f"La escena '{name}' debe ser un diccionario")
+
+    targets: Dict[str, bool] = {}
+    light_spec = spec.get('lights') or {}
+    if not isinstance(light_spec, dict):
+        raise ValueError(
+            f"'lights' de la escena '{name}' debe ser un diccionario")
+    for key, on in light_spec.items():
+        if not isinstance(on, bool):
+            raise ValueError(
+                f"Escena '{name}': el valor de '{key}' debe ser booleano")
+        key = str(key)
+        if key in known:
+            targets[key] = on
+        else:
+            try:
+                selected = resolve_light_target(key, lights, group_index)
+            except ValueError as e:
+                raise ValueError(f"Escena '{name}': {e}")
+            for light in selected:
+                targets[light] = on
+
+    alarm = spec.get('alarm')
+    if alarm is not None and not isinstance(alarm, bool):
+        raise ValueError(f"Escena '{name}': 'alarm' debe ser booleano")
+
+    presence = spec.get('presence')
+    if presence is not None:
+        if not isinstance(presence, list):
+            raise ValueError(
+                f"Escena '{name}': 'presence' debe ser una lista de personas")
+        presence = [str(person) for person in presence]
+
+    return Scene(
+        name,
+        lights_on=tuple(light for light, on in targets.items() if on),
+        lights_off=tuple(light for light, on in targets.items() if not on),
+        alarm=alarm,
+        presence=presence,
+    )
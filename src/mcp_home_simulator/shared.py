@@ -0,0 +1,362 @@
+"""Estado de luces y alarma en memoria compartida para procesos lectores."""
+
+import json
+import multiprocessing
+import queue
+import struct
+import threading
+import time
+from itertools import compress
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .encoding import packb
+from .rules import LIGHT_KEY_PREFIX
+
+
+# Tools que los procesos lectores pueden responder desde la memoria compartida
+SHARED_READ_TOOLS = frozenset({'get_alarm_status', 'list_lights_on'})
+
+# Capacidad por defecto de la cola de peticiones hacia los procesos lectores
+DEFAULT_WORKER_QUEUE = 1024
+
+# Método de arranque de los procesos lectores: el servidor ya tiene hilos en
+# marcha al arrancarlos (también tras una recarga), y un fork podría heredar
+# cerrojos tomados por otro hilo
+WORKER_START_METHOD = 'spawn'
+
+# Cabecera del segmento: secuencia del seqlock (uint64), alarma (uint8),
+# relleno y número de luces (uint32); a continuación, un byte por luz
+_HEADER = struct.Struct('<QB3xI')
+_SEQUENCE = struct.Struct('<Q')
+_STATE_OFFSET = 8
+
+
+class SharedHomeState:
+    """
+    Segmento de memoria compartida con el estado de las luces y la alarma.
+
+    Un único proceso escritor modifica el segmento; cualquier número de
+    procesos lo leen sin IPC. La coherencia se garantiza con un seqlock: el
+    escritor pone la secuencia en impar, escribe y la pone en par; el lector
+    copia el estado y reintenta si la secuencia era impar o cambió durante
+    la copia. La secuencia dividida entre 2 es la versión del segmento.
+
+    El protocolo depende de que los procesadores no reordenen los accesos
+    a memoria entre procesos (orden total de escrituras de x86); CPython no
+    emite barreras explícitas.
+    """
+
+    def __init__(self, names: Sequence[str], name: Optional[str] = None,
+                 create: bool = True):
+        """
+        Crea o abre el segmento.
+
+        Args:
+            names: Nombres de las luces, en el orden de sus posiciones.
+            name: Nombre del segmento (None = nombre aleatorio al crearlo).
+            create: True para crear el segmento (escritor), False para abrirlo.
+
+        Raises:
+            ValueError: Si el segmento abierto no tiene el número de luces esperado.
+        """
+        self.names = list(names)
+        self._index = {light: i for i, light in enumerate(self.names)}
+        self._owner = create
+        size = _HEADER.size + max(len(self.names), 1)
+        if create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            _HEADER.pack_into(self._shm.buf, 0, 0, 0, len(self.names))
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            count = _HEADER.unpack_from(self._shm.buf, 0)[2]
+            if count != len(self.names):
+                self._shm.close()
+                raise ValueError(f"El segmento '{name}' tiene {count} luces, "
+                                 f"se esperaban {len(self.names)}")
+        self._buf = self._shm.buf
+        self._end = _HEADER.size + len(self.names)
+
+    @property
+    def name(self) -> str:
+        """Obtiene el nombre del segmento (para abrirlo desde otro proceso)."""
+        return self._shm.name
+
+    @property
+    def version(self) -> int:
+        """Obtiene el número de escrituras completadas."""
+        return _SEQUENCE.unpack_from(self._buf, 0)[0] // 2
+
+    def write(self, lights: Optional[Dict[str, bool]] = None,
+              alarm: Optional[bool] = None) -> None:
+        """
+        Actualiza luces y/o alarma en una sola escritura atómica para los lectores.
+
+        Args:
+            lights: Nuevo estado de las luces indicadas (las desconocidas se ignoran).
+            alarm: Nuevo estado de la alarma (None = sin cambios).
+        """
+        buf = self._buf
+        sequence = _SEQUENCE.unpack_from(buf, 0)[0]
+        _SEQUENCE.pack_into(buf, 0, sequence + 1)
+        if alarm is not None:
+            buf[_STATE_OFFSET] = 1 if alarm else 0
+        if lights:
+            index = self._index
+            for light, on in lights.items():
+                position = index.get(light)
+                if position is not None:
+                    buf[_HEADER.size + position] = 1 if on else 0
+        _SEQUENCE.pack_into(buf, 0, sequence + 2)
+
+    def snapshot(self) -> bytes:
+        """
+        Lee una copia coherente del estado.
+
+        Returns:
+            Bytes con la alarma en la posición 0 y una luz por posición a
+            partir de _HEADER.size - _STATE_OFFSET.
+        """
+        buf = self._buf
+        unpack = _SEQUENCE.unpack_from
+        while True:
+            before = unpack(buf, 0)[0]
+            if before & 1:
+                # Escritura en curso: ceder el procesador y reintentar
+                time.sleep(0)
+                continue
+            data = bytes(buf[_STATE_OFFSET:self._end])
+            if unpack(buf, 0)[0] == before:
+                return data
+
+    def alarm_armed(self) -> bool:
+        """Indica si la alarma está armada."""
+        return self.snapshot()[0] == 1
+
+    def lights_on(self) -> List[str]:
+        """Obtiene las luces encendidas, en el orden de la configuración."""
+        data = self.snapshot()
+        return list(compress(self.names, data[_HEADER.size - _STATE_OFFSET:]))
+
+    def execute_tool(self, tool_name: str) -> Dict[str, Any]:
+        """
+        Ejecuta una tool de solo lectura sobre el segmento.
+
+        Args:
+            tool_name: Nombre de la tool (ver SHARED_READ_TOOLS).
+
+        Returns:
+            Resultado de la tool, igual que MCPTools.
+        """
+        if tool_name == 'get_alarm_status':
+            return {'armed': self.alarm_armed()}
+        if tool_name == 'list_lights_on':
+            return {'on': self.lights_on()}
+        return {'ok': False, 'error': f"Tool '{tool_name}' no disponible en memoria compartida"}
+
+    def close(self) -> None:
+        """Cierra el segmento y, si es el escritor, lo elimina."""
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class SharedStateMirror:
+    """Replica en un SharedHomeState cada mutación de un HomeState."""
+
+    def __init__(self, state: Any, shared: SharedHomeState):
+        """
+        Copia el estado actual y se registra como observador de cambios.
+
+        Args:
+            state: Instancia de HomeState (el escritor único).
+            shared: Segmento creado por este proceso.
+        """
+        self.state = state
+        self.shared = shared
+        shared.write(dict(state.lights), state.alarm_armed)
+        state.add_listener(self.on_change)
+
+    def on_change(self, changes: Dict[str, Any]) -> None:
+        """
+        Aplica los cambios de luces y alarma de una mutación.
+
+        Args:
+            changes: Diccionario {clave: nuevo valor} de HomeState.
+        """
+        lights = {key[len(LIGHT_KEY_PREFIX):]: value for key, value in changes.items()
+                  if key.startswith(LIGHT_KEY_PREFIX)}
+        alarm = changes.get('alarm')
+        if lights or alarm is not None:
+            self.shared.write(lights, alarm)
+
+    def close(self) -> None:
+        """Deja de replicar cambios."""
+        self.state.remove_listener(self.on_change)
+
+
+def _reader_main(segment: str, names: List[str], requests: Any, results: Any) -> None:
+    """
+    Bucle de un proceso lector: responde peticiones leyendo el segmento.
+
+    Args:
+        segment: Nombre del segmento compartido.
+        names: Nombres de las luces.
+        requests: Cola de peticiones (msg_id, tool, encoding, deadline) o None para terminar.
+        results: Cola de respuestas serializadas.
+    """
+    shared = SharedHomeState(names, segment, create=False)
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            msg_id, tool_name, encoding, deadline = request
+            if deadline is not None and time.monotonic() >= deadline:
+                message = {'type': 'error', 'id': msg_id, 'ok': False,
+                           'error': "Plazo vencido antes de ejecutar la llamada",
+                           'code': 'deadline'}
+            else:
+                message = {'type': 'result', 'id': msg_id, 'ok': True,
+                           'result': shared.execute_tool(tool_name)}
+            if encoding == 'msgpack':
+                results.put(packb(message))
+            else:
+                results.put(json.dumps(message, ensure_ascii=False))
+    finally:
+        shared.close()
+
+
+class ReaderPool:
+    """
+    Procesos lectores que responden tools de luces y alarma sin pasar por el escritor.
+
+    El servidor sigue leyendo la entrada (fan-in) y ejecutando las
+    mutaciones en su propio proceso, que actualiza el segmento compartido.
+    Las lecturas de SHARED_READ_TOOLS se reparten entre los procesos por una
+    cola acotada; cada proceso serializa su respuesta y un hilo del
+    servidor la entrega a la cola de salida.
+    """
+
+    def __init__(self, shared: SharedHomeState, workers: int,
+                 emit: Callable[[Any], None],
+                 capacity: int = DEFAULT_WORKER_QUEUE):
+        """
+        Inicializa el grupo de procesos (sin arrancarlos).
+
+        Args:
+            shared: Segmento creado por el servidor.
+            workers: Número de procesos lectores.
+            emit: Función que entrega una respuesta serializada al escritor.
+            capacity: Número máximo de peticiones pendientes.
+
+        Raises:
+            ValueError: Si el número de procesos no es positivo.
+        """
+        if workers <= 0:
+            raise ValueError("El número de procesos lectores debe ser mayor que 0")
+        self.shared = shared
+        self.workers = workers
+        self.capacity = capacity
+        self._emit = emit
+        self._processes: List[Any] = []
+        self._collector: Optional[threading.Thread] = None
+        self._requests: Any = None
+        self._results: Any = None
+        # Lecturas enviadas cuya respuesta aún no se ha entregado
+        self._inflight = 0
+        self._idle = threading.Condition()
+        self.forwarded = 0
+        self.busy = 0
+
+    def start(self) -> None:
+        """Arranca los procesos lectores y el hilo que recoge sus respuestas."""
+        context = multiprocessing.get_context(WORKER_START_METHOD)
+        self._requests = context.Queue(self.capacity)
+        self._results = context.Queue()
+        self._processes = [
+            context.Process(target=_reader_main, name=f'mcp-reader-{i}', daemon=True,
+                            args=(self.shared.name, self.shared.names,
+                                  self._requests, self._results))
+            for i in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+        self._collector = threading.Thread(target=self._collect, name='mcp-readers',
+                                           daemon=True)
+        self._collector.start()
+
+    def submit(self, msg_id: Any, tool_name: str, encoding: str,
+               deadline: Optional[float] = None) -> bool:
+        """
+        Envía una lectura a los procesos lectores.
+
+        Args:
+            msg_id: ID del mensaje de la llamada.
+            tool_name: Tool de SHARED_READ_TOOLS.
+            encoding: Codificación de la respuesta ('json' o 'msgpack').
+            deadline: Instante monotónico límite (None = sin plazo).
+
+        Returns:
+            False si la cola de peticiones está llena.
+        """
+        with self._idle:
+            self._inflight += 1
+        try:
+            self._requests.put_nowait((msg_id, tool_name, encoding, deadline))
+        except queue.Full:
+            self._finished()
+            self.busy += 1
+            return False
+        self.forwarded += 1
+        return True
+
+    def _finished(self) -> None:
+        """Descuenta una lectura en curso y despierta a quien espera en drain()."""
+        with self._idle:
+            self._inflight -= 1
+            if not self._inflight:
+                self._idle.notify_all()
+
+    def drain(self) -> None:
+        """Espera a que se hayan entregado las respuestas de todas las lecturas enviadas."""
+        with self._idle:
+            while self._inflight:
+                self._idle.wait()
+
+    def _collect(self) -> None:
+        """Entrega las respuestas de los procesos hasta recibir None."""
+        while True:
+            item = self._results.get()
+            if item is None:
+                break
+            self._emit(item)
+            self._finished()
+
+    def stop(self) -> None:
+        """Espera a que se respondan las peticiones pendientes y para los procesos."""
+        for _ in self._processes:
+            self._requests.put(None)
+        for process in self._processes:
+            process.join()
+        self._results.put(None)
+        self._collector.join()
+        self._requests.close()
+        self._results.close()
+        self._processes = []
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas del grupo.
+
+        Returns:
+            Diccionario con procesos, lecturas reenviadas, rechazadas y la
+            versión del segmento.
+        """
+        return {
+            'processes': self.workers,
+            'forwarded': self.forwarded,
+            'busy': self.busy,
+            'version': self.shared.version,
+        }
@@ -1,7 +1,47 @@
 """Módulo de estado para el simulador de domótica."""
 
-from typing import Dict, List, Optional, Any
+import fnmatch
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Callable, Iterable, Pattern, Sequence, Tuple
+from .clock import SimClock
 from .config import Config
+from .energy import ENERGY_AVAILABLE, EnergyMeter
+from .history import PresenceHistory
+from .rules import LIGHT_KEY_PREFIX, LIGHT_SET_KEY, RuleEngine
+from .timeseries import ChangeLog
+
+
+# Número máximo de selecciones resueltas que se guardan por estado
+SELECTION_CACHE_SIZE = 256
+
+# Observador de cambios: recibe {clave: nuevo valor}
+ChangeListener = Callable[[Dict[str, Any]], None]
+
+
+@lru_cache(maxsize=SELECTION_CACHE_SIZE)
+def compile_selector(kind: str, pattern: str) -> Pattern[str]:
+    """
+    Compila un selector de luces a expresión regular (con caché).
+
+    Args:
+        kind: Tipo de selector ('pattern' para glob, 'regex' para regex).
+        pattern: Patrón a compilar.
+
+    Returns:
+        Expresión regular compilada.
+
+    Raises:
+        ValueError: Si el tipo es desconocido o la regex no es válida.
+    """
+    if kind == 'pattern':
+        return re.compile(fnmatch.translate(pattern))
+    if kind == 'regex':
+        try:
+            return re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Regex inválida '{pattern}': {e}")
+    raise ValueError(f"Tipo de selector desconocido: {kind}")
 
 
 class HomeState:
@@ -29,6 +69,126 @@ class HomeState:
             'known_people': list(config.presence_default['known_people'])
         }
 
+        # Índices de grupos precalculados en la configuración
+        self._group_index = config.group_index
+        self._light_groups = config.light_groups
+
+        # Número total de luces encendidas, mantenido de forma incremental
+        self.lights_on_count: int = sum(1 for on in self.lights.values() if on)
+
+        # Luces encendidas por grupo, mantenidas de forma incremental
+        self.group_on: Dict[str, int] = {
+            path: sum(1 for light in members if self.lights[light])
+            for path, members in self._group_index.items()
+        }
+
+        # Versión del estado: se incrementa en cada mutación
+        self.version: int = 0
+
+        # Caché de selecciones resueltas: {(tipo, patrón): nombres}
+        self._selection_cache: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+
+        # Observadores notificados tras cada mutación
+        self._listeners: List[ChangeListener] = []
+
+        # Reloj simulado y planificador de eventos
+        self.clock = SimClock(**config.clock)
+
+        # Historial de eventos de presencia
+        history = config.history
+        self.presence_history = PresenceHistory(history['presence_capacity'])
+
+        # Registro columnar de todos los cambios (consultas en un instante)
+        self.changes: Optional[ChangeLog] = None
+        if history['changes']:
+            self.changes = ChangeLog(self, history['chunk_size'],
+                                     history['checkpoint_every'])
+
+        # Medidor de consumo energético (requiere numpy)
+        self.energy: Optional[EnergyMeter] = None
+        if ENERGY_AVAILABLE and (config.data.get('energy') or {}).get('enabled', True):
+            self.energy = EnergyMeter(self)
+
+        # Motor de automatizaciones (solo si hay reglas configuradas)
+        self.rules: Optional[RuleEngine] = None
+        if config.rules:
+            self.rules = RuleEngine(self, config.rules)
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        """
+        Registra un observador de cambios.
+
+        El observador recibe un diccionario {clave: nuevo valor} con las
+        claves 'light:<nombre>', 'alarm' y 'presence' que cambiaron. Si una
+        recarga añade o elimina luces, recibe además {LIGHT_SET_KEY: tupla
+        con los nombres de las luces}.
+
+        Args:
+            listener: Función a invocar tras cada mutación.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: ChangeListener) -> None:
+        """
+        Elimina un observador de cambios registrado.
+
+        Args:
+            listener: Observador a eliminar.
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _commit(self, turn_on: Sequence[str] = (), turn_off: Sequence[str] = (),
+                alarm: bool = False, presence: bool = False) -> None:
+        """
+        Registra una mutación: incrementa la versión y notifica los cambios.
+
+        Args:
+            turn_on: Luces que se encendieron.
+            turn_off: Luces que se apagaron.
+            alarm: True si cambió la alarma.
+            presence: True si cambió la presencia.
+        """
+        self.version += 1
+        if not self._listeners and self.rules is None:
+            return
+
+        changes: Dict[str, Any] = {}
+        for name in turn_on:
+            changes[LIGHT_KEY_PREFIX + name] = True
+        for name in turn_off:
+            changes[LIGHT_KEY_PREFIX + name] = False
+        if alarm:
+            changes['alarm'] = self.alarm_armed
+        if presence:
+            changes['presence'] = list(self.presence['known_people'])
+
+        for listener in tuple(self._listeners):
+            listener(changes)
+
+        # Las reglas se evalúan después de los observadores, de modo que los
+        # cambios en cascada les llegan en orden
+        if self.rules is not None:
+            self.rules.on_change(changes)
+
+    def _write_lights(self, names: List[str], on: bool) -> None:
+        """
+        Escribe el nuevo estado de luces que cambian y actualiza contadores.
+
+        Args:
+            names: Luces cuyo estado actual es distinto de `on`.
+            on: Nuevo estado.
+        """
+        lights = self.lights
+        group_on = self.group_on
+        light_groups = self._light_groups
+        delta = 1 if on else -1
+        for name in names:
+            lights[name] = on
+            for path in light_groups.get(name, ()):
+                group_on[path] += delta
+        self.lights_on_count += delta * len(names)
+
     # ==================== LUCES ====================
 
     def get_light_state(self, name: str) -> Optional[bool]:
@@ -57,9 +217,93 @@ class HomeState:
         if name not in self.lights:
             return False
 
-        self.lights[name] = on
+        if self.lights[name] != on:
+            self._write_lights([name], on)
+            if on:
+                self._commit(turn_on=(name,))
+            else:
+                self._commit(turn_off=(name,))
         return True
 
+    def select_lights(self, names: Optional[Iterable[str]] = None,
+                      pattern: Optional[str] = None,
+                      regex: Optional[str] = None) -> List[str]:
+        """
+        Resuelve un selector de luces a la lista de nombres que abarca.
+
+        Se debe indicar exactamente uno de los selectores. El patrón '*'
+        selecciona todas las luces. Las resoluciones de patrones se guardan
+        en caché, por lo que repetir un selector no vuelve a recorrer nombres.
+
+        Args:
+            names: Lista explícita de nombres.
+            pattern: Patrón glob (ej: 'garage*').
+            regex: Expresión regular (ej: '^planta2_').
+
+        Returns:
+            Lista de nombres de luces seleccionadas, en orden de configuración.
+
+        Raises:
+            ValueError: Si el selector no es válido o contiene luces inexistentes.
+        """
+        given = [s for s in (names, pattern, regex) if s is not None]
+        if len(given) != 1:
+            raise ValueError(
+                "Indica exactamente un selector: names, pattern o regex")
+
+        if names is not None:
+            if isinstance(names, str):
+                raise ValueError("'names' debe ser una lista de nombres")
+            selected = list(dict.fromkeys(names))
+            missing = [name for name in selected if name not in self.lights]
+            if missing:
+                raise ValueError(
+                    f"Luces no encontradas: {', '.join(map(str, missing))}")
+            return selected
+
+        if pattern == '*':
+            return list(self.lights)
+
+        kind, expr = ('pattern', pattern) if pattern is not None else (
+            'regex', regex)
+        if not isinstance(expr, str):
+            raise ValueError(f"'{kind}' debe ser un texto")
+
+        key = (kind, expr)
+        cached = self._selection_cache.get(key)
+        if cached is None:
+            compiled = compile_selector(kind, expr)
+            match = compiled.match if kind == 'pattern' else compiled.search
+            cached = tuple(name for name in self.lights if match(name))
+            if len(self._selection_cache) >= SELECTION_CACHE_SIZE:
+                self._selection_cache.clear()
+            self._selection_cache[key] = cached
+        return list(cached)
+
+    def set_lights_state(self, names: Iterable[str], on: bool) -> List[str]:
+        """
+        Cambia el estado de varias luces en una sola mutación.
+
+        La versión del estado se incrementa una única vez si alguna luz
+        cambia.
+
+        Args:
+            names: Nombres de luces (deben existir).
+            on: True para encender, False para apagar.
+
+        Returns:
+            Lista de luces que cambiaron de estado.
+        """
+        lights = self.lights
+        changed = [name for name in names if lights[name] != on]
+        if changed:
+            self._write_lights(changed, on)
+            if on:
+                self._commit(turn_on=changed)
+            else:
+                self._commit(turn_off=changed)
+        return changed
+
     def list_lights_on(self) -> List[str]:
         """
         Obtiene la lista de luces encendidas.
@@ -78,6 +322,215 @@ class HomeState:
         """
         return dict(self.lights)
 
+    # ==================== GRUPOS ====================
+
+    def list_groups(self) -> List[str]:
+        """
+        Obtiene las rutas de todos los grupos configurados.
+
+        Returns:
+            Lista de rutas de grupo (ej: 'edificio/planta1/cocina').
+        """
+        return list(self._group_index)
+
+    def get_group_lights(self, path: str) -> Optional[Tuple[str, ...]]:
+        """
+        Obtiene las luces de un grupo.
+
+        Args:
+            path: Ruta del grupo.
+
+        Returns:
+            Tupla con las luces del grupo, None si el grupo no existe.
+        """
+        return self._group_index.get(path)
+
+    def get_group_counts(self, path: str) -> Optional[Dict[str, int]]:
+        """
+        Obtiene los contadores de luces encendidas/apagadas de un grupo.
+
+        Los contadores se mantienen de forma incremental, por lo que la
+        consulta es O(1).
+
+        Args:
+            path: Ruta del grupo.
+
+        Returns:
+            Diccionario con 'total', 'on' y 'off', None si el grupo no existe.
+        """
+        members = self._group_index.get(path)
+        if members is None:
+            return None
+        on = self.group_on[path]
+        return {'total': len(members), 'on': on, 'off': len(members) - on}
+
+    def set_group_state(self, path: str, on: bool) -> Optional[List[str]]:
+        """
+        Enciende o apaga todas las luces de un grupo.
+
+        Args:
+            path: Ruta del grupo.
+            on: True para encender, False para apagar.
+
+        Returns:
+            Lista de luces que cambiaron, None si el grupo no existe.
+        """
+        members = self._group_index.get(path)
+        if members is None:
+            return None
+        if self.group_on[path] == (len(members) if on else 0):
+            return []
+        return self.set_lights_state(members, on)
+
+    # ==================== ESCENAS ====================
+
+    def list_scenes(self) -> List[str]:
+        """
+        Obtiene los nombres de las escenas configuradas.
+
+        Returns:
+            Lista de nombres de escenas.
+        """
+        return list(self.config.scenes)
+
+    def activate_scene(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Activa una escena aplicando solo las entradas que cambian.
+
+        Todos los cambios se aplican como una única mutación (la versión
+        se incrementa una sola vez).
+
+        Args:
+            name: Nombre de la escena.
+
+        Returns:
+            Diccionario con los cambios aplicados, None si la escena no existe.
+        """
+        scene = self.config.scenes.get(name)
+        if scene is None:
+            return None
+
+        diff = scene.diff(self)
+        return self.apply_changes(
+            turn_on=diff['turn_on'],
+            turn_off=diff['turn_off'],
+            alarm=diff['alarm'],
+            presence=diff['presence'])
+
+    def apply_changes(self, turn_on: Sequence[str] = (), turn_off: Sequence[str] = (),
+                      alarm: Optional[bool] = None,
+                      presence: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Aplica un conjunto de cambios como una única mutación atómica.
+
+        Se asume que los cambios ya son mínimos (ver Scene.diff): las luces
+        de `turn_on` están apagadas y las de `turn_off` encendidas.
+
+        Args:
+            turn_on: Luces a encender.
+            turn_off: Luces a apagar.
+            alarm: Nuevo estado de la alarma (None = sin cambios).
+            presence: Nuevas personas presentes (None = sin cambios).
+
+        Returns:
+            Diccionario con 'lights_on', 'lights_off', 'alarm_changed'
+            y 'presence_changed'.
+        """
+        if turn_on:
+            self._write_lights(turn_on, True)
+        if turn_off:
+            self._write_lights(turn_off, False)
+        if alarm is not None:
+            self.alarm_armed = alarm
+        if presence is not None:
+            self.presence['known_people'] = list(presence)
+            self.presence['present'] = len(presence) > 0
+            self._record_presence('set', presence)
+
+        if turn_on or turn_off or alarm is not None or presence is not None:
+            self._commit(turn_on, turn_off, alarm is not None,
+                         presence is not None)
+
+        return {
+            'lights_on': list(turn_on),
+            'lights_off': list(turn_off),
+            'alarm_changed': alarm is not None,
+            'presence_changed': presence is not None,
+        }
+
+    def apply_config(self, config: Config) -> Dict[str, Any]:
+        """
+        Aplica una nueva configuración conservando el estado actual.
+
+        Las luces que siguen existiendo conservan su estado, las nuevas
+        empiezan apagadas y las eliminadas se apagan antes de quitarlas (el
+        cambio queda en el historial y en el consumo). Se recalculan los
+        índices de grupos; el motor de reglas solo se reconstruye si cambian
+        las luces, los grupos, las escenas o las reglas, y el medidor de
+        energía se adapta (conservando el consumo acumulado) si cambian las
+        luces, los grupos o las potencias. Si se añaden o eliminan luces, los
+        observadores reciben el nuevo conjunto en la clave LIGHT_SET_KEY. La
+        alarma, la presencia y el reloj no se modifican.
+
+        Args:
+            config: Configuración ya validada.
+
+        Returns:
+            Diccionario con 'added' y 'removed' (luces), 'rules' y 'energy'
+            (True si se reconstruyeron).
+        """
+        old = self.config
+        names = config.lights
+        keep = set(names)
+        added = [name for name in names if name not in self.lights]
+        removed = [name for name in self.lights if name not in keep]
+
+        removed_on = [name for name in removed if self.lights[name]]
+        if removed_on:
+            self.apply_changes(turn_off=removed_on)
+
+        rebuild = bool(added or removed) or any(
+            old.data.get(key) != config.data.get(key)
+            for key in ('groups', 'scenes', 'rules'))
+        rebuild_energy = rebuild or old.light_watts != config.light_watts or \
+            old.data.get('energy') != config.data.get('energy')
+
+        self.config = config
+        self.lights = {name: self.lights.get(name, False) for name in names}
+        self._group_index = config.group_index
+        self._light_groups = config.light_groups
+        self.lights_on_count = sum(1 for on in self.lights.values() if on)
+        self.group_on = {
+            path: sum(1 for light in members if self.lights[light])
+            for path, members in self._group_index.items()
+        }
+        self._selection_cache.clear()
+
+        if rebuild_energy:
+            enabled = ENERGY_AVAILABLE and (config.data.get('energy') or {}).get('enabled', True)
+            if self.energy is not None and enabled:
+                # Se conserva el consumo acumulado de las luces y grupos que siguen
+                self.energy.reconfigure()
+            elif self.energy is not None:
+                self.remove_listener(self.energy._on_change)
+                self.energy = None
+            elif enabled:
+                self.energy = EnergyMeter(self)
+
+        if rebuild:
+            if self.rules is not None:
+                self.rules.close()
+            self.rules = RuleEngine(self, config.rules) if config.rules else None
+
+        # Invalidar las respuestas cacheadas aunque no cambie ninguna luz
+        self.version += 1
+        if added or removed:
+            changes = {LIGHT_SET_KEY: tuple(names)}
+            for listener in tuple(self._listeners):
+                listener(changes)
+        return {'added': added, 'removed': removed, 'rules': rebuild,
+                'energy': rebuild_energy}
+
     # ==================== ALARMA ====================
 
     def get_alarm_status(self) -> bool:
@@ -99,11 +552,24 @@ class HomeState:
         Returns:
             True (siempre exitoso).
         """
-        self.alarm_armed = armed
+        if self.alarm_armed != armed:
+            self.alarm_armed = armed
+            self._commit(alarm=True)
         return True
 
     # ==================== PRESENCIA ====================
 
+    def _record_presence(self, event: str, people: Sequence[str]) -> None:
+        """
+        Registra un evento en el historial de presencia.
+
+        Args:
+            event: Tipo de evento ('set', 'add', 'remove' o 'clear').
+            people: Personas afectadas.
+        """
+        self.presence_history.append(
+            self.clock.now, event, people, self.presence['present'])
+
     def get_presence(self) -> Dict[str, Any]:
         """
         Obtiene el estado del detector de presencia.
@@ -128,6 +594,8 @@ class HomeState:
         """
         self.presence['known_people'] = list(people)
         self.presence['present'] = len(people) > 0
+        self._record_presence('set', people)
+        self._commit(presence=True)
         return True
 
     def add_person(self, name: str) -> bool:
@@ -143,6 +611,8 @@ class HomeState:
         if name not in self.presence['known_people']:
             self.presence['known_people'].append(name)
         self.presence['present'] = True
+        self._record_presence('add', (name,))
+        self._commit(presence=True)
         return True
 
     def remove_person(self, name: str) -> bool:
@@ -158,6 +628,8 @@ class HomeState:
         if name in self.presence['known_people']:
             self.presence['known_people'].remove(name)
             self.presence['present'] = len(self.presence['known_people']) > 0
+            self._record_presence('remove', (name,))
+            self._commit(presence=True)
             return True
         return False
 
@@ -170,6 +642,8 @@ class HomeState:
         """
         self.presence['known_people'] = []
         self.presence['present'] = False
+        self._record_presence('clear', ())
+        self._commit(presence=True)
         return True
 
     # ==================== ESTADO GENERAL ====================
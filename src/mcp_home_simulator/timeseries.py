@@ -0,0 +1,381 @@
+"""Registro columnar de cambios de estado con consultas en un instante dado."""
+
+import fnmatch
+import re
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Hashable, Tuple
+
+from .rules import LIGHT_KEY_PREFIX, LIGHT_SET_KEY
+
+
+# Filas por chunk antes de sellarlo y comprimirlo
+DEFAULT_CHUNK_SIZE = 4096
+
+# Cada cuántos chunks se guarda un snapshot completo (checkpoint)
+DEFAULT_CHECKPOINT_EVERY = 8
+
+# Chunks descomprimidos que se mantienen en caché
+DECODED_CACHE_SIZE = 8
+
+# Máximo de cambios devueltos por consulta
+MAX_CHANGES = 1000
+
+# Identificador de valor para entidades sin valor conocido
+MISSING = 0xFFFFFFFF
+
+
+class _Chunk:
+    """Chunk sellado: columnas comprimidas y checkpoint opcional."""
+
+    __slots__ = ('first_row', 'rows', 'start', 'end', 'times', 'entities',
+                 'values', 'checkpoint')
+
+    def __init__(self, first_row: int, rows: int, start: float, end: float,
+                 times: bytes, entities: bytes, values: bytes,
+                 checkpoint: Optional[bytes]):
+        self.first_row = first_row
+        self.rows = rows
+        self.start = start
+        self.end = end
+        self.times = times
+        self.entities = entities
+        self.values = values
+        self.checkpoint = checkpoint
+
+
+class ChangeLog:
+    """
+    Registro append-only de cambios (timestamp, entidad, valor) en columnas.
+
+    Las filas se acumulan en un chunk activo formado por tres arrays
+    (timestamps, ids de entidad e ids de valor, ambos internados). Al
+    llenarse, el chunk se sella comprimiendo cada columna con zlib. Cada
+    `checkpoint_every` chunks se guarda un snapshot completo del estado al
+    inicio del chunk, de modo que get_state_at() solo tiene que reproducir
+    los cambios desde el checkpoint anterior: el coste está acotado por
+    chunk_size * checkpoint_every filas, sin importar la longitud total.
+    """
+
+    def __init__(self, state: Any, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY):
+        """
+        Inicializa el registro con el estado actual y lo registra como observador.
+
+        Args:
+            state: Instancia de HomeState.
+            chunk_size: Filas por chunk.
+            checkpoint_every: Chunks entre snapshots completos.
+        """
+        if chunk_size <= 0 or checkpoint_every <= 0:
+            raise ValueError("'chunk_size' y 'checkpoint_every' deben ser > 0")
+        self.state = state
+        self.chunk_size = chunk_size
+        self.checkpoint_every = checkpoint_every
+
+        self._entity_ids: Dict[str, int] = {}
+        self._entities: List[str] = []
+        self._value_ids: Dict[Hashable, int] = {}
+        self._values: List[Hashable] = []
+
+        self._chunks: List[_Chunk] = []
+        self._chunk_starts: List[float] = []
+        self._decoded: 'OrderedDict[int, Tuple[array, array, array]]' = OrderedDict()
+
+        # Estado actual como array de ids de valor indexado por entidad
+        self._current = array('I')
+        for name, on in state.lights.items():
+            self._set_current(self._entity(LIGHT_KEY_PREFIX + name), self._value(on))
+        self._set_current(self._entity('alarm'), self._value(state.alarm_armed))
+        self._set_current(self._entity('presence'),
+                          self._value(tuple(state.presence['known_people'])))
+
+        self.origin = state.clock.now
+        self._checkpoint = self._current.tobytes()
+        self._new_active()
+
+        state.add_listener(self._on_change)
+
+    def __len__(self) -> int:
+        """Obtiene el número total de cambios registrados."""
+        return self._active_first_row + len(self._times)
+
+    def _new_active(self) -> None:
+        """Crea un chunk activo vacío."""
+        self._active_first_row = (self._chunks[-1].first_row + self._chunks[-1].rows
+                                  if self._chunks else 0)
+        self._times = array('d')
+        self._entity_col = array('I')
+        self._value_col = array('I')
+        # Snapshot del estado al inicio del chunk activo (si toca checkpoint)
+        if len(self._chunks) % self.checkpoint_every == 0:
+            self._active_checkpoint: Optional[bytes] = self._current.tobytes()
+        else:
+            self._active_checkpoint = None
+
+    def _entity(self, name: str) -> int:
+        """Interna el nombre de una entidad y devuelve su id."""
+        entity_id = self._entity_ids.get(name)
+        if entity_id is None:
+            entity_id = len(self._entities)
+            self._entity_ids[name] = entity_id
+            self._entities.append(name)
+        return entity_id
+
+    def _value(self, value: Hashable) -> int:
+        """Interna un valor y devuelve su id."""
+        value_id = self._value_ids.get(value)
+        if value_id is None:
+            value_id = len(self._values)
+            self._value_ids[value] = value_id
+            self._values.append(value)
+        return value_id
+
+    def _set_current(self, entity_id: int, value_id: int) -> None:
+        """Actualiza el valor actual de una entidad."""
+        current = self._current
+        if entity_id >= len(current):
+            current.extend([MISSING] * (entity_id + 1 - len(current)))
+        current[entity_id] = value_id
+
+    def _on_change(self, changes: Dict[str, Any]) -> None:
+        """
+        Observador de HomeState: añade una fila por clave cambiada.
+
+        Un nuevo conjunto de luces (LIGHT_SET_KEY) se registra como una fila
+        False por cada luz añadida y una fila None por cada luz eliminada.
+
+        Args:
+            changes: Diccionario {clave: nuevo valor}.
+        """
+        if LIGHT_SET_KEY in changes:
+            changes = self._light_set_changes(changes[LIGHT_SET_KEY])
+        now = self.state.clock.now
+        for key, value in changes.items():
+            if isinstance(value, list):
+                value = tuple(value)
+            entity_id = self._entity(key)
+            value_id = self._value(value)
+            self._times.append(now)
+            self._entity_col.append(entity_id)
+            self._value_col.append(value_id)
+            self._set_current(entity_id, value_id)
+            if len(self._times) >= self.chunk_size:
+                self._seal()
+
+    def _light_set_changes(self, names: Tuple[str, ...]) -> Dict[str, Any]:
+        """
+        Convierte un nuevo conjunto de luces en cambios de las luces afectadas.
+
+        Args:
+            names: Nombres de las luces tras la recarga.
+
+        Returns:
+            {clave de luz: False} para las añadidas y {clave de luz: None}
+            para las eliminadas.
+        """
+        current = self._current
+        gone = self._value_ids.get(None)
+        existing = {
+            entity for entity_id, entity in enumerate(self._entities)
+            if entity.startswith(LIGHT_KEY_PREFIX) and entity_id < len(current)
+            and current[entity_id] not in (MISSING, gone)
+        }
+        keys = {LIGHT_KEY_PREFIX + name for name in names}
+        changes: Dict[str, Any] = {key: False for key in keys - existing}
+        changes.update((key, None) for key in existing - keys)
+        return changes
+
+    def _seal(self) -> None:
+        """Comprime el chunk activo y abre uno nuevo."""
+        times = self._times
+        chunk = _Chunk(
+            first_row=self._active_first_row,
+            rows=len(times),
+            start=times[0],
+            end=times[-1],
+            times=zlib.compress(times.tobytes()),
+            entities=zlib.compress(self._entity_col.tobytes()),
+            values=zlib.compress(self._value_col.tobytes()),
+            checkpoint=(zlib.compress(self._active_checkpoint)
+                        if self._active_checkpoint is not None else None),
+        )
+        self._chunks.append(chunk)
+        self._chunk_starts.append(chunk.start)
+        self._new_active()
+
+    def _columns(self, index: int) -> Tuple[array, array, array]:
+        """
+        Obtiene las columnas de un chunk (el activo si index == número de chunks).
+
+        Args:
+            index: Índice del chunk.
+
+        Returns:
+            Tupla (timestamps, ids de entidad, ids de valor).
+        """
+        if index == len(self._chunks):
+            return self._times, self._entity_col, self._value_col
+
+        cached = self._decoded.get(index)
+        if cached is not None:
+            self._decoded.move_to_end(index)
+            return cached
+
+        chunk = self._chunks[index]
+        times = array('d')
+        times.frombytes(zlib.decompress(chunk.times))
+        entities = array('I')
+        entities.frombytes(zlib.decompress(chunk.entities))
+        values = array('I')
+        values.frombytes(zlib.decompress(chunk.values))
+        decoded = (times, entities, values)
+
+        self._decoded[index] = decoded
+        if len(self._decoded) > DECODED_CACHE_SIZE:
+            self._decoded.popitem(last=False)
+        return decoded
+
+    def _checkpoint_of(self, index: int) -> bytes:
+        """
+        Obtiene el snapshot (sin comprimir) guardado al inicio de un chunk.
+
+        Args:
+            index: Índice del chunk (múltiplo de checkpoint_every).
+
+        Returns:
+            Snapshot serializado como array de ids de valor.
+        """
+        if index == len(self._chunks):
+            return self._active_checkpoint
+        return zlib.decompress(self._chunks[index].checkpoint)
+
+    def _decode_value(self, value_id: int) -> Any:
+        """Convierte un id de valor en el valor expuesto por la API."""
+        value = self._values[value_id]
+        return list(value) if isinstance(value, tuple) else value
+
+    def get_state_at(self, time: float) -> Dict[str, Any]:
+        """
+        Reconstruye el estado de la casa en un instante simulado.
+
+        Se parte del último checkpoint anterior y se reproducen los cambios
+        con timestamp <= time.
+
+        Args:
+            time: Instante simulado.
+
+        Returns:
+            Snapshot con el mismo formato que HomeState.get_all_states().
+            Las luces que aún no existían o ya se habían eliminado en ese
+            instante no aparecen.
+        """
+        chunk_count = len(self._chunks)
+        # Último chunk (incluido el activo) que empieza en o antes de time
+        target = bisect_right(self._chunk_starts, time) - 1
+        if self._times and self._times[0] <= time:
+            target = chunk_count
+
+        snapshot = array('I')
+        if target < 0:
+            snapshot.frombytes(self._checkpoint)
+        else:
+            base = target - target % self.checkpoint_every
+            snapshot.frombytes(self._checkpoint_of(base))
+            snapshot.extend([MISSING] * (len(self._entities) - len(snapshot)))
+            for chunk_index in range(base, target + 1):
+                times, entities, values = self._columns(chunk_index)
+                for row in range(bisect_right(times, time)):
+                    snapshot[entities[row]] = values[row]
+
+        lights: Dict[str, bool] = {}
+        result: Dict[str, Any] = {'time': time, 'lights': lights}
+        prefix_length = len(LIGHT_KEY_PREFIX)
+        for entity_id, value_id in enumerate(snapshot):
+            if value_id == MISSING:
+                continue
+            entity = self._entities[entity_id]
+            value = self._decode_value(value_id)
+            if entity.startswith(LIGHT_KEY_PREFIX):
+                if value is not None:
+                    lights[entity[prefix_length:]] = value
+            elif entity == 'alarm':
+                result['alarm'] = value
+            elif entity == 'presence':
+                result['presence'] = {'present': bool(value),
+                                      'known_people': value}
+        return result
+
+    def get_changes(self, start: float, end: float,
+                    entity_filter: Optional[str] = None,
+                    limit: int = MAX_CHANGES) -> Dict[str, Any]:
+        """
+        Obtiene los cambios registrados en un rango de tiempo.
+
+        Args:
+            start: Instante inicial incluido.
+            end: Instante final incluido.
+            entity_filter: Patrón glob sobre la entidad (ej: 'light:garage*').
+            limit: Máximo de cambios devueltos.
+
+        Returns:
+            Diccionario con 'changes' ({time, entity, value}) y 'truncated'.
+
+        Raises:
+            ValueError: Si el rango no es válido.
+        """
+        if end < start:
+            raise ValueError("El fin del rango debe ser posterior al inicio")
+        limit = max(1, min(limit, MAX_CHANGES))
+
+        matcher = None
+        if entity_filter:
+            matcher = re.compile(fnmatch.translate(entity_filter)).match
+            wanted = {entity_id for entity_id, name in enumerate(self._entities)
+                      if matcher(name)}
+
+        chunk_count = len(self._chunks)
+        first = max(bisect_right(self._chunk_starts, start) - 1, 0)
+        changes: List[Dict[str, Any]] = []
+        for chunk_index in range(first, chunk_count + 1):
+            if chunk_index < chunk_count:
+                chunk = self._chunks[chunk_index]
+                if chunk.end < start:
+                    continue
+                if chunk.start > end:
+                    break
+            times, entities, values = self._columns(chunk_index)
+            row = bisect_left(times, start)
+            stop = bisect_right(times, end)
+            while row < stop:
+                entity_id = entities[row]
+                if matcher is None or entity_id in wanted:
+                    if len(changes) >= limit:
+                        return {'changes': changes, 'truncated': True}
+                    entity = self._entities[entity_id]
+                    changes.append({
+                        'time': times[row],
+                        'entity': entity,
+                        'value': self._decode_value(values[row]),
+                    })
+                row += 1
+        return {'changes': changes, 'truncated': False}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de almacenamiento del registro.
+
+        Returns:
+            Diccionario con filas, chunks, checkpoints y bytes comprimidos.
+        """
+        compressed = sum(len(c.times) + len(c.entities) + len(c.values)
+                         + len(c.checkpoint or b'') for c in self._chunks)
+        return {
+            'rows': len(self),
+            'chunks': len(self._chunks),
+            'checkpoints': sum(1 for c in self._chunks if c.checkpoint is not None),
+            'compressed_bytes': compressed,
+            'raw_bytes': len(self) * 16,
+        }
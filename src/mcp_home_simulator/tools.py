@@ -1,9 +1,29 @@
 """Definición de tools MCP y sus implementaciones."""
 
-from typing import Dict, Any, Callable
+import json
+from typing import Dict, Any, Callable, Hashable, Optional, Tuple
 from .state import HomeState
 
 
+# Tools que controlan el reloj (no se pueden planificar con schedule_call)
+CLOCK_TOOLS = frozenset({
+    'get_time', 'advance_time', 'run_until', 'schedule_call', 'cancel_timer'})
+
+# Tools de solo lectura cuyo resultado depende únicamente de la versión del
+# estado (el servidor puede reutilizar su respuesta serializada)
+CACHEABLE_TOOLS = frozenset({
+    'get_presence', 'get_alarm_status', 'list_lights_on', 'get_all_states',
+    'list_groups', 'get_group_state', 'list_scenes'})
+
+# Tools sin efectos sobre el estado (prioridad 'read' en el servidor)
+READ_ONLY_TOOLS = CACHEABLE_TOOLS | frozenset({
+    'get_presence_history', 'list_rules', 'get_time', 'get_energy_report',
+    'get_state_at', 'get_changes'})
+
+# Tools de la alarma (prioridad 'alarm': se atienden antes que el resto)
+ALARM_TOOLS = frozenset({'set_alarm_state', 'get_alarm_status'})
+
+
 class MCPTools:
     """Define y mapea las tools MCP disponibles."""
 
@@ -17,13 +37,32 @@ class MCPTools:
         self.state = state
         self._tools_registry: Dict[str, Callable] = {
             'get_presence': self.get_presence,
+            'get_presence_history': self.get_presence_history,
             'get_alarm_status': self.get_alarm_status,
             'list_lights_on': self.list_lights_on,
             'set_light_state': self.set_light_state,
+            'set_lights': self.set_lights,
             'set_alarm_state': self.set_alarm_state,
+            'list_groups': self.list_groups,
+            'get_group_state': self.get_group_state,
+            'set_group_state': self.set_group_state,
+            'list_scenes': self.list_scenes,
+            'activate_scene': self.activate_scene,
+            'list_rules': self.list_rules,
+            'get_time': self.get_time,
+            'advance_time': self.advance_time,
+            'run_until': self.run_until,
+            'schedule_call': self.schedule_call,
+            'cancel_timer': self.cancel_timer,
+            'get_energy_report': self.get_energy_report,
+            'get_state_at': self.get_state_at,
+            'get_changes': self.get_changes,
             'get_all_states': self.get_all_states,
         }
 
+        # Argumentos declarados de cada tool cacheable (para cache_key)
+        self._cache_params: Dict[str, Tuple[str, ...]] = {}
+
     def get_tool_definitions(self) -> Dict[str, Any]:
         """
         Obtiene las definiciones de todas las tools disponibles.
@@ -51,6 +90,60 @@ class MCPTools:
                     }
                 }
             },
+            'get_presence_history': {
+                'name': 'get_presence_history',
+                'description': 'Obtiene el historial de eventos de presencia '
+                               '(rango de tiempo simulado, paginado o últimas N entradas)',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'since': {
+                            'type': 'number',
+                            'description': 'Instante inicial incluido'
+                        },
+                        'until': {
+                            'type': 'number',
+                            'description': 'Instante final incluido'
+                        },
+                        'offset': {
+                            'type': 'integer',
+                            'description': 'Eventos del rango a saltar (paginación)'
+                        },
+                        'limit': {
+                            'type': 'integer',
+                            'description': 'Tamaño de página (por defecto 100, máximo 1000)'
+                        },
+                        'last': {
+                            'type': 'integer',
+                            'description': 'Devuelve las últimas N entradas'
+                        }
+                    },
+                    'required': []
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'entries': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'seq': {'type': 'integer'},
+                                    'time': {'type': 'number'},
+                                    'event': {'type': 'string'},
+                                    'people': {
+                                        'type': 'array',
+                                        'items': {'type': 'string'}
+                                    },
+                                    'present': {'type': 'boolean'}
+                                }
+                            }
+                        },
+                        'total': {'type': 'integer'},
+                        'next_offset': {'type': ['integer', 'null']}
+                    }
+                }
+            },
             'get_alarm_status': {
                 'name': 'get_alarm_status',
                 'description': 'Obtiene el estado actual de la alarma',
@@ -109,6 +202,45 @@ class MCPTools:
                     }
                 }
             },
+            'set_lights': {
+                'name': 'set_lights',
+                'description': 'Enciende o apaga varias luces en una sola llamada '
+                               '(lista de nombres, patrón glob o regex)',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'names': {
+                            'type': 'array',
+                            'items': {'type': 'string'},
+                            'description': 'Lista explícita de luces'
+                        },
+                        'pattern': {
+                            'type': 'string',
+                            'description': "Patrón glob (ej: 'garage*', '*' = todas)"
+                        },
+                        'regex': {
+                            'type': 'string',
+                            'description': 'Expresión regular sobre el nombre'
+                        },
+                        'on': {
+                            'type': 'boolean',
+                            'description': 'true para encender, false para apagar'
+                        }
+                    },
+                    'required': ['on']
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'ok': {'type': 'boolean'},
+                        'changed': {
+                            'type': 'array',
+                            'items': {'type': 'string'}
+                        },
+                        'error': {'type': 'string'}
+                    }
+                }
+            },
             'set_alarm_state': {
                 'name': 'set_alarm_state',
                 'description': 'Arma o desarma la alarma',
@@ -129,6 +261,400 @@ class MCPTools:
                     }
                 }
             },
+            'list_groups': {
+                'name': 'list_groups',
+                'description': 'Lista los grupos (edificio, planta, habitación) '
+                               'con sus contadores de luces encendidas y apagadas',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {},
+                    'required': []
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'groups': {
+                            'type': 'object',
+                            'additionalProperties': {
+                                'type': 'object',
+                                'properties': {
+                                    'total': {'type': 'integer'},
+                                    'on': {'type': 'integer'},
+                                    'off': {'type': 'integer'}
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            'get_group_state': {
+                'name': 'get_group_state',
+                'description': 'Obtiene el estado de las luces de un grupo',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'group': {
+                            'type': 'string',
+                            'description': "Ruta del grupo (ej: 'edificio/planta2')"
+                        }
+                    },
+                    'required': ['group']
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'group': {'type': 'string'},
+                        'lights': {
+                            'type': 'object',
+                            'additionalProperties': {'type': 'boolean'}
+                        },
+                        'total': {'type': 'integer'},
+                        'on': {'type': 'integer'},
+                        'off': {'type': 'integer'}
+                    }
+                }
+            },
+            'set_group_state': {
+                'name': 'set_group_state',
+                'description': 'Enciende o apaga todas las luces de un grupo',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'group': {
+                            'type': 'string',
+                            'description': "Ruta del grupo (ej: 'edificio/planta2')"
+                        },
+                        'on': {
+                            'type': 'boolean',
+                            'description': 'true para encender, false para apagar'
+                        }
+                    },
+                    'required': ['group', 'on']
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'ok': {'type': 'boolean'},
+                        'changed': {
+                            'type': 'array',
+                            'items': {'type': 'string'}
+                        },
+                        'total': {'type': 'integer'},
+                        'on': {'type': 'integer'},
+                        'off': {'type': 'integer'},
+                        'error': {'type': 'string'}
+                    }
+                }
+            },
+            'list_scenes': {
+                'name': 'list_scenes',
+                'description': 'Lista las escenas configuradas',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {},
+                    'required': []
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'scenes': {
+                            'type': 'array',
+                            'items': {'type': 'object'}
+                        }
+                    }
+                }
+            },
+            'activate_scene': {
+                'name': 'activate_scene',
+                'description': 'Activa una escena (ej: noche, salir) aplicando '
+                               'solo los cambios necesarios de forma atómica',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'name': {
+                            'type': 'string',
+                            'description': 'Nombre de la escena'
+                        }
+                    },
+                    'required': ['name']
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'ok': {'type': 'boolean'},
+                        'lights_on': {
+                            'type': 'array',
+                            'items': {'type': 'string'}
+                        },
+                        'lights_off': {
+                            'type': 'array',
+                            'items': {'type': 'string'}
+                        },
+                        'alarm_changed': {'type': 'boolean'},
+                        'presence_changed': {'type': 'boolean'},
+                        'error': {'type': 'string'}
+                    }
+                }
+            },
+            'list_rules': {
+                'name': 'list_rules',
+                'description': 'Lista las reglas de automatización, su estado '
+                               'y las estadísticas del motor de reglas',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {},
+                    'required': []
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'rules': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'name': {'type': 'string'},
+                                    'active': {'type': 'boolean'},
+                                    'fires': {'type': 'integer'},
+                                    'depends': {'type': 'integer'},
+                                    'pending': {'type': 'boolean'}
+                                }
+                            }
+                        },
+                        'stats': {
+                            'type': 'object',
+                            'additionalProperties': {'type': 'integer'}
+                        }
+                    }
+                }
+            },
+            'get_time': {
+                'name': 'get_time',
+                'description': 'Obtiene el tiempo simulado actual y los eventos pendientes',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {},
+                    'required': []
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'now': {'type': 'number'},
+                        'pending': {'type': 'integer'},
+                        'next_event': {'type': ['number', 'null']}
+                    }
+                }
+            },
+            'advance_time': {
+                'name': 'advance_time',
+                'description': 'Avanza el reloj simulado ejecutando los eventos vencidos',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'seconds': {
+                            'type': 'number',
+                            'description': 'Segundos simulados a avanzar'
+                        }
+                    },
+                    'required': ['seconds']
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'now': {'type': 'number'},
+                        'events_run': {'type': 'integer'},
+                        'pending': {'type': 'integer'},
+                        'error': {'type': 'string'}
+                    }
+                }
+            },
+            'run_until': {
+                'name': 'run_until',
+                'description': 'Ejecuta los eventos simulados hasta un instante dado',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'time': {
+                            'type': 'number',
+                            'description': 'Instante simulado objetivo (segundos)'
+                        }
+                    },
+                    'required': ['time']
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'now': {'type': 'number'},
+                        'events_run': {'type': 'integer'},
+                        'pending': {'type': 'integer'},
+                        'error': {'type': 'string'}
+                    }
+                }
+            },
+            'schedule_call': {
+                'name': 'schedule_call',
+                'description': 'Planifica la ejecución de una tool tras un retardo simulado '
+                               '(ej: armar la alarma dentro de 60 s)',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'delay': {
+                            'type': 'number',
+                            'description': 'Retardo en segundos simulados'
+                        },
+                        'tool': {
+                            'type': 'string',
+                            'description': 'Tool a ejecutar'
+                        },
+                        'args': {
+                            'type': 'object',
+                            'description': 'Argumentos de la tool'
+                        }
+                    },
+                    'required': ['delay', 'tool']
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'ok': {'type': 'boolean'},
+                        'timer_id': {'type': 'integer'},
+                        'at': {'type': 'number'},
+                        'error': {'type': 'string'}
+                    }
+                }
+            },
+            'cancel_timer': {
+                'name': 'cancel_timer',
+                'description': 'Cancela una llamada planificada con schedule_call',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'timer_id': {
+                            'type': 'integer',
+                            'description': 'Identificador devuelto por schedule_call'
+                        }
+                    },
+                    'required': ['timer_id']
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'ok': {'type': 'boolean'},
+                        'error': {'type': 'string'}
+                    }
+                }
+            },
+            'get_energy_report': {
+                'name': 'get_energy_report',
+                'description': 'Obtiene el consumo energético de las luces (Wh) '
+                               'total y por grupo en un rango de tiempo simulado',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'from': {
+                            'type': 'number',
+                            'description': 'Inicio del rango (por defecto, inicio de la simulación)'
+                        },
+                        'to': {
+                            'type': 'number',
+                            'description': 'Fin del rango (por defecto, tiempo actual)'
+                        },
+                        'step': {
+                            'type': 'number',
+                            'description': 'Desglosa el rango en intervalos de este tamaño (s)'
+                        }
+                    },
+                    'required': []
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'from': {'type': 'number'},
+                        'to': {'type': 'number'},
+                        'total_wh': {'type': 'number'},
+                        'groups': {
+                            'type': 'object',
+                            'additionalProperties': {'type': 'number'}
+                        },
+                        'power_w': {'type': 'number'},
+                        'intervals': {
+                            'type': 'array',
+                            'items': {'type': 'object'}
+                        }
+                    }
+                }
+            },
+            'get_state_at': {
+                'name': 'get_state_at',
+                'description': 'Reconstruye el estado de la casa en un instante '
+                               'simulado pasado a partir del registro de cambios',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'time': {
+                            'type': 'number',
+                            'description': 'Instante simulado'
+                        }
+                    },
+                    'required': ['time']
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'time': {'type': 'number'},
+                        'lights': {
+                            'type': 'object',
+                            'additionalProperties': {'type': 'boolean'}
+                        },
+                        'alarm': {'type': 'boolean'},
+                        'presence': {'type': 'object'}
+                    }
+                }
+            },
+            'get_changes': {
+                'name': 'get_changes',
+                'description': 'Obtiene los cambios de estado registrados en un '
+                               'rango de tiempo simulado, opcionalmente filtrados por entidad',
+                'input_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'from': {
+                            'type': 'number',
+                            'description': 'Instante inicial incluido'
+                        },
+                        'to': {
+                            'type': 'number',
+                            'description': 'Instante final incluido (por defecto, tiempo actual)'
+                        },
+                        'entity': {
+                            'type': 'string',
+                            'description': "Patrón glob de entidad (ej: 'light:garage*', 'alarm')"
+                        },
+                        'limit': {
+                            'type': 'integer',
+                            'description': 'Máximo de cambios (por defecto y máximo 1000)'
+                        }
+                    },
+                    'required': ['from']
+                },
+                'output_schema': {
+                    'type': 'object',
+                    'properties': {
+                        'changes': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'time': {'type': 'number'},
+                                    'entity': {'type': 'string'},
+                                    'value': {}
+                                }
+                            }
+                        },
+                        'truncated': {'type': 'boolean'}
+                    }
+                }
+            },
             'get_all_states': {
                 'name': 'get_all_states',
                 'description': 'Obtiene un snapshot completo del estado del sistema',
@@ -160,6 +686,74 @@ class MCPTools:
             }
         }
 
+    def has_tool(self, tool_name: str) -> bool:
+        """
+        Indica si existe una tool con el nombre dado.
+
+        Args:
+            tool_name: Nombre de la tool.
+
+        Returns:
+            True si la tool está registrada.
+        """
+        return tool_name in self._tools_registry
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        """
+        Indica si el resultado de una tool solo depende de la versión del estado.
+
+        Args:
+            tool_name: Nombre de la tool.
+
+        Returns:
+            True si la tool es de solo lectura y cacheable.
+        """
+        return tool_name in CACHEABLE_TOOLS and tool_name in self._tools_registry
+
+    def cache_key(self, tool_name: str, args: Dict[str, Any]) -> Optional[Hashable]:
+        """
+        Obtiene la clave de caché de una llamada a una tool cacheable.
+
+        Solo se usan los argumentos declarados en el input_schema de la
+        tool: los demás no afectan al resultado y no deben crear entradas
+        distintas.
+
+        Args:
+            tool_name: Nombre de la tool (cacheable).
+            args: Argumentos de la llamada.
+
+        Returns:
+            Clave (tool, argumentos declarados en JSON), None si algún
+            argumento no es serializable.
+        """
+        params = self._cache_params.get(tool_name)
+        if params is None:
+            params = tuple(sorted(self.get_tool_definitions()[tool_name]
+                                  ['input_schema'].get('properties', {})))
+            self._cache_params[tool_name] = params
+        try:
+            return (tool_name, json.dumps(
+                {name: args[name] for name in params if name in args}, sort_keys=True))
+        except (TypeError, ValueError):
+            return None
+
+    def priority_class(self, tool_name: str) -> str:
+        """
+        Obtiene la clase de prioridad por defecto de una tool.
+
+        Args:
+            tool_name: Nombre de la tool.
+
+        Returns:
+            'alarm' para las tools de la alarma, 'read' para las de solo
+            lectura y 'write' para el resto (incluidas las desconocidas).
+        """
+        if tool_name in ALARM_TOOLS:
+            return 'alarm'
+        if tool_name in READ_ONLY_TOOLS:
+            return 'read'
+        return 'write'
+
     def execute_tool(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
         """
         Ejecuta una tool MCP.
@@ -178,6 +772,8 @@ class MCPTools:
             }
 
         try:
+            # En modo tiempo real, ejecutar los eventos vencidos antes de la llamada
+            self.state.clock.sync()
             handler = self._tools_registry[tool_name]
             return handler(args)
         except Exception as e:
@@ -192,6 +788,27 @@ class MCPTools:
         """Implementa la tool get_presence."""
         return self.state.get_presence()
 
+    def get_presence_history(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool get_presence_history."""
+        history = self.state.presence_history
+
+        try:
+            if args.get('last') is not None:
+                last = int(args['last'])
+                if last < 0:
+                    raise ValueError("'last' debe ser >= 0")
+                entries = history.last(last)
+                return {'entries': entries, 'total': len(entries),
+                        'next_offset': None}
+
+            return history.query(
+                since=args.get('since'),
+                until=args.get('until'),
+                offset=int(args.get('offset', 0)),
+                limit=int(args.get('limit', 100)))
+        except (TypeError, ValueError) as e:
+            return {'ok': False, 'error': str(e)}
+
     def get_alarm_status(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Implementa la tool get_alarm_status."""
         return {'armed': self.state.get_alarm_status()}
@@ -220,6 +837,27 @@ class MCPTools:
 
         return {'ok': True}
 
+    def set_lights(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool set_lights."""
+        on = args.get('on')
+
+        if on is None:
+            return {
+                'ok': False,
+                'error': 'Falta parámetro requerido: on'
+            }
+
+        try:
+            names = self.state.select_lights(
+                names=args.get('names'),
+                pattern=args.get('pattern'),
+                regex=args.get('regex'))
+        except ValueError as e:
+            return {'ok': False, 'error': str(e)}
+
+        changed = self.state.set_lights_state(names, on)
+        return {'ok': True, 'changed': changed}
+
     def set_alarm_state(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Implementa la tool set_alarm_state."""
         armed = args.get('armed')
@@ -233,6 +871,220 @@ class MCPTools:
         self.state.set_alarm_state(armed)
         return {'ok': True}
 
+    def list_groups(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool list_groups."""
+        return {
+            'groups': {
+                path: self.state.get_group_counts(path)
+                for path in self.state.list_groups()
+            }
+        }
+
+    def get_group_state(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool get_group_state."""
+        group = args.get('group')
+
+        if group is None:
+            return {
+                'ok': False,
+                'error': 'Falta parámetro requerido: group'
+            }
+
+        members = self.state.get_group_lights(group)
+        if members is None:
+            return {
+                'ok': False,
+                'error': f"Grupo '{group}' no encontrado"
+            }
+
+        lights = self.state.lights
+        result = {
+            'group': group,
+            'lights': {name: lights[name] for name in members}
+        }
+        result.update(self.state.get_group_counts(group))
+        return result
+
+    def set_group_state(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool set_group_state."""
+        group = args.get('group')
+        on = args.get('on')
+
+        if group is None or on is None:
+            return {
+                'ok': False,
+                'error': 'Faltan parámetros requeridos: group, on'
+            }
+
+        changed = self.state.set_group_state(group, on)
+        if changed is None:
+            return {
+                'ok': False,
+                'error': f"Grupo '{group}' no encontrado"
+            }
+
+        result = {'ok': True, 'changed': changed}
+        result.update(self.state.get_group_counts(group))
+        return result
+
+    def list_scenes(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool list_scenes."""
+        return {
+            'scenes': [scene.to_dict()
+                       for scene in self.state.config.scenes.values()]
+        }
+
+    def activate_scene(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool activate_scene."""
+        name = args.get('name')
+
+        if name is None:
+            return {
+                'ok': False,
+                'error': 'Falta parámetro requerido: name'
+            }
+
+        changes = self.state.activate_scene(name)
+        if changes is None:
+            return {
+                'ok': False,
+                'error': f"Escena '{name}' no encontrada"
+            }
+
+        result = {'ok': True}
+        result.update(changes)
+        return result
+
+    def list_rules(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool list_rules."""
+        engine = self.state.rules
+        if engine is None:
+            return {'rules': [], 'stats': {}}
+        return {'rules': engine.describe(), 'stats': dict(engine.stats)}
+
+    def get_time(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool get_time."""
+        clock = self.state.clock
+        return {
+            'now': clock.now,
+            'pending': clock.pending,
+            'next_event': clock.next_event_time()
+        }
+
+    def advance_time(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool advance_time."""
+        seconds = args.get('seconds')
+
+        if not isinstance(seconds, (int, float)) or isinstance(seconds, bool) \
+                or seconds < 0:
+            return {
+                'ok': False,
+                'error': "Parámetro 'seconds' debe ser un número >= 0"
+            }
+
+        clock = self.state.clock
+        events_run = clock.advance(seconds)
+        return {'now': clock.now, 'events_run': events_run,
+                'pending': clock.pending}
+
+    def run_until(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool run_until."""
+        until = args.get('time')
+        clock = self.state.clock
+
+        if not isinstance(until, (int, float)) or isinstance(until, bool) \
+                or until < clock.now:
+            return {
+                'ok': False,
+                'error': f"Parámetro 'time' debe ser un instante >= {clock.now}"
+            }
+
+        events_run = clock.run_until(until)
+        return {'now': clock.now, 'events_run': events_run,
+                'pending': clock.pending}
+
+    def schedule_call(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool schedule_call."""
+        delay = args.get('delay')
+        tool = args.get('tool')
+        tool_args = args.get('args') or {}
+
+        if not isinstance(delay, (int, float)) or isinstance(delay, bool) \
+                or delay < 0 or not tool:
+            return {
+                'ok': False,
+                'error': "Faltan parámetros requeridos: delay (>= 0), tool"
+            }
+
+        if tool not in self._tools_registry or tool in CLOCK_TOOLS:
+            return {
+                'ok': False,
+                'error': f"Tool '{tool}' no planificable"
+            }
+
+        clock = self.state.clock
+        timer_id = clock.schedule(delay, self.execute_tool, tool, tool_args)
+        return {'ok': True, 'timer_id': timer_id, 'at': clock.now + delay}
+
+    def cancel_timer(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool cancel_timer."""
+        timer_id = args.get('timer_id')
+
+        if not self.state.clock.cancel(timer_id):
+            return {
+                'ok': False,
+                'error': f"Evento '{timer_id}' no encontrado"
+            }
+
+        return {'ok': True}
+
+    def get_energy_report(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool get_energy_report."""
+        meter = self.state.energy
+        if meter is None:
+            return {
+                'ok': False,
+                'error': 'Simulación energética no disponible '
+                         '(requiere numpy: pip install mcp-home-simulator[energy])'
+            }
+
+        try:
+            return meter.report(args.get('from'), args.get('to'),
+                                args.get('step'))
+        except (TypeError, ValueError) as e:
+            return {'ok': False, 'error': str(e)}
+
+    def get_state_at(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool get_state_at."""
+        log = self.state.changes
+        if log is None:
+            return {'ok': False, 'error': 'Registro de cambios desactivado'}
+        if args.get('time') is None:
+            return {'ok': False, 'error': 'Falta parámetro requerido: time'}
+
+        try:
+            return log.get_state_at(float(args['time']))
+        except (TypeError, ValueError) as e:
+            return {'ok': False, 'error': str(e)}
+
+    def get_changes(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Implementa la tool get_changes."""
+        log = self.state.changes
+        if log is None:
+            return {'ok': False, 'error': 'Registro de cambios desactivado'}
+        if args.get('from') is None:
+            return {'ok': False, 'error': 'Falta parámetro requerido: from'}
+
+        end = args.get('to')
+        try:
+            return log.get_changes(
+                float(args['from']),
+                self.state.clock.now if end is None else float(end),
+                entity_filter=args.get('entity'),
+                limit=int(args.get('limit', 1000)))
+        except (TypeError, ValueError) as e:
+            return {'ok': False, 'error': str(e)}
+
     def get_all_states(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Implementa la tool get_all_states."""
         return self.state.get_all_states()
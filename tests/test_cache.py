@@ -0,0 +1,102 @@
+"""Tests para las cachés del servidor (cache.py)."""
+
+import pytest
+from mcp_home_simulator.cache import IdempotencyCache, ResponseCache
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.state import HomeState
+from mcp_home_simulator.tools import MCPTools
+
+
+class FakeClock:
+    """Reloj manual para controlar el TTL."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestIdempotencyCache:
+    """Tests para la clase IdempotencyCache."""
+
+    @pytest.fixture
+    def clock(self):
+        """Crea un reloj manual."""
+        return FakeClock()
+
+    def test_hit_and_miss(self, clock):
+        """Verifica aciertos, fallos y tasa de aciertos."""
+        cache = IdempotencyCache(capacity=4, ttl=10, clock=clock)
+        assert cache.get('a') is None
+        cache.put('a', {'ok': True})
+        assert cache.get('a') == {'ok': True}
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_lru_eviction(self, clock):
+        """Verifica que se descarta la entrada usada hace más tiempo."""
+        cache = IdempotencyCache(capacity=2, ttl=10, clock=clock)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert cache.stats()['evictions'] == 1
+
+    def test_ttl(self, clock):
+        """Verifica que las entradas caducan tras el TTL."""
+        cache = IdempotencyCache(capacity=2, ttl=10, clock=clock)
+        cache.put('a', 1)
+        clock.now = 9.9
+        assert cache.get('a') == 1
+        clock.now = 10
+        assert cache.get('a') is None
+        assert cache.stats()['expirations'] == 1
+        assert len(cache) == 0
+
+    def test_invalid_parameters(self):
+        """Verifica que la capacidad y el TTL deben ser positivos."""
+        with pytest.raises(ValueError):
+            IdempotencyCache(capacity=0)
+
+
+class TestResponseCache:
+    """Tests para la clase ResponseCache."""
+
+    @pytest.fixture
+    def state(self):
+        """Crea un estado con dos luces en un grupo."""
+        return HomeState(Config.from_data({'lights': ['salon', 'cocina'],
+                                           'groups': {'casa': ['salon', 'cocina']}}))
+
+    def test_lru_bound_within_version(self, state):
+        """Verifica que la caché no crece sin límite mientras no cambia el estado."""
+        cache = ResponseCache(state, capacity=3)
+        for i in range(10):
+            cache.put(('get_group_state', str(i)), 'x')
+        assert cache.get(('get_group_state', '9')) == 'x'
+        assert cache.get(('get_group_state', '0')) is None
+        assert cache.stats()['size'] == 3
+        assert cache.stats()['evictions'] == 7
+
+    def test_invalid_capacity(self, state):
+        """Verifica que la capacidad debe ser positiva."""
+        with pytest.raises(ValueError):
+            ResponseCache(state, capacity=0)
+
+    def test_key_ignores_undeclared_args(self, state):
+        """Verifica que los argumentos no declarados no cambian la clave."""
+        tools = MCPTools(state)
+        key = tools.cache_key('get_all_states', {})
+        assert tools.cache_key('get_all_states', {'x': 1}) == key
+        assert tools.cache_key('get_group_state', {'group': 'casa', 'x': 1}) == \
+            tools.cache_key('get_group_state', {'group': 'casa'})
+        assert tools.cache_key('get_group_state', {'group': 'otra'}) != \
+            tools.cache_key('get_group_state', {'group': 'casa'})
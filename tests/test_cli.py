@@ -143,6 +143,15 @@ class TestCLI:
         assert presence['present'] is False
         assert presence['known_people'] == []
 
+    def test_cmd_scene_activate_not_found(self, cli, capsys):
+        """Verifica comando scene activate con escena inexistente."""
+        args = Namespace(name='inexistente')
+        result = cli.cmd_scene_activate(args)
+
+        assert result == 1
+        captured = capsys.readouterr()
+        assert 'Error' in captured.out
+
     # ==================== Tests de Parser ====================
 
     def test_create_parser(self):
@@ -179,3 +188,124 @@ class TestCLI:
         assert args.command == 'presence'
         assert args.presence_command == 'set'
         assert args.names == ['Carlos', 'Ana']
+
+    def test_parser_scene_activate_command(self):
+        """Verifica parseo de comando scene activate."""
+        parser = create_parser()
+        args = parser.parse_args(['scene', 'activate', 'noche'])
+        assert args.command == 'scene'
+        assert args.scene_command == 'activate'
+        assert args.name == 'noche'
+
+
+class TestCommandSession:
+    """Tests para los modos run y shell (CommandSession)."""
+
+    @pytest.fixture
+    def config_path(self, tmp_path):
+        """Crea un archivo de configuración con luces y una escena."""
+        path = tmp_path / 'config.yaml'
+        path.write_text(
+            "lights: [salon, cocina, garage]\n"
+            "scenes:\n"
+            "  noche: {lights: {'*': false, salon: true}}\n", encoding='utf-8')
+        return str(path)
+
+    @pytest.fixture
+    def session(self, config_path):
+        """Crea una sesión sobre una CLI nueva."""
+        from mcp_home_simulator.cli import CommandSession
+        return CommandSession(CLI(config_path))
+
+    def test_dispatch_missing_subcommand(self, session, capsys):
+        """Verifica el mensaje cuando falta el subcomando."""
+        args = create_parser().parse_args(['lights'])
+        assert session.cli.dispatch(args) == 1
+        assert "subcomando para 'lights' (list, on, off)" in capsys.readouterr().out
+
+    def test_state_carries_over(self, session):
+        """Verifica que los comandos comparten el estado."""
+        out = StringIO()
+        script = ["# preparar", "lights on salon", "", "alarm on",
+                  "presence set 'Ana María' Luis", "status"]
+        assert session.run_script(script, out=out) == 0
+        assert session.cli.state.get_light_state('salon') is True
+        assert session.cli.state.get_presence()['known_people'] == ['Ana María', 'Luis']
+        assert 'ARMADA' in out.getvalue()
+        assert session.executed == 4
+        assert set(session.timings) == {'lights on', 'alarm on', 'presence set', 'status'}
+
+    def test_errors_and_stop_on_error(self, session, capsys):
+        """Verifica los errores y la parada en el primer fallo."""
+        out = StringIO()
+        script = ["lights on sotano", "replay x.rec", "lights parpadear", "lights on salon"]
+        assert session.run_script(script, out=out) == 1
+        assert session.failures == 3
+        assert "no está disponible en una sesión" in out.getvalue()
+        assert session.cli.state.get_light_state('salon') is True
+
+        out = StringIO()
+        assert session.run_script(["lights on sotano", "lights on cocina"],
+                                  stop_on_error=True, out=out) == 1
+        assert "detenido en la línea 1" in out.getvalue()
+        assert session.cli.state.get_light_state('cocina') is False
+
+    def test_config_rejected(self, session, capsys):
+        """Verifica que --config no se admite en una línea de la sesión."""
+        assert session.execute('--config otra.yaml lights on salon') == 1
+        assert session.execute('--config=config.yaml status') == 1
+        assert "--config no está disponible" in capsys.readouterr().out
+        assert session.failures == 2
+        assert session.cli.state.get_light_state('salon') is False
+
+    def test_completions(self, session):
+        """Verifica el autocompletado de comandos y nombres."""
+        assert session.completions('') == sorted(
+            ['status', 'lights', 'alarm', 'presence', 'scene', 'help', 'timings', 'exit', 'quit'])
+        assert session.completions('li') == ['lights']
+        assert session.completions('lights ') == ['list', 'off', 'on']
+        assert session.completions('lights on c') == ['cocina']
+        assert session.completions('scene activate ') == ['noche']
+        assert session.completions('status ') == []
+
+    def test_summary(self, session):
+        """Verifica el resumen de tiempos."""
+        session.run_script(["lights on salon", "lights on cocina"], out=StringIO())
+        summary = session.summary()
+        assert summary.startswith('⏱️  2 comandos')
+        assert 'lights on' in summary and '2 ×' in summary
+
+    def test_shell(self, session, capsys):
+        """Verifica la consola con una entrada simulada."""
+        lines = iter(['lights on salon', 'timings', 'lights list', 'exit', 'status'])
+        assert session.run_shell(lambda prompt: next(lines)) == 0
+        out = capsys.readouterr().out
+        assert "Luz 'salon' encendida" in out
+        assert out.count('⏱️') == 2
+        assert 'ESTADO GENERAL' not in out
+
+    def test_shell_help(self, session, capsys):
+        """Verifica que la ayuda de la consola solo muestra los comandos de sesión."""
+        lines = iter(['help', 'exit'])
+        session.run_shell(lambda prompt: next(lines))
+        out = capsys.readouterr().out
+        assert 'lights {list,on,off}' in out
+        assert 'help, timings, exit, quit' in out
+        assert 'replay' not in out and 'http' not in out and '--config' not in out
+
+    def test_run_cli_script_file(self, config_path, tmp_path, capsys):
+        """Verifica run_cli con un script en un archivo."""
+        script = tmp_path / 'setup.txt'
+        script.write_text("lights on salon\nscene activate noche\nlights list\n",
+                          encoding='utf-8')
+        assert run_cli(['--config', config_path, 'run', str(script)]) == 0
+        captured = capsys.readouterr()
+        assert "Escena 'noche' activada" in captured.out
+        assert '3 comandos' in captured.err
+        assert run_cli(['--config', config_path, 'run', str(tmp_path / 'no.txt')]) == 1
+
+    def test_run_cli_stdin(self, config_path, monkeypatch, capsys):
+        """Verifica run_cli leyendo el script de la entrada estándar."""
+        monkeypatch.setattr(sys, 'stdin', StringIO("alarm on\nlights on sotano\n"))
+        assert run_cli(['--config', config_path, 'run']) == 1
+        assert 'ARMADA' in capsys.readouterr().out
@@ -0,0 +1,183 @@
+"""Tests para el cliente en proceso HomeClient."""
+
+import asyncio
+import json
+import threading
+import pytest
+import yaml
+from mcp_home_simulator import AsyncHomeClient, HomeClient, ToolError
+from mcp_home_simulator.mcp_stdio import MCPStdioServer
+
+
+DATA = {
+    'lights': ['salon', 'cocina', 'garage'],
+    'groups': {'planta': ['salon', 'cocina']},
+    'scenes': {'noche': {'lights': {'*': False, 'salon': True}, 'alarm': True}},
+}
+
+CALLS = [
+    ('set_light_state', {'name': 'salon', 'on': True}),
+    ('set_light_state', {'name': 'sotano', 'on': True}),
+    ('list_lights_on', {}),
+    ('set_group_state', {'group': 'planta', 'on': True}),
+    ('get_group_state', {'group': 'planta'}),
+    ('activate_scene', {'name': 'noche'}),
+    ('get_all_states', {}),
+    ('advance_time', {'seconds': 30}),
+    ('get_changes', {'from': 0}),
+    ('no_existe', {}),
+    ('set_lights', {'pattern': 'x', 'regex': 'y', 'on': True}),
+]
+
+
+@pytest.fixture
+def client():
+    """Crea un cliente con una configuración en memoria."""
+    return HomeClient.from_data(json.loads(json.dumps(DATA)))
+
+
+class TestHomeClient:
+    """Tests para la clase HomeClient."""
+
+    def test_same_responses_as_stdio(self, client, tmp_path, capsys):
+        """Verifica que las respuestas coinciden con las del servidor por stdio."""
+        path = tmp_path / 'config.yaml'
+        path.write_text(yaml.safe_dump(DATA))
+        server = MCPStdioServer(str(path))
+        for i, (tool, args) in enumerate(CALLS, 1):
+            server.process_message(json.dumps(
+                {'type': 'call', 'id': i, 'tool': tool, 'args': args}))
+        expected = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+        actual = [client.request(tool, args, msg_id=i)
+                  for i, (tool, args) in enumerate(CALLS, 1)]
+        assert json.loads(json.dumps(actual)) == expected
+
+    def test_call_and_errors(self, client):
+        """Verifica call() con argumentos con nombre y ToolError."""
+        assert client.call('set_light_state', name='garage', on=True) == {'ok': True}
+        assert client.call('list_lights_on') == {'on': ['garage']}
+        assert client.state.lights['garage'] is True
+
+        with pytest.raises(ToolError) as info:
+            client.call('set_light_state', {'name': 'sotano'}, on=True)
+        assert info.value.response['type'] == 'error'
+        assert 'sotano' in info.value.error
+        assert info.value.code is None
+
+        assert client.request('')['error'] == "Mensaje inválido: falta 'id' o 'tool'"
+
+    def test_ids(self, client):
+        """Verifica los ids correlativos y los indicados."""
+        assert client.request('get_time')['id'] == 1
+        assert client.request('get_time', msg_id='a')['id'] == 'a'
+        assert client.request('get_time')['id'] == 2
+
+    def test_batch(self, client):
+        """Verifica los lotes con tuplas y diccionarios."""
+        responses = client.batch([
+            ('set_light_state', {'name': 'salon', 'on': True}),
+            {'tool': 'no_existe', 'id': 'x'},
+            {'tool': 'list_lights_on'},
+        ])
+        assert [r['ok'] for r in responses] == [True, False, True]
+        assert responses[1]['id'] == 'x'
+        assert responses[2]['result'] == {'on': ['salon']}
+
+        with pytest.raises(ToolError, match='no_existe'):
+            client.call_many([('set_alarm_state', {'armed': True}), ('no_existe', {})])
+        assert client.state.alarm_armed is True
+        assert client.call_many([('get_alarm_status', {})]) == [{'armed': True}]
+
+    def test_batch_is_atomic_across_threads(self, client):
+        """Verifica que un lote no se intercala con llamadas de otros hilos."""
+        def toggle():
+            for i in range(200):
+                client.call('set_lights', pattern='*', on=i % 2 == 0)
+
+        thread = threading.Thread(target=toggle)
+        thread.start()
+        for _ in range(200):
+            first, second = client.call_many([('list_lights_on', {}), ('list_lights_on', {})])
+            assert first == second
+        thread.join()
+
+    def test_shared_state(self, client):
+        """Verifica que se puede controlar un estado existente."""
+        other = HomeClient(state=client.state)
+        other.call('set_alarm_state', armed=True)
+        assert client.call('get_alarm_status') == {'armed': True}
+        assert [tool['name'] for tool in other.list_tools()][:2] == \
+            ['get_presence', 'get_presence_history']
+
+
+class TestAsyncHomeClient:
+    """Tests para la clase AsyncHomeClient."""
+
+    def test_calls(self):
+        """Verifica las llamadas y los lotes desde asyncio."""
+        async def scenario():
+            client = AsyncHomeClient.from_data(json.loads(json.dumps(DATA)))
+            await client.call('set_light_state', name='cocina', on=True)
+            lights, states = await client.call_many([
+                ('list_lights_on', {}), ('get_all_states', {})])
+            with pytest.raises(ToolError):
+                await client.call('no_existe')
+            response = await client.request('get_alarm_status', msg_id=9)
+            return client, lights, states, response
+
+        client, lights, states, response = asyncio.run(scenario())
+        assert lights == {'on': ['cocina']}
+        assert states['lights']['cocina'] is True
+        assert response == {'type': 'result', 'id': 9, 'ok': True,
+                            'result': {'armed': False}}
+        assert client.state.lights['cocina'] is True
+
+    def test_realtime_clock_runs_in_thread(self):
+        """Verifica que las esperas en tiempo real no bloquean el bucle."""
+        async def scenario():
+            client = AsyncHomeClient.from_data(
+                dict(json.loads(json.dumps(DATA)), clock={'realtime': True, 'speed': 100}))
+            ticks = []
+
+            async def ticker():
+                for _ in range(5):
+                    ticks.append(1)
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.ensure_future(ticker())
+            await client.call('run_until', time=client.state.clock.now + 5)
+            during = len(ticks)
+            await task
+            return during
+
+        assert asyncio.run(scenario()) == 5
+
+    def test_realtime_advance_keeps_loop_ticking(self):
+        """Verifica que una lectura concurrente con advance_time en tiempo real no bloquea el bucle."""
+        async def scenario():
+            client = AsyncHomeClient.from_data(
+                dict(json.loads(json.dumps(DATA)), clock={'realtime': True, 'speed': 1}))
+            loop = asyncio.get_running_loop()
+            gaps = []
+
+            async def ticker():
+                last = loop.time()
+                while True:
+                    await asyncio.sleep(0.01)
+                    gaps.append(loop.time() - last)
+                    last = loop.time()
+
+            task = asyncio.ensure_future(ticker())
+            advance = asyncio.ensure_future(client.call('advance_time', seconds=0.3))
+            await asyncio.sleep(0.02)
+            status = await client.call('get_alarm_status')
+            await advance
+            task.cancel()
+            client.close()
+            return status, gaps
+
+        status, gaps = asyncio.run(scenario())
+        assert status == {'armed': False}
+        assert len(gaps) >= 10
+        assert max(gaps) < 0.1
@@ -0,0 +1,151 @@
+"""Tests para el reloj simulado (clock.py)."""
+
+import time
+import pytest
+from mcp_home_simulator.clock import SimClock
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.state import HomeState
+
+
+class TestSimClock:
+    """Tests para la clase SimClock."""
+
+    def test_events_run_in_time_order(self):
+        """Verifica que los eventos se ejecutan en orden temporal."""
+        clock = SimClock()
+        seen = []
+        clock.schedule(30, seen.append, 'b')
+        clock.schedule(10, seen.append, 'a')
+        clock.schedule(60, seen.append, 'c')
+
+        assert clock.advance(45) == 2
+        assert seen == ['a', 'b']
+        assert clock.now == 45
+        assert clock.pending == 1
+        assert clock.next_event_time() == 60
+
+    def test_cancel(self):
+        """Verifica cancelar un evento planificado."""
+        clock = SimClock()
+        seen = []
+        timer_id = clock.schedule(5, seen.append, 'x')
+
+        assert clock.cancel(timer_id) is True
+        assert clock.cancel(timer_id) is False
+        assert clock.advance(10) == 0
+        assert seen == []
+        assert clock.pending == 0
+
+    def test_events_scheduled_during_run(self):
+        """Verifica que un evento puede planificar otros dentro del rango."""
+        clock = SimClock()
+        ticks = []
+
+        def tick():
+            ticks.append(clock.now)
+            clock.schedule(60, tick)
+
+        clock.schedule(60, tick)
+        clock.run_until(300)
+        assert ticks == [60, 120, 180, 240, 300]
+
+    def test_cannot_go_back(self):
+        """Verifica que el reloj no retrocede."""
+        clock = SimClock(start=100)
+        with pytest.raises(ValueError):
+            clock.run_until(50)
+
+    def test_day_in_milliseconds(self):
+        """Verifica que un día simulado con eventos por minuto es rápido."""
+        clock = SimClock()
+        count = [0]
+
+        def tick():
+            count[0] += 1
+            clock.schedule(60, tick)
+
+        clock.schedule(60, tick)
+        start = time.perf_counter()
+        clock.advance(86400)
+        elapsed = time.perf_counter() - start
+
+        assert count[0] == 1440
+        assert elapsed < 1.0
+
+    def test_realtime_pacing(self):
+        """Verifica que el modo tiempo real espera entre eventos."""
+        sleeps = []
+        clock = SimClock(realtime=True, speed=10.0, sleep=sleeps.append)
+        clock.schedule(20, lambda: None)
+
+        clock.run_until(50)
+
+        assert sleeps == [2.0, 3.0]
+        assert clock.now == 50
+
+    def test_sync_inside_event_does_not_rewind(self):
+        """Verifica que un sync() desde un evento no hace retroceder el reloj."""
+        clock = SimClock(realtime=True)
+        seen = []
+
+        def callback():
+            time.sleep(0.05)
+            clock.sync()
+            seen.append(clock.now)
+
+        clock.schedule(0.1, callback)
+        clock.run_until(0.1)
+
+        assert seen == [0.1]
+        assert clock.now == 0.1
+
+    def test_nested_advance_does_not_rewind(self):
+        """Verifica que un avance anidado más allá del objetivo se conserva."""
+        clock = SimClock()
+        clock.schedule(5, lambda: clock.advance(20))
+
+        clock.run_until(10)
+
+        assert clock.now == 25
+
+
+class TestDelayedRules:
+    """Tests para reglas con retardo ('for')."""
+
+    @pytest.fixture
+    def state(self):
+        """Crea un estado con una regla de ausencia de 5 minutos."""
+        return HomeState(Config.from_data({
+            'lights': ['salon', 'cocina'],
+            'rules': [{
+                'name': 'apagar_sin_presencia',
+                'when': {'presence': False},
+                'for': 300,
+                'then': {'lights': {'*': False}},
+            }],
+        }))
+
+    def test_fires_after_delay(self, state):
+        """Verifica que la regla se dispara tras el retardo."""
+        state.set_presence(['Carlos'])
+        state.set_lights_state(['salon', 'cocina'], True)
+        state.clear_presence()
+
+        state.clock.advance(299)
+        assert state.lights_on_count == 2
+
+        state.clock.advance(1)
+        assert state.lights_on_count == 0
+
+    def test_cancelled_when_condition_stops(self, state):
+        """Verifica que el disparo se cancela si vuelve la presencia."""
+        state.set_presence(['Carlos'])
+        state.set_light_state('salon', True)
+        state.clear_presence()
+        state.clock.advance(100)
+        state.add_person('Ana')
+
+        state.clock.advance(600)
+
+        assert state.get_light_state('salon') is True
+        assert state.clock.pending == 0
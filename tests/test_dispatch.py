@@ -0,0 +1,135 @@
+"""Tests para la cola de llamadas pendientes (dispatch.py)."""
+
+import threading
+import pytest
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.dispatch import CallQueue, PendingCall
+
+
+class TestCallQueue:
+    """Tests para la clase CallQueue."""
+
+    def test_fifo_and_capacity(self):
+        """Verifica el orden FIFO y el rechazo con la cola llena."""
+        calls = CallQueue(capacity=2)
+        assert calls.push(PendingCall('call', {'id': 1}, 1))
+        assert calls.push(PendingCall('call', {'id': 2}, 2))
+        assert not calls.push(PendingCall('call', {'id': 3}, 3))
+        # Los mensajes de control se admiten aunque la cola esté llena
+        assert calls.push(PendingCall('hello', {}), force=True)
+        assert len(calls) == 3
+
+        assert [calls.pop().message.get('id') for _ in range(3)] == [1, 2, None]
+
+    def test_cancel(self):
+        """Verifica la cancelación por id de llamadas pendientes."""
+        calls = CallQueue(capacity=4)
+        for msg_id in (1, 2, 3):
+            calls.push(PendingCall('call', {'id': msg_id}, msg_id))
+
+        assert calls.cancel(2).message == {'id': 2}
+        assert calls.cancel(2) is None
+        assert calls.pop().msg_id == 1
+        # Una llamada ya extraída no se puede cancelar
+        assert calls.cancel(1) is None
+        assert calls.pop().msg_id == 3
+
+    def test_unfinished(self):
+        """Verifica el recuento de llamadas admitidas sin terminar."""
+        calls = CallQueue(capacity=4)
+        for msg_id in (1, 2):
+            calls.push(PendingCall('call', {'id': msg_id}, msg_id))
+        calls.cancel(2)
+        assert calls.unfinished == 1
+        calls.pop()
+        assert calls.unfinished == 1
+        calls.task_done()
+        assert calls.unfinished == 0
+
+    def test_close_wakes_consumer(self):
+        """Verifica que cerrar la cola despierta al consumidor bloqueado."""
+        calls = CallQueue(capacity=1)
+        results = []
+        consumer = threading.Thread(target=lambda: results.append(calls.pop()))
+        consumer.start()
+        calls.close()
+        consumer.join(timeout=5)
+
+        assert results == [None]
+        assert not calls.push(PendingCall('call', {}))
+
+    def test_deadline(self):
+        """Verifica el vencimiento del plazo de una llamada."""
+        call = PendingCall('call', {}, deadline_ms=100)
+        assert not call.expired(call.received + 0.05)
+        assert call.expired(call.received + 0.1)
+        assert not PendingCall('call', {}).expired()
+
+    def test_invalid_capacity(self):
+        """Verifica el error con una capacidad o pesos no positivos."""
+        with pytest.raises(ValueError):
+            CallQueue(capacity=0)
+        with pytest.raises(ValueError):
+            CallQueue(weights={'read': 0})
+        with pytest.raises(ValueError):
+            CallQueue().push(PendingCall('call', {}, priority='urgente'))
+
+    def test_capacity_per_class(self):
+        """Verifica que cada clase tiene su propio límite."""
+        calls = CallQueue(capacity=1)
+        assert calls.push(PendingCall('call', {}, priority='read'))
+        assert not calls.push(PendingCall('call', {}, priority='read'))
+        assert calls.push(PendingCall('call', {}, priority='write'))
+        assert len(calls) == 2
+
+    def test_weighted_fairness(self):
+        """Verifica el reparto ponderado sin inanición de las lecturas."""
+        calls = CallQueue(capacity=100)
+        for name in ('read', 'write', 'alarm'):
+            for _ in range(20):
+                calls.push(PendingCall('call', {}, priority=name))
+
+        order = [calls.pop().priority for _ in range(14)]
+        # Pesos 4:2:1 -> en cada ronda de 7 hay 4 alarmas, 2 escrituras y 1 lectura
+        assert order[0] == 'alarm'
+        for window in (order[:7], order[7:]):
+            assert window.count('alarm') == 4
+            assert window.count('write') == 2
+            assert window.count('read') == 1
+
+        stats = calls.stats()
+        assert stats['alarm']['served'] == 8
+        assert stats['read']['pending'] == 18
+
+    def test_priority_order_when_idle(self):
+        """Verifica que una clase más prioritaria se atiende antes."""
+        calls = CallQueue(capacity=10)
+        calls.push(PendingCall('call', {'id': 'r'}, priority='read'))
+        calls.push(PendingCall('call', {'id': 'w'}, priority='write'))
+        assert calls.pop().message['id'] == 'w'
+        assert calls.pop().message['id'] == 'r'
+
+
+class TestPriorityConfig:
+    """Tests de la configuración de prioridades del servidor."""
+
+    def test_defaults_and_overrides(self):
+        """Verifica los pesos por defecto y la asignación de clases por tool."""
+        server = Config.from_data({
+            'lights': ['salon'],
+            'server': {'priorities': {'get_all_states': 'write'},
+                       'priority_weights': {'read': 2}},
+        }).server
+        assert server['priorities'] == {'get_all_states': 'write'}
+        assert server['priority_weights'] == {'alarm': 4, 'write': 2, 'read': 2}
+
+    @pytest.mark.parametrize('section', [
+        {'priorities': {'get_all_states': 'urgente'}},
+        {'priorities': ['get_all_states']},
+        {'priority_weights': {'read': 0}},
+        {'priority_weights': {'otra': 1}},
+    ])
+    def test_invalid(self, section):
+        """Verifica el error con clases o pesos inválidos."""
+        with pytest.raises(ValueError):
+            Config.from_data({'lights': ['salon'], 'server': section})
@@ -0,0 +1,143 @@
+"""Tests para la codificación MessagePack (encoding.py)."""
+
+import io
+import json
+import math
+import struct
+
+import pytest
+from mcp_home_simulator import encoding
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.encoding import _Unpacker, _pack, packb, unpackb
+from mcp_home_simulator.mcp_stdio import MCPStdioServer
+
+
+def pure_pack(value):
+    """Codifica con la implementación en Python."""
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+def pure_unpack(data):
+    """Decodifica con la implementación en Python."""
+    return _Unpacker(data).unpack()
+
+
+VALUES = [
+    None, True, False, 0, 127, 128, 255, 256, 65535, 65536, 2 ** 32, 2 ** 64 - 1,
+    -1, -32, -33, -128, -129, -32768, -32769, -2 ** 31 - 1, -2 ** 63,
+    1.5, -0.25, '', 'a' * 31, 'ñ' * 40, 'x' * 300, 'y' * 70000,
+    b'', b'\x00' * 300, [], list(range(20)), {}, {f"k{i}": i for i in range(20)},
+    {'lights': {'salon': True, 'cocina': False}, 'presence': [None, 1.0]},
+]
+
+
+class TestPurePython:
+    """Tests para el codificador en Python puro."""
+
+    @pytest.mark.parametrize('value', VALUES)
+    def test_roundtrip(self, value):
+        """Verifica que codificar y decodificar devuelve el mismo valor."""
+        assert pure_unpack(pure_pack(value)) == value
+
+    def test_known_encodings(self):
+        """Verifica bytes de referencia de la especificación."""
+        assert pure_pack({'a': True}) == b'\x81\xa1a\xc3'
+        assert pure_pack(-1) == b'\xff'
+        assert pure_pack(200) == b'\xcc\xc8'
+        assert pure_pack([1, 2]) == b'\x92\x01\x02'
+        assert pure_pack(1.0) == b'\xcb' + struct.pack('>d', 1.0)
+        assert pure_unpack(b'\xca' + struct.pack('>f', 0.5)) == 0.5
+        assert math.isnan(pure_unpack(pure_pack(float('nan'))))
+
+    def test_matches_native(self):
+        """Verifica que coincide con la extensión msgpack si está instalada."""
+        msgpack = pytest.importorskip('msgpack')
+        for value in VALUES:
+            assert pure_pack(value) == msgpack.packb(value, use_bin_type=True)
+
+    def test_errors(self):
+        """Verifica los errores de tipos y mensajes inválidos."""
+        with pytest.raises(TypeError):
+            pure_pack({1, 2})
+        with pytest.raises(ValueError):
+            unpackb(b'\x92\x01')
+        with pytest.raises(ValueError):
+            unpackb(b'\x01\x02')
+        with pytest.raises(ValueError):
+            unpackb(b'\xc1')
+
+
+class TestMsgpackSession:
+    """Tests de la negociación de MessagePack en el servidor."""
+
+    @pytest.fixture
+    def server(self, monkeypatch):
+        """Crea un servidor con framing Content-Length."""
+
+        def mock_config_init(self, config_path="config.yaml"):
+            self.config_path = config_path
+            self.data = {
+                'lights': ['salon', 'cocina'],
+                'alarm_default': False,
+                'presence_default': {'present': False, 'known_people': []}
+            }
+
+        monkeypatch.setattr(Config, '__init__', mock_config_init)
+        return MCPStdioServer(framing='content-length')
+
+    def test_negotiation(self, server):
+        """Verifica hello, llamadas en MessagePack y la caché de respuestas."""
+        hello = json.dumps({'type': 'hello', 'id': 1, 'encoding': 'msgpack'}).encode()
+        calls = [
+            {'type': 'call', 'id': 2, 'tool': 'set_light_state',
+             'args': {'name': 'salon', 'on': True}},
+            {'type': 'call', 'id': 3, 'tool': 'get_all_states', 'args': {}},
+            {'type': 'call', 'id': 4, 'tool': 'get_all_states', 'args': {}},
+        ]
+        data = b'Content-Length: %d\r\n\r\n' % len(hello) + hello
+        for call in calls:
+            packed = packb(call)
+            data += struct.pack('>I', len(packed)) + packed
+
+        output = io.BytesIO()
+        server.serve_framed(io.BytesIO(data), output)
+        raw = output.getvalue()
+
+        # ready y hello en JSON con Content-Length
+        stream = io.BytesIO(raw)
+        texts = []
+        for _ in range(2):
+            header = stream.readline()
+            length = int(header.split(b':')[1])
+            stream.readline()
+            texts.append(json.loads(stream.read(length)))
+        assert texts[0]['encodings'] == ['json', 'msgpack']
+        assert texts[1] == {'type': 'hello', 'id': 1, 'encoding': 'msgpack'}
+
+        # Resto en MessagePack con prefijo de longitud
+        replies = []
+        while True:
+            prefix = stream.read(4)
+            if not prefix:
+                break
+            replies.append(unpackb(stream.read(struct.unpack('>I', prefix)[0])))
+
+        assert replies[0] == {'type': 'result', 'id': 2, 'ok': True,
+                              'result': {'ok': True}}
+        assert replies[1]['result']['lights'] == {'salon': True, 'cocina': False}
+        assert replies[2] == dict(replies[1], id=4)
+        assert server.responses.stats()['hits'] == 1
+
+    def test_unknown_encoding(self, server, capsys):
+        """Verifica el error con una codificación no soportada."""
+        server.encoding = 'json'
+        server.handle_message({'type': 'hello', 'id': 1, 'encoding': 'xml'})
+        assert json.loads(capsys.readouterr().out)['type'] == 'error'
+        assert server.encoding == 'json'
+
+
+def test_fallback_flag():
+    """Verifica el indicador de implementación nativa."""
+    assert encoding.MSGPACK_NATIVE == (encoding.msgpack is not None)
@@ -0,0 +1,117 @@
+"""Tests para la simulación de consumo energético (energy.py)."""
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from mcp_home_simulator.energy import MAX_REPORT_INTERVALS  # noqa: E402
+from mcp_home_simulator.config import Config  # noqa: E402
+from mcp_home_simulator.state import HomeState  # noqa: E402
+
+
+class TestEnergyMeter:
+    """Tests para la clase EnergyMeter."""
+
+    @pytest.fixture
+    def state(self):
+        """Crea un estado con luces de distinta potencia y grupos."""
+        return HomeState(Config.from_data({
+            'lights': [
+                {'name': 'salon', 'watts': 60},
+                {'name': 'cocina', 'watts': 40},
+                'garage',
+            ],
+            'energy': {'default_watts': 100},
+            'groups': {'casa': ['salon', 'cocina'], 'exterior': ['garage']},
+        }))
+
+    def test_watts_from_config(self, state):
+        """Verifica la potencia declarada y la potencia por defecto."""
+        assert state.config.lights == ['salon', 'cocina', 'garage']
+        assert state.config.light_watts == {
+            'salon': 60.0, 'cocina': 40.0, 'garage': 100.0}
+
+    def test_integrates_over_time(self, state):
+        """Verifica la integración del consumo entre cambios."""
+        state.set_light_state('salon', True)
+        state.clock.advance(3600)
+        state.set_light_state('garage', True)
+        state.clock.advance(1800)
+
+        report = state.energy.report()
+
+        assert report['total_wh'] == pytest.approx(60 + 60 * 0.5 + 100 * 0.5)
+        assert report['groups']['casa'] == pytest.approx(90)
+        assert report['groups']['exterior'] == pytest.approx(50)
+        assert report['power_w'] == pytest.approx(160)
+
+    def test_arbitrary_range_and_intervals(self, state):
+        """Verifica rangos parciales y desglose por intervalos."""
+        state.clock.advance(600)
+        state.set_lights_state(['salon', 'cocina'], True)
+        state.clock.advance(1200)
+        state.set_lights_state(['salon', 'cocina'], False)
+        state.clock.advance(600)
+
+        report = state.energy.report(0, 2400, step=600)
+
+        assert report['total_wh'] == pytest.approx(100 * 1200 / 3600)
+        assert [round(i['total_wh'], 6) for i in report['intervals']] == [
+            0, round(100 / 6, 6), round(100 / 6, 6), 0]
+
+        partial = state.energy.report(900, 1500)
+        assert partial['total_wh'] == pytest.approx(100 * 600 / 3600)
+
+    def test_too_many_intervals(self, state):
+        """Verifica que se rechaza un 'step' que generaría demasiados intervalos."""
+        state.clock.advance(86400)
+        with pytest.raises(ValueError, match='intervalos'):
+            state.energy.report(0, 86400, step=1e-9)
+        assert len(state.energy.report(0, 86400, step=86400 / MAX_REPORT_INTERVALS)['intervals']) \
+            == MAX_REPORT_INTERVALS
+
+    def test_many_changes_at_same_instant(self, state):
+        """Verifica que varios cambios en el mismo instante no abren segmentos."""
+        for _ in range(10):
+            state.set_light_state('salon', True)
+            state.set_light_state('salon', False)
+        state.set_light_state('cocina', True)
+        state.clock.advance(3600)
+
+        assert state.energy.report()['total_wh'] == pytest.approx(40)
+        assert state.energy._count == 1
+
+    def test_segment_storage_grows(self, state):
+        """Verifica que la tabla de segmentos crece al llenarse."""
+        for i in range(3000):
+            state.set_light_state('salon', i % 2 == 0)
+            state.clock.advance(1)
+
+        assert state.energy.report()['total_wh'] == pytest.approx(
+            1500 * 60 / 3600)
+
+    def test_history_survives_reload(self, state):
+        """Verifica que una recarga conserva el consumo acumulado."""
+        meter = state.energy
+        state.set_lights_state(['salon', 'garage'], True)
+        state.clock.advance(3600)
+
+        state.apply_config(Config.from_data({
+            'lights': [{'name': 'salon', 'watts': 30}, 'cocina', 'terraza'],
+            'energy': {'default_watts': 100},
+            'groups': {'casa': ['salon', 'cocina'], 'fuera': ['terraza']},
+        }))
+        state.set_light_state('terraza', True)
+        state.clock.advance(3600)
+
+        report = state.energy.report()
+        assert state.energy is meter
+        assert report['total_wh'] == pytest.approx(160 + 130)
+        assert report['groups'] == pytest.approx({'casa': 60 + 30, 'fuera': 100})
+        assert report['power_w'] == pytest.approx(130)
+
+    def test_invalid_range(self, state):
+        """Verifica error con un rango invertido."""
+        state.clock.advance(10)
+        with pytest.raises(ValueError):
+            state.energy.report(5, 1)
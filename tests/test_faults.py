@@ -0,0 +1,199 @@
+"""Tests para la inyección de latencia y fallos simulados."""
+
+import json
+import random
+import threading
+import time
+import pytest
+import yaml
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.faults import (
+    DelayQueue, FaultInjector, Latency, compile_faults)
+from mcp_home_simulator.mcp_stdio import MCPStdioServer
+from mcp_home_simulator.tools import ALARM_TOOLS
+
+
+LIGHTS = ['salon', 'cocina', 'garage', 'garage_exterior']
+
+
+def injector(section, groups=None):
+    """Crea un inyector a partir de una sección 'faults'."""
+    return FaultInjector(compile_faults(section, LIGHTS), groups or {}, ALARM_TOOLS)
+
+
+class TestLatency:
+    """Tests para la clase Latency."""
+
+    def test_distributions(self):
+        """Verifica el muestreo de cada distribución."""
+        rng = random.Random(1)
+        assert Latency.parse(20, 'x').sample(rng) == 0.02
+        assert Latency.parse({'dist': 'fixed', 'ms': 5}, 'x').sample(rng) == 0.005
+        uniform = Latency.parse({'dist': 'uniform', 'min_ms': 10, 'max_ms': 20}, 'x')
+        assert all(0.01 <= uniform.sample(rng) <= 0.02 for _ in range(100))
+        lognormal = Latency.parse({'dist': 'lognormal', 'median_ms': 50, 'sigma': 0.5}, 'x')
+        samples = sorted(lognormal.sample(rng) for _ in range(2001))
+        assert 0.04 < samples[1000] < 0.06
+
+    @pytest.mark.parametrize('spec', [
+        -1, True, {'dist': 'gamma'}, {'dist': 'uniform', 'min_ms': 5, 'max_ms': 1},
+        {'dist': 'lognormal', 'median_ms': 0}, {'dist': 'fixed'}])
+    def test_invalid(self, spec):
+        """Verifica el rechazo de especificaciones inválidas."""
+        with pytest.raises(ValueError):
+            Latency.parse(spec, 'x')
+
+
+class TestCompileFaults:
+    """Tests para la función compile_faults."""
+
+    def test_none(self):
+        """Verifica que sin sección no hay inyección."""
+        assert compile_faults(None, LIGHTS) is None
+        assert Config.from_data({'lights': ['a']}).faults is None
+
+    @pytest.mark.parametrize('section, error', [
+        ([], 'diccionario'),
+        ({'seed': 'x'}, 'seed'),
+        ({'devices': {'sotano': {}}}, 'inexistente'),
+        ({'tools': {'*': {'failure_rate': 2}}}, 'failure_rate'),
+        ({'tools': {'*': 5}}, 'diccionario'),
+    ])
+    def test_invalid(self, section, error):
+        """Verifica los errores de validación."""
+        with pytest.raises(ValueError, match=error):
+            Config.from_data({'lights': list(LIGHTS), 'faults': section})
+
+
+class TestFaultInjector:
+    """Tests para la clase FaultInjector."""
+
+    SECTION = {
+        'seed': 7,
+        'tools': {'*': {'latency': {'dist': 'uniform', 'min_ms': 1, 'max_ms': 9},
+                        'failure_rate': 0.3}},
+        'devices': {'garage': {'latency': 500, 'failure_rate': 0.5}},
+    }
+
+    def test_seed_is_reproducible(self):
+        """Verifica que la misma semilla produce las mismas decisiones."""
+        calls = [('set_light_state', {'name': 'garage', 'on': True}),
+                 ('list_lights_on', {})] * 50
+        first = injector(self.SECTION)
+        second = injector(self.SECTION)
+        plans = [first.plan(*call) for call in calls]
+        assert plans == [second.plan(*call) for call in calls]
+        assert any(error for _, error in plans)
+        assert any(error is None for _, error in plans)
+
+    def test_devices_touched(self):
+        """Verifica qué argumentos tocan un dispositivo."""
+        inj = injector({'devices': {'garage': {'latency': 100},
+                                    'alarm': {'failure_rate': 1}}},
+                       {'fuera': ('garage', 'garage_exterior')})
+        assert inj.plan('set_light_state', {'name': 'garage'}) == (0.1, None)
+        assert inj.plan('set_lights', {'names': ['salon', 'garage']}) == (0.1, None)
+        assert inj.plan('set_lights', {'pattern': 'gar*'}) == (0.1, None)
+        assert inj.plan('set_group_state', {'group': 'fuera'}) == (0.1, None)
+        assert inj.plan('set_light_state', {'name': 'salon'}) == (0.0, None)
+        assert inj.plan('set_alarm_state', {'armed': True}) == \
+            (0.0, "Fallo simulado en el dispositivo 'alarm'")
+        assert (inj.delayed, inj.failed) == (4, 1)
+
+    def test_slowest_profile_wins(self):
+        """Verifica que la latencia es la mayor entre tool y dispositivos."""
+        inj = injector({'tools': {'set_light_state': {'latency': 20}},
+                        'devices': {'garage': {'latency': 300}}})
+        assert inj.plan('set_light_state', {'name': 'garage'})[0] == 0.3
+        assert inj.plan('set_light_state', {'name': 'salon'})[0] == 0.02
+
+
+class TestDelayQueue:
+    """Tests para la clase DelayQueue."""
+
+    def test_order_cancel_and_flush(self):
+        """Verifica el orden de vencimiento, la cancelación y el vaciado al parar."""
+        fired = []
+        done = threading.Event()
+        delays = DelayQueue(capacity=3)
+        delays.start()
+        assert delays.schedule(0.05, lambda: (fired.append('b'), done.set()))
+        assert delays.schedule(0.01, lambda: fired.append('a'))
+        assert delays.schedule(30, lambda: fired.append('c'), msg_id=9)
+        assert not delays.schedule(0, lambda: None)
+        assert done.wait(5)
+        assert delays.cancel(9)
+        assert not delays.cancel(9)
+
+        delays.schedule(30, lambda: fired.append('d'))
+        delays.stop()
+        assert fired == ['a', 'b', 'd']
+        assert len(delays) == 0
+
+
+class TestServerFaults:
+    """Tests de la inyección de fallos en el servidor."""
+
+    @pytest.fixture
+    def server(self, tmp_path):
+        """Crea un servidor con una luz lenta y la alarma averiada."""
+        path = tmp_path / 'config.yaml'
+        path.write_text(yaml.safe_dump({
+            'lights': LIGHTS,
+            'server': {'reload_interval': 0},
+            'faults': {'seed': 1, 'devices': {
+                'garage': {'latency': 300},
+                'alarm': {'latency': 10, 'failure_rate': 1}}},
+        }))
+        return MCPStdioServer(str(path))
+
+    @staticmethod
+    def call(server, msg_id, tool, **args):
+        server.process_message(json.dumps(
+            {'type': 'call', 'id': msg_id, 'tool': tool, 'args': args}))
+
+    def test_slow_device_does_not_block(self, server, capsys):
+        """Verifica que una llamada lenta no retrasa al resto."""
+        server.start_pipeline()
+        try:
+            self.call(server, 1, 'set_light_state', name='garage', on=True)
+            self.call(server, 2, 'set_light_state', name='salon', on=True)
+            self.call(server, 3, 'list_lights_on')
+            self.call(server, 4, 'set_alarm_state', armed=True)
+            deadline = time.monotonic() + 5
+            while server.metrics()['faults']['waiting'] and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.call(server, 5, 'list_lights_on')
+        finally:
+            server.stop_pipeline()
+
+        replies = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [reply['id'] for reply in replies] == [2, 3, 4, 1, 5]
+        assert replies[1]['result'] == {'on': ['salon']}
+        assert replies[2]['code'] == 'fault'
+        assert replies[4]['result'] == {'on': ['salon', 'garage']}
+        assert server.state.alarm_armed is False
+        assert server.metrics()['faults'] == {
+            'enabled': True, 'delayed': 2, 'failed': 1, 'waiting': 0}
+
+    def test_cancel_delayed_call(self, server, capsys):
+        """Verifica que una llamada retenida por latencia se puede cancelar."""
+        server.start_pipeline()
+        try:
+            self.call(server, 1, 'set_light_state', name='garage', on=True)
+            server.process_message(json.dumps({'type': 'cancel', 'id': 1}))
+        finally:
+            server.stop_pipeline()
+
+        replies = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert replies == [{'type': 'cancelled', 'id': 1, 'ok': True}]
+        assert server.state.lights['garage'] is False
+
+    def test_failures_without_pipeline(self, server, capsys):
+        """Verifica que sin el bucle se inyectan fallos pero no latencia."""
+        self.call(server, 1, 'get_alarm_status')
+        self.call(server, 2, 'set_light_state', name='garage', on=True)
+
+        replies = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert replies[0]['code'] == 'fault'
+        assert replies[1]['ok'] is True
@@ -0,0 +1,85 @@
+"""Tests para el difusor de cambios de estado."""
+
+import pytest
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.feed import ChangeFeed, delta_payload
+from mcp_home_simulator.state import HomeState
+
+
+@pytest.fixture
+def state():
+    """Crea un estado con tres luces."""
+    return HomeState(Config.from_data({'lights': ['salon', 'cocina', 'garage']}))
+
+
+class TestChangeFeed:
+    """Tests para la clase ChangeFeed."""
+
+    def test_listener_only_while_subscribed(self, state):
+        """Verifica que el observador solo se registra con suscriptores."""
+        feed = ChangeFeed(state)
+        assert feed._on_change not in state._listeners
+        first = feed.subscribe(lambda: None)
+        second = feed.subscribe(lambda: None)
+        assert state._listeners.count(feed._on_change) == 1
+        first.close()
+        assert feed._on_change in state._listeners
+        second.close()
+        second.close()
+        assert feed._on_change not in state._listeners
+        assert len(feed) == 0
+
+    def test_coalesces_and_wakes_once(self, state):
+        """Verifica que los cambios se fusionan por clave y se despierta una vez."""
+        feed = ChangeFeed(state)
+        wakes = []
+        subscriber = feed.subscribe(lambda: wakes.append(1))
+        for on in (True, False, True):
+            state.set_light_state('salon', on)
+        state.set_alarm_state(True)
+        state.set_presence(['ana'])
+
+        kind, version, changes = subscriber.take()
+        assert (kind, version, len(wakes)) == ('delta', state.version, 1)
+        assert changes == {'light:salon': True, 'alarm': True,
+                           'presence': {'present': True, 'known_people': ['ana']}}
+        assert feed.stats()['coalesced'] == 2
+        assert subscriber.take() is None
+
+        state.set_light_state('cocina', True)
+        assert len(wakes) == 2
+
+    def test_take_skips_versions_already_sent(self, state):
+        """Verifica que se descartan los cambios incluidos en un snapshot."""
+        feed = ChangeFeed(state)
+        subscriber = feed.subscribe(lambda: None)
+        state.set_light_state('salon', True)
+        assert subscriber.take(after=state.version) is None
+
+    def test_overflow_forces_resync(self, state):
+        """Verifica que un cliente con demasiados cambios recibe un snapshot."""
+        feed = ChangeFeed(state, max_pending=2)
+        slow = feed.subscribe(lambda: None)
+        fast = feed.subscribe(lambda: None)
+        state.set_light_state('salon', True)
+        assert fast.take()[0] == 'delta'
+        state.set_light_state('cocina', True)
+        state.set_light_state('garage', True)
+        state.set_alarm_state(True)
+
+        assert slow.take() == ('resync', state.version, {})
+        assert slow.pending == {} and feed.overflows == 2
+        assert fast.take()[0] == 'resync'
+        state.set_light_state('salon', False)
+        assert slow.take()[0] == 'delta'
+
+    def test_invalid_max_pending(self, state):
+        """Verifica que max_pending debe ser positivo."""
+        with pytest.raises(ValueError):
+            ChangeFeed(state, max_pending=0)
+
+    def test_delta_payload(self):
+        """Verifica la forma compacta de los deltas."""
+        assert delta_payload(7, {'light:salon': True, 'alarm': False}) == {
+            'version': 7, 'lights': {'salon': True}, 'alarm': False}
+        assert delta_payload(8, {}) == {'version': 8}
@@ -0,0 +1,114 @@
+"""Tests para el framing Content-Length (framing.py)."""
+
+import io
+import json
+
+import pytest
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.framing import FrameReader, FrameWriter, FramingError
+from mcp_home_simulator.mcp_stdio import MCPStdioServer
+
+
+def frame(payload: bytes) -> bytes:
+    """Construye un mensaje con cabecera Content-Length."""
+    return b'Content-Length: %d\r\n\r\n' % len(payload) + payload
+
+
+def read_all(data: bytes):
+    """Lee todos los mensajes de un flujo como bytes."""
+    reader = FrameReader(io.BytesIO(data))
+    messages = []
+    while True:
+        body = reader.read()
+        if body is None:
+            return messages
+        messages.append(bytes(body))
+
+
+class TestFrameReader:
+    """Tests para FrameReader y FrameWriter."""
+
+    def test_roundtrip(self):
+        """Verifica que lo escrito con FrameWriter se lee igual."""
+        output = io.BytesIO()
+        writer = FrameWriter(output)
+        payloads = [b'{"a": 1}', 'línea\ncon salto'.encode('utf-8'), b'']
+        for payload in payloads:
+            writer.write(payload)
+        assert read_all(output.getvalue()) == payloads
+
+    def test_extra_headers_and_blank_lines(self):
+        """Verifica cabeceras adicionales y líneas vacías entre mensajes."""
+        data = (b'\r\nContent-Type: application/json\r\ncontent-length: 2\r\n\r\n{}'
+                + b'\n' + frame(b'[]'))
+        assert read_all(data) == [b'{}', b'[]']
+
+    def test_buffer_reuse_and_growth(self):
+        """Verifica que el buffer crece con mensajes grandes."""
+        big = b'x' * 200000
+        assert read_all(frame(b'a') + frame(big) + frame(b'b')) == [b'a', big, b'b']
+
+    def test_truncated_body(self):
+        """Verifica el error con un cuerpo incompleto."""
+        with pytest.raises(FramingError):
+            read_all(b'Content-Length: 10\r\n\r\nabc')
+
+    def test_invalid_headers(self):
+        """Verifica los errores de cabecera."""
+        with pytest.raises(FramingError):
+            read_all(b'Content-Type: x\r\n\r\n{}')
+        with pytest.raises(FramingError):
+            read_all(b'Content-Length: abc\r\n\r\n')
+        with pytest.raises(FramingError):
+            FrameReader(io.BytesIO(b'Content-Length: 100\r\n\r\n'),
+                        max_size=10).read()
+
+
+class TestFramedServer:
+    """Tests del servidor con framing Content-Length."""
+
+    @pytest.fixture
+    def config(self, monkeypatch):
+        """Sustituye la carga de configuración por datos en memoria."""
+
+        def mock_config_init(self, config_path="config.yaml"):
+            self.config_path = config_path
+            self.data = {
+                'lights': ['salon', 'cocina'],
+                'alarm_default': False,
+                'presence_default': {'present': False, 'known_people': []}
+            }
+
+        monkeypatch.setattr(Config, '__init__', mock_config_init)
+
+    def test_serve_framed(self, config):
+        """Verifica una sesión completa con mensajes que contienen saltos de línea."""
+        server = MCPStdioServer(framing='content-length')
+        call = json.dumps({'type': 'call', 'id': 1, 'tool': 'set_light_state',
+                           'args': {'name': 'salon', 'on': True}}, indent=2)
+        query = json.dumps({'type': 'call', 'id': 2, 'tool': 'list_lights_on',
+                            'args': {}})
+        output = io.BytesIO()
+        server.serve_framed(io.BytesIO(frame(call.encode()) + frame(query.encode())),
+                            output)
+
+        ready, result, lights = [json.loads(m) for m in read_all(output.getvalue())]
+        assert ready['type'] == 'ready'
+        assert result['result'] == {'ok': True}
+        assert lights['result'] == {'on': ['salon']}
+
+    def test_serve_framed_jsonrpc(self, config):
+        """Verifica el modo JSON-RPC con framing y un error de framing."""
+        server = MCPStdioServer(protocol='jsonrpc', framing='content-length')
+        request = b'{"jsonrpc": "2.0", "id": 1, "method": "ping"}'
+        output = io.BytesIO()
+        server.serve_framed(io.BytesIO(frame(request) + b'Basura\r\n\r\n'), output)
+
+        pong, error = [json.loads(m) for m in read_all(output.getvalue())]
+        assert pong == {'jsonrpc': '2.0', 'id': 1, 'result': {}}
+        assert 'framing' in error['error']['message']
+
+    def test_unknown_framing(self, config):
+        """Verifica que se rechaza un framing desconocido."""
+        with pytest.raises(ValueError):
+            MCPStdioServer(framing='xml')
@@ -0,0 +1,353 @@
+"""Tests para la pasarela HTTP."""
+
+import asyncio
+import gzip
+import json
+import pytest
+from mcp_home_simulator import HomeClient
+from mcp_home_simulator.gateway import (
+    GZIP_MIN_SIZE, HTTPError, HTTPGateway, accepts_gzip, etag_matches, parse_head,
+    parse_query)
+
+
+DATA = {
+    'lights': ['salon', 'cocina', 'garage'],
+    'groups': {'planta': ['salon', 'cocina']},
+}
+
+
+async def read_response(reader):
+    """Lee una respuesta HTTP: (estado, cabeceras en minúsculas, cuerpo)."""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    body = await reader.readexactly(length) if length else b''
+    return status, headers, body
+
+
+def request(method, target, body=None, headers=()):
+    """Construye los bytes de una petición HTTP/1.1."""
+    lines = [f"{method} {target} HTTP/1.1", "Host: test"]
+    lines += [f"{name}: {value}" for name, value in headers]
+    payload = b''
+    if body is not None:
+        payload = json.dumps(body).encode('utf-8')
+        lines.append(f"Content-Length: {len(payload)}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload
+
+
+def run(data, scenario):
+    """Ejecuta un escenario con una pasarela en un puerto libre."""
+    async def main():
+        gateway = await HTTPGateway(HomeClient.from_data(data), port=0).start()
+        reader, writer = await asyncio.open_connection('127.0.0.1', gateway.port)
+        try:
+            return await scenario(gateway, reader, writer)
+        finally:
+            writer.close()
+            await gateway.close()
+    return asyncio.run(main())
+
+
+class TestParsing:
+    """Tests para el análisis de peticiones y cabeceras."""
+
+    def test_parse_head(self):
+        """Verifica la línea de petición y las cabeceras repetidas."""
+        method, target, version, headers = parse_head(
+            b'GET /tools?a=1 HTTP/1.1\r\nHost: x\r\nAccept: a\r\naccept: b\r\n\r\n')
+        assert (method, target, version) == ('GET', '/tools?a=1', 'HTTP/1.1')
+        assert headers == {'host': 'x', 'accept': 'a, b'}
+
+    @pytest.mark.parametrize('head, status', [
+        (b'GET /\r\n\r\n', 400),
+        (b'GET / HTTP/2\r\n\r\n', 505),
+        (b'GET / HTTP/1.1\r\nSin dos puntos\r\n\r\n', 400),
+    ])
+    def test_parse_head_errors(self, head, status):
+        """Verifica los errores de peticiones mal formadas."""
+        with pytest.raises(HTTPError) as e:
+            parse_head(head)
+        assert e.value.status == status
+
+    def test_parse_query(self):
+        """Verifica que los valores se interpretan como JSON o texto."""
+        assert parse_query('group=planta&limit=5&on=true&names=%5B%22a%22%5D') == {
+            'group': 'planta', 'limit': 5, 'on': True, 'names': ['a']}
+
+    def test_parse_query_string_properties(self):
+        """Verifica que los argumentos de tipo texto no se decodifican como JSON."""
+        properties = {'group': {'type': 'string'}, 'limit': {'type': 'integer'}}
+        assert parse_query('group=2024&limit=5', properties) == {'group': '2024', 'limit': 5}
+        assert parse_query('group=null', properties) == {'group': 'null'}
+        assert parse_query('group=true', properties) == {'group': 'true'}
+
+    def test_accepts_gzip(self):
+        """Verifica la negociación de gzip."""
+        assert accepts_gzip('gzip, deflate')
+        assert accepts_gzip('br;q=1.0, gzip;q=0.5')
+        assert accepts_gzip('*')
+        assert not accepts_gzip('gzip;q=0')
+        assert not accepts_gzip('deflate')
+        assert not accepts_gzip('')
+
+    def test_etag_matches(self):
+        """Verifica la comparación débil de ETags."""
+        assert etag_matches('W/"a-1"', 'W/"a-1"')
+        assert etag_matches('"x", "a-1"', 'W/"a-1"')
+        assert etag_matches('*', 'W/"a-1"')
+        assert not etag_matches('W/"a-2"', 'W/"a-1"')
+
+
+class TestHTTPGateway:
+    """Tests para la clase HTTPGateway."""
+
+    def test_get_and_post(self):
+        """Verifica las lecturas por GET y las escrituras por POST."""
+        async def scenario(gateway, reader, writer):
+            writer.write(request('GET', '/tools'))
+            writer.write(request('POST', '/tools/set_light_state', {'name': 'salon', 'on': True}))
+            writer.write(request('GET', '/tools/get_group_state?group=planta'))
+            writer.write(request('GET', '/tools/list_lights_on'))
+            return [await read_response(reader) for _ in range(4)]
+
+        tools, posted, group, lights = run(DATA, scenario)
+        assert tools[0] == 200
+        assert 'set_light_state' in {tool['name'] for tool in json.loads(tools[2])['tools']}
+        assert (posted[0], json.loads(posted[2])) == (200, {'ok': True})
+        assert json.loads(group[2])['on'] == 1
+        assert json.loads(lights[2]) == {'on': ['salon']}
+
+    def test_numeric_group_name(self):
+        """Verifica que un grupo con nombre numérico se consulta por GET."""
+        async def scenario(gateway, reader, writer):
+            writer.write(request('GET', '/tools/get_group_state?group=2024'))
+            return await read_response(reader)
+
+        status, _, body = run(dict(DATA, groups={'2024': ['garage']}), scenario)
+        assert status == 200
+        assert json.loads(body)['group'] == '2024'
+
+    def test_realtime_clock_does_not_block_loop(self):
+        """Verifica que un advance_time en tiempo real no detiene las lecturas cacheables ni el bucle."""
+        async def scenario(gateway, reader, writer):
+            loop = asyncio.get_running_loop()
+            gaps = []
+
+            async def ticker():
+                last = loop.time()
+                while True:
+                    await asyncio.sleep(0.01)
+                    gaps.append(loop.time() - last)
+                    last = loop.time()
+
+            task = asyncio.ensure_future(ticker())
+            writer.write(request('POST', '/tools/advance_time', {'seconds': 0.3}))
+            await asyncio.sleep(0.02)
+            other_reader, other_writer = await asyncio.open_connection('127.0.0.1', gateway.port)
+            other_writer.write(request('GET', '/tools/get_alarm_status'))
+            status = await read_response(other_reader)
+            advanced = await read_response(reader)
+            other_writer.close()
+            task.cancel()
+            return status, advanced, gaps
+
+        data = dict(DATA, clock={'realtime': True, 'speed': 1})
+        status, advanced, gaps = run(data, scenario)
+        assert (status[0], json.loads(status[2])) == (200, {'armed': False})
+        assert advanced[0] == 200
+        assert max(gaps) < 0.1
+
+    def test_errors(self):
+        """Verifica los códigos de estado de los errores."""
+        async def scenario(gateway, reader, writer):
+            responses = []
+            for data in (request('GET', '/tools/no_existe'),
+                         request('GET', '/otra'),
+                         request('GET', '/tools/set_light_state'),
+                         request('DELETE', '/tools/get_time'),
+                         request('POST', '/tools/set_light_state', {'name': 'sotano', 'on': True}),
+                         request('POST', '/tools/set_light_state', [1]),
+                         b'POST /tools/get_time HTTP/1.1\r\n\r\n'):
+                writer.write(data)
+                responses.append(await read_response(reader))
+            return responses
+
+        responses = run(DATA, scenario)
+        assert [status for status, _, _ in responses] == [404, 404, 405, 405, 400, 400, 411]
+        assert responses[2][1]['allow'] == 'POST'
+        assert json.loads(responses[4][2])['ok'] is False
+        assert responses[-1][1]['connection'] == 'close'
+
+    def test_etag_and_not_modified(self):
+        """Verifica el ETag por versión y las respuestas 304."""
+        async def scenario(gateway, reader, writer):
+            writer.write(request('GET', '/tools/get_all_states'))
+            first = await read_response(reader)
+            etag = first[1]['etag']
+            writer.write(request('GET', '/tools/get_all_states', headers=[('If-None-Match', etag)]))
+            unchanged = await read_response(reader)
+            writer.write(request('POST', '/tools/set_alarm_state', {'armed': True}))
+            await read_response(reader)
+            writer.write(request('GET', '/tools/get_all_states', headers=[('If-None-Match', etag)]))
+            changed = await read_response(reader)
+            return first, unchanged, changed, gateway.stats()
+
+        first, unchanged, changed, stats = run(DATA, scenario)
+        assert first[1]['etag'].startswith('W/"')
+        assert (unchanged[0], unchanged[2]) == (304, b'')
+        assert changed[0] == 200
+        assert changed[1]['etag'] != first[1]['etag']
+        assert json.loads(changed[2])['alarm'] is True
+        assert stats['not_modified'] == 1
+
+    def test_body_cache(self):
+        """Verifica que una lectura repetida sin cambios reutiliza el cuerpo."""
+        async def scenario(gateway, reader, writer):
+            bodies = []
+            for _ in range(3):
+                writer.write(request('GET', '/tools/list_groups'))
+                bodies.append((await read_response(reader))[2])
+            return bodies, gateway.stats()
+
+        bodies, stats = run(DATA, scenario)
+        assert bodies[0] == bodies[1] == bodies[2]
+        assert stats['body_hits'] == 2
+
+    def test_gzip_large_snapshot(self):
+        """Verifica la compresión de respuestas grandes según Accept-Encoding."""
+        data = {'lights': [f'luz_{i:04d}' for i in range(200)]}
+
+        async def scenario(gateway, reader, writer):
+            writer.write(request('GET', '/tools/get_all_states',
+                                 headers=[('Accept-Encoding', 'gzip')]))
+            compressed = await read_response(reader)
+            writer.write(request('GET', '/tools/get_all_states'))
+            plain = await read_response(reader)
+            writer.write(request('GET', '/tools/get_alarm_status',
+                                 headers=[('Accept-Encoding', 'gzip')]))
+            small = await read_response(reader)
+            return compressed, plain, small
+
+        compressed, plain, small = run(data, scenario)
+        assert compressed[1]['content-encoding'] == 'gzip'
+        assert compressed[1]['vary'] == 'Accept-Encoding'
+        assert len(plain[2]) >= GZIP_MIN_SIZE > len(compressed[2])
+        assert gzip.decompress(compressed[2]) == plain[2]
+        assert 'content-encoding' not in plain[1]
+        assert 'content-encoding' not in small[1]
+
+    def test_head_and_connection_close(self):
+        """Verifica HEAD sin cuerpo y el cierre pedido por el cliente."""
+        async def scenario(gateway, reader, writer):
+            writer.write(request('HEAD', '/tools/get_alarm_status'))
+            head = await reader.readuntil(b'\r\n\r\n')
+            writer.write(request('GET', '/tools/get_alarm_status',
+                                 headers=[('Connection', 'close')]))
+            last = await read_response(reader)
+            return head, last, await reader.read()
+
+        head, last, rest = run(DATA, scenario)
+        assert b'Content-Length: 15' in head  # {"armed":false}
+        assert last[1]['connection'] == 'close'
+        assert rest == b''
+
+
+async def read_event(reader):
+    """Lee un evento SSE: (evento, id, datos)."""
+    fields = {}
+    while True:
+        line = (await reader.readline()).decode('utf-8').rstrip('\n')
+        if not line:
+            if fields:
+                return fields['event'], int(fields['id']), json.loads(fields['data'])
+            continue
+        if line.startswith(':'):
+            continue
+        name, _, value = line.partition(': ')
+        fields[name] = value
+
+
+class TestEventStream:
+    """Tests para el flujo de cambios GET /events."""
+
+    def test_snapshot_then_deltas(self):
+        """Verifica el snapshot inicial y los deltas compactos."""
+        async def scenario(gateway, reader, writer):
+            events_reader, events_writer = await asyncio.open_connection(
+                '127.0.0.1', gateway.port)
+            events_writer.write(request('GET', '/events'))
+            head = await events_reader.readuntil(b'\r\n\r\n')
+            snapshot = await read_event(events_reader)
+            writer.write(request('POST', '/tools/set_light_state', {'name': 'salon', 'on': True}))
+            await read_response(reader)
+            delta = await read_event(events_reader)
+            writer.write(request('POST', '/tools/set_presence', {'people': ['ana']}))
+            writer.write(request('POST', '/tools/set_alarm_state', {'armed': True}))
+            await read_response(reader)
+            await read_response(reader)
+            alarm = await read_event(events_reader)
+            events_writer.close()
+            for _ in range(20):
+                if not gateway.feed:
+                    break
+                await asyncio.sleep(0.01)
+            return head, snapshot, delta, alarm, gateway.stats()['events']
+
+        head, snapshot, delta, alarm, stats = run(DATA, scenario)
+        assert b'Content-Type: text/event-stream' in head
+        assert snapshot[0] == 'snapshot'
+        assert snapshot[2]['lights'] == {'salon': False, 'cocina': False, 'garage': False}
+        assert snapshot[2]['version'] == snapshot[1]
+        assert delta == ('delta', snapshot[1] + 1,
+                         {'version': snapshot[1] + 1, 'lights': {'salon': True}})
+        assert alarm[0] == 'delta' and alarm[2]['alarm'] is True
+        assert stats['subscribers'] == 0 and stats['frames'] >= 3
+
+    def test_slow_consumer_is_bounded(self):
+        """Verifica que un cliente que no lee no acumula cambios sin límite."""
+        data = {'lights': [f'luz_{i:03d}' for i in range(300)]}
+
+        async def scenario(gateway, reader, writer):
+            gateway.feed.max_pending = 50
+            events_reader, events_writer = await asyncio.open_connection(
+                '127.0.0.1', gateway.port)
+            events_writer.transport.pause_reading()
+            events_writer.write(request('GET', '/events'))
+            await asyncio.sleep(0.05)
+            for round_ in range(40):
+                for i in range(300):
+                    gateway.client.client.call('set_light_state', name=f'luz_{i:03d}',
+                                               on=round_ % 2 == 0)
+                await asyncio.sleep(0)
+            subscriber = gateway.feed._subscribers[0]
+            pending = len(subscriber.pending)
+            events_writer.transport.resume_reading()
+            await events_reader.readuntil(b'\r\n\r\n')
+            events = [await read_event(events_reader)]
+            while events[-1][1] < gateway.client.state.version:
+                events.append(await read_event(events_reader))
+            events_writer.close()
+            return pending, events, gateway.feed.overflows
+
+        pending, events, overflows = run(data, scenario)
+        assert pending <= 50
+        assert overflows > 0
+        assert any(kind == 'snapshot' for kind, _, _ in events[1:])
+        final = events[-1][2]
+        assert final.get('lights', {}).get('luz_299', False) is False
+
+    def test_events_method_not_allowed(self):
+        """Verifica que el flujo solo admite GET."""
+        async def scenario(gateway, reader, writer):
+            writer.write(request('POST', '/events', {}))
+            return await read_response(reader)
+
+        status, headers, _ = run(DATA, scenario)
+        assert (status, headers['allow']) == (405, 'GET')
@@ -0,0 +1,95 @@
+"""Tests para el historial de presencia (history.py)."""
+
+import pytest
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.history import PresenceHistory
+from mcp_home_simulator.state import HomeState
+from mcp_home_simulator.tools import MCPTools
+
+
+class TestPresenceHistory:
+    """Tests para la clase PresenceHistory."""
+
+    @pytest.fixture
+    def history(self):
+        """Crea un historial con 10 eventos, uno por segundo."""
+        history = PresenceHistory(capacity=100)
+        for t in range(10):
+            history.append(float(t), 'add', [f"p{t}"], True)
+        return history
+
+    def test_range_query(self, history):
+        """Verifica la consulta por rango de tiempo (extremos incluidos)."""
+        result = history.query(since=3, until=6)
+        assert [e['time'] for e in result['entries']] == [3, 4, 5, 6]
+        assert result['total'] == 4
+        assert result['next_offset'] is None
+
+    def test_pagination(self, history):
+        """Verifica la paginación dentro de un rango."""
+        page1 = history.query(since=2, limit=3)
+        page2 = history.query(since=2, offset=page1['next_offset'], limit=3)
+
+        assert [e['seq'] for e in page1['entries']] == [2, 3, 4]
+        assert [e['seq'] for e in page2['entries']] == [5, 6, 7]
+        assert page1['total'] == 8
+
+    def test_newest_first(self, history):
+        """Verifica el recorrido del más reciente al más antiguo."""
+        result = history.query(until=5, limit=2, newest_first=True)
+        assert [e['time'] for e in result['entries']] == [5, 4]
+
+    def test_ring_overwrites_oldest(self):
+        """Verifica que al llenarse se descartan los eventos más antiguos."""
+        history = PresenceHistory(capacity=4)
+        for t in range(10):
+            history.append(float(t), 'clear', [], False)
+
+        assert len(history) == 4
+        assert history.total_recorded == 10
+        assert [e['seq'] for e in history.last(10)] == [6, 7, 8, 9]
+        assert history.query(since=0, until=7)['total'] == 2
+
+    def test_equal_timestamps(self):
+        """Verifica la búsqueda binaria con timestamps repetidos."""
+        history = PresenceHistory(capacity=8)
+        for event in ('set', 'add', 'remove', 'clear'):
+            history.append(5.0, event, [], False)
+        history.append(6.0, 'add', ['x'], True)
+
+        assert history.query(since=5, until=5)['total'] == 4
+        assert history.query(since=5.5)['total'] == 1
+
+    def test_out_of_order_rejected(self, history):
+        """Verifica que no se aceptan eventos anteriores al último."""
+        with pytest.raises(ValueError):
+            history.append(1.0, 'clear', [], False)
+
+    def test_records_state_events(self):
+        """Verifica que HomeState registra los eventos de presencia."""
+        state = HomeState(Config.from_data({'lights': ['salon']}))
+        state.set_presence(['Carlos', 'Ana'])
+        state.clock.advance(60)
+        state.remove_person('Carlos')
+        state.remove_person('Nadie')
+        state.clock.advance(60)
+        state.clear_presence()
+
+        entries = state.presence_history.last(10)
+        assert [(e['time'], e['event'], e['present']) for e in entries] == [
+            (0, 'set', True), (60, 'remove', True), (120, 'clear', False)]
+        assert entries[1]['people'] == ['Carlos']
+
+    def test_tool_validates_last(self):
+        """Verifica la validación de 'last' en la tool get_presence_history."""
+        state = HomeState(Config.from_data({'lights': ['salon']}))
+        state.set_presence(['Ana'])
+        tools = MCPTools(state)
+
+        assert tools.execute_tool('get_presence_history', {'last': 5})['total'] == 1
+        for last in (-1, 'abc'):
+            result = tools.execute_tool('get_presence_history', {'last': last})
+            assert result['ok'] is False
+            assert not result['error'].startswith('Error al ejecutar tool')
+        assert "'last' debe ser >= 0" in tools.execute_tool(
+            'get_presence_history', {'last': -1})['error']
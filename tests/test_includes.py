@@ -0,0 +1,158 @@
+"""Tests para la composición de la configuración con 'include:'."""
+
+import marshal
+import os
+import sys
+import time
+import pytest
+import yaml
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.includes import (
+    CACHE_DIR_NAME, FragmentCache, merge_config)
+from mcp_home_simulator.reload import ConfigWatcher
+
+
+def write(path, data):
+    """Escribe un archivo YAML y fuerza un cambio de mtime."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.safe_dump(data), encoding='utf-8')
+    stamp = time.time() + 1
+    os.utime(path, (stamp, stamp))
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Sustituye la caché compartida de fragmentos por una vacía."""
+    cache = FragmentCache()
+    monkeypatch.setattr(Config, 'fragment_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def building(tmp_path):
+    """Crea un edificio con un archivo principal y dos plantas."""
+    write(tmp_path / 'plantas' / 'p1.yaml', {
+        'lights': ['salon', {'name': 'cocina', 'watts': 60}],
+        'groups': {'casa': {'p1': ['salon', 'cocina']}},
+    })
+    (tmp_path / 'plantas' / 'p2.ndjson').write_text('"dormitorio"\n"bano"\n')
+    write(tmp_path / 'config.yaml', {
+        'include': ['plantas/p1.yaml', 'plantas/*.ndjson'],
+        'lights': ['garage'],
+        'groups': {'casa': {'p2': ['dormitorio', 'bano']}},
+        'alarm_default': True,
+    })
+    return tmp_path
+
+
+class TestMergeConfig:
+    """Tests para la función merge_config."""
+
+    def test_semantics(self):
+        """Verifica la fusión de diccionarios, listas y escalares."""
+        base = {'lights': ['a'], 'groups': {'x': ['a']}, 'alarm_default': False}
+        merge_config(base, {'lights': ['b'], 'groups': {'y': ['b']},
+                            'alarm_default': True})
+        assert base == {'lights': ['a', 'b'], 'groups': {'x': ['a'], 'y': ['b']},
+                        'alarm_default': True}
+
+
+class TestInclude:
+    """Tests de Config con fragmentos incluidos."""
+
+    def test_compose(self, building, cache):
+        """Verifica la composición de fragmentos de varios formatos."""
+        config = Config(str(building / 'config.yaml'))
+
+        assert config.lights == ['salon', 'cocina', 'dormitorio', 'bano', 'garage']
+        assert config.light_watts['cocina'] == 60.0
+        assert config.group_index['casa'] == ('salon', 'cocina', 'dormitorio', 'bano')
+        assert config.alarm_default is True
+        assert 'include' not in config.data
+        assert [path.name for path in config.files] == ['config.yaml', 'p1.yaml', 'p2.ndjson']
+
+    def test_only_changed_fragment_is_parsed(self, building, cache):
+        """Verifica que solo se vuelve a parsear el fragmento modificado."""
+        Config(str(building / 'config.yaml'))
+        assert cache.stats()['misses'] == 2
+
+        Config(str(building / 'config.yaml'))
+        assert cache.stats()['hits'] == 2
+        assert cache.stats()['misses'] == 2
+
+        write(building / 'plantas' / 'p1.yaml', {'lights': ['salon', 'cocina', 'despacho']})
+        config = Config(str(building / 'config.yaml'))
+        assert cache.stats()['misses'] == 3
+        assert 'despacho' in config.lights
+
+    def test_disk_cache_survives_restart(self, building, cache, monkeypatch):
+        """Verifica que los fragmentos parseados se reutilizan en otro arranque."""
+        Config(str(building / 'config.yaml'))
+        assert len(os.listdir(building / CACHE_DIR_NAME)) == 2
+
+        restarted = FragmentCache()
+        monkeypatch.setattr(Config, 'fragment_cache', restarted)
+        assert len(Config(str(building / 'config.yaml')).lights) == 5
+        assert restarted.stats() == {'size': 2, 'hits': 0, 'disk_hits': 2, 'misses': 0}
+
+    def test_corrupt_disk_cache_is_reparsed(self, building, cache, monkeypatch):
+        """Verifica que un archivo de caché corrupto se descarta y se vuelve a parsear."""
+        Config(str(building / 'config.yaml'))
+        directory = building / CACHE_DIR_NAME
+        names = sorted(os.listdir(directory))
+        assert all(name.endswith(f'.py{sys.version_info[0]}{sys.version_info[1]}-m{marshal.version}')
+                   for name in names)
+        for name in names:
+            data = (directory / name).read_bytes()
+            (directory / name).write_bytes(data[:len(data) // 2])
+
+        restarted = FragmentCache()
+        monkeypatch.setattr(Config, 'fragment_cache', restarted)
+        assert len(Config(str(building / 'config.yaml')).lights) == 5
+        assert restarted.stats()['misses'] == 2 and restarted.stats()['disk_hits'] == 0
+
+        rewritten = FragmentCache()
+        monkeypatch.setattr(Config, 'fragment_cache', rewritten)
+        Config(str(building / 'config.yaml'))
+        assert rewritten.stats()['disk_hits'] == 2
+
+    def test_cached_fragment_is_not_shared(self, building, cache):
+        """Verifica que modificar una configuración no altera la caché."""
+        Config(str(building / 'config.yaml')).lights.append('intrusa')
+        assert 'intrusa' not in Config(str(building / 'config.yaml')).lights
+
+    def test_duplicates_across_fragments(self, building, cache):
+        """Verifica el rechazo de luces repetidas en distintos fragmentos."""
+        write(building / 'config.yaml', {'include': ['plantas/p1.yaml'], 'lights': ['salon']})
+        with pytest.raises(ValueError, match="duplicada.*'salon'"):
+            Config(str(building / 'config.yaml'))
+
+    def test_nested_and_circular(self, tmp_path, cache):
+        """Verifica las inclusiones anidadas y el error de inclusión circular."""
+        write(tmp_path / 'a.yaml', {'include': 'b.yaml', 'lights': ['a']})
+        write(tmp_path / 'b.yaml', {'include': 'c.yaml', 'lights': ['b']})
+        write(tmp_path / 'c.yaml', {'lights': ['c']})
+        assert Config(str(tmp_path / 'a.yaml')).lights == ['c', 'b', 'a']
+
+        write(tmp_path / 'c.yaml', {'include': 'a.yaml', 'lights': ['c']})
+        with pytest.raises(ValueError, match='circular'):
+            Config(str(tmp_path / 'a.yaml'))
+
+    @pytest.mark.parametrize('include, error', [
+        ('falta.yaml', 'no encontrado'),
+        ('plantas/*.json', 'Ningún fragmento'),
+        (5, 'ruta o una lista'),
+    ])
+    def test_invalid_include(self, building, cache, include, error):
+        """Verifica los errores de directivas inválidas."""
+        write(building / 'config.yaml', {'include': include, 'lights': ['x']})
+        with pytest.raises(ValueError, match=error):
+            Config(str(building / 'config.yaml'))
+
+    def test_watcher_sees_fragments(self, building, cache):
+        """Verifica que el vigilante detecta cambios en los fragmentos."""
+        config = Config(str(building / 'config.yaml'))
+        watcher = ConfigWatcher(config.files, lambda: None, interval=60)
+        assert watcher.check() is False
+        write(building / 'plantas' / 'p1.yaml', {'lights': ['salon']})
+        assert watcher.check() is True
@@ -0,0 +1,118 @@
+"""Tests para el modo JSON-RPC 2.0 del servidor MCP (jsonrpc.py)."""
+
+import json
+
+import pytest
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.jsonrpc import (
+    INVALID_REQUEST, METHOD_NOT_FOUND, PARSE_ERROR, TOOL_ERROR)
+from mcp_home_simulator.mcp_stdio import MCPStdioServer
+
+
+class TestJSONRPC:
+    """Tests para el servidor en modo JSON-RPC."""
+
+    @pytest.fixture
+    def server(self, monkeypatch):
+        """Crea un servidor MCP en modo JSON-RPC para tests."""
+
+        def mock_config_init(self, config_path="config.yaml"):
+            self.config_path = config_path
+            self.data = {
+                'lights': ['salon', 'cocina'],
+                'alarm_default': False,
+                'presence_default': {'present': False, 'known_people': []}
+            }
+
+        monkeypatch.setattr(Config, '__init__', mock_config_init)
+        return MCPStdioServer(protocol='jsonrpc')
+
+    def call(self, server, capsys, payload):
+        """Envía un mensaje y devuelve la respuesta decodificada (o None)."""
+        server.process_message(json.dumps(payload))
+        out = capsys.readouterr().out.strip()
+        return json.loads(out) if out else None
+
+    def test_initialize_and_list(self, server, capsys):
+        """Verifica initialize y tools/list."""
+        init = self.call(server, capsys, {
+            'jsonrpc': '2.0', 'id': 1, 'method': 'initialize', 'params': {}})
+        assert init['id'] == 1
+        assert 'tools' in init['result']['capabilities']
+
+        tools = self.call(server, capsys, {
+            'jsonrpc': '2.0', 'id': 2, 'method': 'tools/list'})
+        names = [tool['name'] for tool in tools['result']['tools']]
+        assert 'set_light_state' in names
+        assert 'inputSchema' in tools['result']['tools'][0]
+
+    def test_tools_call(self, server, capsys):
+        """Verifica tools/call con resultado estructurado y error de tool."""
+        response = self.call(server, capsys, {
+            'jsonrpc': '2.0', 'id': 'a', 'method': 'tools/call',
+            'params': {'name': 'set_light_state',
+                       'arguments': {'name': 'salon', 'on': True}}})
+        assert response['result']['isError'] is False
+        assert response['result']['structuredContent'] == {'ok': True}
+        assert json.loads(response['result']['content'][0]['text']) == {'ok': True}
+
+        error = self.call(server, capsys, {
+            'jsonrpc': '2.0', 'id': 'b', 'method': 'tools/call',
+            'params': {'name': 'set_light_state',
+                       'arguments': {'name': 'nada', 'on': True}}})
+        assert error['result']['isError'] is True
+
+    def test_direct_method(self, server, capsys):
+        """Verifica la invocación de una tool por su nombre."""
+        response = self.call(server, capsys, {
+            'jsonrpc': '2.0', 'id': 3, 'method': 'get_alarm_status'})
+        assert response == {'jsonrpc': '2.0', 'id': 3, 'result': {'armed': False}}
+
+        error = self.call(server, capsys, {
+            'jsonrpc': '2.0', 'id': 4, 'method': 'set_light_state',
+            'params': {'name': 'nada', 'on': True}})
+        assert error['error']['code'] == TOOL_ERROR
+
+    def test_batch(self, server, capsys):
+        """Verifica un lote con peticiones, notificaciones y errores."""
+        responses = self.call(server, capsys, [
+            {'jsonrpc': '2.0', 'method': 'set_alarm_state',
+             'params': {'armed': True}},
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'get_alarm_status'},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'desconocido'},
+            42,
+        ])
+        assert [r['id'] for r in responses] == [1, 2, None]
+        assert responses[0]['result'] == {'armed': True}
+        assert responses[1]['error']['code'] == METHOD_NOT_FOUND
+        assert responses[2]['error']['code'] == INVALID_REQUEST
+
+    def test_notifications_only(self, server, capsys):
+        """Verifica que las notificaciones no generan respuesta."""
+        response = self.call(server, capsys, [
+            {'jsonrpc': '2.0', 'method': 'notifications/initialized'},
+            {'jsonrpc': '2.0', 'method': 'set_light_state',
+             'params': {'name': 'cocina', 'on': True}},
+        ])
+        assert response is None
+        assert server.state.get_light_state('cocina') is True
+
+    def test_errors(self, server, capsys):
+        """Verifica los errores de parseo y de lote vacío."""
+        server.process_message('{no json')
+        assert json.loads(capsys.readouterr().out)['error']['code'] == PARSE_ERROR
+        assert self.call(server, capsys, [])['error']['code'] == INVALID_REQUEST
+
+    def test_response_cache(self, server, capsys):
+        """Verifica que las tools de solo lectura usan la caché de respuestas."""
+        request = {'jsonrpc': '2.0', 'id': 1, 'method': 'tools/call',
+                   'params': {'name': 'get_all_states'}}
+        first = self.call(server, capsys, request)
+        second = self.call(server, capsys, dict(request, id=2))
+        assert second['result'] == first['result']
+        assert server.responses.stats()['hits'] == 1
+
+    def test_unknown_protocol(self):
+        """Verifica que se rechaza un protocolo desconocido."""
+        with pytest.raises(ValueError):
+            MCPStdioServer(protocol='xml')
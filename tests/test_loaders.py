@@ -0,0 +1,153 @@
+"""Tests para los cargadores de configuración."""
+
+import io
+import json
+import pytest
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.loaders import (
+    JsonStream, LightCollector, config_format, load_json, load_ndjson)
+
+
+class TestLightCollector:
+    """Tests para la clase LightCollector."""
+
+    def test_names_and_watts(self):
+        """Verifica la normalización de nombres y potencias."""
+        collector = LightCollector()
+        collector.add('salon', 'lights[0]')
+        collector.add({'name': 'cocina', 'watts': 60}, 'lights[1]')
+        config = {'light_watts': {'salon': 5.0}}
+        collector.apply(config)
+
+        assert config['lights'] == ['salon', 'cocina']
+        assert config['light_watts'] == {'salon': 5.0, 'cocina': 60.0}
+
+    @pytest.mark.parametrize('entry', [3, None, '', {'watts': 5}, ['salon']])
+    def test_invalid_entries(self, entry):
+        """Verifica el rechazo de entradas de tipo inválido."""
+        with pytest.raises(ValueError, match='lights\\[4\\]'):
+            LightCollector().add(entry, 'lights[4]')
+
+    def test_duplicates(self):
+        """Verifica el rechazo de nombres repetidos."""
+        collector = LightCollector()
+        collector.add('salon', 'lights[0]')
+        with pytest.raises(ValueError, match="duplicada en lights\\[1\\]: 'salon'"):
+            collector.add({'name': 'salon'}, 'lights[1]')
+
+    def test_config_rejects_duplicates(self):
+        """Verifica que Config ya no fusiona luces repetidas."""
+        with pytest.raises(ValueError, match='duplicada'):
+            Config.from_data({'lights': ['salon', 'cocina', 'salon']})
+
+
+class TestJsonLoader:
+    """Tests para el cargador JSON incremental."""
+
+    DOC = {
+        'alarm_default': True,
+        'lights': ['salon', {'name': 'cocina', 'watts': 60}] +
+                  [f'luz_{i}' for i in range(200)],
+        'groups': {'planta': ['salon', 'cocina']},
+        'server': {'inbox_capacity': 12345},
+    }
+
+    @pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+    def test_chunked(self, chunk_size):
+        """Verifica el mismo resultado con cualquier tamaño de bloque."""
+        text = json.dumps(self.DOC, indent=1)
+        config, normalized = load_json(io.StringIO(text), chunk_size)
+
+        assert normalized is True
+        assert config['lights'][:3] == ['salon', 'cocina', 'luz_0']
+        assert len(config['lights']) == 202
+        assert config['light_watts'] == {'cocina': 60.0}
+        assert config['server'] == {'inbox_capacity': 12345}
+
+    def test_numbers_split_between_chunks(self):
+        """Verifica que un número partido entre bloques se lee completo."""
+        reader = JsonStream(io.StringIO('[123456, 7]'), chunk_size=3)
+        reader.expect('[')
+        assert reader.value() == 123456
+        reader.expect(',')
+        assert reader.value() == 7
+
+    def test_duplicate_reports_position(self):
+        """Verifica que el error indica la posición de la luz repetida."""
+        text = '{"lights": ["a", "b", "a"]}'
+        with pytest.raises(ValueError, match='lights\\[2\\]'):
+            load_json(io.StringIO(text))
+
+    @pytest.mark.parametrize('text', [
+        '{"lights": ["a", "b"', '{"lights": ["a"]} x', '{"lights" ["a"]}', '{1: 2}'])
+    def test_invalid_json(self, text):
+        """Verifica el rechazo de documentos mal formados."""
+        with pytest.raises(ValueError):
+            load_json(io.StringIO(text), chunk_size=4)
+
+    def test_lights_not_a_list(self):
+        """Verifica que 'lights' que no es lista se deja a la validación."""
+        config, normalized = load_json(io.StringIO('{"lights": "salon"}'))
+        assert config == {'lights': 'salon'}
+        assert normalized is False
+
+
+class TestNdjsonLoader:
+    """Tests para el cargador de luces por líneas."""
+
+    def test_lines(self):
+        """Verifica la lectura de nombres y objetos, ignorando líneas vacías."""
+        text = '"salon"\n\n{"name": "cocina", "watts": 60}\n'
+        config, normalized = load_ndjson(io.StringIO(text))
+        assert config == {'lights': ['salon', 'cocina'],
+                          'light_watts': {'cocina': 60.0}}
+        assert normalized is True
+
+    def test_errors_report_line(self):
+        """Verifica que los errores indican el número de línea."""
+        with pytest.raises(ValueError, match='línea 3'):
+            load_ndjson(io.StringIO('"a"\n"b"\n"a"\n'))
+        with pytest.raises(ValueError, match='línea 2'):
+            load_ndjson(io.StringIO('"a"\nsalon\n'))
+
+
+class TestConfigFormats:
+    """Tests de Config con archivos de cada formato."""
+
+    def test_format_by_extension(self):
+        """Verifica la elección del formato por extensión."""
+        assert config_format('casa.JSON') == 'json'
+        assert config_format('luces.jsonl') == 'ndjson'
+        assert config_format('config.yml') == 'yaml'
+        assert config_format('config') == 'yaml'
+
+    def test_json_file(self, tmp_path):
+        """Verifica la carga de un archivo JSON."""
+        path = tmp_path / 'casa.json'
+        path.write_text(json.dumps({'lights': ['salon', {'name': 'cocina', 'watts': 5}],
+                                    'groups': {'todo': ['salon', 'cocina']}}))
+        config = Config(str(path))
+        assert config.lights == ['salon', 'cocina']
+        assert config.light_watts['cocina'] == 5.0
+        assert config.group_index == {'todo': ('salon', 'cocina')}
+        assert config.alarm_default is False
+
+    def test_ndjson_file(self, tmp_path):
+        """Verifica la carga de un archivo de luces por líneas."""
+        path = tmp_path / 'luces.ndjson'
+        path.write_text('"salon"\n"cocina"\n')
+        assert Config(str(path)).lights == ['salon', 'cocina']
+
+    def test_duplicate_in_file(self, tmp_path):
+        """Verifica el error de carga con luces repetidas."""
+        path = tmp_path / 'luces.ndjson'
+        path.write_text('"salon"\n"salon"\n')
+        with pytest.raises(ValueError, match='Error al cargar configuración.*línea 2'):
+            Config(str(path))
+
+    @pytest.mark.parametrize('name', ['nuevo.json', 'nuevo.ndjson'])
+    def test_default_file(self, tmp_path, name):
+        """Verifica que el archivo por defecto se crea en el formato pedido."""
+        config = Config(str(tmp_path / name))
+        assert config.lights == ['salon', 'cocina', 'dormitorio', 'bano', 'garage']
+        assert Config(str(tmp_path / name)).lights == config.lights
@@ -2,6 +2,8 @@
 
 import pytest
 import json
+import threading
+import time
 from io import StringIO
 from mcp_home_simulator.mcp_stdio import MCPStdioServer
 from mcp_home_simulator.config import Config
@@ -199,6 +201,143 @@ class TestMCPStdioServer:
         assert response['result']['alarm'] is True
         assert 'Carlos' in response['result']['presence']['known_people']
 
+    def test_handle_call_set_lights_pattern(self, server, capsys):
+        """Verifica set_lights con patrón glob."""
+        server.state.set_light_state('salon', True)
+        message = {
+            'type': 'call',
+            'id': 9,
+            'tool': 'set_lights',
+            'args': {'pattern': '*', 'on': True}
+        }
+
+        server.handle_call(message)
+        captured = capsys.readouterr()
+
+        response = json.loads(captured.out.strip())
+        assert response['type'] == 'result'
+        assert response['result']['changed'] == ['cocina']
+        assert server.state.list_lights_on() == ['salon', 'cocina']
+
+    def test_handle_call_set_lights_unknown_name(self, server, capsys):
+        """Verifica error de set_lights con luz inexistente."""
+        message = {
+            'type': 'call',
+            'id': 10,
+            'tool': 'set_lights',
+            'args': {'names': ['salon', 'inexistente'], 'on': True}
+        }
+
+        server.handle_call(message)
+        captured = capsys.readouterr()
+
+        response = json.loads(captured.out.strip())
+        assert response['type'] == 'error'
+        assert 'inexistente' in response['error']
+        assert server.state.get_light_state('salon') is False
+
+    def test_handle_call_group_not_found(self, server, capsys):
+        """Verifica error con grupo inexistente."""
+        message = {
+            'type': 'call',
+            'id': 11,
+            'tool': 'set_group_state',
+            'args': {'group': 'planta9', 'on': True}
+        }
+
+        server.handle_call(message)
+        captured = capsys.readouterr()
+
+        response = json.loads(captured.out.strip())
+        assert response['type'] == 'error'
+        assert 'planta9' in response['error']
+
+    def test_handle_call_schedule_and_advance(self, server, capsys):
+        """Verifica planificar una llamada y avanzar el reloj simulado."""
+        server.handle_call({
+            'type': 'call',
+            'id': 12,
+            'tool': 'schedule_call',
+            'args': {'delay': 60, 'tool': 'set_alarm_state',
+                     'args': {'armed': True}}
+        })
+        server.handle_call({
+            'type': 'call',
+            'id': 13,
+            'tool': 'advance_time',
+            'args': {'seconds': 60}
+        })
+        captured = capsys.readouterr()
+
+        responses = [json.loads(line) for line in captured.out.splitlines()]
+        assert responses[0]['result']['at'] == 60
+        assert responses[1]['result']['events_run'] == 1
+        assert responses[1]['result']['now'] == 60
+        assert server.state.get_alarm_status() is True
+
+    def test_handle_call_idempotency_key(self, server, capsys):
+        """Verifica que un reintento con la misma clave no se reejecuta."""
+        message = {
+            'type': 'call',
+            'id': 14,
+            'tool': 'set_lights',
+            'args': {'names': ['salon'], 'on': True},
+            'idempotency_key': 'encender-salon'
+        }
+        server.handle_call(message)
+        server.state.set_light_state('salon', False)
+        server.handle_call(dict(message, id=15))
+        captured = capsys.readouterr()
+
+        first, retry = [json.loads(line) for line in captured.out.splitlines()]
+        assert retry['id'] == 15
+        assert retry['result'] == first['result']
+        assert server.state.get_light_state('salon') is False
+
+    def test_handle_call_dedupe_by_id(self, server, capsys):
+        """Verifica la deduplicación por id solo cuando está activada."""
+        message = {
+            'type': 'call',
+            'id': 16,
+            'tool': 'set_alarm_state',
+            'args': {'armed': True}
+        }
+        server.handle_call(message)
+        assert server.idempotency.stats()['misses'] == 0
+
+        server.dedupe_by_id = True
+        server.handle_call(message)
+        server.handle_call(message)
+        server.process_message(json.dumps({'type': 'metrics', 'id': 17}))
+        captured = capsys.readouterr()
+
+        metrics = json.loads(captured.out.splitlines()[-1])
+        assert metrics['type'] == 'metrics'
+        assert metrics['idempotency']['hits'] == 1
+        assert metrics['idempotency']['misses'] == 1
+
+    def test_handle_call_response_cache(self, server, capsys):
+        """Verifica la caché de respuestas de tools de solo lectura."""
+        message = {'type': 'call', 'id': 18, 'tool': 'get_all_states', 'args': {}}
+        server.handle_call(message)
+        server.handle_call(dict(message, id='b'))
+        server.state.set_light_state('cocina', True)
+        server.handle_call(dict(message, id=19))
+        captured = capsys.readouterr()
+
+        lines = captured.out.splitlines()
+        first, cached, fresh = [json.loads(line) for line in lines]
+        assert cached['id'] == 'b'
+        assert cached['result'] == first['result']
+        assert fresh['result']['lights']['cocina'] is True
+        # El sobre cacheado es idéntico al serializado con json.dumps
+        assert lines[1] == json.dumps(cached, ensure_ascii=False)
+
+        stats = server.responses.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 2
+        assert stats['invalidations'] == 1
+
     def test_handle_call_unknown_tool(self, server, capsys):
         """Verifica error con tool desconocida."""
         message = {
@@ -245,3 +384,139 @@ class TestMCPStdioServer:
         server.process_message(message)
 
         assert server.running is False
+
+
+class TestBackpressure:
+    """Tests de las colas acotadas, plazos y cancelación del servidor."""
+
+    @pytest.fixture
+    def server(self, monkeypatch):
+        """Crea un servidor cuya tool set_alarm_state espera a una señal."""
+
+        def mock_config_init(self, config_path="config.yaml"):
+            self.config_path = config_path
+            self.data = {
+                'lights': ['salon', 'cocina'],
+                'alarm_default': False,
+                'presence_default': {'present': False, 'known_people': []},
+                'server': {'inbox_capacity': 1},
+            }
+
+        monkeypatch.setattr(Config, '__init__', mock_config_init)
+        server = MCPStdioServer()
+        server.started = threading.Event()
+        server.release = threading.Event()
+        execute = server.tools.execute_tool
+
+        def slow_execute(name, args):
+            if name == 'set_alarm_state':
+                server.started.set()
+                server.release.wait(timeout=5)
+            return execute(name, args)
+
+        server.tools.execute_tool = slow_execute
+        yield server
+        server.release.set()
+        server.stop_pipeline()
+
+    def call(self, server, msg_id, tool='get_alarm_status', **extra):
+        """Envía una llamada al servidor."""
+        message = dict({'type': 'call', 'id': msg_id, 'tool': tool, 'args': {}}, **extra)
+        if tool == 'set_alarm_state':
+            message['args'] = {'armed': True}
+        server.process_message(json.dumps(message))
+
+    def replies(self, capsys):
+        """Obtiene las respuestas enviadas, indexadas por id."""
+        return {reply['id']: reply for reply in
+                map(json.loads, capsys.readouterr().out.splitlines())}
+
+    def test_busy_and_cancel(self, server, capsys):
+        """Verifica el rechazo 'busy' con la cola llena y la cancelación."""
+        server.start_pipeline()
+        self.call(server, 1, 'set_alarm_state')
+        assert server.started.wait(timeout=5)
+
+        self.call(server, 2)
+        self.call(server, 3)
+        server.process_message(json.dumps({'type': 'cancel', 'id': 2}))
+        server.process_message(json.dumps({'type': 'cancel', 'id': 1}))
+        server.process_message(json.dumps({'type': 'metrics', 'id': 'm'}))
+        server.release.set()
+        server.stop_pipeline()
+
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        busy, cancelled, running, metrics, result = lines
+        assert busy == {'type': 'error', 'id': 3, 'ok': False, 'code': 'busy',
+                        'error': "Servidor ocupado: 1 llamadas 'alarm' pendientes"}
+        assert cancelled == {'type': 'cancelled', 'id': 2, 'ok': True}
+        # La llamada en ejecución no se puede cancelar y termina normalmente
+        assert running['ok'] is False
+        assert result == {'type': 'result', 'id': 1, 'ok': True,
+                          'result': {'ok': True}}
+        queue = dict(metrics['queue'])
+        assert queue.pop('outbox') <= queue['outbox_capacity']
+        assert queue.pop('classes')['alarm']['pending'] == 0
+        assert queue == {'pending': 0, 'capacity': 1, 'outbox_capacity': 1024,
+                         'busy': 1, 'expired': 0, 'cancelled': 1}
+
+    def test_deadline_expires_in_queue(self, server, capsys):
+        """Verifica que una llamada vencida en la cola falla sin ejecutarse."""
+        server.start_pipeline()
+        self.call(server, 1, 'set_alarm_state')
+        assert server.started.wait(timeout=5)
+        self.call(server, 2, 'set_light_state', deadline_ms=1)
+        time.sleep(0.01)
+        server.release.set()
+        server.stop_pipeline()
+
+        replies = self.replies(capsys)
+        assert replies[2]['code'] == 'deadline'
+        assert server.queue_stats['expired'] == 1
+        assert server.state.get_light_state('salon') is False
+
+    def test_deadline_validation(self, server, capsys):
+        """Verifica plazos vencidos o inválidos sin bucle activo."""
+        self.call(server, 1, deadline_ms=0)
+        self.call(server, 2, deadline_ms='pronto')
+        self.call(server, 3, deadline_ms=1000)
+
+        replies = self.replies(capsys)
+        assert replies[1]['code'] == 'deadline'
+        assert 'deadline_ms' in replies[2]['error']
+        assert replies[3]['ok'] is True
+
+    def test_cancel_without_pending(self, server, capsys):
+        """Verifica la respuesta al cancelar una llamada inexistente."""
+        server.process_message(json.dumps({'type': 'cancel', 'id': 9}))
+        reply = self.replies(capsys)[9]
+        assert reply['type'] == 'cancelled'
+        assert reply['ok'] is False
+
+    def test_priority_classes(self, server, capsys):
+        """Verifica que las llamadas de alarma adelantan a las lecturas en cola."""
+        server.start_pipeline()
+        self.call(server, 1, 'set_alarm_state')
+        assert server.started.wait(timeout=5)
+        server.calls.capacity = 10
+
+        self.call(server, 'r1', 'get_all_states')
+        self.call(server, 'r2', 'get_all_states')
+        self.call(server, 'w', 'set_light_state')
+        self.call(server, 'a', 'get_alarm_status')
+        server.release.set()
+        server.stop_pipeline()
+
+        order = [json.loads(line)['id'] for line in capsys.readouterr().out.splitlines()]
+        assert order == [1, 'a', 'w', 'r1', 'r2']
+        classes = server.queue_metrics()['classes']
+        assert classes['read']['served'] == 2
+        assert classes['read']['wait_ms_max'] >= classes['read']['wait_ms_mean'] > 0
+
+    def test_priority_override(self, server):
+        """Verifica la clase configurada por tool sobre la clase por defecto."""
+        assert server.priority_of('get_all_states') == 'read'
+        assert server.priority_of('set_lights') == 'write'
+        assert server.priority_of('set_alarm_state') == 'alarm'
+        server.priorities['get_all_states'] = 'alarm'
+        assert server.priority_of('get_all_states') == 'alarm'
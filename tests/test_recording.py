@@ -0,0 +1,142 @@
+"""Tests para la grabación y reproducción de sesiones."""
+
+import io
+import json
+import pytest
+import yaml
+from mcp_home_simulator.cli import run_cli
+from mcp_home_simulator.encoding import packb
+from mcp_home_simulator.mcp_stdio import MCPStdioServer
+from mcp_home_simulator.recording import (
+    RECORD_IN_PACKED, RECORD_IN_TEXT, RECORD_META, RECORD_OUT_PACKED, RECORD_OUT_TEXT,
+    SessionRecorder, read_recording)
+from mcp_home_simulator.replay import replay_session
+
+
+SESSION = [
+    {'type': 'call', 'id': 1, 'tool': 'set_light_state', 'args': {'name': 'salon', 'on': True}},
+    {'type': 'call', 'id': 2, 'tool': 'list_lights_on', 'args': {}},
+    {'type': 'metrics', 'id': 3},
+    {'type': 'call', 'id': 4, 'tool': 'get_all_states', 'args': {}},
+]
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    """Crea un archivo de configuración sin recarga automática."""
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump({'lights': ['salon', 'cocina'],
+                                    'server': {'reload_interval': 0}}))
+    return str(path)
+
+
+def record_session(config_path, path, messages, packed_after=None):
+    """Graba una sesión con el servidor en modo bucle."""
+    server = MCPStdioServer(config_path, record=str(path))
+    server._output_stream = io.BytesIO()
+    server.start_pipeline()
+    try:
+        server.send_ready()
+        for message in messages:
+            if packed_after is not None and server.encoding == 'msgpack':
+                server.process_packed(packb(message))
+            else:
+                server.process_message(json.dumps(message))
+    finally:
+        server.stop_pipeline()
+        server.recorder.close()
+    return server
+
+
+class TestSessionRecorder:
+    """Tests para SessionRecorder y read_recording."""
+
+    def test_roundtrip(self, tmp_path):
+        """Verifica la lectura de los registros en orden con su instante."""
+        path = tmp_path / 'sesion.rec'
+        recorder = SessionRecorder(str(path), {'protocol': 'simple'})
+        recorder.record(RECORD_IN_TEXT, '{"type": "quit"}')
+        recorder.record(RECORD_OUT_PACKED, b'\x80')
+        recorder.close()
+        recorder.record(RECORD_IN_TEXT, 'ignorado')
+
+        records = list(read_recording(str(path)))
+        assert [(kind, data) for _, kind, data in records] == [
+            (RECORD_META, b'{"protocol": "simple"}'),
+            (RECORD_IN_TEXT, b'{"type": "quit"}'),
+            (RECORD_OUT_PACKED, b'\x80'),
+        ]
+        assert records[0][0] <= records[1][0] <= records[2][0]
+
+    def test_truncated_tail_and_bad_magic(self, tmp_path):
+        """Verifica que se ignora un registro incompleto y se rechaza otro formato."""
+        path = tmp_path / 'sesion.rec'
+        recorder = SessionRecorder(str(path), {})
+        recorder.record(RECORD_IN_TEXT, 'x' * 100)
+        recorder.close()
+        path.write_bytes(path.read_bytes()[:-10])
+        assert len(list(read_recording(str(path)))) == 1
+
+        path.write_bytes(b'{"type": "call"}\n')
+        with pytest.raises(ValueError, match='no es una grabación'):
+            list(read_recording(str(path)))
+
+
+class TestReplay:
+    """Tests de la reproducción de sesiones."""
+
+    def test_server_records_both_directions(self, config_path, tmp_path):
+        """Verifica que se graban los mensajes recibidos y enviados."""
+        path = tmp_path / 'sesion.rec'
+        record_session(config_path, path, SESSION)
+        kinds = [kind for _, kind, _ in read_recording(str(path))]
+        assert kinds.count(RECORD_IN_TEXT) == 4
+        assert kinds.count(RECORD_OUT_TEXT) == 5
+
+    @pytest.mark.parametrize('paced', [False, True])
+    def test_replay_matches(self, config_path, tmp_path, paced):
+        """Verifica que la reproducción produce las mismas respuestas."""
+        path = tmp_path / 'sesion.rec'
+        record_session(config_path, path, SESSION)
+        report = replay_session(str(path), paced=paced)
+
+        assert report['matched'] is True
+        assert report['messages'] == 4
+        assert report['responses'] == 5
+        assert report['throughput'] > 0
+        assert 0 <= report['latency_ms']['p50'] <= report['latency_ms']['max']
+
+    def test_replay_detects_differences(self, config_path, tmp_path):
+        """Verifica que se informan las respuestas distintas."""
+        path = tmp_path / 'sesion.rec'
+        record_session(config_path, path, SESSION)
+        other = tmp_path / 'otra.yaml'
+        other.write_text(yaml.safe_dump({'lights': ['salon', 'garage'],
+                                         'server': {'reload_interval': 0}}))
+        report = replay_session(str(path), str(other))
+
+        assert report['matched'] is False
+        assert [m['id'] for m in report['mismatches']] == [4]
+
+    def test_replay_msgpack_session(self, config_path, tmp_path):
+        """Verifica la reproducción de una sesión que negocia MessagePack."""
+        path = tmp_path / 'sesion.rec'
+        record_session(config_path, path,
+                       [{'type': 'hello', 'encoding': 'msgpack'}] + SESSION, packed_after=0)
+        kinds = [kind for _, kind, _ in read_recording(str(path))]
+        assert kinds.count(RECORD_IN_PACKED) == 4
+
+        report = replay_session(str(path))
+        assert report['matched'] is True
+        assert report['responses'] == 6
+
+    def test_replay_command(self, config_path, tmp_path, capsys):
+        """Verifica el comando 'replay' de la CLI."""
+        path = tmp_path / 'sesion.rec'
+        record_session(config_path, path, SESSION)
+        capsys.readouterr()
+
+        assert run_cli(['replay', str(path)]) == 0
+        assert 'coinciden' in capsys.readouterr().out
+        assert run_cli(['replay', config_path]) == 1
+        assert 'no es una grabación' in capsys.readouterr().out
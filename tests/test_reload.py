@@ -0,0 +1,178 @@
+"""Tests para la recarga en caliente de la configuración."""
+
+import json
+import os
+import time
+import pytest
+import yaml
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.feed import ChangeFeed
+from mcp_home_simulator.mcp_stdio import MCPStdioServer
+from mcp_home_simulator.reload import ConfigWatcher
+from mcp_home_simulator.state import HomeState
+
+
+BASE = {
+    'lights': ['salon', 'cocina', 'garage'],
+    'groups': {'planta': ['salon', 'cocina']},
+}
+
+
+def write_config(path, data):
+    """Escribe un archivo de configuración y fuerza un cambio de mtime."""
+    path.write_text(yaml.safe_dump(data), encoding='utf-8')
+    stamp = time.time() + 1
+    os.utime(path, (stamp, stamp))
+
+
+class TestApplyConfig:
+    """Tests para HomeState.apply_config."""
+
+    @pytest.fixture
+    def state(self):
+        """Crea un estado con dos luces encendidas."""
+        state = HomeState(Config.from_data(dict(BASE)))
+        state.set_lights_state(['salon', 'garage'], True)
+        state.set_alarm_state(True)
+        return state
+
+    def test_diff_keeps_state(self, state):
+        """Verifica que las luces existentes conservan su estado."""
+        version = state.version
+        summary = state.apply_config(Config.from_data({
+            'lights': ['cocina', 'salon', 'terraza'],
+            'groups': {'planta': ['salon', 'cocina'], 'fuera': ['terraza']},
+        }))
+
+        assert summary['added'] == ['terraza']
+        assert summary['removed'] == ['garage']
+        assert state.get_all_lights() == {'cocina': False, 'salon': True, 'terraza': False}
+        assert state.alarm_armed is True
+        assert state.lights_on_count == 1
+        assert state.get_group_counts('fuera') == {'total': 1, 'on': 0, 'off': 1}
+        assert state.select_lights(pattern='*a*') == ['cocina', 'salon', 'terraza']
+        assert state.version > version
+
+    def test_removed_light_is_turned_off(self, state):
+        """Verifica que la luz eliminada queda apagada en el historial."""
+        state.apply_config(Config.from_data({'lights': ['salon', 'cocina']}))
+        changes = state.changes.get_changes(0, state.clock.now)['changes']
+        assert [(c['entity'], c['value']) for c in changes[-2:]] == [
+            ('light:garage', False), ('light:garage', None)]
+
+    def test_light_set_reaches_log_and_feed(self, state):
+        """Verifica que el registro de cambios y el flujo ven las luces añadidas y eliminadas."""
+        woken = []
+        subscriber = ChangeFeed(state).subscribe(lambda: woken.append(1))
+        state.clock.advance(10)
+        before = state.clock.now
+        state.clock.advance(10)
+
+        state.apply_config(Config.from_data({'lights': ['salon', 'cocina', 'terraza']}))
+        state.clock.advance(10)
+
+        assert state.changes.get_state_at(state.clock.now)['lights'] == {
+            'salon': True, 'cocina': False, 'terraza': False}
+        assert state.changes.get_state_at(before)['lights'] == {
+            'salon': True, 'cocina': False, 'garage': True}
+        assert woken == [1]
+        assert subscriber.take() == ('resync', state.version, {})
+
+    def test_rules_rebuilt_only_on_change(self, state):
+        """Verifica que el motor de reglas solo se reconstruye si cambia."""
+        data = dict(BASE, rules=[{'name': 'sin_nadie', 'when': {'alarm': True},
+                                  'then': {'lights_off': 'all'}}])
+        summary = state.apply_config(Config.from_data(dict(data)))
+        engine = state.rules
+        assert summary['rules'] is True
+        assert engine is not None
+
+        summary = state.apply_config(Config.from_data(dict(data)))
+        assert summary['rules'] is False
+        assert state.rules is engine
+
+
+class TestConfigWatcher:
+    """Tests para la clase ConfigWatcher."""
+
+    def test_check(self, tmp_path):
+        """Verifica la detección de cambios por firma del archivo."""
+        path = tmp_path / 'config.yaml'
+        write_config(path, BASE)
+        changes = []
+        watcher = ConfigWatcher(str(path), lambda: changes.append(1), interval=60)
+
+        assert watcher.check() is False
+        write_config(path, dict(BASE, alarm_default=True))
+        assert watcher.check() is True
+        assert watcher.check() is False
+
+        path.unlink()
+        assert watcher.check() is False
+        assert changes == [1]
+
+    def test_invalid_interval(self, tmp_path):
+        """Verifica el error con un intervalo no positivo."""
+        with pytest.raises(ValueError):
+            ConfigWatcher(str(tmp_path / 'x.yaml'), print, interval=0)
+
+
+class TestServerReload:
+    """Tests de la recarga desde el servidor."""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        """Crea un archivo de configuración con recarga rápida."""
+        path = tmp_path / 'config.yaml'
+        write_config(path, dict(BASE, server={'reload_interval': 0.01}))
+        return path
+
+    def test_reload_message(self, path, capsys):
+        """Verifica la recarga bajo demanda con el mensaje 'reload'."""
+        server = MCPStdioServer(str(path))
+        server.state.set_light_state('salon', True)
+        write_config(path, {'lights': ['salon', 'atico']})
+        server.process_message(json.dumps({'type': 'reload', 'id': 1}))
+
+        reply = json.loads(capsys.readouterr().out)
+        assert reply['type'] == 'reloaded'
+        assert reply['added'] == ['atico']
+        assert reply['removed'] == ['cocina', 'garage']
+        assert server.state.get_all_lights() == {'salon': True, 'atico': False}
+        assert server.metrics()['reload']['count'] == 1
+
+    def test_invalid_file_keeps_config(self, path, capsys):
+        """Verifica que un archivo inválido no cambia la configuración."""
+        server = MCPStdioServer(str(path))
+        path.write_text('lights: []\n', encoding='utf-8')
+        server.process_message(json.dumps({'type': 'reload', 'id': 2}))
+
+        reply = json.loads(capsys.readouterr().out)
+        assert reply['type'] == 'error'
+        assert server.config.lights == BASE['lights']
+        assert server.reload_stats['errors'] == 1
+        assert 'al menos una luz' in server.reload_stats['last_error']
+
+    def test_watcher_applies_between_calls(self, path, capsys):
+        """Verifica la recarga automática al cambiar el archivo."""
+        server = MCPStdioServer(str(path))
+        server.start_pipeline()
+        try:
+            server.process_message(json.dumps({
+                'type': 'call', 'id': 1, 'tool': 'set_light_state',
+                'args': {'name': 'cocina', 'on': True}}))
+            write_config(path, dict(BASE, lights=['cocina', 'sotano'],
+                                    groups={}, server={'reload_interval': 0.01}))
+            deadline = time.monotonic() + 5
+            while server.reload_stats['count'] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            server.process_message(json.dumps({
+                'type': 'call', 'id': 2, 'tool': 'list_lights_on', 'args': {}}))
+        finally:
+            server.stop_pipeline()
+
+        replies = {reply['id']: reply for reply in
+                   map(json.loads, capsys.readouterr().out.splitlines())}
+        assert replies[2]['result'] == {'on': ['cocina']}
+        assert server.reload_stats['added'] == 1
+        assert server.reload_stats['apply_ms'] >= 0
@@ -0,0 +1,147 @@
+"""Tests para el motor de automatizaciones (rules.py)."""
+
+import pytest
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.state import HomeState
+
+
+def make_state(rules, scenes=None):
+    """Crea un HomeState con las reglas indicadas."""
+    return HomeState(Config.from_data({
+        'lights': ['salon', 'cocina', 'garage'],
+        'groups': {'casa': ['salon', 'cocina']},
+        'scenes': scenes or {},
+        'rules': rules,
+    }))
+
+
+class TestRuleEngine:
+    """Tests para la clase RuleEngine."""
+
+    def test_dependencies_inferred(self):
+        """Verifica la inferencia de dependencias desde 'when'."""
+        state = make_state([{
+            'name': 'r',
+            'when': {'presence': False, 'lights': {'casa': True}},
+            'then': {'alarm': True},
+        }])
+        assert state.rules.rules[0].depends == {
+            'presence', 'light:salon', 'light:cocina'}
+
+    def test_declared_dependencies(self):
+        """Verifica 'depends' como clave suelta o lista y rechaza otros tipos."""
+        when = {'alarm': True}
+        single = make_state([{'name': 'r', 'when': when, 'depends': 'light:salon',
+                              'then': {'lights': {'garage': True}}}])
+        assert single.rules.rules[0].depends == {'alarm', 'light:salon'}
+        listed = make_state([{'name': 'r', 'when': when, 'depends': ['presence'],
+                              'then': {'lights': {'garage': True}}}])
+        assert listed.rules.rules[0].depends == {'alarm', 'presence'}
+        for depends in ({'light:salon': True}, ['alarm', 3]):
+            with pytest.raises(ValueError, match="'depends'"):
+                make_state([{'name': 'r', 'when': when, 'depends': depends,
+                             'then': {'lights': {'garage': True}}}])
+
+    def test_rule_fires_on_edge(self):
+        """Verifica que la regla se dispara al pasar a cumplirse."""
+        state = make_state([{
+            'name': 'apagar_al_salir',
+            'when': {'presence': False},
+            'then': {'lights': {'*': False}},
+        }])
+        state.set_presence(['Carlos'])
+        state.set_lights_state(['salon', 'garage'], True)
+        assert state.lights_on_count == 2
+
+        state.clear_presence()
+
+        assert state.list_lights_on() == []
+        assert state.rules.stats['fires'] == 1
+
+    def test_only_dependent_rules_evaluated(self):
+        """Verifica que solo se reevalúan las reglas afectadas."""
+        state = make_state([
+            {'name': 'a', 'when': {'alarm': True}, 'then': {'lights': {'garage': True}}},
+            {'name': 'b', 'when': {'lights': {'salon': True}}, 'then': {'alarm': True}},
+        ])
+        state.set_light_state('cocina', True)
+        assert state.rules.stats['evaluations'] == 0
+
+        state.set_light_state('salon', True)
+
+        # b se evalúa y dispara; su acción cambia la alarma y evalúa a
+        assert state.rules.stats['evaluations'] == 2
+        assert state.get_alarm_status() is True
+        assert state.get_light_state('garage') is True
+
+    def test_scene_action(self):
+        """Verifica reglas que activan una escena."""
+        state = make_state(
+            [{'name': 'r', 'when': {'alarm': True}, 'then': {'scene': 'noche'}}],
+            scenes={'noche': {'lights': {'casa': False}}})
+        state.set_lights_state(['salon', 'cocina'], True)
+        state.set_alarm_state(True)
+        assert state.get_group_counts('casa')['on'] == 0
+
+    def test_cycle_protection(self):
+        """Verifica que dos reglas que se contradicen no entran en bucle."""
+        state = make_state([
+            {'name': 'on', 'when': {'lights': {'salon': False}},
+             'then': {'lights': {'salon': True}}},
+            {'name': 'off', 'when': {'lights': {'salon': True}},
+             'then': {'lights': {'salon': False}}},
+        ])
+        state.set_light_state('salon', True)
+        assert state.rules.stats['fires'] <= 2
+
+    def test_cycle_suppressed(self):
+        """Verifica que una regla no se dispara dos veces en la misma cascada."""
+        state = make_state([
+            {'name': 'a', 'when': {'lights': {'salon': True}},
+             'then': {'lights': {'cocina': True}}},
+            {'name': 'b', 'when': {'lights': {'cocina': True}},
+             'then': {'lights': {'salon': False}}},
+            {'name': 'c', 'when': {'lights': {'salon': False}},
+             'then': {'lights': {'salon': True}}},
+        ])
+
+        state.set_light_state('salon', True)
+
+        assert state.rules.stats['cycles_suppressed'] == 1
+        assert state.rules.stats['fires'] == 3
+
+    def test_storm_protection(self):
+        """Verifica el límite de disparos por cascada."""
+        state = make_state([
+            {'name': 'a', 'when': {'lights': {'salon': True}},
+             'then': {'lights': {'cocina': True}}},
+            {'name': 'b', 'when': {'lights': {'cocina': True}},
+             'then': {'lights': {'garage': True}}},
+        ])
+        state.rules.max_fires = 1
+
+        state.set_light_state('salon', True)
+
+        assert state.get_light_state('cocina') is True
+        assert state.get_light_state('garage') is False
+        assert state.rules.stats['storms_suppressed'] == 1
+
+    def test_any_light_on(self):
+        """Verifica la condición agregada any_light_on."""
+        state = make_state([{
+            'name': 'todo_apagado',
+            'when': {'any_light_on': False},
+            'then': {'alarm': True},
+        }])
+        state.set_light_state('garage', True)
+        state.set_light_state('garage', False)
+        assert state.get_alarm_status() is True
+
+    def test_invalid_rule(self):
+        """Verifica errores de validación de reglas."""
+        with pytest.raises(ValueError):
+            make_state([{'name': 'r', 'when': {'lights': {'x': True}},
+                         'then': {'alarm': True}}])
+        with pytest.raises(ValueError):
+            make_state([{'name': 'r', 'when': {'alarm': True},
+                         'then': {'scene': 'inexistente'}}])
@@ -0,0 +1,91 @@
+"""Tests para el motor de escenas (scenes.py)."""
+
+import pytest
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.state import HomeState
+
+
+class TestScenes:
+    """Tests para la compilación y activación de escenas."""
+
+    @pytest.fixture
+    def config(self):
+        """Crea una configuración con grupos y escenas."""
+        return Config.from_data({
+            'lights': ['salon', 'cocina', 'dormitorio', 'garage'],
+            'groups': {'casa': ['salon', 'cocina', 'dormitorio']},
+            'scenes': {
+                'noche': {
+                    'lights': {'*': False, 'dormitorio': True},
+                    'alarm': True,
+                },
+                'salir': {
+                    'lights': {'casa': False},
+                    'alarm': True,
+                    'presence': [],
+                },
+                'llegar': {'presence': ['Carlos']},
+            },
+        })
+
+    @pytest.fixture
+    def state(self, config):
+        """Crea una instancia de HomeState para tests."""
+        return HomeState(config)
+
+    def test_compile_overrides_in_order(self, config):
+        """Verifica que las entradas posteriores sobrescriben a las anteriores."""
+        noche = config.scenes['noche']
+        assert noche.lights_on == ('dormitorio',)
+        assert set(noche.lights_off) == {'salon', 'cocina', 'garage'}
+
+    def test_compile_group_target(self, config):
+        """Verifica que una ruta de grupo se expande a sus luces."""
+        assert config.scenes['salir'].lights_off == (
+            'salon', 'cocina', 'dormitorio')
+
+    def test_compile_unknown_target(self):
+        """Verifica error con una clave que no selecciona luces."""
+        with pytest.raises(ValueError):
+            Config.from_data({
+                'lights': ['salon'],
+                'scenes': {'x': {'lights': {'inexistente': True}}},
+            })
+
+    def test_activate_applies_minimal_diff(self, state):
+        """Verifica que solo se aplican las entradas que cambian."""
+        state.set_light_state('salon', True)
+        version = state.version
+
+        changes = state.activate_scene('noche')
+
+        assert changes['lights_on'] == ['dormitorio']
+        assert changes['lights_off'] == ['salon']
+        assert changes['alarm_changed'] is True
+        assert changes['presence_changed'] is False
+        assert state.version == version + 1
+        assert state.list_lights_on() == ['dormitorio']
+        assert state.get_alarm_status() is True
+
+    def test_activate_twice_is_noop(self, state):
+        """Verifica que reactivar una escena no produce cambios."""
+        state.activate_scene('noche')
+        version = state.version
+
+        changes = state.activate_scene('noche')
+
+        assert changes['lights_on'] == [] and changes['lights_off'] == []
+        assert changes['alarm_changed'] is False
+        assert state.version == version
+
+    def test_activate_presence(self, state):
+        """Verifica escenas que modifican la presencia."""
+        state.activate_scene('llegar')
+        assert state.get_presence() == {
+            'present': True, 'known_people': ['Carlos']}
+        state.activate_scene('salir')
+        assert state.get_presence()['present'] is False
+
+    def test_activate_unknown(self, state):
+        """Verifica activar escena inexistente."""
+        assert state.activate_scene('inexistente') is None
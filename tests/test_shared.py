@@ -0,0 +1,181 @@
+"""Tests para el estado en memoria compartida (shared.py)."""
+
+import json
+import threading
+import time
+import pytest
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.mcp_stdio import MCPStdioServer
+from mcp_home_simulator.shared import (
+    ReaderPool, SharedHomeState, SharedStateMirror, _SEQUENCE)
+from mcp_home_simulator.state import HomeState
+
+
+LIGHTS = ['salon', 'cocina', 'dormitorio']
+
+
+class TestSharedHomeState:
+    """Tests para la clase SharedHomeState."""
+
+    @pytest.fixture
+    def shared(self):
+        """Crea un segmento compartido."""
+        shared = SharedHomeState(LIGHTS)
+        yield shared
+        shared.close()
+
+    def test_write_and_attach(self, shared):
+        """Verifica que otro lector ve las escrituras del segmento."""
+        shared.write({'cocina': True, 'desconocida': True}, alarm=True)
+        reader = SharedHomeState(LIGHTS, shared.name, create=False)
+        try:
+            assert reader.lights_on() == ['cocina']
+            assert reader.alarm_armed() is True
+            assert reader.version == 1
+            shared.write({'cocina': False, 'salon': True})
+            assert reader.execute_tool('list_lights_on') == {'on': ['salon']}
+            assert reader.execute_tool('get_alarm_status') == {'armed': True}
+        finally:
+            reader.close()
+
+    def test_attach_mismatch(self, shared):
+        """Verifica el error al abrir el segmento con otras luces."""
+        with pytest.raises(ValueError):
+            SharedHomeState(['salon'], shared.name, create=False)
+
+    def test_seqlock_waits_for_writer(self, shared):
+        """Verifica que el lector espera mientras hay una escritura en curso."""
+        shared.write(alarm=True)
+        _SEQUENCE.pack_into(shared._buf, 0, 3)
+        result = []
+        reader = threading.Thread(target=lambda: result.append(shared.alarm_armed()))
+        reader.start()
+        time.sleep(0.02)
+        assert not result
+        _SEQUENCE.pack_into(shared._buf, 0, 4)
+        reader.join(timeout=5)
+        assert result == [True]
+
+    def test_mirror(self, shared):
+        """Verifica la réplica de las mutaciones de HomeState."""
+        state = HomeState(Config.from_data({'lights': LIGHTS}))
+        state.set_light_state('dormitorio', True)
+        mirror = SharedStateMirror(state, shared)
+        assert shared.lights_on() == ['dormitorio']
+
+        state.set_light_state('salon', True)
+        state.set_alarm_state(True)
+        assert shared.lights_on() == ['salon', 'dormitorio']
+        assert shared.alarm_armed() is True
+
+        mirror.close()
+        state.set_alarm_state(False)
+        assert shared.alarm_armed() is True
+
+
+class TestReaderPool:
+    """Tests de los procesos lectores."""
+
+    def test_pool(self):
+        """Verifica lecturas desde procesos y el rechazo con la cola llena."""
+        shared = SharedHomeState(LIGHTS)
+        shared.write({'salon': True}, alarm=False)
+        replies = []
+        pool = ReaderPool(shared, workers=2, emit=replies.append, capacity=16)
+        pool.start()
+        try:
+            for msg_id in range(6):
+                tool = 'list_lights_on' if msg_id % 2 else 'get_alarm_status'
+                assert pool.submit(msg_id, tool, 'json')
+            assert pool.submit('vencida', 'get_alarm_status', 'json', deadline=0.0)
+            assert pool.stats()['forwarded'] == 7
+        finally:
+            pool.stop()
+            shared.close()
+
+        by_id = {reply['id']: reply for reply in map(json.loads, replies)}
+        assert by_id[0]['result'] == {'armed': False}
+        assert by_id[1]['result'] == {'on': ['salon']}
+        assert by_id['vencida']['code'] == 'deadline'
+
+    def test_drain(self):
+        """Verifica que drain() espera a que se entreguen todas las respuestas."""
+        shared = SharedHomeState(LIGHTS)
+        replies = []
+        pool = ReaderPool(shared, workers=1, emit=replies.append, capacity=16)
+        pool.start()
+        try:
+            for msg_id in range(10):
+                assert pool.submit(msg_id, 'list_lights_on', 'json')
+            pool.drain()
+            assert len(replies) == 10
+        finally:
+            pool.stop()
+            shared.close()
+
+    def test_invalid_workers(self):
+        """Verifica el error con un número de procesos no positivo."""
+        with pytest.raises(ValueError):
+            ReaderPool(None, workers=0, emit=print)
+
+
+class TestServerWorkers:
+    """Tests del servidor con procesos lectores."""
+
+    @pytest.fixture
+    def server(self, monkeypatch):
+        """Crea un servidor con dos procesos lectores."""
+
+        def mock_config_init(self, config_path="config.yaml"):
+            self.config_path = config_path
+            self.data = {
+                'lights': LIGHTS,
+                'alarm_default': False,
+                'presence_default': {'present': False, 'known_people': []},
+            }
+
+        monkeypatch.setattr(Config, '__init__', mock_config_init)
+        return MCPStdioServer(workers=2)
+
+    def test_reads_from_workers(self, server, capsys):
+        """Verifica que las lecturas se responden desde los procesos lectores."""
+        server.start_pipeline()
+        try:
+            server.state.set_light_state('cocina', True)
+            server.process_message(json.dumps(
+                {'type': 'call', 'id': 1, 'tool': 'list_lights_on', 'args': {}}))
+            server.process_message(json.dumps(
+                {'type': 'call', 'id': 2, 'tool': 'get_all_states', 'args': {}}))
+            metrics = server.queue_metrics()
+        finally:
+            server.stop_pipeline()
+
+        replies = {reply['id']: reply for reply in
+                   map(json.loads, capsys.readouterr().out.splitlines())}
+        assert replies[1]['result'] == {'on': ['cocina']}
+        assert replies[2]['result']['lights']['cocina'] is True
+        assert metrics['readers']['forwarded'] == 1
+        assert server.readers is None
+
+    def test_read_your_writes(self, server, capsys):
+        """Verifica que una lectura ve las escrituras enviadas antes por el cliente."""
+        server.start_pipeline()
+        try:
+            for i, name in enumerate(LIGHTS):
+                server.process_message(json.dumps(
+                    {'type': 'call', 'id': f'w{i}', 'tool': 'set_light_state',
+                     'args': {'name': name, 'on': True}}))
+                server.process_message(json.dumps(
+                    {'type': 'call', 'id': f'r{i}', 'tool': 'list_lights_on', 'args': {}}))
+        finally:
+            server.stop_pipeline()
+
+        replies = {reply['id']: reply for reply in
+                   map(json.loads, capsys.readouterr().out.splitlines())}
+        for i in range(len(LIGHTS)):
+            assert set(LIGHTS[:i + 1]) <= set(replies[f'r{i}']['result']['on'])
+
+    def test_invalid_workers(self):
+        """Verifica el error con un número de procesos negativo."""
+        with pytest.raises(ValueError):
+            MCPStdioServer(workers=-1)
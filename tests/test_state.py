@@ -81,6 +81,106 @@ class TestHomeState:
             'dormitorio': False
         }
 
+    def test_select_lights_by_names(self, state):
+        """Verifica selección por lista explícita."""
+        assert state.select_lights(names=['cocina', 'salon']) == [
+            'cocina', 'salon']
+
+    def test_select_lights_unknown_name(self, state):
+        """Verifica error al seleccionar luz inexistente."""
+        with pytest.raises(ValueError):
+            state.select_lights(names=['salon', 'inexistente'])
+
+    def test_select_lights_by_pattern(self, state):
+        """Verifica selección por glob y por '*'."""
+        assert state.select_lights(pattern='*o*') == [
+            'salon', 'cocina', 'dormitorio']
+        assert state.select_lights(pattern='*') == [
+            'salon', 'cocina', 'dormitorio']
+        assert state.select_lights(pattern='s*') == ['salon']
+
+    def test_select_lights_by_regex(self, state):
+        """Verifica selección por regex."""
+        assert state.select_lights(regex='^(salon|cocina)$') == [
+            'salon', 'cocina']
+
+    def test_select_lights_invalid(self, state):
+        """Verifica errores de selector inválido."""
+        with pytest.raises(ValueError):
+            state.select_lights()
+        with pytest.raises(ValueError):
+            state.select_lights(pattern='*', regex='.*')
+        with pytest.raises(ValueError):
+            state.select_lights(regex='(')
+
+    def test_set_lights_state_bumps_version_once(self, state):
+        """Verifica que un cambio múltiple incrementa la versión una vez."""
+        state.set_light_state('salon', True)
+        version = state.version
+        changed = state.set_lights_state(['salon', 'cocina', 'dormitorio'], True)
+        assert changed == ['cocina', 'dormitorio']
+        assert state.version == version + 1
+        assert state.set_lights_state(['salon'], True) == []
+        assert state.version == version + 1
+
+    # ==================== Tests de Grupos ====================
+
+    @pytest.fixture
+    def grouped_state(self):
+        """Crea un estado con jerarquía de grupos."""
+        config = Config.__new__(Config)
+        config.data = {
+            'lights': ['salon', 'cocina', 'dormitorio', 'garage'],
+            'groups': {
+                'casa': {
+                    'planta1': {'salon': ['salon'], 'cocina': ['cocina']},
+                    'planta2': ['dormitorio'],
+                },
+                'exterior': ['garage'],
+            },
+            'alarm_default': False,
+            'presence_default': {'present': False, 'known_people': []}
+        }
+        return HomeState(config)
+
+    def test_group_index(self, grouped_state):
+        """Verifica el índice de pertenencia de la jerarquía."""
+        assert grouped_state.get_group_lights('casa') == (
+            'salon', 'cocina', 'dormitorio')
+        assert grouped_state.get_group_lights('casa/planta1') == (
+            'salon', 'cocina')
+        assert grouped_state.get_group_lights('casa/planta1/cocina') == (
+            'cocina',)
+        assert grouped_state.get_group_lights('inexistente') is None
+
+    def test_group_counts_incremental(self, grouped_state):
+        """Verifica que los contadores siguen los cambios de luces."""
+        grouped_state.set_light_state('salon', True)
+        grouped_state.set_lights_state(['cocina', 'garage'], True)
+        assert grouped_state.get_group_counts('casa') == {
+            'total': 3, 'on': 2, 'off': 1}
+        assert grouped_state.get_group_counts('exterior')['on'] == 1
+        grouped_state.set_light_state('salon', False)
+        assert grouped_state.get_group_counts('casa/planta1')['on'] == 1
+
+    def test_set_group_state(self, grouped_state):
+        """Verifica encender y apagar un grupo completo."""
+        assert grouped_state.set_group_state('casa/planta1', True) == [
+            'salon', 'cocina']
+        assert grouped_state.set_group_state('casa/planta1', True) == []
+        assert grouped_state.get_light_state('dormitorio') is False
+        assert grouped_state.set_group_state('inexistente', True) is None
+
+    def test_group_unknown_light(self):
+        """Verifica error si un grupo referencia una luz inexistente."""
+        config = Config.__new__(Config)
+        config.data = {
+            'lights': ['salon'],
+            'groups': {'casa': ['salon', 'cocina']},
+        }
+        with pytest.raises(ValueError):
+            config.group_index
+
     # ==================== Tests de Alarma ====================
 
     def test_initial_alarm_state(self, state):
@@ -0,0 +1,130 @@
+"""Tests para el registro columnar de cambios (timeseries.py)."""
+
+import random
+
+import pytest
+from mcp_home_simulator.config import Config
+from mcp_home_simulator.state import HomeState
+from mcp_home_simulator.tools import MCPTools
+
+
+def make_state(lights, chunk_size=4, checkpoint_every=2):
+    """Crea un estado con chunks pequeños para forzar sellado y checkpoints."""
+    return HomeState(Config.from_data({
+        'lights': lights,
+        'history': {'chunk_size': chunk_size,
+                    'checkpoint_every': checkpoint_every},
+    }))
+
+
+class TestChangeLog:
+    """Tests para la clase ChangeLog."""
+
+    @pytest.fixture
+    def state(self):
+        """Crea un estado con cambios a lo largo de 10 segundos simulados."""
+        state = make_state(['salon', 'cocina', 'garage'])
+        for t in range(10):
+            state.set_light_state('salon', t % 2 == 0)
+            if t == 3:
+                state.set_alarm_state(True)
+            if t == 5:
+                state.set_presence(['Carlos'])
+            state.clock.advance(1)
+        return state
+
+    def test_state_at(self, state):
+        """Verifica la reconstrucción del estado en instantes pasados."""
+        log = state.changes
+        assert log.stats()['chunks'] >= 2
+
+        at_0 = log.get_state_at(0)
+        assert at_0['lights'] == {'salon': True, 'cocina': False, 'garage': False}
+        assert at_0['alarm'] is False
+
+        at_4 = log.get_state_at(4.5)
+        assert at_4['lights']['salon'] is True
+        assert at_4['alarm'] is True
+        assert at_4['presence'] == {'present': False, 'known_people': []}
+
+        at_9 = log.get_state_at(100)
+        assert at_9['lights']['salon'] is False
+        assert at_9['presence'] == {'present': True, 'known_people': ['Carlos']}
+
+    def test_state_before_origin(self, state):
+        """Verifica que antes del primer cambio se devuelve el estado inicial."""
+        assert state.changes.get_state_at(-1)['lights']['salon'] is False
+
+    def test_changes_range_and_filter(self, state):
+        """Verifica la consulta de cambios por rango y patrón de entidad."""
+        result = state.changes.get_changes(2, 5)
+        assert [(c['time'], c['entity']) for c in result['changes']] == [
+            (2, 'light:salon'), (3, 'light:salon'), (3, 'alarm'),
+            (4, 'light:salon'), (5, 'light:salon'), (5, 'presence')]
+        assert result['truncated'] is False
+
+        alarm = state.changes.get_changes(0, 10, entity_filter='alarm')
+        assert alarm['changes'] == [{'time': 3, 'entity': 'alarm', 'value': True}]
+
+        limited = state.changes.get_changes(0, 10, limit=3)
+        assert len(limited['changes']) == 3
+        assert limited['truncated'] is True
+
+    def test_invalid_range(self, state):
+        """Verifica que un rango invertido se rechaza."""
+        with pytest.raises(ValueError):
+            state.changes.get_changes(5, 1)
+
+    def test_matches_replay(self):
+        """Verifica get_state_at contra una reproducción ingenua del estado."""
+        rng = random.Random(7)
+        names = [f"luz_{i}" for i in range(20)]
+        state = make_state(names, chunk_size=16, checkpoint_every=3)
+        snapshots = {0.0: dict(state.lights)}
+        for step in range(1, 300):
+            state.set_lights_state(rng.sample(names, rng.randint(1, 5)),
+                                   rng.random() < 0.5)
+            snapshots[state.clock.now] = dict(state.lights)
+            state.clock.advance(rng.choice([0, 0.5, 1]))
+
+        for time, lights in snapshots.items():
+            assert state.changes.get_state_at(time)['lights'] == lights
+
+    def test_compression(self):
+        """Verifica que los chunks sellados ocupan menos que las columnas crudas."""
+        state = make_state(['a', 'b'], chunk_size=1024)
+        for _ in range(4096):
+            state.set_light_state('a', not state.lights['a'])
+            state.clock.advance(1)
+
+        stats = state.changes.stats()
+        assert stats['rows'] == 4096
+        assert stats['chunks'] == 4
+        assert stats['compressed_bytes'] < stats['raw_bytes']
+
+    def test_disabled(self):
+        """Verifica que el registro se puede desactivar."""
+        state = HomeState(Config.from_data({
+            'lights': ['salon'], 'history': {'changes': False}}))
+        assert state.changes is None
+        result = MCPTools(state).execute_tool('get_state_at', {'time': 0})
+        assert result['ok'] is False
+
+
+class TestChangeLogTools:
+    """Tests para las tools get_state_at y get_changes."""
+
+    def test_tools(self):
+        """Verifica las tools sobre un estado con cambios."""
+        state = make_state(['salon', 'garage'])
+        tools = MCPTools(state)
+        tools.execute_tool('set_light_state', {'name': 'garage', 'on': True})
+        state.clock.advance(10)
+        tools.execute_tool('set_light_state', {'name': 'garage', 'on': False})
+
+        assert tools.execute_tool('get_state_at', {'time': 5})['lights'] == {
+            'salon': False, 'garage': True}
+        changes = tools.execute_tool('get_changes',
+                                     {'from': 0, 'entity': 'light:gar*'})
+        assert [c['value'] for c in changes['changes']] == [True, False]
+        assert tools.execute_tool('get_changes', {})['ok'] is False